@@ -0,0 +1,67 @@
+"""
+Benchmark single-pass access-log ingest throughput.
+
+Usage:
+    python benchmarks/bench_access_log.py [--lines 2000000] [--streams 50] [--vods 500]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from jitsi_plus_plugin.core import access_log
+from jitsi_plus_plugin.core.access_log import AccessLogAnalytics
+
+
+def write_log(path, lines, streams, vods, batch=100000):
+    """Write a synthetic combined-format log spanning about two hours."""
+    renditions = ["1080p", "720p", "480p", "360p"]
+    rng = random.Random(42)
+    with open(path, "w") as f:
+        for offset in range(0, lines, batch):
+            chunk = []
+            for i in range(offset, min(lines, offset + batch)):
+                second = i * 7200 // lines
+                client = f"10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(256)}"
+                if i % 3:
+                    path_part = f"/hls/1700000000-stream-{rng.randrange(streams)}_{rng.choice(renditions)}/{i % 1000}.ts"
+                else:
+                    path_part = f"/hls/vod/vod-{rng.randrange(vods):06d}/{i % 1000:05d}.ts"
+                chunk.append(
+                    f'{client} - - [19/Oct/2026:{10 + second // 3600:02d}:{second // 60 % 60:02d}:{second % 60:02d} '
+                    f'+0000] "GET {path_part} HTTP/1.1" 200 {rng.randrange(200000, 2000000)} '
+                    f'"-" "Mozilla/5.0 (Player)"\n'
+                )
+            f.write("".join(chunk))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Access-log ingest benchmark")
+    parser.add_argument("--lines", type=int, default=2000000, help="Number of log lines")
+    parser.add_argument("--streams", type=int, default=50, help="Number of live streams")
+    parser.add_argument("--vods", type=int, default=500, help="Number of VODs")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        path = os.path.join(work_dir, "access.log")
+        write_log(path, args.lines, args.streams, args.vods)
+        size = os.path.getsize(path)
+
+        analytics = AccessLogAnalytics()
+        started_at = time.time()
+        analytics.ingest_file(path)
+        elapsed = time.time() - started_at
+
+    backend = "numpy" if access_log.np is not None else "lists"
+    print(f"lines={analytics.lines_parsed} size={size / 1e6:.0f}MB backend={backend}")
+    print(f"  ingest: {elapsed:.2f}s  {size / 1e6 / elapsed:.1f}MB/s  {analytics.lines_parsed / elapsed:,.0f} lines/s")
+    print(f"  series: {len(analytics.series)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Backtest scaling policies on a demand trace.
+
+Usage:
+    python benchmarks/bench_autoscaler.py [--days 3] [--trace demand.csv] [--provision-delay 300]
+
+The synthetic trace is a daily cycle of participants with noise and a
+scheduled-event spike each afternoon; a CSV trace has one demand value per
+tick in a "demand" column. Each policy is replayed with servers taking the
+provisioning delay to boot, and the table shows cost (server-hours), load
+that exceeded ready capacity, and how many scale events were issued.
+"""
+
+import argparse
+import csv
+import math
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from jitsi_plus_plugin.utils.autoscaler import backtest
+
+POLICIES = {
+    # Per-tick threshold with no cooldown or step limit, like the old monitor loop
+    "reactive": {"forecast_enabled": False, "scale_up_cooldown": 0, "scale_down_cooldown": 0,
+                 "max_step_up": 1000, "max_step_down": 1000, "scale_down_window": 0},
+    "hysteresis": {"forecast_enabled": False},
+    "holt": {"lead_time": 600},
+    "holt_winters": {"lead_time": 600, "season_length": None},
+}
+
+
+def synthetic_demand(days, tick, seed=3):
+    """Participants per tick over whole days."""
+    rng = random.Random(seed)
+    demand = []
+    for i in range(int(days * 86400 / tick)):
+        hour = (i * tick / 3600) % 24
+        base = 2000 + 18000 * max(0.0, math.sin(math.pi * (hour - 7) / 14))
+        event = 15000 if 15 <= hour < 16.5 else 0
+        # Event attendees join over ten minutes before the start
+        if 14.83 <= hour < 15:
+            event = 15000 * (hour - 14.83) / 0.17
+        demand.append(max(0.0, base + event + rng.gauss(0, 500)))
+    return demand
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scaling policy backtest")
+    parser.add_argument("--days", type=float, default=3, help="Synthetic trace length")
+    parser.add_argument("--trace", help="CSV trace with a demand column, one row per tick")
+    parser.add_argument("--tick", type=int, default=30, help="Seconds per tick")
+    parser.add_argument("--capacity", type=int, default=500, help="Participants per server")
+    parser.add_argument("--provision-delay", type=float, default=300, help="Seconds for a server to boot")
+    args = parser.parse_args()
+
+    if args.trace:
+        with open(args.trace, newline="") as f:
+            demand = [float(row["demand"]) for row in csv.DictReader(f)]
+    else:
+        demand = synthetic_demand(args.days, args.tick)
+
+    print(f"ticks={len(demand)} tick={args.tick}s capacity={args.capacity} provision_delay={args.provision_delay:.0f}s")
+    for name, policy in POLICIES.items():
+        config = dict(policy, tick_seconds=args.tick)
+        if "season_length" in config:
+            config["season_length"] = int(86400 / args.tick)
+        result = backtest(config, demand, args.capacity, initial_servers=10, provision_delay=args.provision_delay)
+        print(f"  {name:<13} server-hours {result['server_hours']:8.0f}  peak {result['peak_servers']:4d}  "
+              f"overloaded ticks {result['overloaded_ticks']:5d}  "
+              f"unserved {result['unserved_load_seconds'] / 3600:8.0f} participant-hours  "
+              f"scale ups {result['scale_ups']:5d}  downs {result['scale_downs']:5d}")
+
+
+if __name__ == "__main__":
+    main()
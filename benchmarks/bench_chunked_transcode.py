@@ -0,0 +1,74 @@
+"""
+Benchmark wall-clock speedup of the chunked transcoder against core count.
+
+Usage:
+    python benchmarks/bench_chunked_transcode.py [--input sample.mp4] [--duration 300]
+
+Without --input a synthetic 720p sample is generated with FFmpeg's test
+sources. The single-process baseline is one plain FFmpeg invocation with the
+same encoder settings.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from jitsi_plus_plugin.core.transcoder import ChunkedTranscoder, DEFAULT_AUDIO_ARGS, DEFAULT_VIDEO_ARGS
+
+
+def generate_sample(path, duration):
+    """Generate a synthetic sample with a 2 s GOP and a sine audio track."""
+    subprocess.run([
+        "ffmpeg", "-y", "-v", "error",
+        "-f", "lavfi", "-i", f"testsrc2=size=1280x720:rate=30:duration={duration}",
+        "-f", "lavfi", "-i", f"sine=frequency=440:duration={duration}",
+        "-c:v", "libx264", "-preset", "ultrafast", "-g", "60",
+        "-c:a", "aac", "-shortest", path
+    ], check=True)
+
+
+def baseline(input_path, output_path):
+    """Transcode with a single FFmpeg process."""
+    started_at = time.time()
+    subprocess.run(
+        ["ffmpeg", "-y", "-v", "error", "-i", input_path, *DEFAULT_VIDEO_ARGS, *DEFAULT_AUDIO_ARGS, output_path],
+        check=True
+    )
+    return time.time() - started_at
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chunked transcoder benchmark")
+    parser.add_argument("--input", help="Input media file (generated if omitted)")
+    parser.add_argument("--duration", type=int, default=300, help="Duration of the generated sample in seconds")
+    parser.add_argument("--workers", type=int, nargs="+", help="Worker counts to test")
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    worker_counts = args.workers or sorted({1, 2, 4, 8, 16, cores} & set(range(1, cores + 1)))
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        input_path = args.input
+        if not input_path:
+            input_path = os.path.join(work_dir, "sample.mp4")
+            print(f"Generating {args.duration}s sample...")
+            generate_sample(input_path, args.duration)
+
+        baseline_time = baseline(input_path, os.path.join(work_dir, "baseline.mp4"))
+        print(f"{'workers':>8} {'chunks':>7} {'seconds':>9} {'speedup':>8}")
+        print(f"{'single':>8} {1:>7} {baseline_time:>9.2f} {1.0:>8.2f}")
+
+        for workers in worker_counts:
+            transcoder = ChunkedTranscoder({"workers": workers, "min_chunk_duration": 10, "work_directory": work_dir})
+            result = transcoder.transcode(input_path, os.path.join(work_dir, f"chunked-{workers}.mp4"))
+            print(f"{workers:>8} {result['chunks']:>7} {result['elapsed']:>9.2f} "
+                  f"{baseline_time / result['elapsed']:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Measure import time of the jitsi-plus CLI entry point.
+
+Usage:
+    python benchmarks/bench_import_time.py [--runs 10] [--budget-ms 50]
+
+Runs ``python -X importtime -c "import jitsi_plus_plugin.cli"`` in fresh
+interpreters and reports the median cumulative import time. Exits non-zero
+if the median exceeds the budget or if importing the CLI pulls in heavy
+modules that should only load on first use.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+ENTRY_MODULE = "jitsi_plus_plugin.cli"
+HEAVY_MODULES = ["requests", "websockets", "asyncio", "subprocess", "sqlite3"]
+
+
+def measure():
+    """Import the CLI once and return its cumulative time (us) and imported modules."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {ENTRY_MODULE}"],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+
+    cumulative = None
+    imported = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative_us, name = line.split("|")
+        name = name.strip()
+        imported.add(name)
+        if name == ENTRY_MODULE:
+            cumulative = int(cumulative_us)
+
+    return cumulative, imported
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CLI import-time benchmark")
+    parser.add_argument("--runs", type=int, default=10, help="Number of fresh interpreters")
+    parser.add_argument("--budget-ms", type=float, default=50, help="Maximum median import time")
+    args = parser.parse_args()
+
+    timings = []
+    imported = set()
+    for _ in range(args.runs):
+        cumulative, modules = measure()
+        timings.append(cumulative / 1000)
+        imported |= modules
+
+    median = statistics.median(timings)
+    heavy = [name for name in HEAVY_MODULES if name in imported]
+
+    print(f"import {ENTRY_MODULE}: median {median:.1f} ms, min {min(timings):.1f} ms over {args.runs} runs")
+    print(f"  heavy modules imported: {', '.join(heavy) or 'none'}")
+
+    if median > args.budget_ms or heavy:
+        print(f"FAIL: budget is {args.budget_ms:.0f} ms with no heavy modules")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
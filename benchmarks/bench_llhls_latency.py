@@ -0,0 +1,134 @@
+"""
+Measure LL-HLS latency with a synthetic live source.
+
+Usage:
+    python benchmarks/bench_llhls_latency.py [--seconds 30] [--part 0.5] [--segment 2]
+
+An FFmpeg test pattern is encoded in real time (-re) and sent over local UDP
+to the LL-HLS packager, which is served by the built-in origin. A client
+follows the playlist with blocking reloads, as an LL-HLS player does, and
+records when each part becomes visible. Part latency is the time from the
+moment the part's last frame was produced to the moment the client saw it.
+The encoder start time is taken as the stream's time zero, so encoder
+startup is included and the figures are an upper bound.
+
+Estimated glass-to-glass latency adds the player's PART-HOLD-BACK (three
+part durations) to the part latency; the same estimate for standard HLS
+is three segments of buffer plus one segment of packaging.
+
+Requires ffmpeg with libx264 on the PATH.
+"""
+
+import argparse
+import http.client
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from jitsi_plus_plugin.core.llhls import LowLatencyHlsPackager
+from jitsi_plus_plugin.core.media_server import MediaServer
+
+PART_LINE = re.compile(r'#EXT-X-PART:DURATION=([\d.]+),URI="[^"]*part_(\d+)\.ts"')
+MEDIA_SEQUENCE = re.compile(r"#EXT-X-MEDIA-SEQUENCE:(\d+)")
+
+
+def start_source(port, segment):
+    """Encode a real-time test pattern to local UDP with a keyframe per segment."""
+    fps = 30
+    return subprocess.Popen([
+        "ffmpeg", "-loglevel", "error", "-re",
+        "-f", "lavfi", "-i", f"testsrc2=size=1280x720:rate={fps}",
+        "-c:v", "libx264", "-preset", "veryfast", "-tune", "zerolatency",
+        "-g", str(int(fps * segment)), "-keyint_min", str(int(fps * segment)), "-sc_threshold", "0",
+        "-f", "mpegts", f"udp://127.0.0.1:{port}?pkt_size=1316"
+    ])
+
+
+def follow(port, seconds, started_at, seen):
+    """Follow the playlist with blocking reloads, recording when each part appears."""
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    msn, part = None, None
+    media_time = {}
+    deadline = time.time() + seconds
+
+    while time.time() < deadline:
+        path = "/llhls/bench.m3u8"
+        if msn is not None:
+            path += f"?_HLS_msn={msn}&_HLS_part={part}"
+        conn.request("GET", path)
+        response = conn.getresponse()
+        body = response.read().decode()
+        now = time.time()
+        if response.status != 200:
+            time.sleep(0.05)
+            continue
+
+        # Parts are numbered in stream order, so their media end time is a running sum
+        sequence = int(MEDIA_SEQUENCE.search(body).group(1))
+        parts = [(int(number), float(duration)) for duration, number in PART_LINE.findall(body)]
+        for number, duration in parts:
+            if number not in media_time:
+                media_time[number] = media_time.get(number - 1, 0.0) + duration
+            if number not in seen:
+                seen[number] = now - (started_at + media_time[number])
+
+        # Ask for the part after the last one listed
+        segments = body.count("#EXTINF")
+        open_parts = body.split("#EXTINF")[-1].count("#EXT-X-PART:")
+        msn, part = sequence + segments, open_parts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LL-HLS latency harness")
+    parser.add_argument("--seconds", type=float, default=30, help="Measurement duration")
+    parser.add_argument("--part", type=float, default=0.5, help="Part duration in seconds")
+    parser.add_argument("--segment", type=float, default=2, help="Segment duration in seconds")
+    parser.add_argument("--udp-port", type=int, default=23000, help="Local UDP port for the source")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        media_server = MediaServer({"recording_directory": work_dir})
+        packager = LowLatencyHlsPackager("bench", os.path.join(work_dir, "bench_ll"), {
+            "part_duration": args.part,
+            "segment_duration": args.segment
+        })
+        media_server.llhls_packagers["bench"] = packager
+        media_server.start_origin("127.0.0.1", 0)
+
+        packager.start(f"udp://127.0.0.1:{args.udp_port}?fifo_size=1000000&overrun_nonfatal=1")
+        started_at = time.time()
+        source = start_source(args.udp_port, args.segment)
+
+        seen = {}
+        client = threading.Thread(target=follow, args=(media_server.origin.port, args.seconds, started_at, seen))
+        client.daemon = True
+        client.start()
+        client.join(args.seconds + 30)
+
+        source.terminate()
+        source.wait(timeout=5)
+        packager.stop()
+        media_server.shutdown()
+
+    latencies = sorted(seen.values())
+    if not latencies:
+        print("No parts were received; check that ffmpeg with libx264 is installed.")
+        return
+
+    p50 = statistics.median(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1] if len(latencies) >= 20 else latencies[-1]
+    print(f"part={args.part}s segment={args.segment}s parts={len(latencies)}")
+    print(f"  part latency p50: {p50:.2f}s  p95: {p95:.2f}s")
+    print(f"  estimated glass-to-glass, LL-HLS: {p50 + 3 * args.part:.2f}s")
+    print(f"  estimated glass-to-glass, standard HLS with 4s segments: {4 * 3 + 4:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Compare fleet sizes needed by each placement policy on an allocation trace.
+
+Usage:
+    python benchmarks/bench_placement.py [--hours 24] [--trace rooms.csv]
+
+The trace is either synthetic (Poisson room arrivals with a daytime peak,
+heavy-tailed room sizes and log-normal durations) or a CSV file with
+start,duration,participants columns in seconds. For each policy the trace is
+replayed against a large fleet of bridges and the number of bridges hosting
+at least one room is sampled at every event; savings are relative to
+least-loaded. A scheduled-event spike is also placed in arrival order and as
+one decreasing batch.
+"""
+
+import argparse
+import csv
+import heapq
+import logging
+import math
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from jitsi_plus_plugin.utils.placement import PLACEMENT_POLICIES
+from jitsi_plus_plugin.utils.scaling import ScalingManager
+
+
+def synthetic_trace(hours, peak_rate, seed=11):
+    """Generate (start, duration, participants) rooms."""
+    rng = random.Random(seed)
+    rooms = []
+    now = 0.0
+    while now < hours * 3600:
+        # Arrival rate follows the time of day, peaking mid-afternoon
+        rate = peak_rate * (0.15 + 0.85 * max(0.0, math.sin(math.pi * ((now / 3600) % 24 - 6) / 12)))
+        now += rng.expovariate(max(rate, peak_rate * 0.15))
+        participants = min(300, int(rng.paretovariate(1.6) * 3))
+        duration = rng.lognormvariate(math.log(40 * 60), 0.6)
+        rooms.append((now, duration, participants))
+    return rooms
+
+
+def load_trace(path):
+    """Read rooms from a CSV file."""
+    with open(path, newline="") as f:
+        return sorted(
+            (float(row["start"]), float(row["duration"]), int(row["participants"]))
+            for row in csv.DictReader(f)
+        )
+
+
+def build(policy, servers, capacity):
+    """Create a manager with an idle fleet."""
+    manager = ScalingManager({"auto_scaling": False, "placement": {"jitsi": policy}})
+    for i in range(servers):
+        manager.add_jitsi_server({"id": f"jvb-{i}", "capacity": capacity})
+    return manager
+
+
+def replay(policy, trace, servers, capacity):
+    """Replay a trace and return (mean, peak) bridges in use and rejected rooms."""
+    manager = build(policy, servers, capacity)
+    in_use = {}
+    ends = []
+    weighted, peak, rejected, last = 0.0, 0, 0, trace[0][0]
+
+    def sample(at):
+        nonlocal weighted, last
+        weighted += len(in_use) * (at - last)
+        last = at
+
+    for i, (start, duration, participants) in enumerate(trace):
+        while ends and ends[0][0] <= start:
+            end, room_id = heapq.heappop(ends)
+            sample(end)
+            server_id = manager.room_allocations[room_id]["server_id"]
+            manager.deallocate_server(room_id)
+            in_use[server_id] -= 1
+            if not in_use[server_id]:
+                del in_use[server_id]
+
+        sample(start)
+        server = manager.allocate_jitsi_server(f"room-{i}", participants)
+        if server is None:
+            rejected += 1
+            continue
+        in_use[server["id"]] = in_use.get(server["id"], 0) + 1
+        peak = max(peak, len(in_use))
+        heapq.heappush(ends, (start + duration, f"room-{i}"))
+
+    return weighted / max(last - trace[0][0], 1e-9), peak, rejected
+
+
+def spike(policy, rooms, servers, capacity, batch):
+    """Place a burst of rooms and return the bridges used."""
+    manager = build(policy, servers, capacity)
+    if batch:
+        manager.allocate_jitsi_servers({f"room-{i}": size for i, size in enumerate(rooms)})
+    else:
+        for i, size in enumerate(rooms):
+            manager.allocate_jitsi_server(f"room-{i}", size)
+    return sum(1 for server in manager.jitsi_servers if server["current_load"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Placement policy fleet-size comparison")
+    parser.add_argument("--hours", type=float, default=24, help="Synthetic trace length")
+    parser.add_argument("--peak-rate", type=float, default=1.5, help="Peak room arrivals per second")
+    parser.add_argument("--trace", help="CSV trace with start,duration,participants columns")
+    parser.add_argument("--servers", type=int, default=200, help="Bridges available")
+    parser.add_argument("--capacity", type=int, default=500, help="Participants per bridge")
+    parser.add_argument("--spike-rooms", type=int, default=500, help="Rooms in the scheduled-event spike")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+
+    trace = load_trace(args.trace) if args.trace else synthetic_trace(args.hours, args.peak_rate)
+    print(f"rooms={len(trace)} bridges={args.servers} capacity={args.capacity}")
+
+    results = {policy: replay(policy, trace, args.servers, args.capacity) for policy in PLACEMENT_POLICIES}
+    baseline = results["least_loaded"][0]
+    for policy, (mean, peak, rejected) in results.items():
+        print(f"  {policy:<13} mean in use {mean:7.1f}  peak {peak:5d}  "
+              f"savings {1 - mean / baseline:6.1%}  rejected {rejected}")
+
+    rng = random.Random(5)
+    # Event breakout rooms are larger and more uniform than everyday meetings
+    rooms = [rng.randint(20, 300) for _ in range(args.spike_rooms)]
+    lower_bound = math.ceil(sum(rooms) / args.capacity)
+    fleet = 2 * lower_bound
+    print(f"spike of {len(rooms)} rooms ({sum(rooms)} participants) on {fleet} bridges, "
+          f"lower bound {lower_bound} bridges")
+    for policy in PLACEMENT_POLICIES:
+        print(f"  {policy:<13} arrival order {spike(policy, rooms, fleet, args.capacity, False):5d}  "
+              f"decreasing batch {spike(policy, rooms, fleet, args.capacity, True):5d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Benchmark server selection when allocating 100k rooms across 1k servers,
+selection in a saturated pool, and idle-server cleanup with many live
+allocations.
+
+Usage:
+    python benchmarks/bench_scaling.py [--servers 1000] [--rooms 100000] [--cleanup-allocations 1000000]
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from jitsi_plus_plugin.utils.scaling import ScalingManager
+
+
+def sorted_selection(servers, demand):
+    """Select a server the way allocation did before the load index: filter and sort."""
+    available = [
+        server for server in servers
+        if server["status"] == "active" and server["current_load"] + demand <= server["capacity"]
+    ]
+    available.sort(key=lambda s: s["current_load"])
+    return available[0] if available else None
+
+
+def build(servers):
+    """Create a manager with a fleet of bridges."""
+    manager = ScalingManager({"auto_scaling": False})
+    for i in range(servers):
+        manager.add_jitsi_server({"id": f"jvb-{i}", "capacity": 10 ** 6})
+    return manager
+
+
+def run_index(manager, rooms, churn):
+    """Allocate rooms through the load index, releasing a share as they go."""
+    rng = random.Random(7)
+    live = []
+    started_at = time.perf_counter()
+    for i in range(rooms):
+        manager.allocate_jitsi_server(f"room-{i}", rng.randint(2, 50))
+        live.append(f"room-{i}")
+        if churn and i % churn == 0:
+            # Swap-remove a random live room
+            j = rng.randrange(len(live))
+            live[j], live[-1] = live[-1], live[j]
+            manager.deallocate_server(live.pop())
+    return time.perf_counter() - started_at
+
+
+def run_sorted(manager, rooms):
+    """Time the filter-and-sort selection alone on the same fleet."""
+    rng = random.Random(7)
+    started_at = time.perf_counter()
+    for _ in range(rooms):
+        demand = rng.randint(2, 50)
+        server = sorted_selection(manager.jitsi_servers, demand)
+        server["current_load"] += demand
+    return time.perf_counter() - started_at
+
+
+def run_saturated(servers, attempts):
+    """Time selections that find no room, with every server full."""
+    manager = ScalingManager({"auto_scaling": False})
+    for i in range(servers):
+        manager.add_jitsi_server({"id": f"jvb-{i}", "capacity": 100})
+        manager.allocate_jitsi_server(f"room-{i}", 100)
+
+    index = manager.jitsi_index
+    started_at = time.perf_counter()
+    for _ in range(attempts):
+        assert index.select(10) is None
+    return time.perf_counter() - started_at
+
+
+def scan_cleanup(manager):
+    """Find idle servers the way cleanup did before idle tracking: scan allocations per idle server."""
+    now = time.time()
+    idle = []
+    for server in manager.jitsi_servers:
+        if server["status"] == "active" and not server["rooms"]:
+            idle_time = now - max([
+                allocation["allocated_at"]
+                for allocation in manager.room_allocations.values()
+                if allocation["server_id"] == server["id"] and allocation["server_type"] == "jitsi"
+            ] or [server["added_at"]])
+            if idle_time > 3600 and len([s for s in manager.jitsi_servers if s["status"] == "active"]) > 1:
+                idle.append(server)
+    return idle
+
+
+def run_cleanup(servers, allocations):
+    """Time one monitor cleanup with live allocations on half the fleet and the rest idle."""
+    manager = build(servers // 2)
+    for i in range(allocations):
+        manager.allocate_jitsi_server(f"room-{i}", 1)
+    for i in range(servers // 2, servers):
+        manager.add_jitsi_server({"id": f"jvb-{i}", "capacity": 10 ** 6})
+
+    started_at = time.perf_counter()
+    scan_cleanup(manager)
+    scanned = time.perf_counter() - started_at
+
+    # Idle for over the timeout from the manager's point of view
+    manager.clock = lambda: time.time() + 7200
+    started_at = time.perf_counter()
+    manager._clean_up_servers()
+    tracked = time.perf_counter() - started_at
+    return scanned, tracked
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Server selection benchmark")
+    parser.add_argument("--servers", type=int, default=1000, help="Number of servers")
+    parser.add_argument("--rooms", type=int, default=100000, help="Number of rooms to allocate")
+    parser.add_argument("--churn", type=int, default=4, help="Release a random room every N allocations (0 disables)")
+    parser.add_argument("--sorted-rooms", type=int, default=10000, help="Rooms for the filter-and-sort baseline")
+    parser.add_argument("--saturated-attempts", type=int, default=10000, help="Selections in the saturated pool")
+    parser.add_argument("--cleanup-servers", type=int, default=200, help="Servers in the cleanup benchmark")
+    parser.add_argument("--cleanup-allocations", type=int, default=1000000, help="Live allocations during cleanup")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+
+    elapsed = run_index(build(args.servers), args.rooms, args.churn)
+    print(f"servers={args.servers} rooms={args.rooms}")
+    print(f"  load index:      {elapsed:.2f}s  {elapsed / args.rooms * 1e6:.1f}us/allocation")
+
+    elapsed = run_sorted(build(args.servers), args.sorted_rooms)
+    print(f"  filter and sort: {elapsed / args.sorted_rooms * 1e6:.1f}us/allocation (selection only, {args.sorted_rooms} rooms)")
+
+    elapsed = run_saturated(args.servers, args.saturated_attempts)
+    print(f"  saturated pool:  {elapsed / args.saturated_attempts * 1e6:.1f}us/selection (no server has room)")
+
+    scanned, tracked = run_cleanup(args.cleanup_servers, args.cleanup_allocations)
+    print(f"cleanup servers={args.cleanup_servers} live allocations={args.cleanup_allocations}")
+    print(f"  idle tracking:   {tracked * 1e3:.2f}ms")
+    print(f"  allocation scan: {scanned * 1e3:.0f}ms (finding idle servers only)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Benchmark concurrent allocation and release from many threads.
+
+Usage:
+    python benchmarks/bench_scaling_contention.py [--threads 64] [--ops 5000] [--servers 200]
+
+Each thread allocates rooms and streams and, once it holds its share of
+live ones, releases a random one per allocation, while a monitor thread
+runs scaling ticks. The run
+is repeated with one resource lock stripe and with the configured
+number, and checks afterwards that every server's load matches the
+rooms placed on it and no server is over capacity.
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from jitsi_plus_plugin.utils.scaling import ScalingManager
+
+
+def build(servers, stripes):
+    """Create a manager with a fleet of bridges and media servers."""
+    manager = ScalingManager({"auto_scaling": False, "lock_stripes": stripes})
+    for i in range(servers):
+        manager.add_jitsi_server({"id": f"jvb-{i}", "capacity": 500})
+    for i in range(max(1, servers // 10)):
+        manager.add_media_server({"id": f"media-{i}", "capacity": 1000})
+    return manager
+
+
+def worker(manager, n, ops, live_limit, latencies, start):
+    """Allocate and release rooms, recording the latency of each call."""
+    rng = random.Random(n)
+    live = []
+    start.wait()
+    for i in range(ops):
+        resource_id = f"room-{n}-{i}"
+        started_at = time.perf_counter()
+        if rng.random() < 0.1:
+            placed = manager.allocate_media_server(resource_id)
+        else:
+            placed = manager.allocate_jitsi_server(resource_id, rng.randint(2, 50))
+        latencies.append(time.perf_counter() - started_at)
+        if placed:
+            live.append(resource_id)
+
+        if len(live) > live_limit:
+            j = rng.randrange(len(live))
+            live[j], live[-1] = live[-1], live[j]
+            started_at = time.perf_counter()
+            manager.deallocate_server(live.pop())
+            latencies.append(time.perf_counter() - started_at)
+
+
+def check(manager):
+    """Count servers whose accounting does not match their placements."""
+    errors = 0
+    for server in manager.jitsi_servers:
+        expected = sum(manager.room_allocations[room_id]["expected_participants"] for room_id in server["rooms"])
+        if server["current_load"] != expected or server["current_load"] > server["capacity"]:
+            errors += 1
+    for server in manager.media_servers:
+        if server["current_load"] != len(server["streams"]):
+            errors += 1
+    placed = sum(len(server["rooms"]) for server in manager.jitsi_servers)
+    placed += sum(len(server["streams"]) for server in manager.media_servers)
+    return errors + abs(placed - len(manager.room_allocations))
+
+
+def run(threads, ops, servers, stripes, live_limit):
+    """Run all workers against one manager with a monitor ticking alongside."""
+    manager = build(servers, stripes)
+    start = threading.Event()
+    latencies = [[] for _ in range(threads)]
+    workers = [
+        threading.Thread(target=worker, args=(manager, n, ops, live_limit, latencies[n], start))
+        for n in range(threads)
+    ]
+
+    done = threading.Event()
+
+    def monitor():
+        while not done.is_set():
+            manager._monitor_tick()
+            time.sleep(0.01)
+
+    ticker = threading.Thread(target=monitor)
+    for thread in workers:
+        thread.start()
+    ticker.start()
+
+    started_at = time.perf_counter()
+    start.set()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started_at
+    done.set()
+    ticker.join()
+
+    samples = sorted(sample for thread_latencies in latencies for sample in thread_latencies)
+    return {
+        "ops": len(samples),
+        "elapsed": elapsed,
+        "p50": samples[len(samples) // 2],
+        "p99": samples[int(len(samples) * 0.99)],
+        "errors": check(manager)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Allocation contention benchmark")
+    parser.add_argument("--threads", type=int, default=64, help="Allocating threads")
+    parser.add_argument("--ops", type=int, default=5000, help="Allocations per thread")
+    parser.add_argument("--servers", type=int, default=200, help="Number of Jitsi servers")
+    parser.add_argument("--live", type=int, default=20, help="Live rooms held per thread")
+    parser.add_argument("--stripes", type=int, default=64, help="Resource lock stripes")
+    parser.add_argument("--switch-interval", type=float, default=1e-4, help="Interpreter thread switch interval")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    # A short switch interval makes unsafe interleavings more likely to show up
+    sys.setswitchinterval(args.switch_interval)
+
+    print(f"threads={args.threads} ops/thread={args.ops} servers={args.servers}")
+    for stripes in sorted({1, args.stripes}):
+        result = run(args.threads, args.ops, args.servers, stripes, args.live)
+        print(f"  stripes={stripes:<3}  {result['ops'] / result['elapsed']:9.0f} ops/s  "
+              f"p50 {result['p50'] * 1e6:6.1f}us  p99 {result['p99'] * 1e6:8.1f}us  "
+              f"accounting errors {result['errors']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Benchmark plugin startup against slow backends.
+
+Usage:
+    python benchmarks/bench_startup.py [--delay 2.0]
+
+A local HTTP server stands in for the Jitsi and media server backends and
+answers every request after --delay seconds. The benchmark reports the time
+until the signaling server accepts its first connection and the time until
+every component is ready, for the old sequential startup and for the
+concurrent startup used by JitsiPlusPlugin.initialize.
+"""
+
+import argparse
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from jitsi_plus_plugin import JitsiPlusPlugin
+
+
+def start_backend(delay):
+    """Start an HTTP server that answers 200 after a delay."""
+    class SlowHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(delay)
+            self.send_response(200)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SlowHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def make_plugin(backend_url, work_dir):
+    """Create a plugin pointed at the slow backend."""
+    return JitsiPlusPlugin({
+        "jitsi": {"server_url": backend_url},
+        "media_server": {"server_url": backend_url, "recording_directory": work_dir},
+        "signaling": {"host": "127.0.0.1", "port": 0}
+    })
+
+
+def wait_for_accept(plugin):
+    """Block until the signaling server accepts a TCP connection."""
+    plugin.signaling.wait_until_ready()
+    while True:
+        try:
+            socket.create_connection(("127.0.0.1", plugin.signaling.port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.001)
+
+
+def sequential(backend_url, work_dir):
+    """Start components one after the other, as before."""
+    plugin = make_plugin(backend_url, work_dir)
+    start = time.perf_counter()
+    plugin.jitsi.initialize()
+    plugin.media_server.initialize()
+    plugin.signaling.start()
+    wait_for_accept(plugin)
+    elapsed = time.perf_counter() - start
+    return elapsed, elapsed
+
+
+def concurrent(backend_url, work_dir):
+    """Start components through the startup orchestrator."""
+    plugin = make_plugin(backend_url, work_dir)
+    start = time.perf_counter()
+    plugin.initialize(wait=False)
+    wait_for_accept(plugin)
+    first_accept = time.perf_counter() - start
+    plugin.startup.wait()
+    all_ready = time.perf_counter() - start
+    return first_accept, all_ready
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Plugin startup benchmark")
+    parser.add_argument("--delay", type=float, default=2.0, help="Backend response delay in seconds")
+    args = parser.parse_args()
+
+    backend = start_backend(args.delay)
+    backend_url = f"http://127.0.0.1:{backend.server_address[1]}"
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        print(f"backend delay={args.delay}s")
+        for name, run in [("sequential", sequential), ("concurrent", concurrent)]:
+            first_accept, all_ready = run(backend_url, work_dir)
+            print(f"  {name:<11} time-to-first-accept: {first_accept:6.3f}s  all ready: {all_ready:6.3f}s")
+
+    backend.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark VOD catalog listing latency at catalog sizes up to 1M entries.
+
+Usage:
+    python benchmarks/bench_vod_catalog.py [--entries 1000000] [--page-size 50]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from jitsi_plus_plugin.core.vod_catalog import VodCatalog
+
+
+def populate(catalog, count, batch=10000):
+    """Insert synthetic VOD entries in batches."""
+    statuses = ["ready", "processing", "error"]
+    started_at = time.time()
+    for offset in range(0, count, batch):
+        catalog.put_many({
+            "id": f"vod-{i:08d}",
+            "name": f"Recording {i % 5000}",
+            "source_stream": f"{1700000000 + i}-stream-{i % 20000}",
+            "created_at": 1700000000.0 + i,
+            "file_path": f"/var/recordings/{i}.mp4",
+            "status": statuses[i % 3],
+            "duration": 3600.0
+        } for i in range(offset, min(count, offset + batch)))
+    return time.time() - started_at
+
+
+def timed(label, func, repeat=200):
+    """Print the median latency of a catalog call."""
+    samples = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started_at)
+    samples.sort()
+    print(f"  {label:<40} p50={samples[len(samples) // 2] * 1000:.3f}ms "
+          f"p99={samples[int(len(samples) * 0.99)] * 1000:.3f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="VOD catalog benchmark")
+    parser.add_argument("--entries", type=int, default=1000000, help="Number of catalog entries")
+    parser.add_argument("--page-size", type=int, default=50, help="Entries per page")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        catalog = VodCatalog(os.path.join(work_dir, "catalog.db"))
+        elapsed = populate(catalog, args.entries)
+        print(f"Inserted {args.entries} entries in {elapsed:.1f}s")
+
+        ids = [f"vod-{i:08d}" for i in random.sample(range(args.entries), 1000)]
+        page = args.page_size
+
+        timed("first page", lambda: catalog.query(limit=page))
+        timed("deep page (random cursor)", lambda: catalog.query(limit=page, cursor=random.choice(ids)))
+        timed("newest first", lambda: catalog.query(limit=page, descending=True))
+        timed("status filter", lambda: catalog.query(limit=page, status="error", cursor=random.choice(ids)))
+        timed("source_stream filter", lambda: catalog.query(
+            source_stream=f"{1700000000 + 12345}-stream-12345"))
+        timed("get by id", lambda: catalog.get(random.choice(ids)))
+        timed("get_many (100 ids)", lambda: catalog.get_many(random.sample(ids, 100)), repeat=50)
+
+        catalog.close()
+
+
+if __name__ == "__main__":
+    main()
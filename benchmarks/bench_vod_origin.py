@@ -0,0 +1,81 @@
+"""
+Benchmark concurrent byte-range throughput of the built-in VOD origin.
+
+Usage:
+    python benchmarks/bench_vod_origin.py [--size-mb 512] [--clients 64] [--range-kb 1024] [--seconds 10]
+
+Each client holds a keep-alive connection and issues random Range requests
+against a single VOD file, as players do while seeking.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from jitsi_plus_plugin.core.media_server import MediaServer
+
+
+async def client(port, size, range_bytes, deadline, stats):
+    """Issue range requests on one keep-alive connection until the deadline."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        while time.perf_counter() < deadline:
+            start = random.randrange(0, size - range_bytes)
+            writer.write(
+                f"GET /vod/vod-bench.mp4 HTTP/1.1\r\nHost: localhost\r\n"
+                f"Range: bytes={start}-{start + range_bytes - 1}\r\n\r\n".encode()
+            )
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = int(head.split(b"Content-Length: ")[1].split(b"\r\n")[0])
+            await reader.readexactly(length)
+            stats["requests"] += 1
+            stats["bytes"] += length
+    finally:
+        writer.close()
+
+
+async def run(port, size, clients, range_bytes, seconds):
+    """Run all clients concurrently."""
+    stats = {"requests": 0, "bytes": 0}
+    deadline = time.perf_counter() + seconds
+    await asyncio.gather(*(client(port, size, range_bytes, deadline, stats) for _ in range(clients)))
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="VOD origin range-request benchmark")
+    parser.add_argument("--size-mb", type=int, default=512, help="Size of the test file in MB")
+    parser.add_argument("--clients", type=int, default=64, help="Concurrent connections")
+    parser.add_argument("--range-kb", type=int, default=1024, help="Size of each range request in KB")
+    parser.add_argument("--seconds", type=float, default=10, help="Benchmark duration")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        path = os.path.join(work_dir, "bench.mp4")
+        with open(path, "wb") as f:
+            chunk = os.urandom(1024 * 1024)
+            for _ in range(args.size_mb):
+                f.write(chunk)
+
+        media_server = MediaServer({"recording_directory": work_dir})
+        media_server.vod_entries["vod-bench"] = {"id": "vod-bench", "file_path": path}
+        media_server.start_origin("127.0.0.1", 0)
+
+        size = args.size_mb * 1024 * 1024
+        stats = asyncio.run(run(media_server.origin.port, size, args.clients,
+                                args.range_kb * 1024, args.seconds))
+        media_server.shutdown()
+
+    print(f"clients={args.clients} range={args.range_kb}KB duration={args.seconds}s")
+    print(f"  requests/s: {stats['requests'] / args.seconds:,.0f}")
+    print(f"  throughput: {stats['bytes'] / args.seconds / 1024 / 1024:,.1f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
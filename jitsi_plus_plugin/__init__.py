@@ -5,16 +5,45 @@ with video conferencing, audio calls, broadcasting, and VOD capabilities.
 
 __version__ = '0.1.0'
 
-from .core.jitsi_connector import JitsiConnector
-from .core.media_server import MediaServer
-from .core.signaling import SignalingServer
+import importlib
 
-from .features.video_call import VideoCallController
-from .features.audio_call import AudioCallController
-from .features.broadcast import BroadcastController
-from .features.vod import VideoOnDemand
-from .features.whiteboard import WhiteboardController
-from .features.polls import PollController
+# Submodules pull in requests, websockets and asyncio, so they are imported
+# on first use rather than when the package (or the CLI) is imported.
+_LAZY_ATTRIBUTES = {
+    "JitsiConnector": ".core.jitsi_connector",
+    "MediaServer": ".core.media_server",
+    "SignalingServer": ".core.signaling",
+    "VideoCallController": ".features.video_call",
+    "AudioCallController": ".features.audio_call",
+    "BroadcastController": ".features.broadcast",
+    "VideoOnDemand": ".features.vod",
+    "WhiteboardController": ".features.whiteboard",
+    "PollController": ".features.polls",
+    "get_http_client": ".utils.http_client",
+    "acquire_http_client": ".utils.http_client",
+    "release_http_client": ".utils.http_client",
+    "StartupOrchestrator": ".utils.startup",
+}
+
+def _load(name):
+    """Import a lazily exported attribute and cache it in the module globals."""
+    try:
+        return globals()[name]
+    except KeyError:
+        pass
+    
+    module = importlib.import_module(_LAZY_ATTRIBUTES[name], __name__)
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        return _load(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
 
 class JitsiPlusPlugin:
     """Main plugin class that integrates all components."""
@@ -22,28 +51,84 @@ class JitsiPlusPlugin:
     def __init__(self, config=None):
         self.config = config or {}
         
+        # Shared pooled client for control-plane calls, closed when the last plugin shuts down
+        self.http_client = _load("acquire_http_client")(self.config.get("http_client", {}))
+        
         # Initialize core components
-        self.jitsi = JitsiConnector(self.config.get("jitsi", {}))
-        self.media_server = MediaServer(self.config.get("media_server", {}))
-        self.signaling = SignalingServer(self.config.get("signaling", {}))
+        self.jitsi = _load("JitsiConnector")(self.config.get("jitsi", {}))
+        self.media_server = _load("MediaServer")(self.config.get("media_server", {}))
+        self.signaling = _load("SignalingServer")(self.config.get("signaling", {}))
         
-        # Initialize features
-        self.video_call = VideoCallController(self.jitsi, self.signaling)
-        self.audio_call = AudioCallController(self.jitsi, self.signaling)
-        self.broadcast = BroadcastController(self.jitsi, self.media_server, self.signaling)
-        self.vod = VideoOnDemand(self.media_server)
-        self.whiteboard = WhiteboardController(self.signaling)
-        self.polls = PollController(self.signaling)
+        # Feature controllers are created on first access
+        self._controllers = {}
+        
+        self.startup = None
     
-    def initialize(self):
-        """Initialize all components and start the plugin."""
-        # Initialize core components
-        self.jitsi.initialize()
-        self.media_server.initialize()
+    def _controller(self, name, factory):
+        """Get a feature controller, creating it on first access."""
+        controller = self._controllers.get(name)
+        if controller is None:
+            controller = factory()
+            self._controllers[name] = controller
+        return controller
+    
+    @property
+    def video_call(self):
+        return self._controller("video_call", lambda: _load("VideoCallController")(self.jitsi, self.signaling))
+    
+    @property
+    def audio_call(self):
+        return self._controller("audio_call", lambda: _load("AudioCallController")(self.jitsi, self.signaling))
+    
+    @property
+    def broadcast(self):
+        return self._controller(
+            "broadcast",
+            lambda: _load("BroadcastController")(
+                self.jitsi, self.media_server, self.signaling, self.config.get("broadcast", {})
+            )
+        )
+    
+    @property
+    def vod(self):
+        return self._controller("vod", lambda: _load("VideoOnDemand")(self.media_server))
+    
+    @property
+    def whiteboard(self):
+        return self._controller("whiteboard", lambda: _load("WhiteboardController")(self.signaling))
+    
+    @property
+    def polls(self):
+        return self._controller("polls", lambda: _load("PollController")(self.signaling))
+    
+    def initialize(self, wait=True):
+        """
+        Initialize all components and start the plugin.
+        
+        Signaling starts accepting connections straight away while the Jitsi
+        and media server backends are probed concurrently, each bounded by
+        its own timeout.
+        
+        Args:
+            wait (bool): Wait for components to become ready or time out.
+                When False, poll get_readiness() instead.
+        """
+        startup_config = self.config.get("startup", {})
+        timeout = startup_config.get("timeout", 10)
+        
         self.signaling.start()
         
+        self.startup = _load("StartupOrchestrator")(startup_config)
+        self.startup.add_component("signaling", lambda: self.signaling.wait_until_ready(timeout))
+        self.startup.add_component("jitsi", self.jitsi.initialize)
+        self.startup.add_component("media_server", self.media_server.initialize)
+        self.startup.start()
+        
+        components = self.startup.wait() if wait else self.startup.get_status()
+        
         return {
             "status": "initialized",
+            "components": components,
             "version": __version__,
             "features": {
                 "video_call": True,
@@ -55,10 +140,19 @@ class JitsiPlusPlugin:
             }
         }
     
+    def get_readiness(self):
+        """Get the readiness of each core component."""
+        if self.startup is None:
+            return {}
+        return self.startup.get_status()
+    
     def shutdown(self):
         """Properly shutdown all components."""
         self.signaling.stop()
+        if "broadcast" in self._controllers:
+            self._controllers["broadcast"].shutdown()
         self.media_server.shutdown()
         self.jitsi.disconnect()
+        _load("release_http_client")(self.http_client)
         
         return {"status": "shutdown"}
\ No newline at end of file
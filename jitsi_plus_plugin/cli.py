@@ -65,6 +65,10 @@ def setup_parser():
     
     # List VOD entries
     list_vod_parser = vod_subparsers.add_parser('list', help='List VOD entries')
+    list_vod_parser.add_argument('--limit', type=int, help='Maximum number of entries to list')
+    list_vod_parser.add_argument('--cursor', help='ID of the last entry of the previous page')
+    list_vod_parser.add_argument('--status', help='Only list entries with this status')
+    list_vod_parser.add_argument('--source-stream', help='Only list entries recorded from this stream')
     
     return parser
 
@@ -163,6 +167,11 @@ def main():
             plugin.media_server.config['host'] = args.host
             plugin.media_server.config['port'] = args.port
             
+            # Serve VOD files, thumbnails and HLS segments
+            if not plugin.media_server.start_origin(args.host, args.port):
+                print(f"Failed to start media server on {args.host}:{args.port}")
+                sys.exit(1)
+            
             # This would typically block until terminated
             print("Media server is running. Press Ctrl+C to stop.")
             try:
@@ -180,10 +189,18 @@ def main():
                 print(f"  URL: {vod_info['url']}")
             
             elif args.vod_command == 'list':
-                vod_entries = plugin.vod.list_vod_entries()
+                vod_entries = plugin.vod.list_vod_entries(
+                    limit=args.limit,
+                    cursor=args.cursor,
+                    status=args.status,
+                    source_stream=args.source_stream
+                )
                 print(f"VOD Entries: {len(vod_entries)}")
                 for entry in vod_entries:
                     print(f"  {entry['id']} - '{entry['name']}'")
+                
+                if args.limit and len(vod_entries) == args.limit:
+                    print(f"Next page: --cursor {vod_entries[-1]['id']}")
             
             else:
                 print("Unknown VOD command. Use 'jitsi-plus vod --help' for more information.")
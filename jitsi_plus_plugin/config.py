@@ -19,8 +19,50 @@ DEFAULT_CONFIG = {
         "server_url": "https://media.example.com",
         "rtmp_port": 1935,
         "hls_segment_duration": 4,
+        "vod_hls_enabled": True,
         "recording_enabled": True,
-        "recording_directory": "/var/recordings"
+        "recording_directory": "/var/recordings",
+        "catalog_path": "/var/recordings/vod_catalog.db",
+        "trickplay_enabled": True,
+        "trickplay_interval": 10,
+        "faststart_enabled": True,
+        "keyframe_index_enabled": True,
+        "live_clip_enabled": True,
+        "clip_workers": 2,
+        "dedup_enabled": True,
+        "dedup_use_mmap": False,
+        "storage": {
+            "max_bytes": None,
+            "policy": "lru",
+            "cold_directory": None,
+            "min_free_bytes": 1073741824,
+            "recording_reserve_bytes": 2147483648,
+            "orphan_grace_seconds": 3600
+        },
+        "llhls": {
+            "enabled": False,
+            "part_duration": 0.5,
+            "playlist_segments": 6
+        },
+        "restream": {
+            "health_interval": 5,
+            "retry_interval": 30,
+            "max_retry_interval": 600,
+            "max_targets": 10
+        },
+        "analytics": {
+            "access_logs": [],
+            "bucket_seconds": 60,
+            "poll_interval": 1
+        }
+    },
+    "broadcast": {
+        "viewers": {
+            "window": 30,
+            "tick_interval": 5,
+            "shards": 16,
+            "hll_precision": 14
+        }
     },
     "signaling": {
         "host": "0.0.0.0",
@@ -29,10 +71,49 @@ DEFAULT_CONFIG = {
         "ssl_cert": "",
         "ssl_key": ""
     },
+    "http_client": {
+        "timeout": 5,
+        "max_connections_per_host": 10,
+        "failure_threshold": 5,
+        "reset_timeout": 30,
+        "health_cache_ttl": 10
+    },
+    "startup": {
+        "timeout": 10,
+        "component_timeouts": {
+            "jitsi": 5,
+            "media_server": 5
+        }
+    },
     "scaling": {
         "auto_scaling": True,
         "max_participants_per_server": 100,
-        "monitor_interval_seconds": 30
+        "monitor_interval_seconds": 30,
+        "lock_stripes": 64,
+        "placement": {
+            "jitsi": "least_loaded",
+            "media": "least_loaded"
+        },
+        "controller": {
+            "lead_time": 300,
+            "target_utilization": 0.7,
+            "scale_up_threshold": 0.8,
+            "scale_down_threshold": 0.4,
+            "scale_up_cooldown": 120,
+            "scale_down_cooldown": 600,
+            "max_step_up": 5,
+            "max_step_down": 1,
+            "min_servers": 1,
+            "season_length": 0
+        },
+        "telemetry": {
+            "enabled": False,
+            "host": "0.0.0.0",
+            "port": 8125,
+            "history_size": 120,
+            "reservation_grace": 60,
+            "cpu_limit": 0.85
+        }
     },
     "features": {
         "whiteboard_enabled": True,
@@ -0,0 +1,491 @@
+"""
+Streaming analytics over HLS and VOD origin access logs.
+"""
+
+import calendar
+import logging
+import mmap
+import os
+import re
+import threading
+import time
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import unquote
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; plain lists are used without it
+    np = None
+
+logger = logging.getLogger(__name__)
+
+# Combined (or common) log format as written by nginx and Apache
+LOG_LINE = re.compile(
+    rb'^(\S+) \S+ \S+ \[([^\]]+)\] "[A-Z]+ ([^ "?]+)[^"]*" (\d{3}) (\d+|-)(?: "[^"]*" "([^"]*)")?',
+    re.MULTILINE
+)
+
+# Request paths served by this plugin, mapped to the stream or VOD they belong to.
+# Nested paths are matched on their directory (up to the last slash) so that
+# the result can be reused for every segment in it.
+DEFAULT_PATH_PATTERNS = [
+    ("vod", r"^/hls/vod/(?P<id>[^/]+)/"),
+    ("vod", r"^/vod/(?P<id>[^/.]+)\."),
+    ("stream", r"^/llhls/(?P<id>[^/]+?)(?:\.m3u8$|/)"),
+    ("stream", r"^/hls/(?P<id>[^/]+?)(?:_(?P<rendition>\d+p|src|hi|mid|low))?(?:\.m3u8$|-\d+\.ts$|/)"),
+]
+
+MONTHS = {
+    b"Jan": 1, b"Feb": 2, b"Mar": 3, b"Apr": 4, b"May": 5, b"Jun": 6,
+    b"Jul": 7, b"Aug": 8, b"Sep": 9, b"Oct": 10, b"Nov": 11, b"Dec": 12
+}
+
+# 8 MiB batches keep the regex loop busy without holding much of the log in memory
+DEFAULT_BATCH_BYTES = 8 * 1024 * 1024
+
+
+def parse_log_time(value: bytes) -> int:
+    """
+    Parse a log timestamp such as ``19/Oct/2026:10:00:00 +0000``.
+
+    Args:
+        value (bytes): Timestamp from the log line.
+
+    Returns:
+        int: Unix time in seconds.
+
+    Raises:
+        ValueError: If the timestamp is malformed.
+    """
+    try:
+        day, month, year = int(value[0:2]), MONTHS[value[3:6]], int(value[7:11])
+        hour, minute, second = int(value[12:14]), int(value[15:17]), int(value[18:20])
+        offset = int(value[22:24]) * 3600 + int(value[24:26]) * 60
+    except (KeyError, ValueError, IndexError):
+        raise ValueError(f"Invalid log timestamp: {value!r}")
+
+    if value[21:22] == b"-":
+        offset = -offset
+    return calendar.timegm((year, month, day, hour, minute, second)) - offset
+
+
+class _Series:
+    """Time-bucketed traffic for one stream or VOD."""
+
+    def __init__(self):
+        # Absolute bucket number of the first array element
+        self.origin = None
+        self.bytes = self._zeros(0)
+        self.requests = self._zeros(0)
+        self.viewers = self._zeros(0)
+        # Rendition name -> bytes per bucket
+        self.renditions = {}
+        # Clients seen in buckets that may still receive lines; counted when closed
+        self.open_clients = {}
+
+    @staticmethod
+    def _zeros(length: int):
+        return np.zeros(length, dtype=np.int64) if np is not None else [0] * length
+
+    def _pad(self, pad: int, front: bool):
+        """Add zero buckets before or after every array."""
+        def grow(values):
+            if np is not None:
+                return np.concatenate((self._zeros(pad), values) if front else (values, self._zeros(pad)))
+            return self._zeros(pad) + values if front else values + self._zeros(pad)
+
+        self.bytes, self.requests, self.viewers = grow(self.bytes), grow(self.requests), grow(self.viewers)
+        self.renditions = {name: grow(values) for name, values in self.renditions.items()}
+
+    def _cover(self, low: int, high: int):
+        """Grow the arrays to cover buckets low..high."""
+        if self.origin is None:
+            self.origin = low
+        size = len(self.bytes)
+
+        if low < self.origin:
+            pad = self.origin - low
+            self._pad(pad, front=True)
+            self.origin = low
+            size += pad
+
+        if high - self.origin + 1 > size:
+            # Grow geometrically so a live log does not reallocate every batch
+            self._pad(max(high - self.origin + 1 - size, size // 2, 16), front=False)
+
+    def _accumulate(self, values, buckets: List[int], weights: Optional[List[int]]):
+        """Add weights (or counts) to buckets already covered by the arrays."""
+        if np is not None:
+            low, high = min(buckets), max(buckets)
+            index = np.asarray(buckets, dtype=np.int64) - low
+            start = low - self.origin
+            span = high - low + 1
+            if weights is None:
+                values[start:start + span] += np.bincount(index, minlength=span)
+            else:
+                values[start:start + span] += np.bincount(
+                    index, weights=np.asarray(weights, dtype=np.float64), minlength=span
+                ).astype(np.int64)
+        else:
+            for i, bucket in enumerate(buckets):
+                values[bucket - self.origin] += 1 if weights is None else weights[i]
+
+    def add(self, buckets: List[int], sizes: List[int], renditions: Dict[str, Tuple[List[int], List[int]]]):
+        """Add a batch of requests, with their buckets and sizes split by rendition."""
+        self._cover(min(buckets), max(buckets))
+        self._accumulate(self.bytes, buckets, sizes)
+        self._accumulate(self.requests, buckets, None)
+
+        for name, (rendition_buckets, rendition_sizes) in renditions.items():
+            if name not in self.renditions:
+                self.renditions[name] = self._zeros(len(self.bytes))
+            self._accumulate(self.renditions[name], rendition_buckets, rendition_sizes)
+
+    def close_buckets(self, before: int):
+        """Count the distinct clients of buckets older than the given bucket."""
+        for bucket in [bucket for bucket in self.open_clients if bucket < before]:
+            # Late lines for an already closed bucket can only raise its count
+            index = bucket - self.origin
+            self.viewers[index] = max(int(self.viewers[index]), len(self.open_clients.pop(bucket)))
+
+    def used_length(self) -> int:
+        """Number of buckets up to the last one with traffic."""
+        if np is not None:
+            nonzero = np.flatnonzero(self.requests)
+            return int(nonzero[-1]) + 1 if len(nonzero) else 0
+        for i in range(len(self.requests) - 1, -1, -1):
+            if self.requests[i]:
+                return i + 1
+        return 0
+
+
+class AccessLogAnalytics:
+    """
+    Aggregates origin access logs into per-stream and per-VOD time series.
+
+    Logs are read in large batches, from a memory map for whole files or by
+    tailing for live ones. One multi-line regex pass over each batch parses
+    the lines, and per-resource traffic is added to time-bucketed arrays
+    (NumPy where available) in one step per batch. Concurrent viewers are
+    the distinct clients, by address and user agent, seen in a bucket.
+
+    With several logs, a bucket's clients are kept as a set until every
+    followed log has moved past it, so that lines for the same bucket from
+    different logs are merged rather than counted per log. A log that has
+    been read to its end is treated as having moved past the previous
+    bucket of the current time.
+    """
+
+    def __init__(self, config: Dict[str, Any] = None):
+        """
+        Initialize the analytics pipeline.
+
+        Args:
+            config (Dict[str, Any], optional): Analytics configuration.
+        """
+        self.config = config or {}
+        self.bucket_seconds = self.config.get("bucket_seconds", 60)
+        self.batch_bytes = self.config.get("batch_bytes", DEFAULT_BATCH_BYTES)
+        self.poll_interval = self.config.get("poll_interval", 1)
+        self.access_logs = list(self.config.get("access_logs", []))
+        self.path_patterns = [
+            (kind, re.compile(pattern.encode("utf-8")))
+            for kind, pattern in self.config.get("path_patterns", DEFAULT_PATH_PATTERNS)
+        ]
+
+        # (kind, resource ID) -> _Series
+        self.series = {}
+        self.lines_parsed = 0
+        self.bytes_read = 0
+
+        # Followed files: path -> [offset, inode]
+        self.positions = {}
+        # Log (path, or None for ingest_bytes) -> latest bucket it has reached
+        self._watermarks = {}
+        self._closed_before = None
+        self._time_cache = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self.tail_thread = None
+
+    def ingest_bytes(self, data) -> int:
+        """
+        Parse and aggregate complete log lines.
+
+        Args:
+            data: Bytes-like object holding whole lines.
+
+        Returns:
+            int: Number of lines aggregated.
+        """
+        return self._ingest(data, 0, len(data), None)
+
+    def ingest_file(self, path: str, offset: int = 0) -> int:
+        """
+        Aggregate a log file from an offset to its last complete line.
+
+        Args:
+            path (str): Path to the log file.
+            offset (int): Byte offset to start from.
+
+        Returns:
+            int: Offset just after the last complete line read.
+
+        Raises:
+            OSError: If the file cannot be read.
+        """
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size <= offset:
+                return offset
+
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                while offset < size:
+                    end = min(offset + self.batch_bytes, size)
+                    # Batches end on a line boundary; a trailing partial line waits for more data
+                    newline = mapped.rfind(b"\n", offset, end)
+                    if newline < 0:
+                        if end == size:
+                            break
+                        newline = mapped.find(b"\n", end, size)
+                        if newline < 0:
+                            break
+                    self._ingest(mapped, offset, newline + 1, path)
+                    offset = newline + 1
+
+        return offset
+
+    def follow(self, path: str, from_start: bool = True):
+        """
+        Tail a log file, including rotations and truncations.
+
+        Args:
+            path (str): Path to the log file.
+            from_start (bool): Aggregate existing content first rather than
+                only lines appended from now on.
+        """
+        offset, inode = 0, None
+        if not from_start:
+            try:
+                stat_result = os.stat(path)
+                offset, inode = stat_result.st_size, stat_result.st_ino
+            except OSError:
+                pass
+        self.positions[path] = [offset, inode]
+
+    def query(self, kind: str, resource_id: str, start: Optional[float] = None,
+              end: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Get the traffic of a stream or VOD.
+
+        Args:
+            kind (str): "stream" or "vod".
+            resource_id (str): Stream key or VOD ID.
+            start (float, optional): Unix time of the first bucket to include.
+            end (float, optional): Unix time after the last bucket to include.
+
+        Returns:
+            Optional[Dict[str, Any]]: Per-bucket bytes, requests, bandwidth and
+            concurrent viewers, with totals and the rendition mix, or None if
+            the resource has no traffic.
+        """
+        with self._lock:
+            series = self.series.get((kind, resource_id))
+            if series is None or series.origin is None:
+                return None
+
+            length = series.used_length()
+            first = 0 if start is None else max(0, int(start // self.bucket_seconds) - series.origin)
+            last = length if end is None else min(length, -(-int(end) // self.bucket_seconds) - series.origin)
+            last = max(first, last)
+
+            bytes_sent = [int(value) for value in series.bytes[first:last]]
+            requests = [int(value) for value in series.requests[first:last]]
+            viewers = [
+                len(series.open_clients[bucket]) if bucket in series.open_clients else int(value)
+                for bucket, value in zip(range(series.origin + first, series.origin + last), series.viewers[first:last])
+            ]
+            renditions = {name: int(sum(values[first:last])) for name, values in series.renditions.items()}
+
+        total_bytes = sum(bytes_sent)
+        rendition_bytes = sum(renditions.values())
+        return {
+            "bucket_seconds": self.bucket_seconds,
+            "start": (series.origin + first) * self.bucket_seconds,
+            "bytes": bytes_sent,
+            "requests": requests,
+            "bandwidth_bps": [value * 8 / self.bucket_seconds for value in bytes_sent],
+            "viewers": viewers,
+            "total_bytes": total_bytes,
+            "total_requests": sum(requests),
+            "peak_viewers": max(viewers, default=0),
+            "renditions": {
+                name: value / rendition_bytes for name, value in renditions.items() if value
+            } if rendition_bytes else {}
+        }
+
+    def poll(self):
+        """Read lines appended to the followed logs since the last poll."""
+        for path, position in list(self.positions.items()):
+            try:
+                stat_result = os.stat(path)
+            except OSError:
+                continue
+
+            offset, inode = position
+            # A new inode or a shorter file means the log was rotated or truncated
+            if (inode is not None and stat_result.st_ino != inode) or stat_result.st_size < offset:
+                offset = 0
+
+            position[0] = self.ingest_file(path, offset)
+            position[1] = stat_result.st_ino
+
+            # Lines appended later belong to the current bucket or the one before
+            with self._lock:
+                self._advance(path, int(time.time()) // self.bucket_seconds - 1)
+
+    def start(self) -> bool:
+        """
+        Follow the configured access logs in the background.
+
+        Returns:
+            bool: True if started, False if already running.
+        """
+        if self.tail_thread and self.tail_thread.is_alive():
+            return False
+
+        for path in self.access_logs:
+            if path not in self.positions:
+                self.follow(path)
+
+        self._stop_event.clear()
+        self.tail_thread = threading.Thread(target=self._tail_loop)
+        self.tail_thread.daemon = True
+        self.tail_thread.start()
+
+        logger.info(f"Following {len(self.positions)} access log(s)")
+        return True
+
+    def stop(self):
+        """Stop following access logs."""
+        self._stop_event.set()
+        if self.tail_thread:
+            self.tail_thread.join(timeout=5)
+            self.tail_thread = None
+
+    def _classify(self, path: bytes) -> Optional[Tuple[str, str, str]]:
+        """Map a request path to its resource kind, ID and rendition."""
+        for kind, pattern in self.path_patterns:
+            match = pattern.match(path)
+            if match:
+                groups = match.groupdict()
+                rendition = groups.get("rendition")
+                return (
+                    kind,
+                    unquote(groups["id"].decode("utf-8", "replace")),
+                    rendition.decode("ascii", "replace") if rendition else "source"
+                )
+        return None
+
+    def _timestamp(self, value: bytes) -> int:
+        """Parse a timestamp, reusing results for lines logged in the same second."""
+        cached = self._time_cache.get(value)
+        if cached is None:
+            if len(self._time_cache) > 100000:
+                self._time_cache.clear()
+            cached = self._time_cache[value] = parse_log_time(value)
+        return cached
+
+    def _advance(self, source: Optional[str], bucket: int):
+        """
+        Record the latest bucket a log has reached and count the clients of
+        buckets every followed log has moved past. Called with the lock held.
+        """
+        if bucket <= self._watermarks.get(source, bucket - 1):
+            return
+        self._watermarks[source] = bucket
+
+        sources = set(self.positions)
+        sources.add(source)
+        if not sources <= self._watermarks.keys():
+            return
+        before = min(self._watermarks[log] for log in sources)
+        if self._closed_before is not None and before <= self._closed_before:
+            return
+        self._closed_before = before
+
+        for series in self.series.values():
+            if series.open_clients:
+                series.close_buckets(before)
+
+    def _ingest(self, data, start: int, end: int, source: Optional[str]) -> int:
+        """Parse the lines in data[start:end] of a log and add them to the series."""
+        # (kind, ID) -> [buckets, sizes, {bucket: clients}, {rendition: (buckets, sizes)}]
+        batch = {}
+        classify_cache = {}
+        parsed = 0
+
+        for match in LOG_LINE.finditer(data, start, end):
+            client, timestamp, path, status, size, user_agent = match.groups()
+            if status[0] not in b"23":
+                continue
+
+            # Segments of one stream or VOD share a directory, so classify that once
+            key = path[:path.rfind(b"/") + 1] if path.count(b"/") > 2 else path
+            target = classify_cache.get(key)
+            if target is None:
+                target = classify_cache[key] = self._classify(key) or ()
+            if not target:
+                continue
+
+            try:
+                bucket = self._timestamp(timestamp) // self.bucket_seconds
+            except ValueError:
+                continue
+
+            size = int(size) if size != b"-" else 0
+            entry = batch.get(target[:2])
+            if entry is None:
+                entry = batch[target[:2]] = [[], [], {}, {}]
+            entry[0].append(bucket)
+            entry[1].append(size)
+            entry[2].setdefault(bucket, set()).add((client, user_agent))
+            rendition = entry[3].get(target[2])
+            if rendition is None:
+                rendition = entry[3][target[2]] = ([], [])
+            rendition[0].append(bucket)
+            rendition[1].append(size)
+            parsed += 1
+
+        with self._lock:
+            latest = None
+            for key, (buckets, sizes, clients, renditions) in batch.items():
+                series = self.series.get(key)
+                if series is None:
+                    series = self.series[key] = _Series()
+                series.add(buckets, sizes, renditions)
+
+                for bucket, bucket_clients in clients.items():
+                    series.open_clients.setdefault(bucket, set()).update(bucket_clients)
+                # Late lines for buckets every log has moved past
+                if self._closed_before is not None:
+                    series.close_buckets(self._closed_before)
+                latest = max(buckets) if latest is None else max(latest, max(buckets))
+
+            # Lines of each log arrive roughly in time order, so only its latest bucket stays open
+            if latest is not None:
+                self._advance(source, latest - 1)
+
+            self.lines_parsed += parsed
+            self.bytes_read += end - start
+
+        return parsed
+
+    def _tail_loop(self):
+        """Poll the followed logs until stopped."""
+        while not self._stop_event.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                logger.error(f"Error reading access logs: {str(e)}")
+            self._stop_event.wait(self.poll_interval)
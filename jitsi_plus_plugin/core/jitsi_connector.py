@@ -3,14 +3,14 @@ Jitsi connector for integrating with Jitsi Meet API.
 """
 
 import logging
-import requests
 import json
 import time
 import uuid
 import asyncio
-import websockets
 from typing import Dict, Any, List, Optional, Callable
 
+from ..utils.http_client import get_http_client
+
 logger = logging.getLogger(__name__)
 
 class JitsiConnector:
@@ -19,14 +19,16 @@ class JitsiConnector:
     Handles connection and communication with Jitsi servers.
     """
     
-    def __init__(self, config: Dict[str, Any]):
+    def __init__(self, config: Dict[str, Any], http_client=None):
         """
         Initialize the Jitsi connector.
         
         Args:
             config (Dict[str, Any]): Configuration for Jitsi connection.
+            http_client (HttpClient, optional): HTTP client for control-plane calls.
         """
         self.config = config
+        self.http_client = http_client or get_http_client()
         self.server_url = config.get("server_url", "https://meet.jit.si")
         self.room_prefix = config.get("room_prefix", "jitsi-plus-")
         self.use_ssl = config.get("use_ssl", True)
@@ -52,7 +54,7 @@ class JitsiConnector:
         """
         try:
             # Test connection to Jitsi server
-            response = requests.get(f"{self.server_url}/http-pre-bind", timeout=5)
+            response = self.http_client.get(f"{self.server_url}/http-pre-bind", timeout=5)
             if response.status_code == 200:
                 logger.info(f"Successfully connected to Jitsi server at {self.server_url}")
                 self.connected = True
@@ -64,6 +66,15 @@ class JitsiConnector:
             logger.error(f"Error connecting to Jitsi server: {str(e)}")
             return False
     
+    def is_healthy(self) -> bool:
+        """
+        Check whether the Jitsi server is reachable, using a cached result.
+        
+        Returns:
+            bool: True if the server answers, False otherwise.
+        """
+        return self.http_client.check_health(f"{self.server_url}/http-pre-bind")
+    
     def create_room(self, room_name: Optional[str] = None) -> Dict[str, Any]:
         """
         Create a new Jitsi room.
@@ -264,6 +275,8 @@ class JitsiConnector:
         protocol = "wss" if self.use_ssl else "ws"
         ws_url = f"{protocol}://{self.server_url.replace('https://', '').replace('http://', '')}/xmpp-websocket"
         
+        import websockets
+        
         try:
             # For testing compatibility, handle AsyncMock objects differently
             self.websocket = await websockets.connect(ws_url)
@@ -296,6 +309,8 @@ class JitsiConnector:
         
     async def _websocket_listener(self):
         """Listen for incoming websocket messages."""
+        import websockets
+        
         try:
             while True:
                 message = await self.websocket.recv()
@@ -0,0 +1,220 @@
+"""
+Compact on-disk keyframe index for recorded media files.
+"""
+
+import bisect
+import logging
+import os
+import struct
+import subprocess
+import sys
+from array import array
+from typing import Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+INDEX_EXTENSION = ".kfi"
+
+# Header: magic (which carries the format version) and keyframe count, followed
+# by the keyframe timestamps as float64 seconds and their byte offsets as
+# int64, all little-endian.
+INDEX_MAGIC = b"KFI1"
+INDEX_HEADER = struct.Struct("<4sI")
+
+class KeyframeIndex:
+    """
+    Sorted video keyframe timestamps and byte offsets for one media file.
+
+    Stored as two packed arrays (16 bytes per keyframe), so an index for a
+    multi-hour recording is a few kilobytes and loads without parsing.
+    """
+
+    def __init__(self, timestamps: Iterable[float] = (), positions: Iterable[int] = ()):
+        """
+        Initialize the keyframe index.
+
+        Args:
+            timestamps (Iterable[float]): Keyframe timestamps in seconds, ascending.
+            positions (Iterable[int]): Byte offset of each keyframe, -1 if unknown.
+        """
+        self.timestamps = array("d", timestamps)
+        self.positions = array("q", positions)
+
+        if len(self.timestamps) != len(self.positions):
+            raise ValueError("Timestamps and positions must have the same length")
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @staticmethod
+    def index_path(media_path: str) -> str:
+        """
+        Get the path of the index stored next to a media file.
+
+        Args:
+            media_path (str): Path to media file.
+
+        Returns:
+            str: Path to the index file.
+        """
+        return os.path.splitext(media_path)[0] + INDEX_EXTENSION
+
+    @classmethod
+    def probe(cls, media_path: str, ffprobe_path: str = "ffprobe") -> "KeyframeIndex":
+        """
+        Build an index from a media file's packet headers.
+
+        Args:
+            media_path (str): Path to media file.
+            ffprobe_path (str): Path to the ffprobe binary.
+
+        Returns:
+            KeyframeIndex: The index; empty if probing failed.
+        """
+        ffprobe_cmd = [
+            ffprobe_path,
+            "-v", "error",
+            "-select_streams", "v:0",
+            "-show_entries", "packet=pts_time,pos,flags",
+            "-of", "csv=print_section=0",
+            media_path
+        ]
+
+        result = subprocess.run(ffprobe_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        if result.returncode != 0:
+            logger.error(f"Error probing keyframes for {media_path}: {result.stderr.strip()}")
+
+        keyframes = []
+        for line in result.stdout.splitlines():
+            fields = line.strip().split(",")
+            if len(fields) < 3 or "K" not in fields[2]:
+                continue
+            try:
+                timestamp = float(fields[0])
+            except ValueError:
+                continue
+            try:
+                position = int(fields[1])
+            except ValueError:
+                position = -1
+            keyframes.append((timestamp, position))
+
+        keyframes.sort()
+        return cls((timestamp for timestamp, _ in keyframes), (position for _, position in keyframes))
+
+    @classmethod
+    def load(cls, path: str) -> "KeyframeIndex":
+        """
+        Load an index file.
+
+        Args:
+            path (str): Path to the index file.
+
+        Returns:
+            KeyframeIndex: The loaded index.
+
+        Raises:
+            ValueError: If the file is not a valid index.
+        """
+        with open(path, "rb") as f:
+            data = f.read()
+
+        if len(data) < INDEX_HEADER.size:
+            raise ValueError(f"Truncated keyframe index: {path}")
+        magic, count = INDEX_HEADER.unpack_from(data)
+        if magic != INDEX_MAGIC or len(data) != INDEX_HEADER.size + count * 16:
+            raise ValueError(f"Invalid keyframe index: {path}")
+
+        index = cls()
+        offset = INDEX_HEADER.size
+        index.timestamps.frombytes(data[offset:offset + count * 8])
+        index.positions.frombytes(data[offset + count * 8:])
+        if sys.byteorder == "big":
+            index.timestamps.byteswap()
+            index.positions.byteswap()
+        return index
+
+    @classmethod
+    def load_for(cls, media_path: str) -> Optional["KeyframeIndex"]:
+        """
+        Load the index stored next to a media file, if there is a valid one.
+
+        Args:
+            media_path (str): Path to media file.
+
+        Returns:
+            Optional[KeyframeIndex]: The index or None.
+        """
+        path = cls.index_path(media_path)
+        try:
+            # An index older than its media file describes a previous version
+            if os.path.getmtime(path) < os.path.getmtime(media_path):
+                return None
+            return cls.load(path)
+        except (OSError, ValueError):
+            return None
+
+    def save(self, path: str):
+        """
+        Write the index atomically.
+
+        Args:
+            path (str): Path to the index file.
+        """
+        timestamps, positions = self.timestamps, self.positions
+        if sys.byteorder == "big":
+            timestamps, positions = array("d", timestamps), array("q", positions)
+            timestamps.byteswap()
+            positions.byteswap()
+
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(INDEX_HEADER.pack(INDEX_MAGIC, len(self)))
+            f.write(timestamps.tobytes())
+            f.write(positions.tobytes())
+        os.replace(temp_path, path)
+
+    def floor(self, timestamp: float) -> Optional[float]:
+        """
+        Get the last keyframe at or before a timestamp.
+
+        Args:
+            timestamp (float): Time in seconds.
+
+        Returns:
+            Optional[float]: Keyframe timestamp or None if there is none.
+        """
+        i = bisect.bisect_right(self.timestamps, timestamp)
+        return self.timestamps[i - 1] if i else None
+
+    def ceil(self, timestamp: float) -> Optional[float]:
+        """
+        Get the first keyframe at or after a timestamp.
+
+        Args:
+            timestamp (float): Time in seconds.
+
+        Returns:
+            Optional[float]: Keyframe timestamp or None if there is none.
+        """
+        i = bisect.bisect_left(self.timestamps, timestamp)
+        return self.timestamps[i] if i < len(self.timestamps) else None
+
+    def position(self, timestamp: float) -> Optional[int]:
+        """
+        Get the byte offset of the last keyframe at or before a timestamp.
+
+        Args:
+            timestamp (float): Time in seconds.
+
+        Returns:
+            Optional[int]: Byte offset or None if unknown.
+        """
+        i = bisect.bisect_right(self.timestamps, timestamp)
+        if not i or self.positions[i - 1] < 0:
+            return None
+        return self.positions[i - 1]
+
+    def to_list(self) -> List[float]:
+        """Get the keyframe timestamps as a list."""
+        return self.timestamps.tolist()
@@ -0,0 +1,457 @@
+"""
+Low-latency HLS packaging with partial segments and blocking playlist reloads.
+"""
+
+import collections
+import logging
+import math
+import os
+import shutil
+import subprocess
+import threading
+from typing import Dict, Any, List, Optional, Callable
+from urllib.parse import quote
+
+logger = logging.getLogger(__name__)
+
+PART_PATTERN = "part_%06d.ts"
+SEGMENT_PATTERN = "seg_%06d.ts"
+PART_LIST = "parts.csv"
+
+TS_PACKET_SIZE = 188
+# MPEG-TS packets read from the start of a part when looking for its first video frame
+TS_SCAN_PACKETS = 512
+# PMT stream types of video codecs (MPEG-1/2, MPEG-4, H.264, HEVC, AVS2, VC-1)
+VIDEO_STREAM_TYPES = {0x01, 0x02, 0x10, 0x1b, 0x24, 0xd2, 0xea}
+
+def starts_with_keyframe(path: str) -> Optional[bool]:
+    """
+    Check whether an MPEG-TS part starts with a video keyframe.
+
+    The segment muxer cuts parts before a video packet, so the first video
+    PES packet of a part is its first frame; FFmpeg's MPEG-TS muxer sets the
+    random access indicator on keyframes.
+
+    Args:
+        path (str): Path to the part.
+
+    Returns:
+        Optional[bool]: Whether the first video frame is a keyframe, True for
+        parts without video, or None if the part could not be parsed.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read(TS_PACKET_SIZE * TS_SCAN_PACKETS)
+    except OSError:
+        return None
+
+    try:
+        return _first_video_frame_is_key(data)
+    except IndexError:
+        return None
+
+def _section(packet: bytes, offset: int) -> bytes:
+    """Get the PSI section starting in a packet's payload."""
+    start = offset + 1 + packet[offset]
+    return packet[start:]
+
+def _first_video_frame_is_key(data: bytes) -> Optional[bool]:
+    """Parse MPEG-TS packets up to the first video PES packet; see starts_with_keyframe."""
+    pmt_pids = set()
+    video_pids = None
+    for offset in range(0, len(data) - TS_PACKET_SIZE + 1, TS_PACKET_SIZE):
+        packet = data[offset:offset + TS_PACKET_SIZE]
+        if packet[0] != 0x47:
+            return None
+        pid = ((packet[1] & 0x1f) << 8) | packet[2]
+        unit_start = packet[1] & 0x40
+        adaptation = packet[3] & 0x20
+        payload = 4 + (1 + packet[4] if adaptation else 0)
+        if not unit_start or payload >= TS_PACKET_SIZE:
+            continue
+
+        if pid == 0:
+            section = _section(packet, payload)
+            end = min(len(section), 3 + (((section[1] & 0x0f) << 8) | section[2]) - 4)
+            for entry in range(8, end - 3, 4):
+                if (section[entry] << 8) | section[entry + 1]:
+                    pmt_pids.add(((section[entry + 2] & 0x1f) << 8) | section[entry + 3])
+        elif pid in pmt_pids and video_pids is None:
+            section = _section(packet, payload)
+            end = min(len(section), 3 + (((section[1] & 0x0f) << 8) | section[2]) - 4)
+            entry = 12 + (((section[10] & 0x0f) << 8) | section[11])
+            video_pids = set()
+            while entry + 5 <= end:
+                if section[entry] in VIDEO_STREAM_TYPES:
+                    video_pids.add(((section[entry + 1] & 0x1f) << 8) | section[entry + 2])
+                entry += 5 + (((section[entry + 3] & 0x0f) << 8) | section[entry + 4])
+            if not video_pids:
+                return True
+        elif video_pids and pid in video_pids:
+            return bool(adaptation and packet[4] and packet[5] & 0x40)
+
+    return None
+
+class LowLatencyHlsPackager:
+    """
+    Packages one live stream as LL-HLS.
+
+    FFmpeg stream-copies the ingest into short MPEG-TS parts, cutting at the
+    part duration even between keyframes, and appends each finished part to
+    a CSV list. The packager tails that list, groups parts into segments
+    (a segment file is the concatenation of its parts) and renders the media
+    playlist with EXT-X-PART, EXT-X-PRELOAD-HINT and EXT-X-SERVER-CONTROL.
+
+    Parts that start with a keyframe are marked independent, and segments
+    are only closed before such a part, so every segment starts on a
+    keyframe; the encoder's keyframe interval should therefore fall on the
+    part grid. A segment without a keyframe for the maximum segment duration
+    is closed anyway. Parts whose keyframes cannot be read fall back to
+    closing segments by duration.
+    """
+
+    def __init__(self, stream_key: str, output_directory: str, config: Dict[str, Any] = None):
+        """
+        Initialize the packager.
+
+        Args:
+            stream_key (str): Key of the stream.
+            output_directory (str): Directory for parts, segments and the part list.
+            config (Dict[str, Any], optional): LL-HLS configuration.
+        """
+        self.stream_key = stream_key
+        self.output_directory = output_directory
+        self.config = config or {}
+        self.part_duration = self.config.get("part_duration", 0.5)
+        self.segment_duration = self.config.get("segment_duration", 4)
+        self.max_segment_duration = self.config.get("max_segment_duration", 3 * self.segment_duration)
+        self.playlist_segments = self.config.get("playlist_segments", 6)
+        self.poll_interval = self.config.get("poll_interval", 0.05)
+
+        # Completed segments, oldest first; older ones are deleted from disk
+        self.segments = collections.deque()
+        self.current_parts = []
+        self.next_sequence = 0
+        self.next_part_number = 0
+        self.ended = False
+
+        self.process = None
+        self._list_offset = 0
+        self._lock = threading.Lock()
+        # Serializes add_part and end, so segment files are written without holding _lock
+        self._segment_lock = threading.Lock()
+        self._waiters = []
+        self._stop_event = threading.Event()
+        self.tail_thread = None
+
+    @property
+    def uri_prefix(self) -> str:
+        """Prefix of part and segment URIs, relative to the playlist URL."""
+        return quote(self.stream_key) + "/"
+
+    def ffmpeg_command(self, input_url: str) -> List[str]:
+        """
+        Build the FFmpeg command writing the parts.
+
+        Args:
+            input_url (str): URL of the ingest.
+
+        Returns:
+            List[str]: FFmpeg command.
+        """
+        return [
+            "ffmpeg",
+            "-nostats",
+            "-i", input_url,
+            "-map", "0",
+            "-c", "copy",
+            "-f", "segment",
+            "-segment_time", str(self.part_duration),
+            "-break_non_keyframes", "1",
+            "-segment_format", "mpegts",
+            "-segment_list", os.path.join(self.output_directory, PART_LIST),
+            "-segment_list_type", "csv",
+            "-segment_list_flags", "+live",
+            os.path.join(self.output_directory, PART_PATTERN)
+        ]
+
+    def start(self, input_url: str) -> bool:
+        """
+        Start FFmpeg and the part list tail.
+
+        Args:
+            input_url (str): URL of the ingest.
+
+        Returns:
+            bool: True if started, False otherwise.
+        """
+        os.makedirs(self.output_directory, exist_ok=True)
+
+        try:
+            self.process = subprocess.Popen(
+                self.ffmpeg_command(input_url),
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL
+            )
+        except Exception as e:
+            logger.error(f"Error starting LL-HLS packager for stream {self.stream_key}: {str(e)}")
+            return False
+
+        self._stop_event.clear()
+        self.tail_thread = threading.Thread(target=self._tail_loop)
+        self.tail_thread.daemon = True
+        self.tail_thread.start()
+
+        logger.info(f"Started LL-HLS packaging for stream {self.stream_key}")
+        return True
+
+    def stop(self, remove_files: bool = True):
+        """
+        Stop packaging and end the playlist.
+
+        Args:
+            remove_files (bool): Whether to delete the output directory.
+        """
+        if self.process:
+            try:
+                self.process.terminate()
+                try:
+                    self.process.wait(timeout=5)
+                except subprocess.TimeoutExpired:
+                    self.process.kill()
+            except Exception as e:
+                logger.error(f"Error stopping LL-HLS packager for stream {self.stream_key}: {str(e)}")
+            self.process = None
+
+        self._stop_event.set()
+        if self.tail_thread:
+            self.tail_thread.join(timeout=5)
+            self.tail_thread = None
+
+        self.end()
+        if remove_files:
+            shutil.rmtree(self.output_directory, ignore_errors=True)
+
+    def add_part(self, uri: str, duration: float, keyframe: Optional[bool] = None):
+        """
+        Publish a finished part.
+
+        Args:
+            uri (str): File name of the part in the output directory.
+            duration (float): Duration of the part in seconds.
+            keyframe (bool, optional): Whether the part starts with a keyframe;
+                None if unknown, in which case the first part of each segment
+                is assumed to.
+        """
+        with self._segment_lock:
+            with self._lock:
+                buffered = sum(part["duration"] for part in self.current_parts)
+            # Start a new segment on a keyframe once the current one is long enough
+            if (keyframe and buffered >= self.segment_duration - 1e-6) or \
+                    buffered >= self.max_segment_duration - 1e-6:
+                self._close_segment()
+
+            with self._lock:
+                self.current_parts.append({
+                    "uri": uri,
+                    "duration": duration,
+                    "independent": keyframe if keyframe is not None else not self.current_parts
+                })
+                self.next_part_number += 1
+                buffered = sum(part["duration"] for part in self.current_parts)
+                waiters, self._waiters = self._waiters, []
+
+            self._notify(waiters)
+
+            if keyframe is None and buffered >= self.segment_duration - 1e-6:
+                self._close_segment()
+
+    def end(self):
+        """Close the last segment and mark the playlist as ended."""
+        with self._segment_lock:
+            if self.ended:
+                return
+            self._close_segment()
+            with self._lock:
+                self.ended = True
+                waiters, self._waiters = self._waiters, []
+
+        self._notify(waiters)
+
+    def has_part(self, msn: int, part: Optional[int] = None) -> bool:
+        """
+        Check whether a blocking playlist request can be answered.
+
+        Args:
+            msn (int): Media sequence number requested.
+            part (int, optional): Part index within that segment.
+
+        Returns:
+            bool: True if the segment (or part) is in the playlist.
+        """
+        with self._lock:
+            if self.ended or msn < self.next_sequence:
+                return True
+            if msn == self.next_sequence and part is not None:
+                return part < len(self.current_parts)
+            return False
+
+    def add_waiter(self, callback: Callable[[], None]):
+        """
+        Call a function once after the next playlist update.
+
+        Args:
+            callback (Callable[[], None]): Function to call; it runs on the
+                packager thread and must not block.
+        """
+        with self._lock:
+            call_now = self.ended
+            if not call_now:
+                self._waiters.append(callback)
+        if call_now:
+            callback()
+
+    def playlist(self) -> str:
+        """
+        Render the media playlist.
+
+        Returns:
+            str: M3U8 playlist.
+        """
+        with self._lock:
+            segments = list(self.segments)[-self.playlist_segments:]
+            current_parts = list(self.current_parts)
+            ended = self.ended
+            next_part_number = self.next_part_number
+
+        target_duration = max(
+            [math.ceil(self.segment_duration)] + [math.ceil(segment["duration"]) for segment in segments]
+        )
+        lines = [
+            "#EXTM3U",
+            "#EXT-X-VERSION:9",
+            f"#EXT-X-TARGETDURATION:{target_duration}",
+            f"#EXT-X-SERVER-CONTROL:CAN-BLOCK-RELOAD=YES,PART-HOLD-BACK={3 * self.part_duration:.3f}",
+            f"#EXT-X-PART-INF:PART-TARGET={self.part_duration:.3f}",
+            f"#EXT-X-MEDIA-SEQUENCE:{segments[0]['sequence'] if segments else self.next_sequence}"
+        ]
+
+        # Parts are only listed near the live edge
+        for i, segment in enumerate(segments):
+            if not ended and i >= len(segments) - 2:
+                lines.extend(self._part_lines(segment["parts"]))
+            lines.append(f"#EXTINF:{segment['duration']:.3f},")
+            lines.append(self.uri_prefix + segment["uri"])
+
+        if ended:
+            lines.append("#EXT-X-ENDLIST")
+        else:
+            lines.extend(self._part_lines(current_parts))
+            lines.append(f'#EXT-X-PRELOAD-HINT:TYPE=PART,URI="{self.uri_prefix}{PART_PATTERN % next_part_number}"')
+
+        return "\n".join(lines) + "\n"
+
+    def is_preload_hint(self, file_name: str) -> bool:
+        """Check whether a file name is the part announced by the preload hint."""
+        with self._lock:
+            return not self.ended and file_name == PART_PATTERN % self.next_part_number
+
+    @staticmethod
+    def _notify(waiters: List[Callable[[], None]]):
+        """Call waiters, isolating them from each other's errors."""
+        for callback in waiters:
+            try:
+                callback()
+            except Exception as e:
+                logger.debug(f"LL-HLS waiter failed: {str(e)}")
+
+    def _part_lines(self, parts: List[Dict[str, Any]]) -> List[str]:
+        """Render EXT-X-PART tags."""
+        lines = []
+        for part in parts:
+            line = f'#EXT-X-PART:DURATION={part["duration"]:.3f},URI="{self.uri_prefix}{part["uri"]}"'
+            if part["independent"]:
+                line += ",INDEPENDENT=YES"
+            lines.append(line)
+        return lines
+
+    def _close_segment(self):
+        """
+        Turn the current parts into a segment.
+
+        Called with the segment lock held, so the parts cannot change while
+        the segment file is written outside the playlist lock; the parts stay
+        in the playlist as partial segments until the segment is published.
+        """
+        with self._lock:
+            parts = list(self.current_parts)
+            sequence = self.next_sequence
+        if not parts:
+            return
+        segment_uri = SEGMENT_PATTERN % sequence
+
+        # MPEG-TS parts concatenate into a valid segment
+        try:
+            with open(os.path.join(self.output_directory, segment_uri), "wb") as segment_file:
+                for part in parts:
+                    with open(os.path.join(self.output_directory, part["uri"]), "rb") as part_file:
+                        shutil.copyfileobj(part_file, segment_file)
+        except OSError as e:
+            logger.error(f"Error writing LL-HLS segment {segment_uri} for stream {self.stream_key}: {str(e)}")
+
+        expired = []
+        with self._lock:
+            self.segments.append({
+                "sequence": sequence,
+                "uri": segment_uri,
+                "duration": sum(part["duration"] for part in parts),
+                "parts": parts
+            })
+            self.next_sequence += 1
+            self.current_parts = self.current_parts[len(parts):]
+
+            # Keep a couple of segments beyond the playlist for clients that lag
+            while len(self.segments) > self.playlist_segments + 2:
+                expired.append(self.segments.popleft())
+            waiters, self._waiters = self._waiters, []
+
+        self._notify(waiters)
+
+        for segment in expired:
+            for name in [segment["uri"]] + [part["uri"] for part in segment["parts"]]:
+                try:
+                    os.remove(os.path.join(self.output_directory, name))
+                except OSError:
+                    pass
+
+    def _read_part_list(self):
+        """Publish parts appended to the part list since the last read."""
+        path = os.path.join(self.output_directory, PART_LIST)
+        try:
+            with open(path, "r") as f:
+                f.seek(self._list_offset)
+                data = f.read()
+        except OSError:
+            return
+
+        # Only consume complete lines; FFmpeg may be mid-write
+        complete = data[:data.rfind("\n") + 1]
+        self._list_offset += len(complete.encode("utf-8"))
+        for line in complete.splitlines():
+            fields = line.strip().split(",")
+            if len(fields) < 3:
+                continue
+            try:
+                duration = float(fields[2]) - float(fields[1])
+            except ValueError:
+                continue
+            self.add_part(fields[0], duration, starts_with_keyframe(os.path.join(self.output_directory, fields[0])))
+
+    def _tail_loop(self):
+        """Poll the part list until stopped."""
+        while not self._stop_event.wait(self.poll_interval):
+            try:
+                self._read_part_list()
+            except Exception as e:
+                logger.error(f"Error reading LL-HLS parts for stream {self.stream_key}: {str(e)}")
+        self._read_part_list()
@@ -3,14 +3,29 @@ Media server module for handling streaming, recording, and VOD functionality.
 """
 
 import logging
-import requests
+import math
 import json
 import os
+import shutil
 import time
 import subprocess
 import threading
 import asyncio
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, List, Optional, Callable
+from urllib.parse import quote
+
+from ..utils.hashing import ContentHasher, DEFAULT_CHUNK_SIZE
+from ..utils.http_client import get_http_client
+from .access_log import AccessLogAnalytics
+from .keyframes import KeyframeIndex
+from .llhls import LowLatencyHlsPackager
+from .restream import RestreamManager
+from .storage import StorageManager
+from .transcoder import ChunkedTranscoder, write_concat_list
+from .vod_catalog import VodCatalog
+from .vod_origin import VodOriginServer
 
 logger = logging.getLogger(__name__)
 
@@ -20,25 +35,95 @@ class MediaServer:
     and video-on-demand functionality.
     """
     
-    def __init__(self, config: Dict[str, Any]):
+    def __init__(self, config: Dict[str, Any], http_client=None):
         """
         Initialize the media server.
         
         Args:
             config (Dict[str, Any]): Configuration for media server.
+            http_client (HttpClient, optional): HTTP client for control-plane calls.
         """
         self.config = config
+        self.http_client = http_client or get_http_client()
         self.server_url = config.get("server_url", "https://media.example.com")
         self.rtmp_port = config.get("rtmp_port", 1935)
         self.hls_segment_duration = config.get("hls_segment_duration", 4)
+        # Segment URLs in playlist manifests; {start} and {end} are also
+        # available for packagers that cut segments on request
+        self.vod_segment_url = config.get("vod_segment_url", "{server_url}/hls/vod/{vod_id}/{index:05d}.ts")
+        # Cut processed VODs into HLS segments under hls_directory for playlist manifests
+        self.vod_hls_enabled = config.get("vod_hls_enabled", True)
         self.recording_enabled = config.get("recording_enabled", True)
         self.recording_directory = config.get("recording_directory", "/var/recordings")
+        self.transcoder = ChunkedTranscoder(config.get("transcoder", {}))
+        
+        # Trickplay (scrub preview) settings
+        self.trickplay_enabled = config.get("trickplay_enabled", True)
+        self.trickplay_interval = config.get("trickplay_interval", 10)
+        self.trickplay_width = config.get("trickplay_width", 160)
+        self.trickplay_height = config.get("trickplay_height", 90)
+        self.trickplay_columns = config.get("trickplay_columns", 10)
+        self.trickplay_rows = config.get("trickplay_rows", 10)
+        
+        # Low-latency HLS: partial segments and blocking playlist reloads
+        self.hls_directory = config.get("hls_directory", os.path.join(self.recording_directory, "hls"))
+        self.llhls_config = dict(config.get("llhls", {}))
+        self.llhls_config.setdefault("segment_duration", self.hls_segment_duration)
+        self.llhls_enabled = self.llhls_config.get("enabled", False)
+        self.llhls_packagers = {}
+        
+        # Post-recording stage, run on the clip workers
+        self.faststart_enabled = config.get("faststart_enabled", True)
+        self.keyframe_index_enabled = config.get("keyframe_index_enabled", True)
+        self.finalize_jobs = {}
+        # VOD ID -> job processing a stopped stream's recording into a VOD
+        self.recording_jobs = {}
+        
+        # Clipping: recordings also write short segments so clips can be cut while live
+        self.live_clip_enabled = config.get("live_clip_enabled", True)
+        self.live_segment_duration = config.get("live_segment_duration", 2)
+        self.clip_workers = config.get("clip_workers", 2)
+        self.clip_queue_size = config.get("clip_queue_size", 32)
+        self.clip_executor = None
+        self.clip_jobs = {}
+        self.segment_users = {}
+        self._clip_lock = threading.Lock()
+        
+        # Content-addressed deduplication of ingested files
+        self.dedup_enabled = config.get("dedup_enabled", True)
+        self.content_hasher = ContentHasher(
+            config.get("dedup_chunk_size", DEFAULT_CHUNK_SIZE),
+            config.get("dedup_use_mmap", False)
+        )
+        self.content_index = {}
+        self.dedup_stats = {"ingests": 0, "duplicates": 0, "bytes_ingested": 0, "bytes_deduplicated": 0}
+        self._dedup_lock = threading.Lock()
         
         # Streaming management
         self.active_streams = {}
         self.vod_entries = {}
         self.recording_processes = {}
         
+        # Source stream key -> VOD ID, kept in step with vod_entries
+        self.stream_vod_index = {}
+        
+        # Persistent VOD catalog; vod_entries then acts as a cache in front of it
+        catalog_path = config.get("catalog_path")
+        self.catalog = VodCatalog(catalog_path) if catalog_path else None
+        
+        # Optional built-in HTTP origin for VOD files, thumbnails and HLS
+        self.origin_config = config.get("origin", {})
+        self.origin = None
+        
+        # Recording retention
+        self.storage = StorageManager(self, config.get("storage", {}))
+        
+        # Simulcast to external RTMP/SRT destinations
+        self.restream = RestreamManager(self, config.get("restream", {}))
+        
+        # Per-stream and per-VOD traffic from origin access logs
+        self.analytics = AccessLogAnalytics(config.get("analytics", {}))
+        
         # Connection status
         self.connected = False
         
@@ -46,6 +131,11 @@ class MediaServer:
         self.on_stream_started = None
         self.on_stream_ended = None
         self.on_recording_completed = None
+        # Called with a VOD ID whenever that entry is saved or deleted
+        self.on_vod_changed = None
+        
+        # Returns the generated HLS manifest for a playlist ID, set by the VOD controller
+        self.playlist_manifest_provider = None
     
     def initialize(self) -> bool:
         """
@@ -56,7 +146,7 @@ class MediaServer:
         """
         try:
             # Test connection to media server
-            response = requests.get(f"{self.server_url}/api/status", timeout=5)
+            response = self.http_client.get(f"{self.server_url}/api/status", timeout=5)
             if response.status_code == 200:
                 logger.info(f"Successfully connected to media server at {self.server_url}")
                 self.connected = True
@@ -65,6 +155,15 @@ class MediaServer:
                 if self.recording_enabled and not os.path.exists(self.recording_directory):
                     os.makedirs(self.recording_directory, exist_ok=True)
                 
+                if self.recording_enabled:
+                    self.storage.start()
+                
+                if self.origin_config.get("enabled"):
+                    self.start_origin()
+                
+                if self.analytics.access_logs:
+                    self.analytics.start()
+                
                 return True
             else:
                 logger.error(f"Failed to connect to media server: {response.status_code}")
@@ -73,6 +172,15 @@ class MediaServer:
             logger.error(f"Error connecting to media server: {str(e)}")
             return False
     
+    def is_healthy(self) -> bool:
+        """
+        Check whether the media server is reachable, using a cached result.
+        
+        Returns:
+            bool: True if the status endpoint answers, False otherwise.
+        """
+        return self.http_client.check_health(f"{self.server_url}/api/status")
+    
     def create_stream(self, stream_name: str, stream_type: str = "live") -> Dict[str, Any]:
         """
         Create a new stream.
@@ -96,6 +204,8 @@ class MediaServer:
             "hls_url": f"{self.server_url}/hls/{stream_key}.m3u8",
             "recording_path": None
         }
+        if self.llhls_enabled:
+            stream_info["llhls_url"] = f"{self.server_url}/llhls/{quote(stream_key)}.m3u8"
         
         # Set recording path if applicable
         if stream_type in ["record", "live_record"] and self.recording_enabled:
@@ -122,12 +232,20 @@ class MediaServer:
             
             # Start recording if needed
             if stream_info["type"] in ["record", "live_record"] and self.recording_enabled:
+                # Refuse up front rather than run out of disk mid-broadcast
+                if not self.storage.can_record():
+                    logger.error(f"Failed to start stream {stream_key}: not enough storage to record")
+                    return False
                 self._start_recording(stream_key)
             
             # Update stream status
             stream_info["status"] = "active"
             stream_info["started_at"] = time.time()
             
+            self.restream.start(stream_key)
+            if self.llhls_enabled:
+                self._start_llhls(stream_key)
+            
             # Trigger callback if set
             if self.on_stream_started:
                 self.on_stream_started(stream_info)
@@ -155,6 +273,12 @@ class MediaServer:
             if stream_key in self.recording_processes:
                 self._stop_recording(stream_key)
             
+            with self._clip_lock:
+                finalizing = self.finalize_jobs.get(stream_key)
+            
+            self.restream.stop(stream_key)
+            self._stop_llhls(stream_key)
+            
             # Update stream status
             stream_info["status"] = "stopped"
             stream_info["ended_at"] = time.time()
@@ -169,8 +293,18 @@ class MediaServer:
                     "created_at": time.time(),
                     "duration": stream_info.get("ended_at", time.time()) - stream_info.get("started_at", time.time()),
                     "file_path": stream_info["recording_path"],
-                    "url": f"{self.server_url}/vod/{vod_id}.mp4"
+                    "url": f"{self.server_url}/vod/{vod_id}.mp4",
+                    "status": "processing"
                 }
+                self.stream_vod_index[stream_key] = vod_id
+                self._save_vod_entry(vod_id)
+                
+                # Thumbnails, trickplay and HLS segments are made once the file is final;
+                # the callback runs straight away if finalization has already finished
+                if finalizing:
+                    finalizing.add_done_callback(lambda job: self._recording_finalized(vod_id))
+                else:
+                    self._recording_finalized(vod_id)
                 
                 logger.info(f"Created VOD entry for stream: {stream_info['name']} ({vod_id})")
             
@@ -205,13 +339,18 @@ class MediaServer:
         """
         return [stream for stream in self.active_streams.values() if stream["status"] == "active"]
     
-    def create_vod_entry(self, name: str, file_path: str) -> Dict[str, Any]:
+    def create_vod_entry(self, name: str, file_path: str, source_stream: Optional[str] = None) -> Dict[str, Any]:
         """
         Create a VOD entry manually from a file.
         
+        The file is hashed while it is processed; if its content is already
+        stored, it is replaced with a hard link to the existing file and the
+        entry records the original in ``duplicate_of``.
+        
         Args:
             name (str): Name for the VOD entry.
             file_path (str): Path to video file.
+            source_stream (str, optional): Key of the stream the file was recorded from.
             
         Returns:
             Dict[str, Any]: VOD entry information.
@@ -225,7 +364,7 @@ class MediaServer:
         vod_info = {
             "id": vod_id,
             "name": name,
-            "source_stream": None,
+            "source_stream": source_stream,
             "created_at": time.time(),
             "duration": None,  # Will be set after processing
             "file_path": file_path,
@@ -233,11 +372,14 @@ class MediaServer:
             "status": "processing"
         }
         
-        # Start a thread to process the file (get duration, create thumbnails, etc.)
-        threading.Thread(target=self._process_vod_file, args=(vod_id, file_path)).start()
-        
         # Add to VOD entries
         self.vod_entries[vod_id] = vod_info
+        if source_stream:
+            self.stream_vod_index[source_stream] = vod_id
+        self._save_vod_entry(vod_id)
+        
+        # Start a thread to process the file (hash, get duration, create thumbnails, etc.)
+        threading.Thread(target=self._process_vod_file, args=(vod_id, file_path)).start()
         
         logger.info(f"Created VOD entry: {name} ({vod_id})")
         return vod_info
@@ -252,16 +394,147 @@ class MediaServer:
         Returns:
             Optional[Dict[str, Any]]: VOD entry information or None if not found.
         """
-        return self.vod_entries.get(vod_id)
+        vod_info = self.vod_entries.get(vod_id)
+        
+        # Fall back to the catalog for entries not loaded since startup
+        if vod_info is None and self.catalog:
+            vod_info = self.catalog.get(vod_id)
+            if vod_info is not None:
+                self.vod_entries[vod_id] = vod_info
+        
+        return vod_info
     
-    def list_vod_entries(self) -> List[Dict[str, Any]]:
+    def get_vod_infos(self, vod_ids: List[str]) -> Dict[str, Dict[str, Any]]:
         """
-        List all VOD entries.
+        Get information about several VOD entries at once.
         
+        Args:
+            vod_ids (List[str]): IDs of the VOD entries.
+            
+        Returns:
+            Dict[str, Dict[str, Any]]: VOD entry information keyed by ID;
+            unknown IDs are omitted.
+        """
+        found = {}
+        missing = []
+        
+        for vod_id in vod_ids:
+            vod_info = self.vod_entries.get(vod_id)
+            if vod_info is not None:
+                found[vod_id] = vod_info
+            else:
+                missing.append(vod_id)
+        
+        # One catalog query for entries not loaded since startup
+        if missing and self.catalog:
+            for vod_id, vod_info in self.catalog.get_many(missing).items():
+                found[vod_id] = self.vod_entries.setdefault(vod_id, vod_info)
+        
+        return found
+    
+    def list_vod_entries(self, limit: Optional[int] = None, cursor: Optional[str] = None,
+                         source_stream: Optional[str] = None, status: Optional[str] = None,
+                         name: Optional[str] = None, created_after: Optional[float] = None,
+                         created_before: Optional[float] = None,
+                         descending: bool = False) -> List[Dict[str, Any]]:
+        """
+        List VOD entries, optionally filtered and paginated.
+        
+        Entries are ordered by creation time. To fetch the next page, pass the
+        ID of the last entry of the current page as ``cursor``.
+        
+        Args:
+            limit (int, optional): Maximum number of entries to return.
+            cursor (str, optional): ID of the last entry of the previous page.
+            source_stream (str, optional): Only entries recorded from this stream.
+            status (str, optional): Only entries with this status.
+            name (str, optional): Only entries with this name.
+            created_after (float, optional): Only entries created at or after this time.
+            created_before (float, optional): Only entries created before this time.
+            descending (bool): Newest entries first.
+            
         Returns:
             List[Dict[str, Any]]: List of VOD entry information.
         """
-        return list(self.vod_entries.values())
+        if self.catalog:
+            entries = self.catalog.query(limit, cursor, source_stream, status, name,
+                                         created_after, created_before, descending)
+            # Prefer live cached objects so in-flight updates are visible
+            return [self.vod_entries.get(entry["id"], entry) for entry in entries]
+        
+        filters = (limit, cursor, source_stream, status, name, created_after, created_before)
+        if all(value is None for value in filters) and not descending:
+            return list(self.vod_entries.values())
+        
+        entries = [
+            entry for entry in self.vod_entries.values()
+            if (source_stream is None or entry.get("source_stream") == source_stream)
+            and (status is None or entry.get("status") == status)
+            and (name is None or entry.get("name") == name)
+            and (created_after is None or (entry.get("created_at") or 0) >= created_after)
+            and (created_before is None or (entry.get("created_at") or 0) < created_before)
+        ]
+        
+        def sort_key(entry):
+            return (entry.get("created_at") or 0, entry["id"])
+        
+        entries.sort(key=sort_key, reverse=descending)
+        
+        if cursor:
+            cursor_entry = self.vod_entries.get(cursor)
+            # An unknown cursor ends the listing, as it does in the catalog
+            if cursor_entry is None:
+                return []
+            cursor_key = sort_key(cursor_entry)
+            entries = [
+                entry for entry in entries
+                if (sort_key(entry) < cursor_key if descending else sort_key(entry) > cursor_key)
+            ]
+        
+        return entries[:limit] if limit is not None else entries
+    
+    def get_vod_for_stream(self, stream_key: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the VOD entry recorded from a stream.
+        
+        Args:
+            stream_key (str): Key of the source stream.
+            
+        Returns:
+            Optional[Dict[str, Any]]: VOD entry information or None if not found.
+        """
+        return self.get_vods_for_streams([stream_key]).get(stream_key)
+    
+    def get_vods_for_streams(self, stream_keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the VOD entries recorded from several streams at once.
+        
+        Args:
+            stream_keys (List[str]): Keys of the source streams.
+            
+        Returns:
+            Dict[str, Dict[str, Any]]: VOD entry information keyed by stream key;
+            streams without a recording are omitted.
+        """
+        found = {}
+        missing = []
+        
+        for stream_key in stream_keys:
+            vod_id = self.stream_vod_index.get(stream_key)
+            vod_info = self.get_vod_info(vod_id) if vod_id else None
+            if vod_info:
+                found[stream_key] = vod_info
+            else:
+                missing.append(stream_key)
+        
+        # Entries recorded before a restart are only in the catalog
+        if missing and self.catalog:
+            for stream_key, vod_info in self.catalog.find_by_source_streams(missing).items():
+                vod_info = self.vod_entries.setdefault(vod_info["id"], vod_info)
+                self.stream_vod_index[stream_key] = vod_info["id"]
+                found[stream_key] = vod_info
+        
+        return found
     
     def configure_ad_settings(self, vod_id: str, ad_config: Dict[str, Any]) -> bool:
         """
@@ -274,7 +547,7 @@ class MediaServer:
         Returns:
             bool: True if successful, False otherwise.
         """
-        if vod_id in self.vod_entries:
+        if self.get_vod_info(vod_id):
             # Save ad configuration
             self.vod_entries[vod_id]["ad_config"] = {
                 "pre_roll": ad_config.get("pre_roll", []),
@@ -282,6 +555,7 @@ class MediaServer:
                 "post_roll": ad_config.get("post_roll", []),
                 "custom": ad_config.get("custom", [])
             }
+            self._save_vod_entry(vod_id)
             
             logger.info(f"Configured ad settings for VOD: {vod_id}")
             return True
@@ -300,7 +574,7 @@ class MediaServer:
         Returns:
             bool: True if successful, False otherwise.
         """
-        if vod_id in self.vod_entries:
+        if self.get_vod_info(vod_id):
             vod_info = self.vod_entries[vod_id]
             
             # Delete physical file if requested
@@ -313,6 +587,18 @@ class MediaServer:
             
             # Remove from VOD entries
             del self.vod_entries[vod_id]
+            source_stream = vod_info.get("source_stream")
+            if source_stream and self.stream_vod_index.get(source_stream) == vod_id:
+                del self.stream_vod_index[source_stream]
+            content_hash = vod_info.get("content_hash")
+            if content_hash and self.content_index.get(content_hash) == vod_id:
+                del self.content_index[content_hash]
+            if self.catalog:
+                self.catalog.delete(vod_id)
+            self.storage.untrack_vod(vod_id)
+            shutil.rmtree(self._vod_segment_directory(vod_id), ignore_errors=True)
+            if self.on_vod_changed:
+                self.on_vod_changed(vod_id)
             
             logger.info(f"Deleted VOD entry: {vod_id}")
             return True
@@ -320,6 +606,211 @@ class MediaServer:
         logger.warning(f"Failed to delete VOD entry: {vod_id} not found")
         return False
     
+    def get_dedup_stats(self) -> Dict[str, Any]:
+        """
+        Get content deduplication statistics for ingested files.
+        
+        Returns:
+            Dict[str, Any]: Ingest counts, bytes ingested and stored, and the
+            dedup ratio (bytes ingested per byte stored).
+        """
+        stats = dict(self.dedup_stats)
+        stats["unique"] = stats["ingests"] - stats["duplicates"]
+        stats["bytes_stored"] = stats["bytes_ingested"] - stats["bytes_deduplicated"]
+        stats["ratio"] = stats["bytes_ingested"] / stats["bytes_stored"] if stats["bytes_stored"] else 1.0
+        stats["files_hashed"] = self.content_hasher.files_hashed
+        stats["bytes_hashed"] = self.content_hasher.bytes_hashed
+        stats["hash_cache_hits"] = self.content_hasher.cache_hits
+        return stats
+    
+    def get_stream_analytics(self, stream_key: str, start: Optional[float] = None,
+                             end: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Get bandwidth, rendition mix and concurrency of a live stream from the access logs.
+        
+        Args:
+            stream_key (str): Key of the stream.
+            start (float, optional): Unix time to start from.
+            end (float, optional): Unix time to end at.
+            
+        Returns:
+            Optional[Dict[str, Any]]: Time-bucketed traffic or None if the stream has no logged traffic.
+        """
+        return self.analytics.query("stream", stream_key, start, end)
+    
+    def get_vod_analytics(self, vod_id: str, start: Optional[float] = None,
+                          end: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Get bandwidth, rendition mix and concurrency of a VOD from the access logs.
+        
+        Args:
+            vod_id (str): ID of the VOD entry.
+            start (float, optional): Unix time to start from.
+            end (float, optional): Unix time to end at.
+            
+        Returns:
+            Optional[Dict[str, Any]]: Time-bucketed traffic or None if the VOD has no logged traffic.
+        """
+        return self.analytics.query("vod", vod_id, start, end)
+    
+    def start_origin(self, host: Optional[str] = None, port: Optional[int] = None) -> bool:
+        """
+        Start the built-in HTTP origin serving files under the recording directory.
+        
+        Args:
+            host (str, optional): Host to bind to.
+            port (int, optional): Port to bind to.
+            
+        Returns:
+            bool: True if started, False otherwise.
+        """
+        if self.origin and self.origin.is_running:
+            logger.warning("VOD origin server is already running")
+            return False
+        
+        origin_config = dict(self.origin_config)
+        if host is not None:
+            origin_config["host"] = host
+        if port is not None:
+            origin_config["port"] = port
+        
+        self.origin = VodOriginServer(self, origin_config)
+        return self.origin.start()
+    
+    def transcode_file(self, input_path: str, output_path: str,
+                       video_args: Optional[List[str]] = None,
+                       audio_args: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Transcode a file in parallel chunks across all CPU cores.
+        
+        Args:
+            input_path (str): Path to input file.
+            output_path (str): Path to output file.
+            video_args (List[str], optional): FFmpeg video encoding arguments.
+            audio_args (List[str], optional): FFmpeg audio encoding arguments.
+            
+        Returns:
+            Dict[str, Any]: Transcode result information.
+        """
+        return self.transcoder.transcode(input_path, output_path, video_args, audio_args)
+    
+    def create_clip(self, source: str, start: float, end: float,
+                    name: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Cut a clip into a new VOD entry without re-encoding.
+        
+        The clip starts on the keyframe at or before ``start``. Clips of a
+        stream that is still recording are cut from its live segments,
+        otherwise from the finished file. The cut runs on a bounded worker
+        pool; the entry is "processing" until it completes and the job is
+        available in clip_jobs meanwhile.
+        
+        Args:
+            source (str): VOD ID or stream key to clip from.
+            start (float): Start time in seconds.
+            end (float): End time in seconds.
+            name (str, optional): Name for the clip.
+            
+        Returns:
+            Optional[Dict[str, Any]]: Clip VOD entry, or None if the clip queue is full.
+            
+        Raises:
+            ValueError: If the time range is invalid or the source is unknown.
+        """
+        if start < 0 or end <= start:
+            raise ValueError(f"Invalid clip range: {start}-{end}")
+        
+        # Resolved up front so the catalog is not read under the lock
+        source_vod = self.get_vod_info(source) or self.get_vod_for_stream(source)
+        vod_id = f"vod-clip-{uuid.uuid4().hex[:12]}"
+        
+        # The queue bound is checked and the job registered in one critical section,
+        # so concurrent callers cannot overshoot it
+        with self._clip_lock:
+            if len(self.clip_jobs) >= self.clip_queue_size:
+                logger.warning(f"Clip queue full, rejecting clip of {source}")
+                return None
+            # Checked under the lock that releases the segments, so they cannot go away in between
+            live = source in self.recording_processes and bool(
+                self.active_streams.get(source, {}).get("segment_directory")
+            )
+            
+            file_path = None
+            source_stream = source if source in self.active_streams else None
+            if not live:
+                if not source_vod or not source_vod.get("file_path"):
+                    raise ValueError(f"Unknown clip source: {source}")
+                file_path = source_vod["file_path"]
+                source_stream = source_vod.get("source_stream")
+            
+            vod_info = {
+                "id": vod_id,
+                "name": name or f"Clip of {source}",
+                "source_stream": source_stream,
+                "clip_of": source,
+                "clip_start": start,
+                "clip_end": end,
+                "created_at": time.time(),
+                "duration": None,
+                "file_path": os.path.join(self.recording_directory, f"{vod_id}.mp4"),
+                "url": f"{self.server_url}/vod/{vod_id}.mp4",
+                "status": "processing"
+            }
+            self.vod_entries[vod_id] = vod_info
+            # Saved before the job can update the entry
+            self._save_vod_entry(vod_id)
+            
+            if live:
+                self.segment_users[source] = self.segment_users.get(source, 0) + 1
+            self.clip_jobs[vod_id] = self._get_clip_executor().submit(
+                self._run_clip_job, vod_id, source, live, file_path, start, end
+            )
+        
+        logger.info(f"Queued clip {vod_id} of {source} ({start}-{end}s)")
+        return vod_info
+    
+    def add_restream_target(self, stream_key: str, url: str, name: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Send a stream to an external RTMP/SRT destination as well.
+        
+        Args:
+            stream_key (str): Key of the stream.
+            url (str): Destination URL.
+            name (str, optional): Display name for the destination.
+            
+        Returns:
+            Dict[str, Any]: Target information.
+            
+        Raises:
+            ValueError: If the stream does not exist or the URL is not supported.
+        """
+        return self.restream.add_target(stream_key, url, name)
+    
+    def remove_restream_target(self, stream_key: str, target_id: str) -> bool:
+        """
+        Stop sending a stream to a destination.
+        
+        Args:
+            stream_key (str): Key of the stream.
+            target_id (str): ID of the target.
+            
+        Returns:
+            bool: True if successful, False otherwise.
+        """
+        return self.restream.remove_target(stream_key, target_id)
+    
+    def get_restream_targets(self, stream_key: str) -> List[Dict[str, Any]]:
+        """
+        Get a stream's destinations with their health and statistics.
+        
+        Args:
+            stream_key (str): Key of the stream.
+            
+        Returns:
+            List[Dict[str, Any]]: Target information.
+        """
+        return self.restream.get_targets(stream_key)
+    
     def _start_recording(self, stream_key: str):
         """
         Start recording a stream using FFmpeg.
@@ -343,10 +834,28 @@ class MediaServer:
                 "ffmpeg",
                 "-i", stream_info["rtmp_url"],
                 "-c:v", "copy",
-                "-c:a", "copy",
-                output_path
+                "-c:a", "copy"
             ]
             
+            if self.live_clip_enabled:
+                # Tee the same packets into the MP4 and into keyframe-aligned
+                # segments that can be clipped while the stream is still live
+                segment_directory = os.path.join(self.recording_directory, f"{stream_key}_segments")
+                os.makedirs(segment_directory, exist_ok=True)
+                segment_list = os.path.join(segment_directory, "segments.csv")
+                stream_info["segment_directory"] = segment_directory
+                
+                ffmpeg_cmd += [
+                    "-map", "0",
+                    "-f", "tee",
+                    f"[f=mp4]{output_path}|"
+                    f"[f=segment:segment_time={self.live_segment_duration}:segment_format=mpegts:"
+                    f"segment_list={segment_list}:segment_list_type=csv]"
+                    f"{os.path.join(segment_directory, '%06d.ts')}"
+                ]
+            else:
+                ffmpeg_cmd.append(output_path)
+            
             # Start FFmpeg process
             process = subprocess.Popen(
                 ffmpeg_cmd,
@@ -361,6 +870,48 @@ class MediaServer:
         except Exception as e:
             logger.error(f"Error starting recording for stream {stream_key}: {str(e)}")
     
+    def get_llhls_packager(self, stream_key: str) -> Optional[LowLatencyHlsPackager]:
+        """
+        Get the LL-HLS packager of a live stream.
+        
+        Args:
+            stream_key (str): Key of the stream.
+            
+        Returns:
+            Optional[LowLatencyHlsPackager]: The packager or None if the stream is not packaged.
+        """
+        return self.llhls_packagers.get(stream_key)
+    
+    def _start_llhls(self, stream_key: str):
+        """
+        Start LL-HLS packaging for a stream.
+        
+        Args:
+            stream_key (str): Key of the stream to package.
+        """
+        if stream_key in self.llhls_packagers:
+            return
+        
+        stream_info = self.active_streams[stream_key]
+        packager = LowLatencyHlsPackager(
+            stream_key,
+            os.path.join(self.hls_directory, f"{stream_key}_ll"),
+            self.llhls_config
+        )
+        if packager.start(stream_info["rtmp_url"]):
+            self.llhls_packagers[stream_key] = packager
+    
+    def _stop_llhls(self, stream_key: str):
+        """
+        Stop LL-HLS packaging for a stream.
+        
+        Args:
+            stream_key (str): Key of the stream.
+        """
+        packager = self.llhls_packagers.pop(stream_key, None)
+        if packager:
+            packager.stop()
+    
     def _stop_recording(self, stream_key: str):
         """
         Stop recording a stream.
@@ -386,15 +937,331 @@ class MediaServer:
                 # Remove from recording processes
                 del self.recording_processes[stream_key]
                 
-                # Trigger callback if set
-                if self.on_recording_completed and stream_key in self.active_streams:
-                    stream_info = self.active_streams[stream_key]
-                    self.on_recording_completed(stream_info)
+                stream_info = self.active_streams.get(stream_key)
+                if stream_info is not None:
+                    self._release_segments(stream_key)
+                    
+                    # Make the file playable straight away and seekable by keyframe in the
+                    # background; the recording is complete once that has finished
+                    recording_path = stream_info.get("recording_path")
+                    if (self.faststart_enabled or self.keyframe_index_enabled) and \
+                            recording_path and os.path.exists(recording_path):
+                        with self._clip_lock:
+                            self.finalize_jobs[stream_key] = self._get_clip_executor().submit(
+                                self._run_finalize_job, stream_key, stream_info
+                            )
+                    elif self.on_recording_completed:
+                        self.on_recording_completed(stream_info)
                 
                 logger.info(f"Stopped recording for stream: {stream_key}")
             except Exception as e:
                 logger.error(f"Error stopping recording for stream {stream_key}: {str(e)}")
 
+    def _get_clip_executor(self) -> ThreadPoolExecutor:
+        """
+        Get the worker pool for clips and recording finalization, creating it on first use.
+        
+        Must be called with the clip lock held.
+        
+        Returns:
+            ThreadPoolExecutor: Worker pool.
+        """
+        if self.clip_executor is None:
+            self.clip_executor = ThreadPoolExecutor(max_workers=self.clip_workers,
+                                                    thread_name_prefix="clip")
+        return self.clip_executor
+    
+    def _run_finalize_job(self, stream_key: str, stream_info: Dict[str, Any]):
+        """
+        Finalize a stopped recording and report it as completed.
+        
+        Args:
+            stream_key (str): Key of the recorded stream.
+            stream_info (Dict[str, Any]): Information about the recorded stream.
+        """
+        try:
+            self._finalize_recording(stream_info)
+            if self.on_recording_completed:
+                self.on_recording_completed(stream_info)
+        except Exception as e:
+            logger.error(f"Error finalizing recording for stream {stream_key}: {str(e)}")
+        finally:
+            with self._clip_lock:
+                self.finalize_jobs.pop(stream_key, None)
+    
+    def _recording_finalized(self, vod_id: str):
+        """
+        Process the VOD file of a finalized recording on the clip workers.
+        
+        Args:
+            vod_id (str): ID of the VOD entry.
+        """
+        vod_info = self.vod_entries.get(vod_id)
+        if not vod_info or vod_info["status"] != "processing":
+            return
+        
+        try:
+            with self._clip_lock:
+                self.recording_jobs[vod_id] = self._get_clip_executor().submit(
+                    self._run_recording_job, vod_id, vod_info["file_path"]
+                )
+        except RuntimeError:
+            # The workers are shutting down; this runs on the worker that finalized the file
+            self._run_recording_job(vod_id, vod_info["file_path"])
+    
+    def _run_recording_job(self, vod_id: str, file_path: str):
+        """
+        Process a recording into a ready VOD entry.
+        
+        Args:
+            vod_id (str): ID of the VOD entry.
+            file_path (str): Path to the recording.
+        """
+        try:
+            self._process_vod_file(vod_id, file_path)
+        finally:
+            with self._clip_lock:
+                self.recording_jobs.pop(vod_id, None)
+    
+    def _run_clip_job(self, vod_id: str, source: str, live: bool, file_path: Optional[str],
+                      start: float, end: float):
+        """
+        Cut a clip and process it into a ready VOD entry.
+        
+        Args:
+            vod_id (str): ID of the clip's VOD entry.
+            source (str): VOD ID or stream key being clipped.
+            live (bool): Whether to cut from live segments.
+            file_path (str, optional): Source file for finished recordings.
+            start (float): Start time in seconds.
+            end (float): End time in seconds.
+        """
+        vod_info = self.vod_entries[vod_id]
+        try:
+            if live:
+                clip_start = self._cut_live_clip(source, vod_info["file_path"], start, end)
+            else:
+                clip_start = self._cut_file_clip(file_path, vod_info["file_path"], start, end)
+            
+            vod_info["clip_start"] = clip_start
+            self._process_vod_file(vod_id, vod_info["file_path"])
+        except Exception as e:
+            logger.error(f"Error creating clip {vod_id}: {str(e)}")
+            vod_info["status"] = "error"
+            self._save_vod_entry(vod_id)
+        finally:
+            if live:
+                self._release_segments(source, from_clip=True)
+            with self._clip_lock:
+                self.clip_jobs.pop(vod_id, None)
+    
+    def _cut_file_clip(self, input_path: str, output_path: str, start: float, end: float) -> float:
+        """
+        Stream-copy a time range of a finished file.
+        
+        Args:
+            input_path (str): Source file.
+            output_path (str): Clip file.
+            start (float): Start time in seconds.
+            end (float): End time in seconds.
+            
+        Returns:
+            float: Actual start time, snapped to a keyframe.
+        """
+        index = KeyframeIndex.load_for(input_path) or KeyframeIndex.probe(input_path)
+        keyframe = index.floor(start)
+        clip_start = keyframe if keyframe is not None else start
+        
+        self._run_ffmpeg([
+            "ffmpeg", "-y", "-v", "error",
+            "-ss", str(clip_start),
+            "-i", input_path,
+            "-t", str(end - clip_start),
+            "-map", "0",
+            "-c", "copy",
+            "-avoid_negative_ts", "make_zero",
+            "-movflags", "+faststart",
+            output_path
+        ])
+        return clip_start
+    
+    def _cut_live_clip(self, stream_key: str, output_path: str, start: float, end: float) -> float:
+        """
+        Stream-copy a time range from the live segments of a recording.
+        
+        Segments start on keyframes, so the clip starts at the beginning of
+        the segment containing ``start``.
+        
+        Args:
+            stream_key (str): Key of the recording stream.
+            output_path (str): Clip file.
+            start (float): Start time in seconds.
+            end (float): End time in seconds.
+            
+        Returns:
+            float: Actual start time, snapped to a segment boundary.
+        """
+        segment_directory = self.active_streams[stream_key]["segment_directory"]
+        
+        segments = []
+        with open(os.path.join(segment_directory, "segments.csv")) as f:
+            for line in f:
+                fields = line.strip().split(",")
+                if len(fields) < 3:
+                    continue
+                segment_start, segment_end = float(fields[1]), float(fields[2])
+                if segment_end > start and segment_start < end:
+                    segments.append((segment_start, os.path.join(segment_directory, fields[0])))
+        
+        if not segments:
+            raise ValueError(f"No recorded segments for {stream_key} between {start}s and {end}s")
+        
+        clip_start = segments[0][0]
+        concat_path = f"{output_path}.ffconcat"
+        write_concat_list(concat_path, [segment_path for _, segment_path in segments])
+        
+        try:
+            self._run_ffmpeg([
+                "ffmpeg", "-y", "-v", "error",
+                "-f", "concat", "-safe", "0",
+                "-i", concat_path,
+                "-t", str(end - clip_start),
+                "-map", "0",
+                "-c", "copy",
+                "-avoid_negative_ts", "make_zero",
+                "-movflags", "+faststart",
+                output_path
+            ])
+        finally:
+            os.remove(concat_path)
+        
+        return clip_start
+    
+    def _run_ffmpeg(self, ffmpeg_cmd: List[str]):
+        """
+        Run an FFmpeg command and raise on failure.
+        
+        Args:
+            ffmpeg_cmd (List[str]): Command to run.
+            
+        Raises:
+            RuntimeError: If FFmpeg exits with an error.
+        """
+        result = subprocess.run(ffmpeg_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"FFmpeg failed: {result.stderr.strip()}")
+    
+    def _release_segments(self, stream_key: str, from_clip: bool = False):
+        """
+        Delete a recording's live segments once the recording has stopped
+        and no clip job is reading them.
+        
+        Args:
+            stream_key (str): Key of the recording stream.
+            from_clip (bool): Whether a finished clip job is releasing them.
+        """
+        with self._clip_lock:
+            users = self.segment_users.get(stream_key, 0)
+            if from_clip:
+                users -= 1
+                if users > 0:
+                    self.segment_users[stream_key] = users
+                else:
+                    self.segment_users.pop(stream_key, None)
+            if users > 0 or stream_key in self.recording_processes:
+                return
+            segment_directory = self.active_streams.get(stream_key, {}).pop("segment_directory", None)
+        
+        if segment_directory:
+            shutil.rmtree(segment_directory, ignore_errors=True)
+    
+    def _finalize_recording(self, stream_info: Dict[str, Any]):
+        """
+        Remux a finished recording with faststart and save its keyframe index.
+        
+        Args:
+            stream_info (Dict[str, Any]): Information about the recorded stream.
+        """
+        recording_path = stream_info.get("recording_path")
+        if not recording_path or not os.path.exists(recording_path):
+            return
+        
+        if self.faststart_enabled:
+            self._remux_faststart(recording_path)
+        
+        if self.keyframe_index_enabled:
+            try:
+                index = KeyframeIndex.probe(recording_path)
+                if len(index):
+                    index.save(KeyframeIndex.index_path(recording_path))
+                    stream_info["keyframe_count"] = len(index)
+            except Exception as e:
+                logger.error(f"Error indexing keyframes for {recording_path}: {str(e)}")
+    
+    def _remux_faststart(self, file_path: str) -> bool:
+        """
+        Move the moov atom to the front of an MP4 file without re-encoding.
+        
+        Players can then start playback after the first request instead of
+        fetching the end of the file first. The file is replaced atomically,
+        so a failed remux leaves the original untouched.
+        
+        Args:
+            file_path (str): Path to the MP4 file.
+            
+        Returns:
+            bool: True if remuxed, False otherwise.
+        """
+        base, extension = os.path.splitext(file_path)
+        temp_path = f"{base}.faststart{extension}"
+        
+        ffmpeg_cmd = [
+            "ffmpeg",
+            "-y",
+            "-v", "error",
+            "-i", file_path,
+            "-map", "0",
+            "-c", "copy",
+            "-movflags", "+faststart",
+            temp_path
+        ]
+        
+        try:
+            result = subprocess.run(ffmpeg_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+            if result.returncode != 0:
+                logger.error(f"Faststart remux failed for {file_path}: {result.stderr.strip()}")
+                return False
+            
+            os.replace(temp_path, file_path)
+            logger.info(f"Remuxed {file_path} with faststart")
+            return True
+        except Exception as e:
+            logger.error(f"Error remuxing {file_path}: {str(e)}")
+            return False
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+    
+    def get_keyframe_index(self, vod_id: str) -> Optional[KeyframeIndex]:
+        """
+        Get the keyframe index of a VOD's file.
+        
+        Args:
+            vod_id (str): ID of the VOD entry.
+            
+        Returns:
+            Optional[KeyframeIndex]: The saved index, or a freshly probed one
+            if none was saved, or None if the VOD does not exist.
+        """
+        vod_info = self.get_vod_info(vod_id)
+        if not vod_info or not vod_info.get("file_path"):
+            return None
+        
+        index = KeyframeIndex.load_for(vod_info["file_path"])
+        if index is None:
+            index = KeyframeIndex.probe(vod_info["file_path"])
+        return index
+    
     def _process_vod_file(self, vod_id: str, file_path: str):
         """
         Process a VOD file to extract metadata.
@@ -407,42 +1274,393 @@ class MediaServer:
             return
         
         try:
-            # Get duration using FFprobe
-            ffprobe_cmd = [
-                "ffprobe",
-                "-v", "error",
-                "-show_entries", "format=duration",
-                "-of", "default=noprint_wrappers=1:nokey=1",
-                file_path
-            ]
+            # Identical content shares the stored file and the assets derived from it
+            existing = self._deduplicate(vod_id, file_path) or {}
             
-            result = subprocess.run(ffprobe_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-            duration = float(result.stdout.strip())
+            if existing.get("duration") is not None:
+                duration = existing["duration"]
+            else:
+                # Get duration using FFprobe
+                ffprobe_cmd = [
+                    "ffprobe",
+                    "-v", "error",
+                    "-show_entries", "format=duration",
+                    "-of", "default=noprint_wrappers=1:nokey=1",
+                    file_path
+                ]
+                
+                result = subprocess.run(ffprobe_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+                duration = float(result.stdout.strip())
             
             # Update VOD entry with duration
             self.vod_entries[vod_id]["duration"] = duration
-            self.vod_entries[vod_id]["status"] = "ready"
             
-            # Generate thumbnail
-            thumbnail_path = os.path.join(os.path.dirname(file_path), f"{vod_id}_thumbnail.jpg")
+            if existing.get("thumbnail_url"):
+                self.vod_entries[vod_id]["thumbnail_url"] = existing["thumbnail_url"]
+            else:
+                # Generate thumbnail
+                thumbnail_path = os.path.join(os.path.dirname(file_path), f"{vod_id}_thumbnail.jpg")
+                
+                ffmpeg_cmd = [
+                    "ffmpeg",
+                    "-i", file_path,
+                    "-ss", str(min(30, duration / 2)),  # Take thumbnail from middle or 30 seconds in
+                    "-vframes", "1",
+                    thumbnail_path
+                ]
+                
+                subprocess.run(ffmpeg_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+                
+                # Add thumbnail URL to VOD entry
+                self.vod_entries[vod_id]["thumbnail_url"] = f"{self.server_url}/thumbnails/{os.path.basename(thumbnail_path)}"
             
-            ffmpeg_cmd = [
-                "ffmpeg",
-                "-i", file_path,
-                "-ss", str(min(30, duration / 2)),  # Take thumbnail from middle or 30 seconds in
-                "-vframes", "1",
-                thumbnail_path
-            ]
+            # Generate scrub preview sprites
+            if self.trickplay_enabled:
+                self.vod_entries[vod_id]["trickplay"] = (
+                    existing.get("trickplay") or self._generate_trickplay(vod_id, file_path, duration)
+                )
             
-            subprocess.run(ffmpeg_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            # HLS segments for playlist manifests; a duplicate links the existing segments
+            if self.vod_hls_enabled:
+                segments = None
+                if existing.get("hls_segments") and self._link_segments(existing["id"], vod_id):
+                    segments = existing["hls_segments"]
+                self.vod_entries[vod_id]["hls_segments"] = segments or self._segment_vod(vod_id, file_path)
             
-            # Add thumbnail URL to VOD entry
-            self.vod_entries[vod_id]["thumbnail_url"] = f"{self.server_url}/thumbnails/{os.path.basename(thumbnail_path)}"
+            # Ready once every derived asset exists
+            self.vod_entries[vod_id]["status"] = "ready"
             
             logger.info(f"Processed VOD file for {vod_id}: duration={duration}s")
         except Exception as e:
             logger.error(f"Error processing VOD file for {vod_id}: {str(e)}")
             self.vod_entries[vod_id]["status"] = "error"
+        
+        self._save_vod_entry(vod_id)
+    
+    def _vod_segment_directory(self, vod_id: str) -> str:
+        """
+        Get the directory holding a VOD's HLS segments.
+        
+        Args:
+            vod_id (str): ID of the VOD entry.
+            
+        Returns:
+            str: Directory under the HLS directory, served at ``/hls/vod/<vod_id>/``.
+        """
+        return os.path.join(self.hls_directory, "vod", vod_id)
+    
+    def _segment_vod(self, vod_id: str, file_path: str) -> Optional[List[List[float]]]:
+        """
+        Cut a VOD file into MPEG-TS segments for HLS without re-encoding.
+        
+        Streams are copied, so each segment starts on a keyframe: the
+        segment muxer cuts at the first keyframe after every multiple of the
+        HLS segment duration. The segment list it writes records where each
+        cut actually fell.
+        
+        Args:
+            vod_id (str): ID of the VOD entry.
+            file_path (str): Path to video file.
+            
+        Returns:
+            Optional[List[List[float]]]: Start and end time of each segment,
+            or None if segmenting failed.
+        """
+        output_dir = self._vod_segment_directory(vod_id)
+        shutil.rmtree(output_dir, ignore_errors=True)
+        os.makedirs(output_dir, exist_ok=True)
+        list_path = os.path.join(output_dir, "segments.csv")
+        
+        ffmpeg_cmd = [
+            "ffmpeg",
+            "-y",
+            "-v", "error",
+            "-i", file_path,
+            "-map", "0:v",
+            "-map", "0:a?",
+            "-c", "copy",
+            "-f", "segment",
+            "-segment_format", "mpegts",
+            "-segment_time", str(self.hls_segment_duration),
+            "-segment_list", list_path,
+            "-segment_list_type", "csv",
+            os.path.join(output_dir, "%05d.ts")
+        ]
+        
+        result = subprocess.run(ffmpeg_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        if result.returncode != 0:
+            logger.error(f"Error segmenting VOD {vod_id} for HLS: {result.stderr.strip()}")
+            shutil.rmtree(output_dir, ignore_errors=True)
+            return None
+        
+        segments = []
+        with open(list_path) as f:
+            for line in f:
+                fields = line.strip().split(",")
+                if len(fields) < 3:
+                    continue
+                segments.append([float(fields[1]), float(fields[2])])
+        
+        logger.info(f"Cut VOD {vod_id} into {len(segments)} HLS segments")
+        return segments
+    
+    def _link_segments(self, source_id: str, vod_id: str) -> bool:
+        """
+        Hard-link another VOD's HLS segments into a VOD's segment directory.
+        
+        Args:
+            source_id (str): ID of the VOD entry with the same content.
+            vod_id (str): ID of the VOD entry to link the segments for.
+            
+        Returns:
+            bool: True if every segment was linked, False otherwise.
+        """
+        source_dir = self._vod_segment_directory(source_id)
+        output_dir = self._vod_segment_directory(vod_id)
+        shutil.rmtree(output_dir, ignore_errors=True)
+        try:
+            os.makedirs(output_dir)
+            for name in os.listdir(source_dir):
+                os.link(os.path.join(source_dir, name), os.path.join(output_dir, name))
+            return True
+        except OSError as e:
+            logger.warning(f"Error linking HLS segments of {source_id} for {vod_id}: {str(e)}")
+            shutil.rmtree(output_dir, ignore_errors=True)
+            return False
+    
+    def _hash_content(self, file_path: str) -> Optional[str]:
+        """
+        Hash a file for deduplication.
+        
+        Args:
+            file_path (str): Path to video file.
+            
+        Returns:
+            Optional[str]: Content hash, or None if deduplication is disabled
+            or the file cannot be read.
+        """
+        if not self.dedup_enabled:
+            return None
+        
+        try:
+            return self.content_hasher.hash(file_path)
+        except OSError as e:
+            logger.warning(f"Error hashing {file_path}, skipping deduplication: {str(e)}")
+            return None
+    
+    def _deduplicate(self, vod_id: str, file_path: str) -> Optional[Dict[str, Any]]:
+        """
+        Hash a new VOD file and link it to an existing file with the same content.
+        
+        Args:
+            vod_id (str): ID of the new VOD entry.
+            file_path (str): Path to video file.
+            
+        Returns:
+            Optional[Dict[str, Any]]: Existing VOD entry with the same content, or None.
+        """
+        content_hash = self._hash_content(file_path)
+        if not content_hash:
+            return None
+        
+        size = os.path.getsize(file_path)
+        with self._dedup_lock:
+            existing = self._find_by_content_hash(content_hash)
+            if existing and existing["id"] == vod_id:
+                existing = None
+            
+            self.vod_entries[vod_id]["content_hash"] = content_hash
+            if existing is None:
+                self.content_index[content_hash] = vod_id
+            
+            self.dedup_stats["ingests"] += 1
+            self.dedup_stats["bytes_ingested"] += size
+            if existing:
+                self.dedup_stats["duplicates"] += 1
+                self.dedup_stats["bytes_deduplicated"] += size
+        
+        if existing:
+            self.vod_entries[vod_id]["duplicate_of"] = existing["id"]
+            self._link_file(existing["file_path"], file_path)
+            logger.info(f"Linked duplicate content of VOD entry {existing['id']}: {file_path}")
+        return existing
+    
+    def _link_file(self, source_path: str, file_path: str) -> bool:
+        """
+        Replace a file with a hard link to another file with the same content.
+        
+        The file is replaced atomically; if linking fails (for example across
+        file systems) the copy is kept.
+        
+        Args:
+            source_path (str): File to link to.
+            file_path (str): File to replace.
+            
+        Returns:
+            bool: True if the file is now a link to the source, False otherwise.
+        """
+        temp_path = f"{file_path}.link"
+        try:
+            if os.path.samefile(source_path, file_path):
+                return True
+            os.link(source_path, temp_path)
+            os.replace(temp_path, file_path)
+            return True
+        except OSError as e:
+            logger.warning(f"Error linking {file_path} to {source_path}, keeping the copy: {str(e)}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return False
+    
+    def _find_by_content_hash(self, content_hash: str) -> Optional[Dict[str, Any]]:
+        """
+        Find a usable VOD entry with the given content.
+        
+        Args:
+            content_hash (str): Content hash.
+            
+        Returns:
+            Optional[Dict[str, Any]]: VOD entry information or None.
+        """
+        vod_id = self.content_index.get(content_hash)
+        vod_info = self.get_vod_info(vod_id) if vod_id else None
+        
+        if vod_info is None and self.catalog:
+            vod_info = self.catalog.find_by_content_hash(content_hash)
+            if vod_info is not None:
+                self.vod_entries.setdefault(vod_info["id"], vod_info)
+                self.content_index[content_hash] = vod_info["id"]
+        
+        # Entries whose processing failed or whose file has gone are re-ingested
+        if vod_info is None or vod_info.get("status") == "error" or not os.path.exists(vod_info["file_path"]):
+            return None
+        return vod_info
+    
+    def _save_vod_entry(self, vod_id: str):
+        """
+        Write a VOD entry through to the catalog, if one is configured,
+        and attribute its file to it in the storage index.
+        
+        Args:
+            vod_id (str): ID of the VOD entry.
+        """
+        if vod_id not in self.vod_entries:
+            return
+        
+        self.storage.track_vod(self.vod_entries[vod_id])
+        
+        if self.on_vod_changed:
+            self.on_vod_changed(vod_id)
+        
+        if not self.catalog:
+            return
+        
+        try:
+            self.catalog.put(self.vod_entries[vod_id])
+        except Exception as e:
+            logger.error(f"Error saving VOD entry {vod_id} to catalog: {str(e)}")
+    
+    def _generate_trickplay(self, vod_id: str, file_path: str, duration: float) -> Optional[Dict[str, Any]]:
+        """
+        Generate tiled thumbnail sprite sheets and a WebVTT index for scrubbing.
+        
+        All sprites are produced by a single FFmpeg decode pass: frames are
+        sampled at the trickplay interval, scaled to a fixed tile size and
+        packed into sheets by the tile filter.
+        
+        Args:
+            vod_id (str): ID of the VOD entry.
+            file_path (str): Path to video file.
+            duration (float): Duration of the video in seconds.
+            
+        Returns:
+            Optional[Dict[str, Any]]: Trickplay information or None on failure.
+        """
+        output_dir = os.path.dirname(file_path)
+        width, height = self.trickplay_width, self.trickplay_height
+        columns, rows = self.trickplay_columns, self.trickplay_rows
+        interval = self.trickplay_interval
+        
+        thumbnail_count = max(1, math.ceil(duration / interval))
+        tiles_per_sprite = columns * rows
+        sprite_count = math.ceil(thumbnail_count / tiles_per_sprite)
+        
+        # Only lay out as many rows as the thumbnails need for short videos
+        if sprite_count == 1:
+            columns = min(columns, thumbnail_count)
+            rows = math.ceil(thumbnail_count / columns)
+        
+        sprite_pattern = os.path.join(output_dir, f"{vod_id}_sprite_%03d.jpg")
+        video_filter = (
+            f"fps=1/{interval},"
+            f"scale={width}:{height}:force_original_aspect_ratio=decrease,"
+            f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,"
+            f"tile={columns}x{rows}"
+        )
+        
+        ffmpeg_cmd = [
+            "ffmpeg",
+            "-i", file_path,
+            "-vf", video_filter,
+            "-an",
+            "-q:v", "5",
+            sprite_pattern
+        ]
+        
+        result = subprocess.run(ffmpeg_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        if result.returncode != 0:
+            logger.error(f"Error generating trickplay sprites for {vod_id}")
+            return None
+        
+        sprite_urls = [
+            f"{self.server_url}/thumbnails/{os.path.basename(sprite_pattern % (index + 1))}"
+            for index in range(sprite_count)
+        ]
+        
+        # Map each time range to its tile in the sprite sheets
+        cues = ["WEBVTT", ""]
+        for index in range(thumbnail_count):
+            sprite_index, tile_index = divmod(index, columns * rows)
+            x = (tile_index % columns) * width
+            y = (tile_index // columns) * height
+            start = index * interval
+            end = min(duration, start + interval)
+            cues.append(f"{self._format_vtt_time(start)} --> {self._format_vtt_time(end)}")
+            cues.append(f"{sprite_urls[sprite_index]}#xywh={x},{y},{width},{height}")
+            cues.append("")
+        
+        vtt_path = os.path.join(output_dir, f"{vod_id}_trickplay.vtt")
+        with open(vtt_path, "w") as f:
+            f.write("\n".join(cues))
+        
+        logger.info(f"Generated {sprite_count} trickplay sprites for {vod_id}")
+        return {
+            "vtt_url": f"{self.server_url}/thumbnails/{os.path.basename(vtt_path)}",
+            "sprite_urls": sprite_urls,
+            "interval": interval,
+            "width": width,
+            "height": height,
+            "columns": columns,
+            "rows": rows,
+            "count": thumbnail_count
+        }
+    
+    @staticmethod
+    def _format_vtt_time(seconds: float) -> str:
+        """
+        Format seconds as a WebVTT timestamp.
+        
+        Args:
+            seconds (float): Time in seconds.
+            
+        Returns:
+            str: Timestamp in HH:MM:SS.mmm format.
+        """
+        milliseconds = int(round(seconds * 1000))
+        hours, milliseconds = divmod(milliseconds, 3600000)
+        minutes, milliseconds = divmod(milliseconds, 60000)
+        secs, milliseconds = divmod(milliseconds, 1000)
+        return f"{hours:02d}:{minutes:02d}:{secs:02d}.{milliseconds:03d}"
     
     def shutdown(self):
         """Shutdown media server and clean up resources."""
@@ -455,4 +1673,17 @@ class MediaServer:
             if self.active_streams[stream_key]["status"] == "active":
                 self.stop_stream(stream_key)
         
+        if self.origin and self.origin.is_running:
+            self.origin.stop()
+        
+        self.storage.stop()
+        self.restream.shutdown()
+        self.analytics.stop()
+        
+        if self.clip_executor:
+            self.clip_executor.shutdown(wait=True)
+        
+        if self.catalog:
+            self.catalog.close()
+        
         logger.info("Media server shutdown complete")
\ No newline at end of file
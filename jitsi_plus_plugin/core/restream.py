@@ -0,0 +1,506 @@
+"""
+Restreaming: fan one ingest out to several RTMP/SRT destinations.
+"""
+
+import logging
+import re
+import subprocess
+import threading
+import time
+import uuid
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Container used for each destination protocol
+TARGET_FORMATS = {
+    "rtmp": "flv",
+    "rtmps": "flv",
+    "srt": "mpegts",
+}
+
+# Logged by the tee muxer when one of its outputs fails and onfail=ignore
+# keeps the others going
+SLAVE_FAILURE = re.compile(r"Slave muxer #(\d+) failed: (.*?), continuing with")
+
+class RestreamManager:
+    """
+    Sends each stream to its restream targets with a single stream-copy
+    FFmpeg process. The tee muxer writes the same packets to every target,
+    so adding targets adds sockets rather than encoders, and with
+    onfail=ignore a destination that fails leaves the others running.
+
+    Tee outputs are fixed when FFmpeg starts, so a target added to a live
+    stream, or a failed target being retried, gets a tee process of its
+    own rather than restarting the outputs that are healthy. Removing a
+    target restarts only the process it shares with others. Every target
+    goes back into one process when the stream starts again.
+
+    A failed target is retried with exponential backoff, from
+    retry_interval up to max_retry_interval, and the backoff resets once it
+    has stayed up for retry_interval.
+    """
+
+    def __init__(self, media_server, config: Dict[str, Any] = None):
+        """
+        Initialize the restream manager.
+
+        Args:
+            media_server (MediaServer): Media server owning the streams.
+            config (Dict[str, Any], optional): Restream configuration.
+        """
+        self.media_server = media_server
+        self.config = config or {}
+        self.health_interval = self.config.get("health_interval", 5)
+        self.retry_interval = self.config.get("retry_interval", 30)
+        self.max_retry_interval = self.config.get("max_retry_interval", 600)
+        self.max_targets = self.config.get("max_targets", 10)
+
+        # stream_key -> {target_id: target}, in the order they were added
+        self.targets = {}
+
+        # stream_key -> running tee process states, oldest first
+        self.processes = {}
+
+        self._lock = threading.RLock()
+        self._stop_event = threading.Event()
+        self.monitor_thread = None
+
+    def add_target(self, stream_key: str, url: str, name: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Add a destination for a stream, starting it straight away if the
+        stream is live.
+
+        Args:
+            stream_key (str): Key of the stream.
+            url (str): Destination URL (rtmp://, rtmps:// or srt://).
+            name (str, optional): Display name for the destination.
+
+        Returns:
+            Dict[str, Any]: Target information.
+
+        Raises:
+            ValueError: If the stream does not exist, the URL is not supported
+                or the stream already has the maximum number of targets.
+        """
+        scheme = url.split("://", 1)[0].lower() if "://" in url else ""
+        if scheme not in TARGET_FORMATS:
+            raise ValueError(f"Unsupported restream URL: {url}")
+        if stream_key not in self.media_server.active_streams:
+            raise ValueError(f"Stream not found: {stream_key}")
+
+        with self._lock:
+            targets = self.targets.setdefault(stream_key, {})
+            if len(targets) >= self.max_targets:
+                raise ValueError(f"Stream {stream_key} already has {self.max_targets} restream targets")
+
+            target = {
+                "id": f"target-{uuid.uuid4().hex[:8]}",
+                "name": name or url.split("://", 1)[1].split("/", 1)[0],
+                "url": url,
+                "format": TARGET_FORMATS[scheme],
+                "status": "pending",
+                "error": None,
+                "failures": 0,
+                "consecutive_failures": 0,
+                "retry_at": None,
+                "frames_sent": 0,
+                "dropped_frames": 0,
+                "added_at": time.time()
+            }
+            targets[target["id"]] = target
+
+            if self._is_live(stream_key):
+                self._start_process(stream_key, [target])
+
+            info = dict(target)
+
+        logger.info(f"Added restream target {target['name']} ({target['id']}) to stream {stream_key}")
+        return info
+
+    def remove_target(self, stream_key: str, target_id: str) -> bool:
+        """
+        Remove a destination from a stream.
+
+        Args:
+            stream_key (str): Key of the stream.
+            target_id (str): ID of the target.
+
+        Returns:
+            bool: True if successful, False if the target does not exist.
+        """
+        with self._lock:
+            targets = self.targets.get(stream_key, {})
+            if target_id not in targets:
+                logger.warning(f"Restream target not found: {target_id}")
+                return False
+
+            state = self._find_process(stream_key, target_id)
+            others = []
+            if state:
+                others = [targets[other_id] for other_id in self._live_slaves(state) if other_id != target_id]
+                self._pop_process(stream_key, state)
+            del targets[target_id]
+            if not targets:
+                del self.targets[stream_key]
+
+            # The tee outputs cannot change, so the targets it shared go to a new process
+            if others:
+                self._start_process(stream_key, others)
+
+        # Wait for FFmpeg to exit without holding up the other targets
+        self._terminate(stream_key, [state])
+
+        logger.info(f"Removed restream target {target_id} from stream {stream_key}")
+        return True
+
+    def get_targets(self, stream_key: str) -> List[Dict[str, Any]]:
+        """
+        Get a stream's targets with their health and statistics.
+
+        Every output of a tee process receives the same packets, so a running
+        target reports its process's frame counts and bitrate.
+
+        Args:
+            stream_key (str): Key of the stream.
+
+        Returns:
+            List[Dict[str, Any]]: Target information in the order they were added.
+        """
+        with self._lock:
+            result = []
+            for target in self.targets.get(stream_key, {}).values():
+                info = dict(target)
+                info["bitrate_kbps"] = 0.0
+                state = self._find_process(stream_key, target["id"])
+                if state:
+                    info["frames_sent"] += state["progress"]["frame"]
+                    info["dropped_frames"] += state["progress"]["drop_frames"]
+                    info["bitrate_kbps"] = state["progress"]["bitrate_kbps"]
+                result.append(info)
+            return result
+
+    def start(self, stream_key: str) -> bool:
+        """
+        Start sending a stream to its targets.
+
+        Args:
+            stream_key (str): Key of the stream.
+
+        Returns:
+            bool: True if a process was started, False if there are no targets to start.
+        """
+        with self._lock:
+            targets = [
+                target for target in self.targets.get(stream_key, {}).values()
+                if not self._find_process(stream_key, target["id"])
+            ]
+            for target in targets:
+                target["consecutive_failures"] = 0
+            return bool(targets) and self._start_process(stream_key, targets)
+
+    def stop(self, stream_key: str):
+        """
+        Stop sending a stream to its targets. The targets are kept.
+
+        Args:
+            stream_key (str): Key of the stream.
+        """
+        with self._lock:
+            states = [self._pop_process(stream_key, state) for state in list(self.processes.get(stream_key, ()))]
+            for target in self.targets.get(stream_key, {}).values():
+                target["status"] = "pending"
+                target["retry_at"] = None
+
+        self._terminate(stream_key, states)
+
+    def check_health(self) -> Dict[str, Dict[str, str]]:
+        """
+        Check every target of the live streams and retry failed ones.
+
+        A target fails when the tee muxer drops its output or when its
+        FFmpeg process exits. Failed targets whose backoff has passed are
+        retried together in a new process; running processes are left alone.
+
+        Returns:
+            Dict[str, Dict[str, str]]: Target status keyed by stream key and target ID.
+        """
+        now = time.time()
+        health = {}
+        stopped = []
+
+        with self._lock:
+            for stream_key, targets in self.targets.items():
+                for state in list(self.processes.get(stream_key, ())):
+                    exited = state["process"].poll() is not None
+                    if exited:
+                        for target_id in self._live_slaves(state):
+                            self._slave_failed(stream_key, state, target_id, state["error"] or "process exited", now)
+                    if exited or not self._live_slaves(state):
+                        stopped.append((stream_key, self._pop_process(stream_key, state)))
+                    elif now - state["started_at"] >= self.retry_interval:
+                        # Stayed up long enough; the next failure starts the backoff over
+                        for target_id in self._live_slaves(state):
+                            targets[target_id]["consecutive_failures"] = 0
+
+                due = [
+                    target for target in targets.values()
+                    if target["status"] == "failed" and now >= target["retry_at"]
+                    and not self._find_process(stream_key, target["id"])
+                ]
+                if due and self._is_live(stream_key):
+                    logger.info(f"Retrying {len(due)} restream targets for stream {stream_key}")
+                    self._start_process(stream_key, due)
+
+                health[stream_key] = {target_id: target["status"] for target_id, target in targets.items()}
+
+        for stream_key, state in stopped:
+            self._terminate(stream_key, [state])
+        return health
+
+    def shutdown(self):
+        """Stop all restream processes and the health monitor."""
+        self._stop_event.set()
+        with self._lock:
+            stopping = [
+                (stream_key, [self._pop_process(stream_key, state) for state in list(states)])
+                for stream_key, states in list(self.processes.items())
+            ]
+        for stream_key, states in stopping:
+            self._terminate(stream_key, states)
+        if self.monitor_thread:
+            self.monitor_thread.join(timeout=5)
+            self.monitor_thread = None
+
+    def _is_live(self, stream_key: str) -> bool:
+        """Check whether a stream is active."""
+        stream_info = self.media_server.active_streams.get(stream_key)
+        return bool(stream_info) and stream_info.get("status") == "active"
+
+    def _start_process(self, stream_key: str, targets: List[Dict[str, Any]]) -> bool:
+        """
+        Start a tee process writing a stream to some of its targets. Called
+        with the lock held.
+
+        Args:
+            stream_key (str): Key of the stream.
+            targets (List[Dict[str, Any]]): Targets to start, in tee output order.
+
+        Returns:
+            bool: True if the process started, False otherwise.
+        """
+        stream_info = self.media_server.active_streams.get(stream_key)
+        if not stream_info:
+            return False
+
+        outputs = "|".join(
+            f"[f={target['format']}:onfail=ignore]{self._escape(target['url'])}" for target in targets
+        )
+        ffmpeg_cmd = [
+            "ffmpeg",
+            "-nostats",
+            "-v", "error",
+            "-progress", "pipe:1",
+            "-i", stream_info["rtmp_url"],
+            "-map", "0",
+            "-c", "copy",
+            "-f", "tee",
+            outputs
+        ]
+
+        try:
+            process = subprocess.Popen(
+                ffmpeg_cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True
+            )
+        except Exception as e:
+            logger.error(f"Error starting restream for stream {stream_key}: {str(e)}")
+            now = time.time()
+            for target in targets:
+                self._mark_failed(target, str(e), now)
+            return False
+
+        state = {
+            "process": process,
+            # Indexed by the tee muxer's slave number
+            "slaves": [target["id"] for target in targets],
+            "detached": set(),
+            "started_at": time.time(),
+            "progress": {"frame": 0, "drop_frames": 0, "bitrate_kbps": 0.0},
+            "error": None
+        }
+        self.processes.setdefault(stream_key, []).append(state)
+        for target in targets:
+            target["status"] = "active"
+            target["error"] = None
+            target["retry_at"] = None
+
+        # Drain both pipes: progress on stdout, tee failures on stderr
+        for reader in (self._read_progress, self._read_errors):
+            thread = threading.Thread(target=reader, args=(stream_key, state))
+            thread.daemon = True
+            thread.start()
+
+        self._start_monitor()
+        logger.info(f"Restreaming stream {stream_key} to {len(targets)} targets")
+        return True
+
+    def _find_process(self, stream_key: str, target_id: str) -> Optional[Dict[str, Any]]:
+        """Get the process currently writing to a target. Called with the lock held."""
+        for state in self.processes.get(stream_key, ()):
+            if target_id in state["slaves"] and target_id not in state["detached"]:
+                return state
+        return None
+
+    @staticmethod
+    def _live_slaves(state: Dict[str, Any]) -> List[str]:
+        """IDs of the targets a process is still writing to."""
+        return [target_id for target_id in state["slaves"] if target_id not in state["detached"]]
+
+    def _detach(self, stream_key: str, state: Dict[str, Any], target_id: str):
+        """
+        Stop attributing a process to a target and fold its counters into
+        the target. Called with the lock held.
+        """
+        if target_id in state["detached"]:
+            return
+        state["detached"].add(target_id)
+
+        target = self.targets.get(stream_key, {}).get(target_id)
+        if target:
+            target["frames_sent"] += state["progress"]["frame"]
+            target["dropped_frames"] += state["progress"]["drop_frames"]
+
+    def _pop_process(self, stream_key: str, state: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Detach a process from the stream and its targets. Called with the
+        lock held; the process is left running.
+
+        Args:
+            stream_key (str): Key of the stream.
+            state (Dict[str, Any]): Process state.
+
+        Returns:
+            Dict[str, Any]: The process state.
+        """
+        states = self.processes.get(stream_key, [])
+        if state in states:
+            states.remove(state)
+            if not states:
+                del self.processes[stream_key]
+
+        for target_id in self._live_slaves(state):
+            self._detach(stream_key, state, target_id)
+        return state
+
+    def _terminate(self, stream_key: str, states: List[Optional[Dict[str, Any]]]):
+        """
+        Stop detached processes. Called without the lock, since FFmpeg can
+        take seconds to exit.
+
+        Args:
+            stream_key (str): Key of the stream.
+            states (List[Optional[Dict[str, Any]]]): States from _pop_process.
+        """
+        processes = [state["process"] for state in states if state]
+        for process in processes:
+            try:
+                process.terminate()
+            except Exception as e:
+                logger.error(f"Error stopping restream for stream {stream_key}: {str(e)}")
+
+        for process in processes:
+            try:
+                process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                logger.info(f"Force killed restream process for stream: {stream_key}")
+            except Exception as e:
+                logger.error(f"Error stopping restream for stream {stream_key}: {str(e)}")
+
+    def _slave_failed(self, stream_key: str, state: Dict[str, Any], target_id: str, error: str, now: float):
+        """Record that a process stopped writing to a target. Called with the lock held."""
+        if target_id in state["detached"]:
+            return
+        self._detach(stream_key, state, target_id)
+        target = self.targets.get(stream_key, {}).get(target_id)
+        if target:
+            self._mark_failed(target, error, now)
+
+    def _mark_failed(self, target: Dict[str, Any], error: str, now: float):
+        """Record a target failure and schedule its retry with exponential backoff."""
+        target["status"] = "failed"
+        target["error"] = error
+        target["failures"] += 1
+        target["consecutive_failures"] += 1
+        delay = min(self.retry_interval * 2 ** (target["consecutive_failures"] - 1), self.max_retry_interval)
+        target["retry_at"] = now + delay
+        logger.warning(f"Restream target {target['name']} ({target['id']}) failed: {error}; retrying in {delay:.0f}s")
+
+    def _read_progress(self, stream_key: str, state: Dict[str, Any]):
+        """Parse FFmpeg -progress output into the process statistics."""
+        snapshot = {}
+        try:
+            for line in state["process"].stdout:
+                key, _, value = line.strip().partition("=")
+                if key != "progress":
+                    snapshot[key] = value.strip()
+                    continue
+
+                progress = {}
+                try:
+                    progress["frame"] = int(snapshot.get("frame", 0))
+                    progress["drop_frames"] = int(snapshot.get("drop_frames", 0))
+                except ValueError:
+                    pass
+                try:
+                    progress["bitrate_kbps"] = float(snapshot.get("bitrate", "").replace("kbits/s", ""))
+                except ValueError:
+                    pass
+                state["progress"] = {**state["progress"], **progress}
+                snapshot = {}
+        except Exception as e:
+            logger.debug(f"Restream progress reader for {stream_key} stopped: {str(e)}")
+
+    def _read_errors(self, stream_key: str, state: Dict[str, Any]):
+        """Watch FFmpeg's log for tee outputs that failed, keeping the last error."""
+        try:
+            for line in state["process"].stderr:
+                if not line.strip():
+                    continue
+                state["error"] = line.strip()
+                match = SLAVE_FAILURE.search(line)
+                if not match:
+                    continue
+                index = int(match.group(1))
+                with self._lock:
+                    if index < len(state["slaves"]):
+                        self._slave_failed(stream_key, state, state["slaves"][index], match.group(2), time.time())
+        except Exception as e:
+            logger.debug(f"Restream log reader for {stream_key} stopped: {str(e)}")
+
+    @staticmethod
+    def _escape(url: str) -> str:
+        """Escape characters that are special in a tee output list."""
+        for char in ("\\", "|", "[", "]"):
+            url = url.replace(char, "\\" + char)
+        return url
+
+    def _start_monitor(self):
+        """Start the health monitor if it is not running."""
+        if self.monitor_thread and self.monitor_thread.is_alive():
+            return
+        self._stop_event.clear()
+        self.monitor_thread = threading.Thread(target=self._monitor_loop)
+        self.monitor_thread.daemon = True
+        self.monitor_thread.start()
+
+    def _monitor_loop(self):
+        """Periodically check restream health."""
+        while not self._stop_event.wait(self.health_interval):
+            try:
+                self.check_health()
+            except Exception as e:
+                logger.error(f"Error in restream monitor: {str(e)}")
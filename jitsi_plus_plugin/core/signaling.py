@@ -5,7 +5,6 @@ Signaling server for real-time communication.
 import logging
 import json
 import asyncio
-import websockets
 import threading
 import uuid
 from typing import Dict, Any, List, Optional, Callable, Set
@@ -45,6 +44,7 @@ class SignalingServer:
         self.server = None
         self.is_running = False
         self.server_thread = None
+        self.ready = threading.Event()
         
         # Event handlers
         self.event_handlers = {}
@@ -56,6 +56,7 @@ class SignalingServer:
             return
         
         self.is_running = True
+        self.ready.clear()
         self.server_thread = threading.Thread(target=self._run_server)
         self.server_thread.daemon = True
         self.server_thread.start()
@@ -78,6 +79,8 @@ class SignalingServer:
     
     def _run_server(self):
         """Run the WebSocket server in a separate thread."""
+        import websockets
+        
         loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
         
@@ -87,16 +90,42 @@ class SignalingServer:
             ssl_context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
             ssl_context.load_cert_chain(self.ssl_cert, self.ssl_key)
         
-        start_server = websockets.serve(
-            self._handle_connection,
-            self.host,
-            self.port,
-            ssl=ssl_context
-        )
+        async def start_server():
+            # Newer websockets releases need a running loop to build the server
+            return await websockets.serve(
+                self._handle_connection,
+                self.host,
+                self.port,
+                ssl=ssl_context
+            )
+        
+        try:
+            self.server = loop.run_until_complete(start_server())
+        except OSError as e:
+            logger.error(f"Failed to start signaling server on {self.host}:{self.port}: {str(e)}")
+            self.is_running = False
+            self.ready.set()
+            return
+        
+        if self.port == 0:
+            self.port = self.server.sockets[0].getsockname()[1]
         
-        self.server = loop.run_until_complete(start_server)
+        self.ready.set()
+        logger.info(f"Signaling server accepting connections on {self.host}:{self.port}")
         loop.run_forever()
     
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until the server is accepting connections.
+        
+        Args:
+            timeout (float, optional): Maximum seconds to wait.
+            
+        Returns:
+            bool: True if the server is accepting connections, False otherwise.
+        """
+        return self.ready.wait(timeout) and self.is_running
+    
     async def _stop_server(self):
         """Stop the WebSocket server."""
         self.server.close()
@@ -110,6 +139,8 @@ class SignalingServer:
             websocket: WebSocket connection object.
             path: Connection path.
         """
+        import websockets
+        
         # Generate connection ID
         connection_id = str(uuid.uuid4())
         self.active_connections[connection_id] = websocket
@@ -0,0 +1,682 @@
+"""
+Recording retention: disk-usage index, quotas and eviction for the recording directory.
+"""
+
+import logging
+import os
+import shutil
+import threading
+import time
+from typing import Dict, Any, List, Optional
+
+from .keyframes import KeyframeIndex
+
+logger = logging.getLogger(__name__)
+
+GIB = 1024 ** 3
+
+# Derived files are named "<vod_id><marker>...", e.g. "vod-1_thumbnail.jpg"
+DERIVED_FILE_MARKERS = ("_thumbnail.", "_trickplay.", "_sprite_")
+
+EVICTION_POLICIES = ("lru", "lfu", "age")
+
+# Candidates read from the catalog per query while enforcing limits
+EVICTION_BATCH_SIZE = 100
+
+# Files without a VOD that may be evicted; anything else, such as the
+# catalog database, is only counted
+ORPHAN_EXTENSIONS = (".mp4", ".mkv", ".mov", ".flv", ".ts", ".kfi", ".jpg", ".vtt")
+
+class StorageManager:
+    """
+    Keeps an incremental index of the files under the recording directory and
+    enforces a storage quota by evicting whole VODs (video, thumbnail and
+    trickplay files together).
+
+    Only files under the recording directory are indexed or ever deleted.
+    VODs created from files elsewhere are left alone. Media files there that
+    no VOD entry owns, such as recordings left from before a restart
+    without a catalog, are evicted first once they are older than the
+    orphan grace period.
+
+    Scanning and eviction run on the monitor thread; callers only read the
+    index.
+    """
+
+    def __init__(self, media_server, config: Dict[str, Any] = None):
+        """
+        Initialize the storage manager.
+
+        Args:
+            media_server (MediaServer): Media server owning the VOD entries.
+            config (Dict[str, Any], optional): Storage configuration.
+        """
+        self.media_server = media_server
+        self.config = config or {}
+        self.recording_directory = os.path.abspath(media_server.recording_directory)
+        self.max_bytes = self.config.get("max_bytes")
+        self.high_watermark = self.config.get("high_watermark", 0.95)
+        self.low_watermark = self.config.get("low_watermark", 0.85)
+        self.policy = self.config.get("policy", "lru")
+        self.cold_directory = self.config.get("cold_directory")
+        self.min_free_bytes = self.config.get("min_free_bytes", GIB)
+        self.recording_reserve_bytes = self.config.get("recording_reserve_bytes", 2 * GIB)
+        self.scan_interval = self.config.get("scan_interval", 300)
+        self.orphan_grace_seconds = self.config.get("orphan_grace_seconds", 3600)
+
+        if self.policy not in EVICTION_POLICIES:
+            raise ValueError(f"Unknown eviction policy: {self.policy}")
+        if self.cold_directory:
+            self.cold_directory = os.path.abspath(self.cold_directory)
+
+        # HLS segments of a VOD live in <hls_directory>/vod/<vod_id>/
+        self.vod_segment_root = os.path.join(os.path.abspath(media_server.hls_directory), "vod")
+
+        # Index: path -> (size, mtime, (device, inode)), plus ownership of files by VOD
+        self.files = {}
+        self.total_bytes = 0
+        # Hard links share their data, so usage is counted per inode:
+        # (device, inode) -> [counted size, paths]
+        self.inodes = {}
+        self.file_owners = {}
+        self.vod_files = {}
+        self.unowned_files = set()
+
+        # Access statistics: vod_id -> [last_access, hits]
+        self.access = {}
+        # Hits not yet written to the catalog: vod_id -> [last_access, new hits]
+        self.pending_access = {}
+
+        # Statistics
+        self.evicted = 0
+        self.moved = 0
+        self.orphans_removed = 0
+        self.freed_bytes = 0
+
+        # Set once the first scan has indexed the directory and attributed files to VODs
+        self.indexed = threading.Event()
+
+        self._lock = threading.RLock()
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+        self.monitor_thread = None
+
+    def start(self) -> bool:
+        """
+        Start the monitor thread, which indexes the recording directory and
+        then rescans and enforces limits periodically.
+
+        Returns:
+            bool: True if started, False if already running.
+        """
+        if self.monitor_thread and self.monitor_thread.is_alive():
+            logger.warning("Storage monitor is already running")
+            return False
+
+        self._stop_event.clear()
+        self.monitor_thread = threading.Thread(target=self._monitor_loop)
+        self.monitor_thread.daemon = True
+        self.monitor_thread.start()
+        return True
+
+    def stop(self):
+        """Stop the periodic scans."""
+        self._stop_event.set()
+        self._wake_event.set()
+        if self.monitor_thread:
+            self.monitor_thread.join(timeout=5)
+            self.monitor_thread = None
+
+    def scan(self) -> Dict[str, int]:
+        """
+        Reconcile the index with the files on disk.
+
+        Only files whose size or modification time changed are updated, and
+        the running total is adjusted by the difference.
+
+        Returns:
+            Dict[str, int]: Number of indexed files, total bytes and changed files.
+        """
+        seen = set()
+        changed = 0
+
+        for root, dirs, names in os.walk(self.recording_directory):
+            if self.cold_directory:
+                dirs[:] = [d for d in dirs if os.path.join(root, d) != self.cold_directory]
+
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+
+                seen.add(path)
+                with self._lock:
+                    if self.files.get(path) != self._file_entry(stat):
+                        owner = self._owner_from_name(name) or self._owner_from_directory(root)
+                        self._add_file(path, stat, owner)
+                        changed += 1
+
+        with self._lock:
+            for path in [path for path in self.files if path not in seen]:
+                self._remove_file(path)
+                changed += 1
+
+            return {"files": len(self.files), "bytes": self.total_bytes, "changed": changed}
+
+    def track_vod(self, vod_info: Dict[str, Any]):
+        """
+        Attribute a VOD's video file and its keyframe index to it so that
+        they are evicted with the VOD.
+
+        Args:
+            vod_info (Dict[str, Any]): VOD entry.
+        """
+        path = vod_info.get("file_path")
+        if not path or not self._is_managed(path):
+            return
+
+        path = os.path.abspath(path)
+        for file_path in (path, KeyframeIndex.index_path(path)):
+            # Stat even indexed files: deduplication may have replaced the file with a link
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                with self._lock:
+                    if file_path in self.files:
+                        self._set_owner(file_path, vod_info["id"])
+                continue
+
+            with self._lock:
+                self._add_file(file_path, stat, vod_info["id"])
+
+    def untrack_vod(self, vod_id: str):
+        """
+        Forget a deleted VOD, dropping files that no longer exist from the index.
+
+        Args:
+            vod_id (str): ID of the VOD entry.
+        """
+        with self._lock:
+            for path in list(self.vod_files.get(vod_id, ())):
+                if os.path.exists(path):
+                    self._set_owner(path, None)
+                else:
+                    self._remove_file(path)
+            self.vod_files.pop(vod_id, None)
+            self.access.pop(vod_id, None)
+            self.pending_access.pop(vod_id, None)
+
+    def record_access(self, vod_id: str):
+        """
+        Record that a VOD was played.
+
+        Args:
+            vod_id (str): ID of the VOD entry.
+        """
+        now = time.time()
+        tables = (self.access, self.pending_access) if self.media_server.catalog else (self.access,)
+        with self._lock:
+            for table in tables:
+                stats = table.get(vod_id)
+                if stats is None:
+                    table[vod_id] = [now, 1]
+                else:
+                    stats[0] = now
+                    stats[1] += 1
+
+    def get_usage(self) -> Dict[str, Any]:
+        """
+        Get storage usage.
+
+        Returns:
+            Dict[str, Any]: Usage, quota, free disk space and eviction statistics.
+        """
+        with self._lock:
+            return {
+                "used_bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "files": len(self.files),
+                "vods": len(self.vod_files),
+                "free_bytes": self._free_bytes(),
+                "policy": self.policy,
+                "evicted": self.evicted,
+                "moved": self.moved,
+                "orphans_removed": self.orphans_removed,
+                "freed_bytes": self.freed_bytes
+            }
+
+    def eviction_candidates(self, limit: Optional[int] = None) -> List[str]:
+        """
+        Get evictable VODs in eviction order.
+
+        Args:
+            limit (int, optional): Maximum number of VODs to rank; those
+                without files under the recording directory are then left out.
+
+        Returns:
+            List[str]: VOD IDs, first to evict first.
+        """
+        ranked = self._ranked_vods(limit, 0)
+        with self._lock:
+            return [vod_id for vod_id in ranked if vod_id in self.vod_files]
+
+    def enforce(self) -> List[str]:
+        """
+        Evict VODs while usage is above the quota or free disk space is low.
+
+        Once the quota's high watermark is crossed, VODs are evicted down to
+        the low watermark so that eviction does not run on every new file.
+        Candidates are ranked a batch at a time.
+
+        Returns:
+            List[str]: IDs of evicted VODs.
+        """
+        evicted = []
+        if not self._over_limits(self.high_watermark):
+            return evicted
+
+        # Files no VOD owns cannot be played, so they go first
+        self._evict_orphans()
+
+        # VODs that stay in the ranking move the next batch along
+        offset = 0
+        while self._over_limits(self.low_watermark):
+            batch = self._ranked_vods(EVICTION_BATCH_SIZE, offset)
+            if not batch:
+                break
+
+            for vod_id in batch:
+                if not self._over_limits(self.low_watermark):
+                    break
+                if vod_id not in self.vod_files:
+                    offset += 1
+                    continue
+
+                if self.evict(vod_id):
+                    evicted.append(vod_id)
+                vod_info = self.media_server.vod_entries.get(vod_id)
+                if vod_info is not None and not (self.cold_directory and vod_info.get("storage_tier") == "cold"):
+                    offset += 1
+
+        if self._over_limits(self.high_watermark):
+            logger.warning(f"Storage still over limits after evicting {len(evicted)} VODs")
+        return evicted
+
+    def evict(self, vod_id: str) -> bool:
+        """
+        Evict a VOD: move its video to the cold directory if one is
+        configured, otherwise delete the VOD and its files.
+
+        Args:
+            vod_id (str): ID of the VOD entry.
+
+        Returns:
+            bool: True if any space was freed, False otherwise.
+        """
+        vod_info = self.media_server.get_vod_info(vod_id)
+
+        with self._lock:
+            paths = list(self.vod_files.get(vod_id, ()))
+            before = self.total_bytes
+
+        if vod_info and self.cold_directory:
+            moved = self._move_to_cold(vod_info)
+            if moved:
+                self.moved += 1
+                self.freed_bytes += before - self.total_bytes
+            return moved
+
+        if vod_info:
+            self.media_server.delete_vod_entry(vod_id, delete_file=self._is_managed(vod_info.get("file_path")))
+
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.error(f"Error deleting {path}: {str(e)}")
+                continue
+            with self._lock:
+                self._remove_file(path)
+
+        with self._lock:
+            self.vod_files.pop(vod_id, None)
+            self.access.pop(vod_id, None)
+            freed = before - self.total_bytes
+
+        self.evicted += 1
+        self.freed_bytes += freed
+        logger.info(f"Evicted VOD {vod_id} ({self.policy}), freed {freed} bytes")
+        return freed > 0
+
+    def can_record(self) -> bool:
+        """
+        Check that there is room for another recording.
+
+        Requires the quota and the disk to have room for the configured
+        reservation for every active recording plus the new one, on top of
+        the minimum free space. Does not evict: when usage is over the high
+        watermark, the monitor thread is woken to make room, so a refused
+        recording can be retried once it has.
+
+        Returns:
+            bool: True if a new recording may start, False otherwise.
+        """
+        if self._over_limits(self.high_watermark):
+            self._wake_event.set()
+
+        reserve = self.recording_reserve_bytes * (len(self.media_server.recording_processes) + 1)
+
+        if self.max_bytes and self.total_bytes + reserve > self.max_bytes:
+            logger.error(f"Recording quota exhausted: {self.total_bytes} of {self.max_bytes} bytes used")
+            return False
+
+        free = self._free_bytes()
+        if free is not None and free - reserve < self.min_free_bytes:
+            logger.error(f"Not enough free disk space to record: {free} bytes free")
+            return False
+
+        return True
+
+    def _ranked_vods(self, limit: Optional[int], offset: int) -> List[str]:
+        """
+        Rank VODs for eviction by the configured policy.
+
+        With a catalog the ranking is an indexed query that reads only the
+        requested page, so entries are never loaded just to be ranked.
+        Without one, the indexed VODs are ranked in memory.
+
+        Args:
+            limit (int, optional): Maximum number of VOD IDs to return.
+            offset (int): Number of ranked VODs to skip.
+
+        Returns:
+            List[str]: VOD IDs, first to evict first.
+        """
+        catalog = self.media_server.catalog
+        if catalog:
+            self._flush_access()
+            return catalog.eviction_candidates(
+                self.policy,
+                limit if limit is not None else -1,
+                offset,
+                include_cold=not self.cold_directory
+            )
+
+        with self._lock:
+            candidates = []
+            for vod_id in self.vod_files:
+                vod_info = self.media_server.vod_entries.get(vod_id)
+                if vod_info is None:
+                    candidates.append((self._sort_key(vod_id, 0), vod_id))
+                    continue
+                if vod_info.get("status") == "processing":
+                    continue
+                if self.cold_directory and vod_info.get("storage_tier") == "cold":
+                    continue
+                candidates.append((self._sort_key(vod_id, vod_info.get("created_at") or 0), vod_id))
+
+        candidates.sort()
+        end = offset + limit if limit is not None else None
+        return [vod_id for _, vod_id in candidates[offset:end]]
+
+    def _flush_access(self):
+        """Write playback statistics gathered since the last flush to the catalog."""
+        with self._lock:
+            pending, self.pending_access = self.pending_access, {}
+        if not pending:
+            return
+
+        try:
+            self.media_server.catalog.record_access_many(pending)
+        except Exception as e:
+            logger.error(f"Error saving VOD access statistics: {str(e)}")
+
+    def _track_known_vods(self):
+        """
+        Attribute video files to the VODs loaded in memory and in the
+        catalog, and disown derived files of VODs that no longer exist.
+        """
+        known = set()
+        for vod_info in list(self.media_server.vod_entries.values()):
+            self.track_vod(vod_info)
+            known.add(vod_info["id"])
+
+        catalog = self.media_server.catalog
+        if catalog:
+            cursor = None
+            while True:
+                page = catalog.query(limit=1000, cursor=cursor)
+                if not page:
+                    break
+                for vod_info in page:
+                    self.track_vod(vod_info)
+                    known.add(vod_info["id"])
+                cursor = page[-1]["id"]
+
+        with self._lock:
+            unknown = [vod_id for vod_id in self.vod_files if vod_id not in known]
+        if not unknown:
+            return
+
+        # Check again for entries created since the listing started
+        found = self.media_server.get_vod_infos(unknown)
+        with self._lock:
+            for vod_id in unknown:
+                if vod_id not in found:
+                    for path in list(self.vod_files.get(vod_id, ())):
+                        self._set_owner(path, None)
+
+    def _evict_orphans(self):
+        """Delete media files no VOD owns, oldest first, until usage is under the low watermark."""
+        cutoff = time.time() - self.orphan_grace_seconds
+        in_use = [os.path.abspath(self.media_server.hls_directory) + os.sep]
+        for stream_info in list(self.media_server.active_streams.values()):
+            for key in ("recording_path", "segment_directory"):
+                if stream_info.get(key):
+                    in_use.append(os.path.abspath(stream_info[key]))
+
+        with self._lock:
+            orphans = sorted(
+                (self.files[path][1], path) for path in self.unowned_files
+                if path.endswith(ORPHAN_EXTENSIONS) and self.files[path][1] < cutoff
+                and not any(path.startswith(prefix) for prefix in in_use)
+            )
+
+        for _, path in orphans:
+            if not self._over_limits(self.low_watermark):
+                break
+            with self._lock:
+                # Claimed by a VOD since the list was made
+                if path not in self.unowned_files:
+                    continue
+                before = self.total_bytes
+
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.error(f"Error deleting {path}: {str(e)}")
+                continue
+
+            with self._lock:
+                self._remove_file(path)
+                freed = before - self.total_bytes
+            self.orphans_removed += 1
+            self.freed_bytes += freed
+            logger.info(f"Evicted orphaned file {path}, freed {freed} bytes")
+
+    def _move_to_cold(self, vod_info: Dict[str, Any]) -> bool:
+        """Move a VOD's video file to the cold directory and repoint the entry."""
+        path = vod_info.get("file_path")
+        if not path or not self._is_managed(path) or not os.path.exists(path):
+            return False
+
+        destination = os.path.join(self.cold_directory, os.path.basename(path))
+        try:
+            os.makedirs(self.cold_directory, exist_ok=True)
+            shutil.move(path, destination)
+        except OSError as e:
+            logger.error(f"Error moving {path} to cold storage: {str(e)}")
+            return False
+
+        with self._lock:
+            self._remove_file(os.path.abspath(path))
+
+        # The keyframe index travels with its video
+        index_path = KeyframeIndex.index_path(path)
+        if os.path.exists(index_path):
+            try:
+                shutil.move(index_path, KeyframeIndex.index_path(destination))
+                with self._lock:
+                    self._remove_file(os.path.abspath(index_path))
+            except OSError as e:
+                logger.error(f"Error moving {index_path} to cold storage: {str(e)}")
+
+        vod_info["file_path"] = destination
+        vod_info["storage_tier"] = "cold"
+        self.media_server._save_vod_entry(vod_info["id"])
+
+        logger.info(f"Moved VOD {vod_info['id']} to cold storage: {destination}")
+        return True
+
+    def _over_limits(self, watermark: float) -> bool:
+        """Check usage against the quota watermark and the free-space floor."""
+        if self.max_bytes and self.total_bytes > self.max_bytes * watermark:
+            return True
+
+        free = self._free_bytes()
+        return free is not None and free < self.min_free_bytes
+
+    def _free_bytes(self) -> Optional[int]:
+        """Free space on the recording file system, or None if unknown."""
+        path = self.recording_directory
+        while not os.path.exists(path):
+            parent = os.path.dirname(path)
+            if parent == path:
+                return None
+            path = parent
+
+        try:
+            return shutil.disk_usage(path).free
+        except OSError:
+            return None
+
+    def _sort_key(self, vod_id: str, created_at: float):
+        """Eviction order key for the configured policy; smallest goes first."""
+        last_access, hits = self.access.get(vod_id, (created_at, 0))
+        if self.policy == "lfu":
+            return (hits, last_access)
+        if self.policy == "age":
+            return (created_at,)
+        return (last_access,)
+
+    def _is_managed(self, path: Optional[str]) -> bool:
+        """Check whether a path lies under the recording directory (and not in cold storage)."""
+        if not path:
+            return False
+        path = os.path.abspath(path)
+        if self.cold_directory and path.startswith(self.cold_directory + os.sep):
+            return False
+        return path.startswith(self.recording_directory + os.sep)
+
+    @staticmethod
+    def _owner_from_name(name: str) -> Optional[str]:
+        """Get the VOD ID from the name of a derived file."""
+        for marker in DERIVED_FILE_MARKERS:
+            index = name.rfind(marker)
+            if index > 0:
+                return name[:index]
+        return None
+
+    def _owner_from_directory(self, directory: str) -> Optional[str]:
+        """Get the VOD ID from the directory of a VOD's HLS segments."""
+        if os.path.dirname(directory) == self.vod_segment_root:
+            return os.path.basename(directory)
+        return None
+
+    @staticmethod
+    def _file_entry(stat: os.stat_result) -> tuple:
+        """Get the index entry for a file's status."""
+        return (stat.st_size, stat.st_mtime, (stat.st_dev, stat.st_ino))
+
+    def _add_file(self, path: str, stat: os.stat_result, owner: Optional[str]):
+        """Add or update a file in the index. Caller holds the lock."""
+        self._unlink_inode(path)
+        entry = self._file_entry(stat)
+        self.files[path] = entry
+
+        # Only the first link to an inode adds to the usage
+        inode = self.inodes.setdefault(entry[2], [0, set()])
+        self.total_bytes += entry[0] - inode[0]
+        inode[0] = entry[0]
+        inode[1].add(path)
+
+        if owner or path not in self.file_owners:
+            self._set_owner(path, owner)
+
+    def _remove_file(self, path: str):
+        """Remove a file from the index. Caller holds the lock."""
+        self._unlink_inode(path)
+        self._set_owner(path, None)
+        self.file_owners.pop(path, None)
+        self.unowned_files.discard(path)
+
+    def _unlink_inode(self, path: str):
+        """Drop a path from the index, freeing its inode's usage with its last link. Caller holds the lock."""
+        previous = self.files.pop(path, None)
+        if previous is None:
+            return
+
+        inode = self.inodes[previous[2]]
+        inode[1].discard(path)
+        if not inode[1]:
+            self.total_bytes -= inode[0]
+            del self.inodes[previous[2]]
+
+    def _set_owner(self, path: str, owner: Optional[str]):
+        """Attribute an indexed file to a VOD. Caller holds the lock."""
+        previous = self.file_owners.get(path)
+        if previous == owner and path in self.file_owners:
+            return
+
+        if previous:
+            paths = self.vod_files.get(previous)
+            if paths:
+                paths.discard(path)
+                if not paths:
+                    del self.vod_files[previous]
+
+        self.file_owners[path] = owner
+        if owner:
+            self.vod_files.setdefault(owner, set()).add(path)
+            self.unowned_files.discard(path)
+        else:
+            self.unowned_files.add(path)
+
+    def _monitor_loop(self):
+        """Index the recording directory, then rescan and enforce limits periodically or when woken."""
+        try:
+            self.scan()
+            self._track_known_vods()
+        except Exception as e:
+            logger.error(f"Error indexing recording directory: {str(e)}")
+        self.indexed.set()
+
+        woken = True
+        while not self._stop_event.is_set():
+            try:
+                if not woken:
+                    self.scan()
+                if self.media_server.catalog:
+                    self._flush_access()
+                self.enforce()
+            except Exception as e:
+                logger.error(f"Error in storage monitor: {str(e)}")
+
+            woken = self._wake_event.wait(self.scan_interval)
+            self._wake_event.clear()
@@ -0,0 +1,350 @@
+"""
+Chunked transcoder for spreading long transcodes across all CPU cores.
+"""
+
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+
+from .keyframes import KeyframeIndex
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_VIDEO_ARGS = ["-c:v", "libx264", "-preset", "veryfast", "-crf", "23"]
+DEFAULT_AUDIO_ARGS = ["-c:a", "aac", "-b:a", "128k"]
+
+
+def write_concat_list(list_path: str, file_paths: List[str]):
+    """
+    Write a list of files for FFmpeg's concat demuxer.
+
+    Quotes in the paths are escaped so that any file name can be listed.
+
+    Args:
+        list_path (str): Path to the list file.
+        file_paths (List[str]): Files to concatenate, in order.
+    """
+    with open(list_path, "w") as f:
+        f.write("ffconcat version 1.0\n")
+        for file_path in file_paths:
+            escaped = file_path.replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+
+
+class ChunkedTranscoder:
+    """
+    Transcoder that splits the input at keyframes, transcodes the video
+    chunks in parallel and concatenates the results without re-encoding.
+
+    Audio is transcoded in a single job alongside the video chunks so that
+    codec priming at chunk boundaries never produces audible gaps.
+    """
+
+    def __init__(self, config: Dict[str, Any] = None):
+        """
+        Initialize the chunked transcoder.
+
+        Args:
+            config (Dict[str, Any], optional): Transcoder configuration.
+        """
+        self.config = config or {}
+        self.ffmpeg_path = self.config.get("ffmpeg_path", "ffmpeg")
+        self.ffprobe_path = self.config.get("ffprobe_path", "ffprobe")
+        self.workers = self.config.get("workers") or os.cpu_count() or 1
+        self.min_chunk_duration = self.config.get("min_chunk_duration", 30)
+        self.chunks_per_worker = self.config.get("chunks_per_worker", 2)
+        self.work_directory = self.config.get("work_directory")
+
+    def probe_duration(self, input_path: str) -> float:
+        """
+        Get the duration of a media file.
+
+        Args:
+            input_path (str): Path to media file.
+
+        Returns:
+            float: Duration in seconds.
+
+        Raises:
+            RuntimeError: If the file cannot be probed or has no known duration.
+        """
+        ffprobe_cmd = [
+            self.ffprobe_path,
+            "-v", "error",
+            "-show_entries", "format=duration",
+            "-of", "default=noprint_wrappers=1:nokey=1",
+            input_path
+        ]
+
+        result = subprocess.run(ffprobe_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"FFprobe failed ({result.returncode}): {(result.stderr or '').strip()[-500:]}")
+        try:
+            return float(result.stdout.strip())
+        except ValueError:
+            # "N/A" for inputs such as raw streams that carry no duration
+            raise RuntimeError(f"No duration reported for {input_path}: {result.stdout.strip()!r}")
+
+    def probe_keyframes(self, input_path: str) -> List[float]:
+        """
+        Get the timestamps of all video keyframes in a media file.
+
+        Uses the keyframe index saved next to the file when there is one;
+        otherwise only packet headers are read, which is far cheaper than
+        decoding.
+
+        Args:
+            input_path (str): Path to media file.
+
+        Returns:
+            List[float]: Sorted keyframe timestamps in seconds.
+        """
+        index = KeyframeIndex.load_for(input_path) or KeyframeIndex.probe(input_path, self.ffprobe_path)
+        return index.to_list()
+
+    def has_audio(self, input_path: str) -> bool:
+        """
+        Check whether a media file has an audio stream.
+
+        Args:
+            input_path (str): Path to media file.
+
+        Returns:
+            bool: True if the file has at least one audio stream.
+
+        Raises:
+            RuntimeError: If the file cannot be probed.
+        """
+        ffprobe_cmd = [
+            self.ffprobe_path,
+            "-v", "error",
+            "-select_streams", "a",
+            "-show_entries", "stream=index",
+            "-of", "csv=print_section=0",
+            input_path
+        ]
+
+        result = subprocess.run(ffprobe_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"FFprobe failed ({result.returncode}): {(result.stderr or '').strip()[-500:]}")
+        return bool(result.stdout.strip())
+
+    def plan_chunks(self, keyframes: List[float], duration: float,
+                    workers: Optional[int] = None) -> List[Tuple[float, float]]:
+        """
+        Plan chunk boundaries snapped to keyframes.
+
+        Chunks aim for ``chunks_per_worker`` chunks per worker so that a slow
+        chunk near the end does not leave the other cores idle, but are never
+        shorter than ``min_chunk_duration``.
+
+        Args:
+            keyframes (List[float]): Sorted keyframe timestamps.
+            duration (float): Total duration in seconds.
+            workers (int, optional): Number of parallel workers.
+
+        Returns:
+            List[Tuple[float, float]]: List of (start, end) pairs.
+        """
+        workers = workers or self.workers
+        target = max(self.min_chunk_duration, duration / max(1, workers * self.chunks_per_worker))
+
+        boundaries = [0.0]
+        for keyframe in keyframes:
+            if keyframe - boundaries[-1] >= target and duration - keyframe >= target / 2:
+                boundaries.append(keyframe)
+
+        boundaries.append(duration)
+        return list(zip(boundaries[:-1], boundaries[1:]))
+
+    def transcode(self, input_path: str, output_path: str,
+                  video_args: Optional[List[str]] = None,
+                  audio_args: Optional[List[str]] = None,
+                  workers: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Transcode a file using all available cores.
+
+        Args:
+            input_path (str): Path to input file.
+            output_path (str): Path to output file.
+            video_args (List[str], optional): FFmpeg video encoding arguments.
+            audio_args (List[str], optional): FFmpeg audio encoding arguments.
+            workers (int, optional): Number of parallel workers.
+
+        Returns:
+            Dict[str, Any]: Transcode result information.
+        """
+        if not os.path.exists(input_path):
+            raise FileNotFoundError(f"Input file not found: {input_path}")
+
+        video_args = video_args or DEFAULT_VIDEO_ARGS
+        audio_args = audio_args or DEFAULT_AUDIO_ARGS
+        workers = workers or self.workers
+        started_at = time.time()
+
+        duration = self.probe_duration(input_path)
+        chunks = self.plan_chunks(self.probe_keyframes(input_path), duration, workers)
+
+        work_dir = tempfile.mkdtemp(prefix="transcode-", dir=self.work_directory)
+        chunk_paths = []
+        try:
+            chunk_paths = self._split(input_path, chunks, work_dir)
+            if not chunk_paths:
+                raise RuntimeError(f"No video chunks produced for {input_path}")
+
+            # Share the cores between concurrent encoders instead of oversubscribing
+            threads = max(1, (os.cpu_count() or 1) // min(workers, len(chunk_paths)))
+            audio_path = os.path.join(work_dir, "audio.mka")
+
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                audio_future = executor.submit(self._transcode_audio, input_path, audio_path, audio_args)
+                futures = [
+                    executor.submit(self._transcode_chunk, chunk_path, f"{chunk_path}.out.mkv",
+                                    video_args, threads)
+                    for chunk_path in chunk_paths
+                ]
+                encoded_paths = [future.result() for future in futures]
+                has_audio = audio_future.result()
+
+            self._concat(encoded_paths, audio_path if has_audio else None, output_path, work_dir)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+        elapsed = time.time() - started_at
+        logger.info(f"Transcoded {input_path} in {len(chunk_paths)} chunks with {workers} workers: {elapsed:.1f}s")
+
+        return {
+            "input_path": input_path,
+            "output_path": output_path,
+            "duration": duration,
+            "chunks": len(chunk_paths),
+            "workers": workers,
+            "elapsed": elapsed
+        }
+
+    def _run(self, ffmpeg_cmd: List[str]):
+        """
+        Run an FFmpeg command and raise on failure.
+
+        Args:
+            ffmpeg_cmd (List[str]): Command to run.
+        """
+        result = subprocess.run(ffmpeg_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        if result.returncode != 0:
+            stderr = result.stderr.decode("utf-8", "replace") if isinstance(result.stderr, bytes) else result.stderr
+            raise RuntimeError(f"FFmpeg failed ({result.returncode}): {(stderr or '').strip()[-500:]}")
+
+    def _split(self, input_path: str, chunks: List[Tuple[float, float]], work_dir: str) -> List[str]:
+        """
+        Split the video stream at the planned keyframes without re-encoding.
+
+        Args:
+            input_path (str): Path to input file.
+            chunks (List[Tuple[float, float]]): Planned chunks.
+            work_dir (str): Directory for chunk files.
+
+        Returns:
+            List[str]: Paths of the chunk files in order.
+        """
+        pattern = os.path.join(work_dir, "chunk_%05d.mkv")
+        ffmpeg_cmd = [
+            self.ffmpeg_path, "-y",
+            "-i", input_path,
+            "-map", "0:v:0",
+            "-c", "copy",
+            "-f", "segment",
+            "-reset_timestamps", "1",
+        ]
+        split_points = [f"{start:.6f}" for start, _ in chunks[1:]]
+        if split_points:
+            ffmpeg_cmd += ["-segment_times", ",".join(split_points)]
+        else:
+            ffmpeg_cmd += ["-segment_time", "1000000"]
+        ffmpeg_cmd.append(pattern)
+
+        self._run(ffmpeg_cmd)
+
+        # The muxer may merge boundaries that fall on non-keyframe packets, so
+        # trust what was written rather than the plan
+        return sorted(
+            os.path.join(work_dir, name) for name in os.listdir(work_dir)
+            if name.startswith("chunk_") and name.endswith(".mkv")
+        )
+
+    def _transcode_chunk(self, chunk_path: str, output_path: str,
+                         video_args: List[str], threads: int) -> str:
+        """
+        Transcode a single video chunk.
+
+        Args:
+            chunk_path (str): Path to chunk file.
+            output_path (str): Path to encoded chunk.
+            video_args (List[str]): FFmpeg video encoding arguments.
+            threads (int): Encoder threads for this chunk.
+
+        Returns:
+            str: Path to the encoded chunk.
+        """
+        self._run([
+            self.ffmpeg_path, "-y",
+            "-i", chunk_path,
+            "-an",
+            *video_args,
+            "-threads", str(threads),
+            output_path
+        ])
+        return output_path
+
+    def _transcode_audio(self, input_path: str, output_path: str, audio_args: List[str]) -> bool:
+        """
+        Transcode the audio track in one pass.
+
+        Args:
+            input_path (str): Path to input file.
+            output_path (str): Path to encoded audio.
+            audio_args (List[str]): FFmpeg audio encoding arguments.
+
+        Returns:
+            bool: True if the input has audio, False otherwise.
+
+        Raises:
+            RuntimeError: If probing or encoding the audio fails.
+        """
+        if not self.has_audio(input_path):
+            logger.info(f"No audio stream in {input_path}")
+            return False
+
+        self._run([
+            self.ffmpeg_path, "-y",
+            "-i", input_path,
+            "-vn",
+            "-map", "0:a:0",
+            *audio_args,
+            output_path
+        ])
+        return True
+
+    def _concat(self, chunk_paths: List[str], audio_path: Optional[str], output_path: str, work_dir: str):
+        """
+        Concatenate encoded chunks and mux the audio without re-encoding.
+
+        Args:
+            chunk_paths (List[str]): Encoded chunk paths in order.
+            audio_path (str, optional): Encoded audio path.
+            output_path (str): Path to output file.
+            work_dir (str): Directory for the concat list.
+        """
+        list_path = os.path.join(work_dir, "chunks.txt")
+        write_concat_list(list_path, chunk_paths)
+
+        ffmpeg_cmd = [self.ffmpeg_path, "-y", "-f", "concat", "-safe", "0", "-i", list_path]
+        if audio_path:
+            ffmpeg_cmd += ["-i", audio_path, "-map", "0:v", "-map", "1:a"]
+        ffmpeg_cmd += ["-c", "copy", "-movflags", "+faststart", output_path]
+
+        self._run(ffmpeg_cmd)
@@ -0,0 +1,365 @@
+"""
+Persistent VOD catalog backed by SQLite.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+from typing import Dict, Any, List, Optional, Iterable, Tuple
+
+logger = logging.getLogger(__name__)
+
+# SQLite limits the number of bound parameters per statement
+_BATCH_SIZE = 500
+
+_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS vod_entries (
+        id TEXT PRIMARY KEY,
+        name TEXT,
+        source_stream TEXT,
+        status TEXT,
+        created_at REAL NOT NULL DEFAULT 0,
+        content_hash TEXT,
+        clip_of TEXT,
+        storage_tier TEXT,
+        last_access REAL,
+        hits INTEGER NOT NULL DEFAULT 0,
+        data TEXT NOT NULL
+    )
+    """,
+    # Every index ends in (created_at, id) so filtered listings are served
+    # in cursor order straight from the index without a sort step
+    "CREATE INDEX IF NOT EXISTS idx_vod_created_at ON vod_entries (created_at, id)",
+    "CREATE INDEX IF NOT EXISTS idx_vod_source_stream ON vod_entries (source_stream, created_at, id)",
+    "CREATE INDEX IF NOT EXISTS idx_vod_status ON vod_entries (status, created_at, id)",
+    "CREATE INDEX IF NOT EXISTS idx_vod_name ON vod_entries (name, created_at, id)",
+    "CREATE INDEX IF NOT EXISTS idx_vod_content_hash ON vod_entries (content_hash, created_at, id)",
+    # Eviction orders; entries never played count as last used when created
+    "CREATE INDEX IF NOT EXISTS idx_vod_lru ON vod_entries (coalesce(last_access, created_at), id)",
+    "CREATE INDEX IF NOT EXISTS idx_vod_lfu ON vod_entries (hits, coalesce(last_access, created_at), id)",
+]
+
+# Columns added after the first release, for catalogs created before them
+_ADDED_COLUMNS = [
+    ("content_hash", "TEXT"),
+    ("clip_of", "TEXT"),
+    ("storage_tier", "TEXT"),
+    ("last_access", "REAL"),
+    ("hits", "INTEGER NOT NULL DEFAULT 0"),
+]
+
+# Added columns whose values were already part of the stored entries
+_BACKFILLED_COLUMNS = ("clip_of",)
+
+# ORDER BY clause for each storage eviction policy
+_EVICTION_ORDERS = {
+    "lru": "coalesce(last_access, created_at), id",
+    "lfu": "hits, coalesce(last_access, created_at), id",
+    "age": "created_at, id",
+}
+
+
+class VodCatalog:
+    """
+    SQLite-backed store for VOD entries.
+    Runs in WAL mode so readers never block the recording pipeline's writes.
+    """
+
+    def __init__(self, db_path: str):
+        """
+        Initialize the VOD catalog.
+
+        Args:
+            db_path (str): Path to the SQLite database file.
+        """
+        self.db_path = db_path
+
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+
+        with self._conn:
+            self._conn.execute(_SCHEMA[0])
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(vod_entries)")}
+            for column, column_type in _ADDED_COLUMNS:
+                if column not in columns:
+                    self._conn.execute(f"ALTER TABLE vod_entries ADD COLUMN {column} {column_type}")
+                    # Fill the new column from the stored entries
+                    if column in _BACKFILLED_COLUMNS:
+                        self._conn.execute(
+                            f"UPDATE vod_entries SET {column} = json_extract(data, '$.{column}')"
+                        )
+            for statement in _SCHEMA[1:]:
+                self._conn.execute(statement)
+
+        logger.info(f"Opened VOD catalog at {db_path}")
+
+    def put(self, entry: Dict[str, Any]):
+        """
+        Insert or update a VOD entry.
+
+        Args:
+            entry (Dict[str, Any]): VOD entry information.
+        """
+        self.put_many([entry])
+
+    def put_many(self, entries: Iterable[Dict[str, Any]]):
+        """
+        Insert or update several VOD entries in one transaction.
+
+        Args:
+            entries (Iterable[Dict[str, Any]]): VOD entries.
+        """
+        rows = [self._to_row(entry) for entry in entries]
+        with self._lock, self._conn:
+            # Upsert so that access statistics survive updates to the entry
+            self._conn.executemany(
+                "INSERT INTO vod_entries "
+                "(id, name, source_stream, status, created_at, content_hash, clip_of, storage_tier, data) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET name = excluded.name, "
+                "source_stream = excluded.source_stream, status = excluded.status, "
+                "created_at = excluded.created_at, content_hash = excluded.content_hash, "
+                "clip_of = excluded.clip_of, storage_tier = excluded.storage_tier, data = excluded.data",
+                rows
+            )
+
+    def get(self, vod_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a VOD entry.
+
+        Args:
+            vod_id (str): ID of the VOD entry.
+
+        Returns:
+            Optional[Dict[str, Any]]: VOD entry information or None if not found.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM vod_entries WHERE id = ?", (vod_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_many(self, vod_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Get several VOD entries in batched queries.
+
+        Args:
+            vod_ids (List[str]): IDs of the VOD entries.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Found entries keyed by ID.
+        """
+        found = {}
+        for offset in range(0, len(vod_ids), _BATCH_SIZE):
+            batch = vod_ids[offset:offset + _BATCH_SIZE]
+            placeholders = ",".join("?" * len(batch))
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT id, data FROM vod_entries WHERE id IN ({placeholders})", batch
+                ).fetchall()
+            for vod_id, data in rows:
+                found[vod_id] = json.loads(data)
+        return found
+
+    def find_by_source_streams(self, stream_keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the most recent recording of each of several streams.
+
+        Clips cut from a stream carry its key as well, but are not its
+        recording and are left out.
+
+        Args:
+            stream_keys (List[str]): Keys of the source streams.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Found entries keyed by stream key.
+        """
+        found = {}
+        for offset in range(0, len(stream_keys), _BATCH_SIZE):
+            batch = stream_keys[offset:offset + _BATCH_SIZE]
+            placeholders = ",".join("?" * len(batch))
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT source_stream, data FROM vod_entries WHERE source_stream IN ({placeholders}) "
+                    "AND clip_of IS NULL ORDER BY created_at, id",
+                    batch
+                ).fetchall()
+            # Later rows win, leaving the newest entry per stream
+            for stream_key, data in rows:
+                found[stream_key] = json.loads(data)
+        return found
+
+    def find_by_content_hash(self, content_hash: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the oldest VOD entry with the given content hash.
+
+        Args:
+            content_hash (str): Content hash of the video file.
+
+        Returns:
+            Optional[Dict[str, Any]]: VOD entry information or None if not found.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM vod_entries WHERE content_hash = ? ORDER BY created_at, id LIMIT 1",
+                (content_hash,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def record_access_many(self, accesses: Dict[str, Tuple[float, int]]):
+        """
+        Add playback statistics to several VOD entries in one transaction.
+
+        Args:
+            accesses (Dict[str, Tuple[float, int]]): Last access time and new
+                hits, keyed by VOD ID.
+        """
+        rows = [(last_access, hits, vod_id) for vod_id, (last_access, hits) in accesses.items()]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE vod_entries SET last_access = max(coalesce(last_access, 0), ?), hits = hits + ? "
+                "WHERE id = ?",
+                rows
+            )
+
+    def eviction_candidates(self, policy: str, limit: int, offset: int = 0,
+                            include_cold: bool = True) -> List[str]:
+        """
+        List VOD IDs in eviction order, skipping entries still processing.
+
+        Args:
+            policy (str): Eviction policy, "lru", "lfu" or "age".
+            limit (int): Maximum number of IDs to return.
+            offset (int): Number of IDs to skip.
+            include_cold (bool): Whether to include entries already in cold storage.
+
+        Returns:
+            List[str]: VOD IDs, first to evict first.
+        """
+        sql = "SELECT id FROM vod_entries WHERE status IS NOT 'processing'"
+        if not include_cold:
+            sql += " AND storage_tier IS NOT 'cold'"
+        sql += f" ORDER BY {_EVICTION_ORDERS[policy]} LIMIT ? OFFSET ?"
+
+        with self._lock:
+            rows = self._conn.execute(sql, (limit, offset)).fetchall()
+        return [row[0] for row in rows]
+
+    def delete(self, vod_id: str) -> bool:
+        """
+        Delete a VOD entry.
+
+        Args:
+            vod_id (str): ID of the VOD entry.
+
+        Returns:
+            bool: True if an entry was deleted, False otherwise.
+        """
+        with self._lock, self._conn:
+            cursor = self._conn.execute("DELETE FROM vod_entries WHERE id = ?", (vod_id,))
+        return cursor.rowcount > 0
+
+    def query(self, limit: Optional[int] = None, cursor: Optional[str] = None,
+              source_stream: Optional[str] = None, status: Optional[str] = None,
+              name: Optional[str] = None, created_after: Optional[float] = None,
+              created_before: Optional[float] = None, descending: bool = False) -> List[Dict[str, Any]]:
+        """
+        List VOD entries ordered by creation time with keyset pagination.
+
+        Args:
+            limit (int, optional): Maximum number of entries to return.
+            cursor (str, optional): ID of the last entry of the previous page.
+            source_stream (str, optional): Only entries recorded from this stream.
+            status (str, optional): Only entries with this status.
+            name (str, optional): Only entries with this name.
+            created_after (float, optional): Only entries created at or after this time.
+            created_before (float, optional): Only entries created before this time.
+            descending (bool): Newest entries first.
+
+        Returns:
+            List[Dict[str, Any]]: Matching VOD entries.
+        """
+        clauses, params = self._filters(source_stream, status, name, created_after, created_before)
+
+        if cursor:
+            comparison = "<" if descending else ">"
+            clauses.append(
+                f"(created_at, id) {comparison} (SELECT created_at, id FROM vod_entries WHERE id = ?)"
+            )
+            params.append(cursor)
+
+        sql = "SELECT data FROM vod_entries"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        direction = "DESC" if descending else "ASC"
+        sql += f" ORDER BY created_at {direction}, id {direction}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def count(self, source_stream: Optional[str] = None, status: Optional[str] = None,
+              name: Optional[str] = None) -> int:
+        """
+        Count VOD entries matching the filters.
+
+        Args:
+            source_stream (str, optional): Only entries recorded from this stream.
+            status (str, optional): Only entries with this status.
+            name (str, optional): Only entries with this name.
+
+        Returns:
+            int: Number of matching entries.
+        """
+        clauses, params = self._filters(source_stream, status, name, None, None)
+        sql = "SELECT COUNT(*) FROM vod_entries"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+
+        with self._lock:
+            return self._conn.execute(sql, params).fetchone()[0]
+
+    def close(self):
+        """Close the catalog database."""
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _filters(source_stream, status, name, created_after, created_before):
+        """Build WHERE clauses for the indexed filter columns."""
+        clauses, params = [], []
+        for column, value in (("source_stream", source_stream), ("status", status), ("name", name)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if created_after is not None:
+            clauses.append("created_at >= ?")
+            params.append(created_after)
+        if created_before is not None:
+            clauses.append("created_at < ?")
+            params.append(created_before)
+        return clauses, params
+
+    @staticmethod
+    def _to_row(entry: Dict[str, Any]) -> tuple:
+        """Convert a VOD entry to a table row."""
+        return (
+            entry["id"],
+            entry.get("name"),
+            entry.get("source_stream"),
+            entry.get("status"),
+            entry.get("created_at") or 0,
+            entry.get("content_hash"),
+            entry.get("clip_of"),
+            entry.get("storage_tier"),
+            json.dumps(entry, default=str)
+        )
@@ -0,0 +1,654 @@
+"""
+Asyncio HTTP origin for serving VOD files, thumbnails and HLS segments.
+"""
+
+import asyncio
+import collections
+import hashlib
+import logging
+import mimetypes
+import os
+import threading
+import time
+from email.utils import formatdate
+from typing import Dict, Any, Optional, Tuple, Callable
+from urllib.parse import parse_qs, unquote
+
+from .storage import DERIVED_FILE_MARKERS
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPES = {
+    ".mp4": "video/mp4",
+    ".m3u8": "application/vnd.apple.mpegurl",
+    ".ts": "video/mp2t",
+    ".m4s": "video/iso.segment",
+    ".vtt": "text/vtt",
+    ".jpg": "image/jpeg",
+}
+
+STATUS_REASONS = {
+    200: "OK",
+    206: "Partial Content",
+    304: "Not Modified",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    416: "Range Not Satisfiable",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+MAX_HEADER_BYTES = 16384
+
+
+class FileHandleCache:
+    """
+    LRU cache of open file handles.
+
+    Handles are reference counted so that an evicted file is only closed
+    once the last in-flight transfer using it has finished. A handle is
+    reopened when the file on disk is replaced (for example by a remux).
+    """
+
+    def __init__(self, max_size: int = 256):
+        """
+        Initialize the file handle cache.
+
+        Args:
+            max_size (int): Maximum number of idle open files to keep.
+        """
+        self.max_size = max_size
+        self.entries = collections.OrderedDict()
+        self.orphans = {}
+        self.hits = 0
+        self.misses = 0
+
+    def acquire(self, path: str, stat_result: os.stat_result):
+        """
+        Get an open file for a path, opening it if needed.
+
+        Args:
+            path (str): Path to the file.
+            stat_result (os.stat_result): Current stat of the file.
+
+        Returns:
+            Open binary file object; must be returned with release().
+        """
+        identity = (stat_result.st_ino, stat_result.st_size, stat_result.st_mtime_ns)
+        entry = self.entries.get(path)
+
+        if entry and entry["identity"] == identity:
+            self.entries.move_to_end(path)
+            self.hits += 1
+        else:
+            if entry:
+                self._discard(path)
+            entry = {"file": open(path, "rb"), "identity": identity, "refs": 0}
+            self.entries[path] = entry
+            self.misses += 1
+            self._evict()
+
+        entry["refs"] += 1
+        return entry["file"]
+
+    def release(self, path: str, file):
+        """
+        Return a file obtained from acquire().
+
+        Args:
+            path (str): Path the file was acquired for.
+            file: File object returned by acquire().
+        """
+        entry = self.entries.get(path)
+        if entry and entry["file"] is file:
+            entry["refs"] -= 1
+            return
+
+        # The entry was replaced or evicted while in use
+        entry = self.orphans.get(id(file))
+        if entry is None:
+            return
+        entry["refs"] -= 1
+        if entry["refs"] <= 0:
+            del self.orphans[id(file)]
+            file.close()
+
+    def close(self):
+        """Close all cached files."""
+        for path in list(self.entries):
+            self._discard(path)
+
+    def _evict(self):
+        """Evict least recently used files beyond the cache size."""
+        for path in list(self.entries):
+            if len(self.entries) <= self.max_size:
+                break
+            self._discard(path)
+
+    def _discard(self, path: str):
+        """Remove an entry, closing it now or when its last user releases it."""
+        entry = self.entries.pop(path)
+        if entry["refs"] > 0:
+            self.orphans[id(entry["file"])] = entry
+        else:
+            entry["file"].close()
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single byte range from a Range header.
+
+    Args:
+        header (str): Range header value, e.g. ``bytes=0-1023``.
+        size (int): Size of the file.
+
+    Returns:
+        Optional[Tuple[int, int]]: Inclusive (start, end) or None if unsatisfiable.
+
+    Raises:
+        ValueError: If the header is malformed or requests multiple ranges.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        raise ValueError(f"Unsupported range: {header}")
+
+    start_text, _, end_text = spec.strip().partition("-")
+    if not start_text:
+        # Suffix range: the last N bytes
+        length = int(end_text)
+        if length <= 0 or size == 0:
+            return None
+        return max(0, size - length), size - 1
+
+    start = int(start_text)
+    end = int(end_text) if end_text else size - 1
+    if start >= size or end < start:
+        return None
+    return start, min(end, size - 1)
+
+
+class VodOriginServer:
+    """
+    Minimal HTTP/1.1 origin for media files under the recording directory.
+    Uses zero-copy sendfile, byte ranges, ETags and a file handle cache.
+    """
+
+    def __init__(self, media_server, config: Dict[str, Any] = None):
+        """
+        Initialize the origin server.
+
+        Args:
+            media_server: Media server instance used to resolve VOD IDs.
+            config (Dict[str, Any], optional): Origin configuration.
+        """
+        self.media_server = media_server
+        self.config = config or {}
+        self.host = self.config.get("host", "0.0.0.0")
+        self.port = self.config.get("port", 8090)
+        self.recording_directory = self.config.get("recording_directory", media_server.recording_directory)
+        self.hls_directory = self.config.get("hls_directory", media_server.hls_directory)
+        self.max_age = self.config.get("max_age", 86400)
+
+        self.file_cache = FileHandleCache(self.config.get("fd_cache_size", 256))
+
+        # Server state
+        self.server = None
+        self.loop = None
+        self.is_running = False
+        self.server_thread = None
+        self._ready = threading.Event()
+        self._connections = set()
+
+        # Statistics
+        self.requests_served = 0
+        self.bytes_sent = 0
+
+    def start(self) -> bool:
+        """
+        Start the origin server in a background thread.
+
+        Returns:
+            bool: True if started, False if already running or binding failed.
+        """
+        if self.is_running:
+            logger.warning("VOD origin server is already running")
+            return False
+
+        self.is_running = True
+        self._ready.clear()
+        self.server_thread = threading.Thread(target=self._run_server)
+        self.server_thread.daemon = True
+        self.server_thread.start()
+        self._ready.wait(timeout=5)
+
+        if self.is_running:
+            logger.info(f"VOD origin server listening on {self.host}:{self.port}")
+        return self.is_running
+
+    def stop(self) -> bool:
+        """
+        Stop the origin server.
+
+        Returns:
+            bool: True if stopped, False if not running.
+        """
+        if not self.is_running:
+            logger.warning("VOD origin server is not running")
+            return False
+
+        self.is_running = False
+        if self.loop:
+            asyncio.run_coroutine_threadsafe(self._stop_server(), self.loop).result(timeout=5)
+            self.loop.call_soon_threadsafe(self.loop.stop)
+        if self.server_thread:
+            self.server_thread.join(timeout=5)
+
+        logger.info("VOD origin server stopped")
+        return True
+
+    def _run_server(self):
+        """Run the HTTP server in a separate thread."""
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+        try:
+            self.server = self.loop.run_until_complete(
+                asyncio.start_server(self._handle_connection, self.host, self.port)
+            )
+            # Pick up the real port when binding to port 0
+            self.port = self.server.sockets[0].getsockname()[1]
+        except Exception as e:
+            logger.error(f"Error starting VOD origin server: {str(e)}")
+            self.is_running = False
+            self.loop.close()
+            self.loop = None
+            return
+        finally:
+            self._ready.set()
+
+        self.loop.run_forever()
+        self.loop.close()
+
+    async def _stop_server(self):
+        """Close the listening socket and cached files."""
+        self.server.close()
+        for writer in list(self._connections):
+            writer.close()
+        await self.server.wait_closed()
+        self.file_cache.close()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Serve requests on a keep-alive connection.
+
+        Args:
+            reader (asyncio.StreamReader): Connection reader.
+            writer (asyncio.StreamWriter): Connection writer.
+        """
+        self._connections.add(writer)
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                    break
+                if len(head) > MAX_HEADER_BYTES:
+                    break
+
+                method, path, version, headers = self._parse_head(head)
+                keep_alive = await self._handle_request(writer, method, path, headers, version)
+                self.requests_served += 1
+                if not keep_alive:
+                    break
+        except (ConnectionError, ValueError) as e:
+            logger.debug(f"Origin connection error: {str(e)}")
+        except Exception as e:
+            logger.error(f"Error serving origin request: {str(e)}")
+        finally:
+            self._connections.discard(writer)
+            writer.close()
+
+    @staticmethod
+    def _parse_head(head: bytes) -> Tuple[str, str, str, Dict[str, str]]:
+        """
+        Parse the request line and headers.
+
+        Args:
+            head (bytes): Raw request head.
+
+        Returns:
+            Tuple[str, str, str, Dict[str, str]]: Method, path, HTTP version and lower-cased headers.
+        """
+        lines = head.decode("latin-1").split("\r\n")
+        method, path, version = lines[0].split(" ", 2)
+
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+        return method.upper(), path, version.strip().upper(), headers
+
+    async def _handle_request(self, writer: asyncio.StreamWriter, method: str,
+                              path: str, headers: Dict[str, str], version: str = "HTTP/1.1") -> bool:
+        """
+        Handle a single request.
+
+        Args:
+            writer (asyncio.StreamWriter): Connection writer.
+            method (str): HTTP method.
+            path (str): Request path.
+            headers (Dict[str, str]): Request headers.
+            version (str): HTTP version of the request line.
+
+        Returns:
+            bool: Whether the connection can be kept alive.
+        """
+        connection = headers.get("connection", "").lower()
+        if version == "HTTP/1.0":
+            # HTTP/1.0 connections close unless the client asks otherwise
+            keep_alive = connection == "keep-alive"
+        else:
+            keep_alive = connection != "close"
+
+        if method not in ("GET", "HEAD"):
+            await self._send_status(writer, 405, keep_alive, {"Allow": "GET, HEAD"})
+            return keep_alive
+
+        path, _, query = path.partition("?")
+        if path.startswith("/playlists/"):
+            await self._send_manifest(writer, method, path, headers, keep_alive)
+            return keep_alive
+        
+        if path.startswith("/llhls/"):
+            packager, file_name = self._llhls_target(path)
+            if packager and file_name is None:
+                await self._send_llhls_playlist(writer, method, packager, query, keep_alive)
+                return keep_alive
+            # A client may request the preload-hinted part before it exists
+            if packager and packager.is_preload_hint(file_name):
+                await self._wait_for(packager, lambda: not packager.is_preload_hint(file_name))
+        
+        # VOD lookups may hit the catalog database; keep them off the event loop
+        file_path = await self.loop.run_in_executor(None, self.resolve_path, path)
+        try:
+            stat_result = os.stat(file_path) if file_path else None
+        except OSError:
+            stat_result = None
+
+        if stat_result is None or not os.path.isfile(file_path):
+            await self._send_status(writer, 404, keep_alive)
+            return keep_alive
+
+        size = stat_result.st_size
+        etag = f'"{stat_result.st_ino:x}-{size:x}-{stat_result.st_mtime_ns:x}"'
+        response_headers = {
+            "Content-Type": self._content_type(file_path),
+            "ETag": etag,
+            "Last-Modified": formatdate(stat_result.st_mtime, usegmt=True),
+            "Accept-Ranges": "bytes",
+            "Cache-Control": "no-cache" if file_path.endswith(".m3u8") else f"max-age={self.max_age}",
+        }
+
+        if_none_match = headers.get("if-none-match")
+        if if_none_match and (if_none_match.strip() == "*" or etag in if_none_match):
+            await self._send_status(writer, 304, keep_alive, response_headers)
+            return keep_alive
+
+        status, start, length = 200, 0, size
+        range_header = headers.get("range")
+        if range_header and headers.get("if-range", etag) == etag:
+            try:
+                byte_range = parse_range(range_header, size)
+            except ValueError:
+                byte_range = (0, size - 1) if size else None  # Ignore unsupported ranges
+            if byte_range is None:
+                response_headers["Content-Range"] = f"bytes */{size}"
+                await self._send_status(writer, 416, keep_alive, response_headers)
+                return keep_alive
+            if byte_range != (0, size - 1):
+                status = 206
+                start, length = byte_range[0], byte_range[1] - byte_range[0] + 1
+                response_headers["Content-Range"] = f"bytes {byte_range[0]}-{byte_range[1]}/{size}"
+
+        response_headers["Content-Length"] = str(length)
+        self._write_head(writer, status, keep_alive, response_headers)
+
+        if method == "HEAD" or length == 0:
+            await writer.drain()
+            return keep_alive
+
+        file = self.file_cache.acquire(file_path, stat_result)
+        try:
+            await writer.drain()
+            await self.loop.sendfile(writer.transport, file, start, length)
+            self.bytes_sent += length
+        finally:
+            self.file_cache.release(file_path, file)
+
+        return keep_alive
+
+    async def _send_manifest(self, writer: asyncio.StreamWriter, method: str, path: str,
+                             headers: Dict[str, str], keep_alive: bool):
+        """
+        Send a generated playlist manifest.
+
+        Args:
+            writer (asyncio.StreamWriter): Connection writer.
+            method (str): HTTP method.
+            path (str): Request path, ``/playlists/<playlist_id>.m3u8``.
+            headers (Dict[str, str]): Request headers.
+            keep_alive (bool): Whether the connection is kept alive.
+        """
+        playlist_id, extension = os.path.splitext(path[len("/playlists/"):])
+        provider = self.media_server.playlist_manifest_provider
+        manifest = None
+        if provider and extension == ".m3u8":
+            manifest = await self.loop.run_in_executor(None, provider, playlist_id)
+        if manifest is None:
+            await self._send_status(writer, 404, keep_alive)
+            return
+
+        body = manifest.encode("utf-8")
+        etag = f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+        response_headers = {
+            "Content-Type": CONTENT_TYPES[".m3u8"],
+            "ETag": etag,
+            "Cache-Control": "no-cache",
+        }
+
+        if_none_match = headers.get("if-none-match")
+        if if_none_match and (if_none_match.strip() == "*" or etag in if_none_match):
+            await self._send_status(writer, 304, keep_alive, response_headers)
+            return
+
+        response_headers["Content-Length"] = str(len(body))
+        self._write_head(writer, 200, keep_alive, response_headers)
+        if method == "GET":
+            writer.write(body)
+            self.bytes_sent += len(body)
+        await writer.drain()
+
+    async def _send_llhls_playlist(self, writer: asyncio.StreamWriter, method: str, packager,
+                                   query: str, keep_alive: bool):
+        """
+        Send an LL-HLS media playlist, holding blocking reloads until the
+        requested segment or part is available.
+
+        Args:
+            writer (asyncio.StreamWriter): Connection writer.
+            method (str): HTTP method.
+            packager (LowLatencyHlsPackager): Packager of the stream.
+            query (str): Request query string.
+            keep_alive (bool): Whether the connection is kept alive.
+        """
+        params = parse_qs(query)
+        if "_HLS_msn" in params:
+            try:
+                msn = int(params["_HLS_msn"][0])
+                part = int(params["_HLS_part"][0]) if "_HLS_part" in params else None
+            except ValueError:
+                await self._send_status(writer, 400, keep_alive)
+                return
+
+            # Requests too far ahead of the live edge are rejected, not held
+            if msn > packager.next_sequence + 2:
+                await self._send_status(writer, 400, keep_alive)
+                return
+            if not await self._wait_for(packager, lambda: packager.has_part(msn, part)):
+                await self._send_status(writer, 503, keep_alive)
+                return
+
+        body = packager.playlist().encode("utf-8")
+        self._write_head(writer, 200, keep_alive, {
+            "Content-Type": CONTENT_TYPES[".m3u8"],
+            "Cache-Control": "no-cache",
+            "Content-Length": str(len(body)),
+        })
+        if method == "GET":
+            writer.write(body)
+            self.bytes_sent += len(body)
+        await writer.drain()
+
+    async def _wait_for(self, packager, predicate: Callable[[], bool]) -> bool:
+        """
+        Wait without blocking the event loop until the packager satisfies a
+        condition, for at most three target durations.
+
+        Args:
+            packager (LowLatencyHlsPackager): Packager to wait on.
+            predicate (Callable[[], bool]): Condition to wait for.
+
+        Returns:
+            bool: True if the condition holds, False on timeout.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + 3 * packager.segment_duration
+
+        while not predicate():
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return False
+
+            updated = asyncio.Event()
+            packager.add_waiter(lambda: loop.call_soon_threadsafe(updated.set))
+            if predicate():
+                break
+            try:
+                await asyncio.wait_for(updated.wait(), remaining)
+            except asyncio.TimeoutError:
+                return predicate()
+
+        return True
+
+    def _llhls_target(self, path: str):
+        """
+        Split an LL-HLS request path into its packager and file name.
+
+        Args:
+            path (str): Request path under ``/llhls/``.
+
+        Returns:
+            Tuple: Packager (or None) and file name, None for the playlist.
+        """
+        relative = unquote(path[len("/llhls/"):])
+        if relative.endswith(".m3u8"):
+            return self.media_server.get_llhls_packager(relative[:-len(".m3u8")]), None
+        stream_key, _, file_name = relative.rpartition("/")
+        return self.media_server.get_llhls_packager(stream_key), file_name
+
+    def resolve_path(self, path: str) -> Optional[str]:
+        """
+        Map a request path to a file under the served directories.
+
+        Args:
+            path (str): Request path.
+
+        Returns:
+            Optional[str]: File path or None if the path is not served.
+        """
+        if path.startswith("/vod/"):
+            vod_id, extension = os.path.splitext(path[len("/vod/"):])
+            vod_info = self.media_server.get_vod_info(vod_id)
+            if vod_info and extension == ".mp4":
+                self.media_server.storage.record_access(vod_id)
+                return vod_info.get("file_path")
+            return None
+
+        if path.startswith("/thumbnails/"):
+            return self._derived_file_path(unquote(path[len("/thumbnails/"):]))
+
+        if path.startswith("/hls/"):
+            return self._safe_join(self.hls_directory, path[len("/hls/"):])
+
+        if path.startswith("/llhls/"):
+            packager, file_name = self._llhls_target(path)
+            if packager and file_name:
+                return self._safe_join(packager.output_directory, file_name)
+            return None
+
+        return None
+
+    def _derived_file_path(self, file_name: str) -> Optional[str]:
+        """
+        Map a thumbnail route file name to a file derived from a known VOD.
+
+        Only thumbnails, sprite sheets and trickplay indexes named after an
+        existing VOD are served; recordings, keyframe indexes, live segments
+        and the catalog database are not.
+
+        Args:
+            file_name (str): File name, e.g. ``vod-1_thumbnail.jpg``.
+
+        Returns:
+            Optional[str]: File path or None if the name is not a derived file.
+        """
+        if not file_name or "/" in file_name or os.sep in file_name:
+            return None
+
+        for marker in DERIVED_FILE_MARKERS:
+            vod_id, found, _ = file_name.partition(marker)
+            if not found or not vod_id:
+                continue
+            vod_info = self.media_server.get_vod_info(vod_id)
+            if not vod_info or not vod_info.get("file_path"):
+                return None
+            # Derived files are written next to the VOD file
+            return self._safe_join(os.path.dirname(vod_info["file_path"]), file_name)
+
+        return None
+
+    @staticmethod
+    def _safe_join(root: str, relative: str) -> Optional[str]:
+        """Join a request path to a root directory, refusing traversal."""
+        root = os.path.realpath(root)
+        candidate = os.path.realpath(os.path.join(root, relative))
+        if candidate != root and candidate.startswith(root + os.sep):
+            return candidate
+        return None
+
+    @staticmethod
+    def _content_type(file_path: str) -> str:
+        """Get the content type for a file."""
+        extension = os.path.splitext(file_path)[1].lower()
+        return CONTENT_TYPES.get(extension) or mimetypes.guess_type(file_path)[0] or "application/octet-stream"
+
+    def _write_head(self, writer: asyncio.StreamWriter, status: int, keep_alive: bool,
+                    headers: Dict[str, str]):
+        """Write the status line and headers."""
+        lines = [f"HTTP/1.1 {status} {STATUS_REASONS[status]}"]
+        headers = dict(headers)
+        headers["Date"] = formatdate(time.time(), usegmt=True)
+        headers["Connection"] = "keep-alive" if keep_alive else "close"
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+
+    async def _send_status(self, writer: asyncio.StreamWriter, status: int, keep_alive: bool,
+                           headers: Optional[Dict[str, str]] = None):
+        """Send a response without a body."""
+        headers = dict(headers or {})
+        headers["Content-Length"] = "0"
+        self._write_head(writer, status, keep_alive, headers)
+        await writer.drain()
@@ -7,6 +7,8 @@ import uuid
 import time
 from typing import Dict, Any, List, Optional, Callable
 
+from ..utils.viewers import ViewerTracker
+
 logger = logging.getLogger(__name__)
 
 class BroadcastController:
@@ -15,7 +17,7 @@ class BroadcastController:
     Integrates Jitsi with media server for broadcasting.
     """
     
-    def __init__(self, jitsi_connector, media_server, signaling_server):
+    def __init__(self, jitsi_connector, media_server, signaling_server, config: Dict[str, Any] = None):
         """
         Initialize the broadcast controller.
         
@@ -23,11 +25,16 @@ class BroadcastController:
             jitsi_connector: Jitsi connector instance.
             media_server: Media server instance.
             signaling_server: Signaling server instance.
+            config (Dict[str, Any], optional): Broadcast configuration.
         """
         self.jitsi = jitsi_connector
         self.media_server = media_server
         self.signaling = signaling_server
+        self.config = config or {}
         self.active_broadcasts = {}
+        
+        # Viewer counts are refreshed on the tracker's tick, not per heartbeat
+        self.viewer_tracker = ViewerTracker(self.config.get("viewers", {}), on_tick=self._apply_viewer_counts)
     
     def create_broadcast(self, name: str, config: Dict[str, Any] = None) -> Dict[str, Any]:
         """
@@ -66,12 +73,15 @@ class BroadcastController:
             "stream_key": stream_info["key"],
             "rtmp_url": stream_info["rtmp_url"],
             "hls_url": stream_info["hls_url"],
+            "llhls_url": stream_info.get("llhls_url"),
             "created_at": time.time(),
             "features": room_info["features"],
             "max_hosts": config.get("max_hosts", 10),
             "max_viewers": config.get("max_viewers", 10000),
             "hosts": {},
             "viewers": 0,
+            "unique_viewers": 0,
+            "peak_viewers": 0,
             "status": "created",
             "recording": config.get("recording", False)
         }
@@ -105,6 +115,9 @@ class BroadcastController:
             broadcast_info["status"] = "live"
             broadcast_info["started_at"] = time.time()
             
+            if not self.viewer_tracker.is_running:
+                self.viewer_tracker.start()
+            
             logger.info(f"Started broadcast: {broadcast_info['name']} ({broadcast_id})")
             return True
         
@@ -134,6 +147,10 @@ class BroadcastController:
             broadcast_info["status"] = "ended"
             broadcast_info["ended_at"] = time.time()
             
+            # Keep the final counts, then release the broadcast's viewer state
+            self.viewer_tracker.tick()
+            self.viewer_tracker.remove_broadcast(broadcast_id)
+            
             logger.info(f"Stopped broadcast: {broadcast_info['name']} ({broadcast_id})")
             return True
         
@@ -311,6 +328,180 @@ class BroadcastController:
         logger.info(f"Updated viewer count for broadcast {broadcast_id}: {viewers}")
         return True
     
+    def record_viewer_heartbeat(self, broadcast_id: str, viewer_id: str) -> bool:
+        """
+        Record a heartbeat ping from a viewer.
+        
+        Viewers are counted as watching until no heartbeat has arrived for
+        the tracking window. The broadcast's viewer counts are updated on the
+        next tick.
+        
+        Args:
+            broadcast_id (str): ID of the broadcast.
+            viewer_id (str): ID of the viewer, stable across heartbeats.
+            
+        Returns:
+            bool: True if successful, False otherwise.
+        """
+        if broadcast_id not in self.active_broadcasts:
+            # Heartbeats arrive at high rate, so stale ones are not worth a warning
+            logger.debug(f"Heartbeat for unknown broadcast: {broadcast_id}")
+            return False
+        
+        self.viewer_tracker.heartbeat(broadcast_id, viewer_id)
+        return True
+    
+    def record_viewer_leave(self, broadcast_id: str, viewer_id: str) -> bool:
+        """
+        Stop counting a viewer who has closed the player.
+        
+        Args:
+            broadcast_id (str): ID of the broadcast.
+            viewer_id (str): ID of the viewer.
+            
+        Returns:
+            bool: True if the viewer was being counted, False otherwise.
+        """
+        if broadcast_id not in self.active_broadcasts:
+            logger.debug(f"Viewer leave for unknown broadcast: {broadcast_id}")
+            return False
+        
+        return self.viewer_tracker.leave(broadcast_id, viewer_id)
+    
+    def _apply_viewer_counts(self, counts: Dict[str, Dict[str, int]]):
+        """Copy tracked viewer counts into the broadcast information."""
+        for broadcast_id, broadcast_counts in counts.items():
+            broadcast_info = self.active_broadcasts.get(broadcast_id)
+            if not broadcast_info:
+                continue
+            
+            broadcast_info["viewers"] = broadcast_counts["concurrent"]
+            broadcast_info["unique_viewers"] = broadcast_counts["unique"]
+            broadcast_info["peak_viewers"] = max(broadcast_info.get("peak_viewers", 0), broadcast_counts["concurrent"])
+    
+    def get_broadcast_analytics(self, broadcast_id: str, start: Optional[float] = None,
+                                end: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Get the bandwidth, rendition mix and concurrent viewers of a broadcast
+        from the origin access logs.
+        
+        Args:
+            broadcast_id (str): ID of the broadcast.
+            start (float, optional): Unix time to start from.
+            end (float, optional): Unix time to end at.
+            
+        Returns:
+            Optional[Dict[str, Any]]: Time-bucketed traffic or None if not available.
+        """
+        if broadcast_id not in self.active_broadcasts:
+            logger.warning(f"Broadcast not found: {broadcast_id}")
+            return None
+        
+        broadcast_info = self.active_broadcasts[broadcast_id]
+        return self.media_server.get_stream_analytics(broadcast_info["stream_key"], start, end)
+    
+    def create_clip(self, broadcast_id: str, start: float, end: float,
+                    name: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Cut a highlight clip from a broadcast, live or after it has ended.
+        
+        Args:
+            broadcast_id (str): ID of the broadcast.
+            start (float): Start time in seconds from the start of the recording.
+            end (float): End time in seconds from the start of the recording.
+            name (str, optional): Name for the clip.
+            
+        Returns:
+            Optional[Dict[str, Any]]: Clip VOD entry or None if not available.
+        """
+        if broadcast_id not in self.active_broadcasts:
+            logger.warning(f"Broadcast not found: {broadcast_id}")
+            return None
+        
+        broadcast_info = self.active_broadcasts[broadcast_id]
+        if not broadcast_info["recording"]:
+            logger.warning(f"Broadcast is not recorded: {broadcast_id}")
+            return None
+        
+        try:
+            clip_info = self.media_server.create_clip(
+                broadcast_info["stream_key"], start, end,
+                name or f"{broadcast_info['name']} highlight"
+            )
+        except ValueError as e:
+            logger.warning(f"Failed to clip broadcast {broadcast_id}: {str(e)}")
+            return None
+        
+        if clip_info:
+            logger.info(f"Created clip for broadcast {broadcast_id}: {clip_info['id']}")
+        return clip_info
+    
+    def add_restream_target(self, broadcast_id: str, url: str,
+                            name: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Simulcast a broadcast to an external RTMP/SRT destination.
+        
+        Destinations are written by a stream-copy tee process, so no extra
+        encoding is done per destination, and one that fails is retried
+        without interrupting the others.
+        
+        Args:
+            broadcast_id (str): ID of the broadcast.
+            url (str): Destination URL, e.g. ``rtmp://a.rtmp.youtube.com/live2/<key>``.
+            name (str, optional): Display name for the destination.
+            
+        Returns:
+            Optional[Dict[str, Any]]: Target information or None if it could not be added.
+        """
+        if broadcast_id not in self.active_broadcasts:
+            logger.warning(f"Broadcast not found: {broadcast_id}")
+            return None
+        
+        broadcast_info = self.active_broadcasts[broadcast_id]
+        try:
+            target_info = self.media_server.add_restream_target(broadcast_info["stream_key"], url, name)
+        except ValueError as e:
+            logger.warning(f"Failed to add restream target to broadcast {broadcast_id}: {str(e)}")
+            return None
+        
+        logger.info(f"Added restream target {target_info['id']} to broadcast {broadcast_id}")
+        return target_info
+    
+    def remove_restream_target(self, broadcast_id: str, target_id: str) -> bool:
+        """
+        Stop simulcasting a broadcast to a destination.
+        
+        Args:
+            broadcast_id (str): ID of the broadcast.
+            target_id (str): ID of the target.
+            
+        Returns:
+            bool: True if successful, False otherwise.
+        """
+        if broadcast_id not in self.active_broadcasts:
+            logger.warning(f"Broadcast not found: {broadcast_id}")
+            return False
+        
+        broadcast_info = self.active_broadcasts[broadcast_id]
+        return self.media_server.remove_restream_target(broadcast_info["stream_key"], target_id)
+    
+    def get_restream_stats(self, broadcast_id: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        Get the health, bitrate and dropped frames of a broadcast's destinations.
+        
+        Args:
+            broadcast_id (str): ID of the broadcast.
+            
+        Returns:
+            Optional[List[Dict[str, Any]]]: Target information or None if the broadcast is not found.
+        """
+        if broadcast_id not in self.active_broadcasts:
+            logger.warning(f"Broadcast not found: {broadcast_id}")
+            return None
+        
+        broadcast_info = self.active_broadcasts[broadcast_id]
+        return self.media_server.get_restream_targets(broadcast_info["stream_key"])
+    
     def get_recording_url(self, broadcast_id: str) -> Optional[str]:
         """
         Get the recording URL for a broadcast.
@@ -330,8 +521,38 @@ class BroadcastController:
         # Check if broadcast has ended and was recorded
         if broadcast_info["status"] == "ended" and broadcast_info["recording"]:
             # Look up VOD entry in media server
-            for vod_entry in self.media_server.list_vod_entries():
-                if vod_entry.get("source_stream") == broadcast_info["stream_key"]:
-                    return vod_entry.get("url")
+            vod_entry = self.media_server.get_vod_for_stream(broadcast_info["stream_key"])
+            if vod_entry:
+                return vod_entry.get("url")
+        
+        return None
+    
+    def get_recording_urls(self, broadcast_ids: List[str]) -> Dict[str, Optional[str]]:
+        """
+        Get the recording URLs for several broadcasts at once.
+        
+        Args:
+            broadcast_ids (List[str]): IDs of the broadcasts.
+            
+        Returns:
+            Dict[str, Optional[str]]: Recording URL (or None) keyed by broadcast ID.
+        """
+        recording_urls = {}
+        stream_keys = {}
         
-        return None
\ No newline at end of file
+        for broadcast_id in broadcast_ids:
+            recording_urls[broadcast_id] = None
+            broadcast_info = self.active_broadcasts.get(broadcast_id)
+            if broadcast_info and broadcast_info["status"] == "ended" and broadcast_info["recording"]:
+                stream_keys[broadcast_info["stream_key"]] = broadcast_id
+        
+        if stream_keys:
+            vod_entries = self.media_server.get_vods_for_streams(list(stream_keys))
+            for stream_key, vod_entry in vod_entries.items():
+                recording_urls[stream_keys[stream_key]] = vod_entry.get("url")
+        
+        return recording_urls
+    
+    def shutdown(self):
+        """Stop background viewer tracking."""
+        self.viewer_tracker.stop()
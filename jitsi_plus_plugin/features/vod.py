@@ -3,9 +3,10 @@ Video on Demand (VOD) controller for managing VOD content.
 """
 
 import logging
+import math
 import os
 import uuid
-from typing import Dict, Any, List, Optional, Callable
+from typing import Dict, Any, List, Optional, Callable, Set, Tuple
 
 logger = logging.getLogger(__name__)
 
@@ -23,25 +24,58 @@ class VideoOnDemand:
             media_server: Media server instance.
         """
         self.media_server = media_server
+        
+        # Playlists hold VOD IDs in order; entries are resolved when read
         self.vod_playlists = {}
+        self.playlist_members = {}
+        
+        # Playlist ID -> generated HLS manifest
+        self.manifest_cache = {}
+        
+        # VOD ID -> IDs of playlists whose cached manifest includes it, and back
+        self.manifest_dependents = {}
+        self.manifest_vods = {}
+        # Bumped on every VOD change so a manifest built meanwhile is not cached
+        self.vod_generation = 0
+        
+        # Let the origin serve generated manifests, and drop them when their VODs change
+        media_server.playlist_manifest_provider = self.get_playlist_manifest
+        media_server.on_vod_changed = self._invalidate_vod
     
-    def create_vod_entry(self, name: str, file_path: str) -> Dict[str, Any]:
+    def create_vod_entry(self, name: str, file_path: str, source_stream: Optional[str] = None) -> Dict[str, Any]:
         """
         Create a VOD entry from a file.
         
         Args:
             name (str): Name for the VOD entry.
             file_path (str): Path to video file.
+            source_stream (str, optional): Key of the stream the file was recorded from.
             
         Returns:
             Dict[str, Any]: VOD entry information.
         """
         # Create VOD entry in media server
-        vod_info = self.media_server.create_vod_entry(name, file_path)
+        vod_info = self.media_server.create_vod_entry(name, file_path, source_stream)
         
         logger.info(f"Created VOD entry: {name} ({vod_info['id']})")
         return vod_info
     
+    def create_clip(self, source: str, start: float, end: float,
+                    name: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Cut a clip from a VOD or a recording stream into a new VOD entry.
+        
+        Args:
+            source (str): VOD ID or stream key to clip from.
+            start (float): Start time in seconds.
+            end (float): End time in seconds.
+            name (str, optional): Name for the clip.
+            
+        Returns:
+            Optional[Dict[str, Any]]: Clip VOD entry, or None if the clip queue is full.
+        """
+        return self.media_server.create_clip(source, start, end, name)
+    
     def get_vod_info(self, vod_id: str) -> Optional[Dict[str, Any]]:
         """
         Get information about a VOD entry.
@@ -54,14 +88,37 @@ class VideoOnDemand:
         """
         return self.media_server.get_vod_info(vod_id)
     
-    def list_vod_entries(self) -> List[Dict[str, Any]]:
+    def list_vod_entries(self, limit: Optional[int] = None, cursor: Optional[str] = None,
+                         source_stream: Optional[str] = None, status: Optional[str] = None,
+                         name: Optional[str] = None, created_after: Optional[float] = None,
+                         created_before: Optional[float] = None,
+                         descending: bool = False) -> List[Dict[str, Any]]:
         """
-        List all VOD entries.
+        List VOD entries, optionally filtered and paginated.
         
+        Args:
+            limit (int, optional): Maximum number of entries to return.
+            cursor (str, optional): ID of the last entry of the previous page.
+            source_stream (str, optional): Only entries recorded from this stream.
+            status (str, optional): Only entries with this status.
+            name (str, optional): Only entries with this name.
+            created_after (float, optional): Only entries created at or after this time.
+            created_before (float, optional): Only entries created before this time.
+            descending (bool): Newest entries first.
+            
         Returns:
             List[Dict[str, Any]]: List of VOD entry information.
         """
-        return self.media_server.list_vod_entries()
+        return self.media_server.list_vod_entries(
+            limit=limit,
+            cursor=cursor,
+            source_stream=source_stream,
+            status=status,
+            name=name,
+            created_after=created_after,
+            created_before=created_before,
+            descending=descending
+        )
     
     def delete_vod_entry(self, vod_id: str, delete_file: bool = False) -> bool:
         """
@@ -74,8 +131,34 @@ class VideoOnDemand:
         Returns:
             bool: True if successful, False otherwise.
         """
+        # Playlists skip deleted entries when read; their manifests are
+        # dropped through the media server's change callback
         return self.media_server.delete_vod_entry(vod_id, delete_file)
     
+    def get_dedup_stats(self) -> Dict[str, Any]:
+        """
+        Get content deduplication statistics for ingested files.
+        
+        Returns:
+            Dict[str, Any]: Deduplication statistics, including the dedup ratio.
+        """
+        return self.media_server.get_dedup_stats()
+    
+    def get_vod_analytics(self, vod_id: str, start: Optional[float] = None,
+                          end: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Get the bandwidth, rendition mix and concurrent viewers of a VOD.
+        
+        Args:
+            vod_id (str): ID of the VOD entry.
+            start (float, optional): Unix time to start from.
+            end (float, optional): Unix time to end at.
+            
+        Returns:
+            Optional[Dict[str, Any]]: Time-bucketed traffic or None if there is none.
+        """
+        return self.media_server.get_vod_analytics(vod_id, start, end)
+    
     def configure_ad_settings(self, vod_id: str, ad_config: Dict[str, Any]) -> bool:
         """
         Configure advertisement settings for a VOD entry.
@@ -106,22 +189,25 @@ class VideoOnDemand:
             "id": playlist_id,
             "name": name,
             "created_at": self.media_server.active_streams.get("time", 0) or 0,
-            "vod_entries": [],
+            "vod_ids": [],
             "ad_config": None
         }
+        members = set()
         
         # Add VOD entries if provided
         if vod_ids:
+            found = self.media_server.get_vod_infos(vod_ids)
             for vod_id in vod_ids:
-                vod_info = self.media_server.get_vod_info(vod_id)
-                if vod_info:
-                    playlist_info["vod_entries"].append(vod_info)
+                if vod_id in found and vod_id not in members:
+                    playlist_info["vod_ids"].append(vod_id)
+                    members.add(vod_id)
         
         # Store playlist
         self.vod_playlists[playlist_id] = playlist_info
+        self.playlist_members[playlist_id] = members
         
         logger.info(f"Created VOD playlist: {name} ({playlist_id})")
-        return playlist_info
+        return self._resolve_playlists([playlist_info])[0]
     
     def add_to_playlist(self, playlist_id: str, vod_id: str) -> bool:
         """
@@ -138,21 +224,20 @@ class VideoOnDemand:
             logger.warning(f"Playlist not found: {playlist_id}")
             return False
         
-        vod_info = self.media_server.get_vod_info(vod_id)
-        if not vod_info:
+        # Check if already in playlist
+        members = self.playlist_members[playlist_id]
+        if vod_id in members:
+            logger.warning(f"VOD entry already in playlist: {vod_id}")
+            return True
+        
+        if not self.media_server.get_vod_info(vod_id):
             logger.warning(f"VOD entry not found: {vod_id}")
             return False
         
         # Add VOD to playlist
-        playlist_info = self.vod_playlists[playlist_id]
-        
-        # Check if already in playlist
-        for entry in playlist_info["vod_entries"]:
-            if entry["id"] == vod_id:
-                logger.warning(f"VOD entry already in playlist: {vod_id}")
-                return True
-        
-        playlist_info["vod_entries"].append(vod_info)
+        self.vod_playlists[playlist_id]["vod_ids"].append(vod_id)
+        members.add(vod_id)
+        self._drop_manifest(playlist_id)
         
         logger.info(f"Added VOD {vod_id} to playlist {playlist_id}")
         return True
@@ -173,13 +258,73 @@ class VideoOnDemand:
             return False
         
         # Remove VOD from playlist
-        playlist_info = self.vod_playlists[playlist_id]
-        playlist_info["vod_entries"] = [entry for entry in playlist_info["vod_entries"] 
-                                       if entry["id"] != vod_id]
+        members = self.playlist_members[playlist_id]
+        if vod_id in members:
+            members.discard(vod_id)
+            self.vod_playlists[playlist_id]["vod_ids"].remove(vod_id)
+            self._drop_manifest(playlist_id)
         
         logger.info(f"Removed VOD {vod_id} from playlist {playlist_id}")
         return True
     
+    def move_in_playlist(self, playlist_id: str, vod_id: str, position: int) -> bool:
+        """
+        Move a VOD entry to a new position in a playlist.
+        
+        Args:
+            playlist_id (str): ID of the playlist.
+            vod_id (str): ID of the VOD entry.
+            position (int): New index; negative values count from the end.
+            
+        Returns:
+            bool: True if successful, False otherwise.
+        """
+        if playlist_id not in self.vod_playlists:
+            logger.warning(f"Playlist not found: {playlist_id}")
+            return False
+        
+        if vod_id not in self.playlist_members[playlist_id]:
+            logger.warning(f"VOD entry not in playlist: {vod_id}")
+            return False
+        
+        # Only IDs move, so this is a memmove of pointers even for long playlists
+        vod_ids = self.vod_playlists[playlist_id]["vod_ids"]
+        vod_ids.remove(vod_id)
+        if position < 0:
+            position = max(0, len(vod_ids) + 1 + position)
+        vod_ids.insert(position, vod_id)
+        self._drop_manifest(playlist_id)
+        
+        logger.info(f"Moved VOD {vod_id} to position {position} in playlist {playlist_id}")
+        return True
+    
+    def reorder_playlist(self, playlist_id: str, vod_ids: List[str]) -> bool:
+        """
+        Replace the order of a playlist's VOD entries.
+        
+        Args:
+            playlist_id (str): ID of the playlist.
+            vod_ids (List[str]): The playlist's VOD IDs in their new order.
+            
+        Returns:
+            bool: True if successful, False if the playlist does not exist or
+            the IDs are not exactly its entries.
+        """
+        if playlist_id not in self.vod_playlists:
+            logger.warning(f"Playlist not found: {playlist_id}")
+            return False
+        
+        members = self.playlist_members[playlist_id]
+        if len(vod_ids) != len(members) or set(vod_ids) != members:
+            logger.warning(f"New order does not match the entries of playlist {playlist_id}")
+            return False
+        
+        self.vod_playlists[playlist_id]["vod_ids"] = list(vod_ids)
+        self._drop_manifest(playlist_id)
+        
+        logger.info(f"Reordered playlist {playlist_id}")
+        return True
+    
     def get_playlist_info(self, playlist_id: str) -> Optional[Dict[str, Any]]:
         """
         Get information about a playlist.
@@ -190,7 +335,11 @@ class VideoOnDemand:
         Returns:
             Optional[Dict[str, Any]]: Playlist information or None if not found.
         """
-        return self.vod_playlists.get(playlist_id)
+        playlist_info = self.vod_playlists.get(playlist_id)
+        if playlist_info is None:
+            return None
+        
+        return self._resolve_playlists([playlist_info])[0]
     
     def list_playlists(self) -> List[Dict[str, Any]]:
         """
@@ -199,7 +348,7 @@ class VideoOnDemand:
         Returns:
             List[Dict[str, Any]]: List of playlist information.
         """
-        return list(self.vod_playlists.values())
+        return self._resolve_playlists(list(self.vod_playlists.values()))
     
     def delete_playlist(self, playlist_id: str) -> bool:
         """
@@ -213,6 +362,8 @@ class VideoOnDemand:
         """
         if playlist_id in self.vod_playlists:
             del self.vod_playlists[playlist_id]
+            del self.playlist_members[playlist_id]
+            self._drop_manifest(playlist_id)
             
             logger.info(f"Deleted playlist: {playlist_id}")
             return True
@@ -236,12 +387,15 @@ class VideoOnDemand:
             return False
         
         # Save ad configuration
-        self.vod_playlists[playlist_id]["ad_config"] = {
+        ad_config = {
             "pre_roll": ad_config.get("pre_roll", []),
             "mid_roll": ad_config.get("mid_roll", []),
             "post_roll": ad_config.get("post_roll", []),
             "custom": ad_config.get("custom", [])
         }
+        if self.vod_playlists[playlist_id]["ad_config"] != ad_config:
+            self.vod_playlists[playlist_id]["ad_config"] = ad_config
+            self._drop_manifest(playlist_id)
         
         logger.info(f"Configured ad settings for playlist: {playlist_id}")
         return True
@@ -285,19 +439,222 @@ class VideoOnDemand:
             })
             
             player_config["ad_config"] = vod_info.get("ad_config")
+            
+            # Scrub preview thumbnails
+            if vod_info.get("trickplay"):
+                player_config["thumbnails"] = vod_info["trickplay"]["vtt_url"]
         
         else:
             # Playlist
-            playlist_info = self.vod_playlists.get(playlist_id)
+            playlist_info = self.get_playlist_info(playlist_id)
             if not playlist_info:
                 raise ValueError(f"Playlist not found: {playlist_id}")
             
             for vod_info in playlist_info["vod_entries"]:
-                player_config["sources"].append({
+                source = {
                     "src": vod_info["url"],
                     "type": "video/mp4"
-                })
+                }
+                if vod_info.get("trickplay"):
+                    source["thumbnails"] = vod_info["trickplay"]["vtt_url"]
+                player_config["sources"].append(source)
             
             player_config["ad_config"] = playlist_info.get("ad_config")
+            
+            # Single HLS stream with the ads stitched in on the server
+            if self.media_server.vod_hls_enabled:
+                player_config["hls_url"] = f"{self.media_server.server_url}/playlists/{playlist_id}.m3u8"
+        
+        return player_config
+    
+    def get_playlist_manifest(self, playlist_id: str) -> Optional[str]:
+        """
+        Get an HLS media playlist that plays a playlist's VODs in order with
+        its ads stitched in as discontinuity-tagged breaks.
+        
+        Manifests are cached until the playlist's entries or ad settings
+        change, or one of the VODs in them is updated or deleted. Manifests
+        with VODs that are still processing are rebuilt on every request
+        until their segments are cut.
+        
+        Args:
+            playlist_id (str): ID of the playlist.
+            
+        Returns:
+            Optional[str]: M3U8 manifest or None if the playlist does not exist.
+        """
+        manifest = self.manifest_cache.get(playlist_id)
+        if manifest is not None:
+            return manifest
+        
+        playlist_info = self.vod_playlists.get(playlist_id)
+        if not playlist_info:
+            return None
+        
+        generation = self.vod_generation
+        manifest, vod_ids, complete = self._build_playlist_manifest(self._resolve_playlists([playlist_info])[0])
+        if complete and playlist_id in self.vod_playlists and generation == self.vod_generation:
+            self.manifest_cache[playlist_id] = manifest
+            self.manifest_vods[playlist_id] = vod_ids
+            for vod_id in vod_ids:
+                self.manifest_dependents.setdefault(vod_id, set()).add(playlist_id)
+        return manifest
+    
+    def _invalidate_vod(self, vod_id: str):
+        """
+        Drop the cached manifests that include a VOD.
+        
+        Args:
+            vod_id (str): ID of the VOD entry that was updated or deleted.
+        """
+        self.vod_generation += 1
+        for playlist_id in list(self.manifest_dependents.get(vod_id, ())):
+            self._drop_manifest(playlist_id)
+    
+    def _drop_manifest(self, playlist_id: str):
+        """
+        Drop a playlist's cached manifest and its entries in the reverse index.
+        
+        Args:
+            playlist_id (str): ID of the playlist.
+        """
+        self.manifest_cache.pop(playlist_id, None)
+        for vod_id in self.manifest_vods.pop(playlist_id, ()):
+            dependents = self.manifest_dependents.get(vod_id)
+            if dependents is not None:
+                dependents.discard(playlist_id)
+                if not dependents:
+                    del self.manifest_dependents[vod_id]
+    
+    def _resolve_playlists(self, playlists: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Copy playlists with their VOD entries looked up in one batch.
+        
+        Args:
+            playlists (List[Dict[str, Any]]): Stored playlist information.
+            
+        Returns:
+            List[Dict[str, Any]]: Playlist information with ``vod_entries``;
+            VODs that no longer exist are left out.
+        """
+        vod_ids = list({vod_id: None for playlist in playlists for vod_id in playlist["vod_ids"]})
+        found = self.media_server.get_vod_infos(vod_ids) if vod_ids else {}
+        
+        resolved = []
+        for playlist in playlists:
+            playlist_info = dict(playlist)
+            playlist_info["vod_ids"] = list(playlist["vod_ids"])
+            playlist_info["vod_entries"] = [found[vod_id] for vod_id in playlist["vod_ids"] if vod_id in found]
+            resolved.append(playlist_info)
+        return resolved
+    
+    def _build_playlist_manifest(self, playlist_info: Dict[str, Any]) -> Tuple[str, Set[str], bool]:
+        """
+        Build the HLS manifest for a playlist.
+        
+        Ads are VOD entries, given as VOD IDs or as dicts with a ``vod_id``
+        (and a ``time`` for mid-rolls), so that they are played from their
+        own segments with their probed durations. Other ads, such as bare
+        media URLs, are left to the player's ad configuration.
+        
+        Args:
+            playlist_info (Dict[str, Any]): Playlist information.
+            
+        Returns:
+            Tuple[str, Set[str], bool]: Manifest, IDs of the VODs it was
+            built from and whether every VOD was included.
+        """
+        ad_config = playlist_info.get("ad_config") or {}
+        mid_rolls = sorted(
+            (ad for ad in ad_config.get("mid_roll", []) if isinstance(ad, dict) and "time" in ad),
+            key=lambda ad: ad["time"]
+        )
+        
+        ad_ids = [
+            self._ad_vod_id(ad)
+            for position in ("pre_roll", "mid_roll", "post_roll")
+            for ad in ad_config.get(position, [])
+        ]
+        ad_entries = self.media_server.get_vod_infos([vod_id for vod_id in ad_ids if vod_id])
+        
+        # (duration, url, source); a discontinuity goes wherever the source changes
+        segments = []
+        vod_ids = set()
+        complete = True
+        
+        def vod_segments(vod_info):
+            nonlocal complete
+            vod_ids.add(vod_info["id"])
+            if not vod_info.get("hls_segments"):
+                # Entries that finished without segments cannot be streamed and are skipped
+                if vod_info.get("status") == "processing":
+                    complete = False
+                return []
+            
+            return [
+                (end - start, self.media_server.vod_segment_url.format(
+                    server_url=self.media_server.server_url,
+                    vod_id=vod_info["id"],
+                    index=index,
+                    start=start,
+                    end=end
+                ))
+                for index, (start, end) in enumerate(vod_info["hls_segments"])
+            ]
+        
+        def add_break(ads):
+            for ad in ads:
+                vod_id = self._ad_vod_id(ad)
+                if vod_id not in ad_entries:
+                    logger.warning(f"Skipping ad that is not a VOD entry in playlist {playlist_info['id']}: {ad}")
+                    continue
+                source = ("ad", len(segments))
+                segments.extend((duration, url, source) for duration, url in vod_segments(ad_entries[vod_id]))
+        
+        add_break(ad_config.get("pre_roll", []))
+        
+        position = 0.0
+        for vod_info in playlist_info["vod_entries"]:
+            for duration, url in vod_segments(vod_info):
+                # Mid-rolls play at the first segment boundary at or after their time
+                while mid_rolls and mid_rolls[0]["time"] <= position:
+                    add_break([mid_rolls.pop(0)])
+                segments.append((duration, url, ("vod", vod_info["id"])))
+                position += duration
+        
+        add_break(mid_rolls)
+        add_break(ad_config.get("post_roll", []))
+        
+        target_duration = max([math.ceil(duration) for duration, _, _ in segments] or [1])
+        lines = [
+            "#EXTM3U",
+            "#EXT-X-VERSION:3",
+            "#EXT-X-PLAYLIST-TYPE:VOD",
+            f"#EXT-X-TARGETDURATION:{target_duration}",
+            "#EXT-X-MEDIA-SEQUENCE:0"
+        ]
+        previous_source = None
+        for duration, url, source in segments:
+            if previous_source is not None and source != previous_source:
+                lines.append("#EXT-X-DISCONTINUITY")
+            lines.append(f"#EXTINF:{duration:.3f},")
+            lines.append(url)
+            previous_source = source
+        lines.append("#EXT-X-ENDLIST")
+        
+        return "\n".join(lines) + "\n", vod_ids, complete
+    
+    @staticmethod
+    def _ad_vod_id(ad: Any) -> Optional[str]:
+        """
+        Get the VOD ID of an ad from an ad configuration.
         
-        return player_config
\ No newline at end of file
+        Args:
+            ad (Any): VOD ID, or dict with a ``vod_id``.
+            
+        Returns:
+            Optional[str]: VOD ID or None if the ad does not name one.
+        """
+        if isinstance(ad, dict):
+            return ad.get("vod_id")
+        return ad if isinstance(ad, str) else None
@@ -0,0 +1,305 @@
+"""
+Predictive scaling decisions from server pool load history.
+"""
+
+import logging
+import math
+from array import array
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class RingBuffer:
+    """Fixed-size history of samples; the oldest sample is overwritten when full."""
+
+    def __init__(self, capacity: int):
+        """
+        Initialize the buffer.
+
+        Args:
+            capacity (int): Number of samples kept.
+        """
+        self.capacity = capacity
+        self._values = array("d", bytes(8 * capacity))
+        self._start = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, value: float):
+        """Add a sample."""
+        end = (self._start + self._size) % self.capacity
+        self._values[end] = value
+        if self._size < self.capacity:
+            self._size += 1
+        else:
+            self._start = (self._start + 1) % self.capacity
+
+    def values(self) -> List[float]:
+        """Samples, oldest first."""
+        end = self._start + self._size
+        if end <= self.capacity:
+            return self._values[self._start:end].tolist()
+        return self._values[self._start:].tolist() + self._values[:end - self.capacity].tolist()
+
+    def latest(self, count: int) -> List[float]:
+        """The most recent samples, oldest first."""
+        return self.values()[-count:] if count else []
+
+
+class HoltWintersForecaster:
+    """
+    Additive Holt-Winters exponential smoothing, updated one sample at a time.
+
+    With beta set to 0 and no season this is an EWMA; with a trend but no
+    season it is Holt's linear method.
+    """
+
+    def __init__(self, alpha: float = 0.5, beta: float = 0.2, gamma: float = 0.1, season_length: int = 0):
+        """
+        Initialize the forecaster.
+
+        Args:
+            alpha (float): Level smoothing factor.
+            beta (float): Trend smoothing factor.
+            gamma (float): Seasonal smoothing factor.
+            season_length (int): Samples per season, or 0 for no seasonality.
+        """
+        self.alpha = alpha
+        self.beta = beta
+        self.gamma = gamma
+        self.season_length = season_length
+        self.level = None
+        self.trend = 0.0
+        self.seasonal = [0.0] * season_length
+        self.samples = 0
+
+    def update(self, value: float):
+        """
+        Add an observation.
+
+        Args:
+            value (float): Observed demand.
+        """
+        season_index = self.samples % self.season_length if self.season_length else 0
+        seasonal = self.seasonal[season_index] if self.season_length else 0.0
+
+        if self.level is None:
+            self.level = value
+        else:
+            previous = self.level
+            self.level = self.alpha * (value - seasonal) + (1 - self.alpha) * (previous + self.trend)
+            self.trend = self.beta * (self.level - previous) + (1 - self.beta) * self.trend
+
+        if self.season_length:
+            self.seasonal[season_index] = self.gamma * (value - self.level) + (1 - self.gamma) * seasonal
+        self.samples += 1
+
+    def forecast(self, steps: int = 1) -> float:
+        """
+        Forecast demand some samples ahead.
+
+        Args:
+            steps (int): Samples ahead of the last observation.
+
+        Returns:
+            float: Forecast demand, never negative.
+        """
+        if self.level is None:
+            return 0.0
+        value = self.level + steps * self.trend
+        if self.season_length:
+            value += self.seasonal[(self.samples + steps - 1) % self.season_length]
+        return max(0.0, value)
+
+
+class ScalingController:
+    """
+    Decides how many servers a pool should gain or lose on each tick.
+
+    Demand is forecast a provisioning lead time ahead, so capacity is added
+    before a predicted peak arrives. Scaling up happens when the expected
+    utilization crosses a high watermark and scaling down only below a
+    lower one (hysteresis); each direction has a cooldown and a maximum
+    step so that one spike cannot cause a provisioning storm.
+    """
+
+    def __init__(self, config: Dict[str, Any] = None):
+        """
+        Initialize the controller.
+
+        Args:
+            config (Dict[str, Any], optional): Controller configuration.
+        """
+        self.config = config or {}
+        self.tick_seconds = self.config.get("tick_seconds", 30)
+        self.history_size = self.config.get("history_size", 2880)
+        self.forecast_enabled = self.config.get("forecast_enabled", True)
+        self.lead_time = self.config.get("lead_time", 300)
+        self.target_utilization = self.config.get("target_utilization", 0.7)
+        self.scale_up_threshold = self.config.get("scale_up_threshold", 0.8)
+        self.scale_down_threshold = self.config.get("scale_down_threshold", 0.4)
+        self.scale_up_cooldown = self.config.get("scale_up_cooldown", 120)
+        self.scale_down_cooldown = self.config.get("scale_down_cooldown", 600)
+        self.max_step_up = self.config.get("max_step_up", 5)
+        self.max_step_down = self.config.get("max_step_down", 1)
+        self.min_servers = self.config.get("min_servers", 1)
+        self.scale_down_window = self.config.get("scale_down_window", 600)
+
+        # Pool name -> history, forecaster and the time of the last change in each direction
+        self.pools = {}
+
+    def _pool(self, pool: str) -> Dict[str, Any]:
+        state = self.pools.get(pool)
+        if state is None:
+            state = self.pools[pool] = {
+                "history": RingBuffer(self.history_size),
+                "forecaster": HoltWintersForecaster(
+                    self.config.get("alpha", 0.5),
+                    self.config.get("beta", 0.2),
+                    self.config.get("gamma", 0.1),
+                    self.config.get("season_length", 0)
+                ),
+                "last_scale_up": None,
+                "last_scale_down": None,
+                "forecast": 0.0
+            }
+        return state
+
+    def observe(self, pool: str, demand: float):
+        """
+        Record a pool's demand without making a decision.
+
+        Args:
+            pool (str): Pool name.
+            demand (float): Total load on the pool.
+        """
+        state = self._pool(pool)
+        state["history"].append(demand)
+        state["forecaster"].update(demand)
+        steps = max(1, math.ceil(self.lead_time / self.tick_seconds))
+        state["forecast"] = state["forecaster"].forecast(steps) if self.forecast_enabled else demand
+
+    def decide(self, pool: str, demand: float, server_capacity: float, servers: int, now: float) -> int:
+        """
+        Record a pool's demand and decide on a change in its size.
+
+        Args:
+            pool (str): Pool name.
+            demand (float): Total load on the pool.
+            server_capacity (float): Capacity of one server.
+            servers (int): Servers in the pool, including ones still being provisioned.
+            now (float): Current time in seconds.
+
+        Returns:
+            int: Servers to add (positive) or remove (negative).
+        """
+        self.observe(pool, demand)
+        state = self.pools[pool]
+        if server_capacity <= 0:
+            return 0
+
+        expected = max(demand, state["forecast"])
+        utilization = expected / (servers * server_capacity) if servers else math.inf
+        desired = max(self.min_servers, math.ceil(expected / (server_capacity * self.target_utilization)))
+
+        if (utilization > self.scale_up_threshold or servers < self.min_servers) and desired > servers:
+            if self._cooling_down(state["last_scale_up"], self.scale_up_cooldown, now):
+                return 0
+            state["last_scale_up"] = now
+            return min(desired - servers, self.max_step_up)
+
+        if utilization < self.scale_down_threshold and servers > self.min_servers:
+            # Shrink to what the recent peak needs, not just the current sample
+            window = max(1, math.ceil(self.scale_down_window / self.tick_seconds))
+            recent_peak = max(state["history"].latest(window) + [expected])
+            desired = max(self.min_servers, math.ceil(recent_peak / (server_capacity * self.target_utilization)))
+            if desired >= servers:
+                return 0
+            if (self._cooling_down(state["last_scale_down"], self.scale_down_cooldown, now) or
+                    self._cooling_down(state["last_scale_up"], self.scale_down_cooldown, now)):
+                return 0
+            state["last_scale_down"] = now
+            return -min(servers - desired, self.max_step_down)
+
+        return 0
+
+    def get_forecast(self, pool: str) -> Optional[float]:
+        """
+        Get the latest lead-time forecast for a pool.
+
+        Args:
+            pool (str): Pool name.
+
+        Returns:
+            Optional[float]: Forecast demand or None if the pool has no history.
+        """
+        state = self.pools.get(pool)
+        return state["forecast"] if state else None
+
+    @staticmethod
+    def _cooling_down(last: Optional[float], cooldown: float, now: float) -> bool:
+        return last is not None and now - last < cooldown
+
+
+def backtest(config: Dict[str, Any], demand: List[float], server_capacity: float,
+             initial_servers: int = 1, provision_delay: float = 0) -> Dict[str, Any]:
+    """
+    Replay a demand series through a scaling controller.
+
+    Servers requested by the controller only count towards capacity once the
+    provisioning delay has passed, as with real instances booting.
+
+    Args:
+        config (Dict[str, Any]): Controller configuration; tick_seconds sets
+            the spacing of the demand samples.
+        demand (List[float]): Pool demand per tick.
+        server_capacity (float): Capacity of one server.
+        initial_servers (int): Servers at the start.
+        provision_delay (float): Seconds from a scale-up decision to a usable server.
+
+    Returns:
+        Dict[str, Any]: Servers per tick, server-hours, ticks and unserved load
+        while over capacity, and the number of scale events.
+    """
+    controller = ScalingController(config)
+    tick = controller.tick_seconds
+    ready = initial_servers
+    booting = []
+    servers_per_tick = []
+    overloaded_ticks = 0
+    unserved = 0.0
+    scale_ups = scale_downs = 0
+
+    for i, value in enumerate(demand):
+        now = i * tick
+        ready += sum(1 for at in booting if at <= now)
+        booting = [at for at in booting if at > now]
+
+        capacity = ready * server_capacity
+        if value > capacity:
+            overloaded_ticks += 1
+            unserved += (value - capacity) * tick
+
+        # The controller sees booting servers as already part of the pool
+        delta = controller.decide("pool", value, server_capacity, ready + len(booting), now)
+        if delta > 0:
+            booting.extend([now + provision_delay] * delta)
+            scale_ups += 1
+        elif delta < 0:
+            ready = max(0, ready + delta)
+            scale_downs += 1
+
+        servers_per_tick.append(ready + len(booting))
+
+    return {
+        "servers": servers_per_tick,
+        "server_hours": sum(servers_per_tick) * tick / 3600,
+        "peak_servers": max(servers_per_tick, default=0),
+        "overloaded_ticks": overloaded_ticks,
+        "unserved_load_seconds": unserved,
+        "scale_ups": scale_ups,
+        "scale_downs": scale_downs
+    }
@@ -0,0 +1,342 @@
+"""
+Shared HTTP client for media-server and Jitsi control-plane calls.
+"""
+
+import asyncio
+import functools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """Raised when a request is refused because the host's circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker for a single host.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    requests fail fast for ``reset_timeout`` seconds. One trial request is
+    then let through; its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30):
+        """
+        Initialize the circuit breaker.
+
+        Args:
+            failure_threshold (int): Consecutive failures before opening.
+            reset_timeout (float): Seconds to stay open before a trial request.
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        """
+        Check whether a request may be sent.
+
+        Returns:
+            bool: True if the request may proceed, False if the circuit is open.
+        """
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+                # Let a single trial request through
+                self.state = "half_open"
+                return True
+            return False
+
+    def record_success(self):
+        """Record a successful request."""
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+
+    def record_failure(self):
+        """Record a failed request."""
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+
+class HttpClient:
+    """
+    Pooled HTTP client with keep-alive connections, per-host connection
+    limits, async variants and per-host circuit breakers.
+    """
+
+    def __init__(self, config: Dict[str, Any] = None):
+        """
+        Initialize the HTTP client.
+
+        Args:
+            config (Dict[str, Any], optional): Client configuration.
+        """
+        self.config = config or {}
+        self.timeout = self.config.get("timeout", 5)
+        self.max_hosts = self.config.get("max_hosts", 16)
+        self.max_connections_per_host = self.config.get("max_connections_per_host", 10)
+        self.failure_threshold = self.config.get("failure_threshold", 5)
+        self.reset_timeout = self.config.get("reset_timeout", 30)
+        self.health_cache_ttl = self.config.get("health_cache_ttl", 10)
+
+        self._session = None
+        self._executor = None
+        self._breakers = {}
+        self._health_cache = {}
+        self._lock = threading.Lock()
+
+    @property
+    def session(self) -> requests.Session:
+        """Keep-alive session shared by all requests."""
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    session = requests.Session()
+                    # pool_block makes max_connections_per_host a hard per-host limit
+                    adapter = HTTPAdapter(
+                        pool_connections=self.max_hosts,
+                        pool_maxsize=self.max_connections_per_host,
+                        pool_block=True
+                    )
+                    session.mount("http://", adapter)
+                    session.mount("https://", adapter)
+                    self._session = session
+        return self._session
+
+    def get_breaker(self, url: str) -> CircuitBreaker:
+        """
+        Get the circuit breaker for a URL's host.
+
+        Args:
+            url (str): Request URL.
+
+        Returns:
+            CircuitBreaker: Breaker for the host.
+        """
+        host = urlsplit(url).netloc
+        with self._lock:
+            breaker = self._breakers.get(host)
+            if breaker is None:
+                breaker = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+                self._breakers[host] = breaker
+        return breaker
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Send a request through the pooled session.
+
+        Connection errors, timeouts and 5xx responses count as failures for
+        the host's circuit breaker.
+
+        Args:
+            method (str): HTTP method.
+            url (str): Request URL.
+            **kwargs: Extra arguments for requests.
+
+        Returns:
+            requests.Response: The response.
+
+        Raises:
+            CircuitOpenError: If the host's circuit is open.
+        """
+        breaker = self.get_breaker(url)
+        if not breaker.allow_request():
+            raise CircuitOpenError(f"Circuit open for {urlsplit(url).netloc}")
+
+        kwargs.setdefault("timeout", self.timeout)
+        try:
+            response = self.session.request(method, url, **kwargs)
+        except requests.RequestException:
+            breaker.record_failure()
+            raise
+
+        if response.status_code >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        return response
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """Send a GET request."""
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        """Send a POST request."""
+        return self.request("POST", url, **kwargs)
+
+    async def arequest(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Send a request without blocking the event loop.
+
+        The request runs on a small dedicated thread pool and shares the
+        session's connection pool with synchronous callers.
+
+        Args:
+            method (str): HTTP method.
+            url (str): Request URL.
+            **kwargs: Extra arguments for requests.
+
+        Returns:
+            requests.Response: The response.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._get_executor(), functools.partial(self.request, method, url, **kwargs)
+        )
+
+    async def aget(self, url: str, **kwargs) -> requests.Response:
+        """Send a GET request without blocking the event loop."""
+        return await self.arequest("GET", url, **kwargs)
+
+    async def apost(self, url: str, **kwargs) -> requests.Response:
+        """Send a POST request without blocking the event loop."""
+        return await self.arequest("POST", url, **kwargs)
+
+    def check_health(self, url: str, ttl: Optional[float] = None) -> bool:
+        """
+        Check a health endpoint, caching the result.
+
+        Args:
+            url (str): Health endpoint URL; healthy means HTTP 200.
+            ttl (float, optional): Maximum age in seconds of a cached result.
+
+        Returns:
+            bool: True if healthy, False otherwise.
+        """
+        ttl = self.health_cache_ttl if ttl is None else ttl
+        now = time.monotonic()
+
+        cached = self._health_cache.get(url)
+        if cached and now - cached[0] < ttl:
+            return cached[1]
+
+        try:
+            healthy = self.get(url).status_code == 200
+        except CircuitOpenError:
+            healthy = False
+        except requests.RequestException as e:
+            logger.warning(f"Health check failed for {url}: {str(e)}")
+            healthy = False
+
+        self._health_cache[url] = (now, healthy)
+        return healthy
+
+    async def acheck_health(self, url: str, ttl: Optional[float] = None) -> bool:
+        """Check a health endpoint without blocking the event loop."""
+        max_age = self.health_cache_ttl if ttl is None else ttl
+        cached = self._health_cache.get(url)
+        if cached and time.monotonic() - cached[0] < max_age:
+            return cached[1]
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), self.check_health, url, ttl)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Thread pool backing the async variants."""
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.config.get("async_workers", self.max_connections_per_host),
+                        thread_name_prefix="http-client"
+                    )
+        return self._executor
+
+    def close(self):
+        """Close pooled connections and the async thread pool."""
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+
+_default_client = None
+_default_client_users = 0
+_default_client_lock = threading.Lock()
+
+
+def _shared_client(config: Optional[Dict[str, Any]]) -> HttpClient:
+    """Get or create the shared client. Called with the lock held."""
+    global _default_client
+    if _default_client is None:
+        _default_client = HttpClient(config)
+    elif config and config != _default_client.config:
+        logger.warning("Shared HTTP client is already in use; ignoring the new configuration")
+    return _default_client
+
+
+def get_http_client(config: Dict[str, Any] = None) -> HttpClient:
+    """
+    Get the process-wide shared HTTP client.
+
+    Args:
+        config (Dict[str, Any], optional): Configuration used if the client is created.
+
+    Returns:
+        HttpClient: The shared client.
+    """
+    with _default_client_lock:
+        return _shared_client(config)
+
+
+def acquire_http_client(config: Dict[str, Any] = None) -> HttpClient:
+    """
+    Take a reference to the process-wide shared HTTP client.
+
+    The client is created with the given configuration if no other owner
+    holds it, and closed when the last owner releases it.
+
+    Args:
+        config (Dict[str, Any], optional): Configuration used if the client is created.
+
+    Returns:
+        HttpClient: The shared client.
+    """
+    global _default_client, _default_client_users
+    with _default_client_lock:
+        # A client nobody owns yet is replaced rather than configured differently
+        if _default_client is not None and not _default_client_users and config \
+                and config != _default_client.config:
+            _default_client = None
+        client = _shared_client(config)
+        _default_client_users += 1
+        return client
+
+
+def release_http_client(client: HttpClient):
+    """
+    Release a reference taken with acquire_http_client.
+
+    Args:
+        client (HttpClient): The client that was acquired.
+    """
+    global _default_client, _default_client_users
+    with _default_client_lock:
+        if client is not _default_client or _default_client_users <= 0:
+            return
+        _default_client_users -= 1
+        if _default_client_users:
+            return
+        _default_client = None
+    client.close()
@@ -0,0 +1,408 @@
+"""
+Placement policies choosing which server in a pool takes a new room or stream.
+"""
+
+import bisect
+import heapq
+import itertools
+import random
+from abc import ABC, abstractmethod
+from typing import Dict, Any, Optional
+
+
+class PlacementPolicy(ABC):
+    """
+    Base class for placement policies.
+
+    A policy indexes the servers of one pool. The scaling manager calls
+    update() whenever a server's load changes and remove() when a server
+    stops taking allocations; select() then picks a server for a demand.
+    Subclasses implement all four; add() and remove() here keep the shared
+    server table and are meant to be called through super().
+    """
+
+    name = None
+
+    def __init__(self):
+        """Initialize an empty policy."""
+        self._servers = {}
+        self._order = {}
+        self._counter = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._servers)
+
+    @abstractmethod
+    def add(self, server: Dict[str, Any]):
+        """
+        Add a server, or refresh it if already indexed.
+
+        Args:
+            server (Dict[str, Any]): Server information with id, current_load, capacity and status.
+        """
+        if server["id"] not in self._order:
+            self._order[server["id"]] = next(self._counter)
+        self._servers[server["id"]] = server
+        self.update(server)
+
+    @abstractmethod
+    def update(self, server: Dict[str, Any]):
+        """
+        Record a change to a server's load.
+
+        Args:
+            server (Dict[str, Any]): Server information.
+        """
+
+    @abstractmethod
+    def remove(self, server_id: str):
+        """
+        Stop considering a server for allocation.
+
+        Args:
+            server_id (str): ID of the server.
+        """
+        self._servers.pop(server_id, None)
+
+    @abstractmethod
+    def select(self, demand: int) -> Optional[Dict[str, Any]]:
+        """
+        Pick an active server with room for the demand.
+
+        Args:
+            demand (int): Load the allocation will add.
+
+        Returns:
+            Optional[Dict[str, Any]]: Server information or None if no server has room.
+        """
+
+    @staticmethod
+    def _fits(server: Dict[str, Any], demand: int) -> bool:
+        return server["status"] == "active" and server["current_load"] + demand <= server["capacity"]
+
+
+class ServerLoadIndex(PlacementPolicy):
+    """
+    Least-loaded placement: spreads load evenly across the pool.
+
+    Servers are grouped by capacity, with a min-heap of (load, insertion
+    order, version) entries per group and lazy invalidation: a load change
+    pushes a fresh entry and bumps the server's version, and outdated
+    entries are discarded when they reach the top. Within a group the least
+    loaded server has the most spare capacity, so selection only looks at
+    the top of each group: O(log n) for a pool of one server size, whether
+    or not any server has room.
+    """
+
+    name = "least_loaded"
+
+    def __init__(self):
+        """Initialize an empty index."""
+        super().__init__()
+        # capacity -> heap of (load, insertion order, version, server ID)
+        self._heaps = {}
+        self._versions = {}
+        self._entries = 0
+
+    def add(self, server: Dict[str, Any]):
+        super().add(server)
+
+    def update(self, server: Dict[str, Any]):
+        server_id = server["id"]
+        if server_id not in self._servers:
+            return
+
+        version = self._versions.get(server_id, 0) + 1
+        self._versions[server_id] = version
+        heap = self._heaps.setdefault(server["capacity"], [])
+        heapq.heappush(heap, (server["current_load"], self._order[server_id], version, server_id))
+        self._entries += 1
+
+        # Outdated entries are normally dropped as they surface; rebuild if they pile up
+        if self._entries > 2 * len(self._servers) + 64:
+            self._compact()
+
+    def remove(self, server_id: str):
+        super().remove(server_id)
+        self._versions.pop(server_id, None)
+
+    def select(self, demand: int) -> Optional[Dict[str, Any]]:
+        """
+        Find the least loaded active server with room for the demand.
+
+        Ties go to the server added first.
+
+        Args:
+            demand (int): Load the allocation will add.
+
+        Returns:
+            Optional[Dict[str, Any]]: Server information or None if no server has room.
+        """
+        best = None
+        for capacity, heap in self._heaps.items():
+            if capacity < demand:
+                continue
+            top = self._top(heap)
+            if top is not None and top[0] + demand <= capacity and (best is None or top < best):
+                best = top
+        return self._servers[best[3]] if best else None
+
+    def _top(self, heap: list) -> Optional[tuple]:
+        """Drop outdated entries from a heap and return its current top."""
+        while heap:
+            entry = heap[0]
+            server = self._servers.get(entry[3])
+            if server is not None and self._versions.get(entry[3]) == entry[2] and server["status"] == "active":
+                return entry
+            heapq.heappop(heap)
+            self._entries -= 1
+        return None
+
+    def _compact(self):
+        """Rebuild the heaps from current entries only."""
+        self._heaps = {}
+        for server_id, server in self._servers.items():
+            self._heaps.setdefault(server["capacity"], []).append(
+                (server["current_load"], self._order[server_id], self._versions[server_id], server_id)
+            )
+        for heap in self._heaps.values():
+            heapq.heapify(heap)
+        self._entries = len(self._servers)
+
+
+class BestFitIndex(PlacementPolicy):
+    """
+    Best-fit placement: the server left with the least spare capacity.
+
+    Packs rooms onto as few servers as possible so that the rest drain and
+    can be reclaimed. Servers are kept in a list sorted by spare capacity;
+    selection is a binary search and an update is a binary search plus a
+    list shift, which is a memmove and cheap for pools of thousands.
+    """
+
+    name = "best_fit"
+
+    def __init__(self):
+        """Initialize an empty index."""
+        super().__init__()
+        # Sorted (spare capacity, insertion order, server ID)
+        self._entries = []
+        self._keys = {}
+
+    def add(self, server: Dict[str, Any]):
+        super().add(server)
+
+    def update(self, server: Dict[str, Any]):
+        server_id = server["id"]
+        if server_id not in self._servers:
+            return
+
+        self._discard(server_id)
+        key = (server["capacity"] - server["current_load"], self._order[server_id], server_id)
+        bisect.insort(self._entries, key)
+        self._keys[server_id] = key
+
+    def remove(self, server_id: str):
+        super().remove(server_id)
+        self._discard(server_id)
+
+    def select(self, demand: int) -> Optional[Dict[str, Any]]:
+        """
+        Find the active server whose spare capacity fits the demand most tightly.
+
+        Args:
+            demand (int): Load the allocation will add.
+
+        Returns:
+            Optional[Dict[str, Any]]: Server information or None if no server has room.
+        """
+        for i in range(bisect.bisect_left(self._entries, (demand,)), len(self._entries)):
+            server = self._servers[self._entries[i][2]]
+            if server["status"] == "active":
+                return server
+        return None
+
+    def _discard(self, server_id: str):
+        """Remove a server's entry from the sorted list."""
+        key = self._keys.pop(server_id, None)
+        if key is not None:
+            del self._entries[bisect.bisect_left(self._entries, key)]
+
+
+class FirstFitIndex(PlacementPolicy):
+    """
+    First-fit placement: the earliest added server with room.
+
+    Like best-fit it fills servers before moving on, and when used for a
+    batch sorted by decreasing demand it is first-fit-decreasing. A max
+    segment tree over spare capacity, in insertion order, finds the first
+    server with room in O(log n).
+    """
+
+    name = "first_fit"
+
+    def __init__(self):
+        """Initialize an empty index."""
+        super().__init__()
+        self._size = 16
+        self._tree = [-1] * (2 * self._size)
+        self._slots = {}
+        self._ids = []
+
+    def add(self, server: Dict[str, Any]):
+        if server["id"] not in self._slots:
+            if len(self._ids) == self._size:
+                self._grow()
+            self._slots[server["id"]] = len(self._ids)
+            self._ids.append(server["id"])
+        super().add(server)
+
+    def update(self, server: Dict[str, Any]):
+        if server["id"] not in self._servers:
+            return
+        spare = server["capacity"] - server["current_load"] if server["status"] == "active" else -1
+        self._set(self._slots[server["id"]], spare)
+
+    def remove(self, server_id: str):
+        super().remove(server_id)
+        if server_id in self._slots:
+            self._set(self._slots[server_id], -1)
+
+    def select(self, demand: int) -> Optional[Dict[str, Any]]:
+        """
+        Find the first active server, in the order added, with room for the demand.
+
+        Args:
+            demand (int): Load the allocation will add.
+
+        Returns:
+            Optional[Dict[str, Any]]: Server information or None if no server has room.
+        """
+        tree = self._tree
+        while tree[1] >= demand:
+            i = 1
+            while i < self._size:
+                i = 2 * i if tree[2 * i] >= demand else 2 * i + 1
+
+            slot = i - self._size
+            server = self._servers[self._ids[slot]]
+            if server["status"] == "active":
+                return server
+            # Deactivated without an update; drop it and search again
+            self._set(slot, -1)
+        return None
+
+    def _set(self, slot: int, value: int):
+        """Set a slot's spare capacity and refresh its ancestors."""
+        tree = self._tree
+        i = slot + self._size
+        tree[i] = value
+        i //= 2
+        while i:
+            tree[i] = max(tree[2 * i], tree[2 * i + 1])
+            i //= 2
+
+    def _grow(self):
+        """Double the number of slots."""
+        leaves = self._tree[self._size:]
+        self._size *= 2
+        self._tree = [-1] * self._size + leaves + [-1] * (self._size - len(leaves))
+        for i in range(self._size - 1, 0, -1):
+            self._tree[i] = max(self._tree[2 * i], self._tree[2 * i + 1])
+
+
+class PowerOfTwoChoicesIndex(PlacementPolicy):
+    """
+    Power-of-two-choices placement: the less loaded of two random servers.
+
+    Nearly as even as least-loaded without a global ordering, so it needs
+    no bookkeeping on load changes and avoids herding onto one server when
+    load reports are stale. Falls back to a scan when random picks keep
+    landing on full servers.
+    """
+
+    name = "power_of_two"
+
+    def __init__(self, rng: Optional[random.Random] = None, rounds: int = 3):
+        """
+        Initialize an empty index.
+
+        Args:
+            rng (random.Random, optional): Random number generator.
+            rounds (int): Pairs to sample before falling back to a scan.
+        """
+        super().__init__()
+        self.rng = rng or random.Random()
+        self.rounds = rounds
+        self._ids = []
+        self._positions = {}
+
+    def add(self, server: Dict[str, Any]):
+        if server["id"] not in self._positions:
+            self._positions[server["id"]] = len(self._ids)
+            self._ids.append(server["id"])
+        super().add(server)
+
+    def update(self, server: Dict[str, Any]):
+        # Loads are read from the servers when sampling
+        pass
+
+    def remove(self, server_id: str):
+        super().remove(server_id)
+        position = self._positions.pop(server_id, None)
+        if position is not None:
+            last = self._ids.pop()
+            if last != server_id:
+                self._ids[position] = last
+                self._positions[last] = position
+
+    def select(self, demand: int) -> Optional[Dict[str, Any]]:
+        """
+        Pick the less loaded of two random servers with room for the demand.
+
+        Args:
+            demand (int): Load the allocation will add.
+
+        Returns:
+            Optional[Dict[str, Any]]: Server information or None if no server has room.
+        """
+        if not self._ids:
+            return None
+
+        for _ in range(self.rounds):
+            candidates = [
+                server for server in (
+                    self._servers[self._ids[self.rng.randrange(len(self._ids))]] for _ in range(2)
+                )
+                if self._fits(server, demand)
+            ]
+            if candidates:
+                return min(candidates, key=lambda server: server["current_load"])
+
+        candidates = [server for server in self._servers.values() if self._fits(server, demand)]
+        return min(candidates, key=lambda server: server["current_load"]) if candidates else None
+
+
+PLACEMENT_POLICIES = {
+    policy.name: policy
+    for policy in (ServerLoadIndex, BestFitIndex, FirstFitIndex, PowerOfTwoChoicesIndex)
+}
+
+
+def create_placement_policy(name: str) -> PlacementPolicy:
+    """
+    Create a placement policy by name.
+
+    Args:
+        name (str): One of "least_loaded", "best_fit", "first_fit" or "power_of_two".
+
+    Returns:
+        PlacementPolicy: New, empty policy.
+
+    Raises:
+        ValueError: If the name is unknown.
+    """
+    try:
+        return PLACEMENT_POLICIES[name]()
+    except KeyError:
+        raise ValueError(f"Unknown placement policy: {name}")
@@ -2,11 +2,16 @@
 Scaling utilities for handling high loads and many concurrent users.
 """
 
+import itertools
 import logging
 import threading
 import time
 from typing import Dict, Any, List, Optional, Callable
 
+from .autoscaler import ScalingController
+from .placement import create_placement_policy
+from .telemetry import LOAD_METRICS, TelemetryListener, TelemetryStore
+
 logger = logging.getLogger(__name__)
 
 class ScalingManager:
@@ -15,19 +20,23 @@ class ScalingManager:
     Handles load balancing and resource allocation for high concurrency.
     """
     
-    def __init__(self, config: Dict[str, Any] = None):
+    def __init__(self, config: Dict[str, Any] = None, clock: Optional[Callable[[], float]] = None):
         """
         Initialize the scaling manager.
         
         Args:
             config (Dict[str, Any], optional): Scaling configuration.
+            clock (Callable[[], float], optional): Returns the current time in
+                seconds; defaults to time.time. Simulations pass a virtual clock.
         """
         self.config = config or {}
+        self.clock = clock or time.time
         
         # Default configuration
         self.auto_scaling = self.config.get("auto_scaling", True)
         self.max_participants_per_server = self.config.get("max_participants_per_server", 100)
         self.monitor_interval_seconds = self.config.get("monitor_interval_seconds", 30)
+        self.idle_timeout_seconds = self.config.get("idle_timeout_seconds", 3600)
         
         # Server management
         self.jitsi_servers = []
@@ -37,6 +46,38 @@ class ScalingManager:
         self.server_loads = {}
         self.room_allocations = {}
         
+        # Placement policy per pool: least_loaded, best_fit, first_fit or power_of_two
+        placement = self.config.get("placement", {})
+        self.jitsi_index = create_placement_policy(placement.get("jitsi", "least_loaded"))
+        self.media_index = create_placement_policy(placement.get("media", "least_loaded"))
+        # (server type, server ID) -> server information
+        self.servers_by_id = {}
+        
+        # Active servers per pool, and active servers without rooms or streams
+        # as server ID -> idle since, kept in the order they became idle
+        self.active_counts = {"jitsi": 0, "media": 0}
+        self.idle_servers = {"jitsi": {}, "media": {}}
+        
+        # A pool's lock guards its servers, placement index and idle set; the
+        # allocation records are guarded by locks striped over resource IDs.
+        # Resource locks are always taken before pool locks.
+        self.pool_locks = {"jitsi": threading.RLock(), "media": threading.RLock()}
+        self.resource_locks = [threading.Lock() for _ in range(self.config.get("lock_stripes", 64))]
+        
+        # Forecasts demand and rate-limits provisioning decisions
+        controller_config = dict(self.config.get("controller", {}))
+        controller_config.setdefault("tick_seconds", self.monitor_interval_seconds)
+        self.scaling_controller = ScalingController(controller_config)
+        
+        # Load measured and pushed by the servers themselves
+        telemetry_config = self.config.get("telemetry", {})
+        self.telemetry = TelemetryStore(telemetry_config.get("history_size", 120))
+        self.telemetry_listener = None
+        if telemetry_config.get("enabled", False):
+            self.telemetry_listener = TelemetryListener(telemetry_config, self.ingest_telemetry, self.clock)
+        self.reservation_grace = telemetry_config.get("reservation_grace", 60)
+        self.cpu_limit = telemetry_config.get("cpu_limit", 0.85)
+        
         # Monitoring thread
         self.monitor_thread = None
         self.is_monitoring = False
@@ -61,6 +102,9 @@ class ScalingManager:
         if self.auto_scaling:
             self.start_monitoring()
         
+        if self.telemetry_listener:
+            self.telemetry_listener.start()
+        
         logger.info("Scaling manager initialized")
         return True
     
@@ -74,20 +118,30 @@ class ScalingManager:
         Returns:
             Dict[str, Any]: Server information.
         """
-        server_id = server_config.get("id") or f"jitsi-{len(self.jitsi_servers) + 1}"
-        
-        server_info = {
-            "id": server_id,
-            "url": server_config.get("url"),
-            "capacity": server_config.get("capacity", self.max_participants_per_server),
-            "current_load": 0,
-            "rooms": [],
-            "added_at": time.time(),
-            "status": "active"
-        }
-        
-        self.jitsi_servers.append(server_info)
-        self.server_loads[server_id] = 0
+        with self.pool_locks["jitsi"]:
+            server_id = server_config.get("id") or f"jitsi-{len(self.jitsi_servers) + 1}"
+            
+            server_info = {
+                "id": server_id,
+                "url": server_config.get("url"),
+                "capacity": server_config.get("capacity", self.max_participants_per_server),
+                "max_bitrate": server_config.get("max_bitrate"),
+                "current_load": 0,
+                "measured_load": None,
+                "measured_at": None,
+                "reservations": {},
+                "rooms": [],
+                "added_at": self.clock(),
+                "last_activity": self.clock(),
+                "status": "active"
+            }
+            
+            self.jitsi_servers.append(server_info)
+            self.server_loads[server_id] = 0
+            self.jitsi_index.add(server_info)
+            self.servers_by_id[("jitsi", server_id)] = server_info
+            self.active_counts["jitsi"] += 1
+            self.idle_servers["jitsi"][server_id] = server_info["last_activity"]
         
         logger.info(f"Added Jitsi server: {server_id} ({server_info['url']})")
         return server_info
@@ -102,21 +156,31 @@ class ScalingManager:
         Returns:
             Dict[str, Any]: Server information.
         """
-        server_id = server_config.get("id") or f"media-{len(self.media_servers) + 1}"
-        
-        server_info = {
-            "id": server_id,
-            "url": server_config.get("url"),
-            "rtmp_port": server_config.get("rtmp_port", 1935),
-            "capacity": server_config.get("capacity", 100),  # Streams capacity
-            "current_load": 0,
-            "streams": [],
-            "added_at": time.time(),
-            "status": "active"
-        }
-        
-        self.media_servers.append(server_info)
-        self.server_loads[server_id] = 0
+        with self.pool_locks["media"]:
+            server_id = server_config.get("id") or f"media-{len(self.media_servers) + 1}"
+            
+            server_info = {
+                "id": server_id,
+                "url": server_config.get("url"),
+                "rtmp_port": server_config.get("rtmp_port", 1935),
+                "capacity": server_config.get("capacity", 100),  # Streams capacity
+                "max_bitrate": server_config.get("max_bitrate"),
+                "current_load": 0,
+                "measured_load": None,
+                "measured_at": None,
+                "reservations": {},
+                "streams": [],
+                "added_at": self.clock(),
+                "last_activity": self.clock(),
+                "status": "active"
+            }
+            
+            self.media_servers.append(server_info)
+            self.server_loads[server_id] = 0
+            self.media_index.add(server_info)
+            self.servers_by_id[("media", server_id)] = server_info
+            self.active_counts["media"] += 1
+            self.idle_servers["media"][server_id] = server_info["last_activity"]
         
         logger.info(f"Added media server: {server_id} ({server_info['url']})")
         return server_info
@@ -132,47 +196,60 @@ class ScalingManager:
         Returns:
             Optional[Dict[str, Any]]: Server information or None if no server available.
         """
-        # Find least loaded server with enough capacity
-        available_servers = [
-            server for server in self.jitsi_servers 
-            if server["status"] == "active" and 
-            (server["current_load"] + expected_participants) <= server["capacity"]
-        ]
-        
-        if not available_servers:
-            if self.auto_scaling:
-                # Try to provision a new server
-                logger.info("No available Jitsi servers, attempting to provision a new one")
-                new_server = self._provision_jitsi_server()
-                if new_server:
-                    available_servers.append(new_server)
+        with self._resource_lock(room_id):
+            # Find least loaded server with enough capacity, and take the room
+            # on it before another caller can select the same headroom
+            with self.pool_locks["jitsi"]:
+                server = self.jitsi_index.select(expected_participants)
+                if server:
+                    self._add_load("jitsi", server, room_id, expected_participants)
             
-            if not available_servers:
-                logger.error(f"No available Jitsi servers for room {room_id}")
-                return None
-        
-        # Sort by current load
-        available_servers.sort(key=lambda s: s["current_load"])
-        
-        # Allocate the least loaded server
-        server = available_servers[0]
-        
-        # Update server load
-        server["current_load"] += expected_participants
-        server["rooms"].append(room_id)
-        self.server_loads[server["id"]] = server["current_load"] / server["capacity"]
-        
-        # Record allocation
-        self.room_allocations[room_id] = {
-            "server_id": server["id"],
-            "server_type": "jitsi",
-            "allocated_at": time.time(),
-            "expected_participants": expected_participants
-        }
+            if not server:
+                if self.auto_scaling:
+                    # Try to provision a new server
+                    logger.info("No available Jitsi servers, attempting to provision a new one")
+                    provisioned = self._provision_jitsi_server()
+                    if provisioned:
+                        with self.pool_locks["jitsi"]:
+                            # A server that is still booting only takes load once it is active
+                            if provisioned["status"] == "active":
+                                server = provisioned
+                                self._add_load("jitsi", server, room_id, expected_participants)
+                
+                if not server:
+                    logger.error(f"No available Jitsi servers for room {room_id}")
+                    return None
+            
+            # Record allocation
+            self.room_allocations[room_id] = {
+                "server_id": server["id"],
+                "server_type": "jitsi",
+                "allocated_at": self.clock(),
+                "expected_participants": expected_participants
+            }
         
         logger.info(f"Allocated Jitsi server {server['id']} for room {room_id}")
         return server
     
+    def allocate_jitsi_servers(self, rooms: Dict[str, int]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Allocate Jitsi servers for a batch of rooms, such as a scheduled event.
+        
+        Rooms are placed largest first, so with the first-fit or best-fit
+        policy this is first-fit-decreasing (or best-fit-decreasing), which
+        packs a batch onto fewer servers than arrival order does.
+        
+        Args:
+            rooms (Dict[str, int]): Expected participants by room ID.
+            
+        Returns:
+            Dict[str, Optional[Dict[str, Any]]]: Server information (or None) by room ID.
+        """
+        allocations = {}
+        for room_id, expected_participants in sorted(rooms.items(), key=lambda item: item[1], reverse=True):
+            allocations[room_id] = self.allocate_jitsi_server(room_id, expected_participants)
+        return allocations
+    
     def allocate_media_server(self, stream_id: str, expected_viewers: int = 100) -> Optional[Dict[str, Any]]:
         """
         Allocate a media server for a stream.
@@ -184,43 +261,36 @@ class ScalingManager:
         Returns:
             Optional[Dict[str, Any]]: Server information or None if no server available.
         """
-        # Find least loaded server with enough capacity
-        available_servers = [
-            server for server in self.media_servers 
-            if server["status"] == "active" and 
-            (server["current_load"] + 1) <= server["capacity"]
-        ]
-        
-        if not available_servers:
-            if self.auto_scaling:
-                # Try to provision a new server
-                logger.info("No available media servers, attempting to provision a new one")
-                new_server = self._provision_media_server()
-                if new_server:
-                    available_servers.append(new_server)
+        with self._resource_lock(stream_id):
+            # Find least loaded server with enough capacity (add 1 for the stream itself)
+            with self.pool_locks["media"]:
+                server = self.media_index.select(1)
+                if server:
+                    self._add_load("media", server, stream_id, 1)
             
-            if not available_servers:
-                logger.error(f"No available media servers for stream {stream_id}")
-                return None
-        
-        # Sort by current load
-        available_servers.sort(key=lambda s: s["current_load"])
-        
-        # Allocate the least loaded server
-        server = available_servers[0]
-        
-        # Update server load (add 1 for the stream itself)
-        server["current_load"] += 1
-        server["streams"].append(stream_id)
-        self.server_loads[server["id"]] = server["current_load"] / server["capacity"]
-        
-        # Record allocation
-        self.room_allocations[stream_id] = {
-            "server_id": server["id"],
-            "server_type": "media",
-            "allocated_at": time.time(),
-            "expected_viewers": expected_viewers
-        }
+            if not server:
+                if self.auto_scaling:
+                    # Try to provision a new server
+                    logger.info("No available media servers, attempting to provision a new one")
+                    provisioned = self._provision_media_server()
+                    if provisioned:
+                        with self.pool_locks["media"]:
+                            # A server that is still booting only takes load once it is active
+                            if provisioned["status"] == "active":
+                                server = provisioned
+                                self._add_load("media", server, stream_id, 1)
+                
+                if not server:
+                    logger.error(f"No available media servers for stream {stream_id}")
+                    return None
+            
+            # Record allocation
+            self.room_allocations[stream_id] = {
+                "server_id": server["id"],
+                "server_type": "media",
+                "allocated_at": self.clock(),
+                "expected_viewers": expected_viewers
+            }
         
         logger.info(f"Allocated media server {server['id']} for stream {stream_id}")
         return server
@@ -235,51 +305,198 @@ class ScalingManager:
         Returns:
             bool: True if successful, False otherwise.
         """
-        if resource_id not in self.room_allocations:
-            logger.warning(f"No allocation found for resource: {resource_id}")
-            return False
+        with self._resource_lock(resource_id):
+            # Remove allocation
+            allocation = self.room_allocations.pop(resource_id, None)
+            if allocation is None:
+                logger.warning(f"No allocation found for resource: {resource_id}")
+                return False
+            
+            server_id = allocation["server_id"]
+            server_type = allocation["server_type"]
+            
+            # Find server
+            index = self.jitsi_index if server_type == "jitsi" else self.media_index
+            server = self.servers_by_id.get((server_type, server_id))
+            
+            if not server:
+                logger.warning(f"Server not found: {server_id}")
+                return False
+            
+            with self.pool_locks[server_type]:
+                # Update server load
+                if server_type == "jitsi":
+                    server["current_load"] = max(0, server["current_load"] - allocation.get("expected_participants", 0))
+                    if resource_id in server["rooms"]:
+                        server["rooms"].remove(resource_id)
+                elif server_type == "media":
+                    server["current_load"] = max(0, server["current_load"] - 1)  # Remove the stream itself
+                    if resource_id in server["streams"]:
+                        server["streams"].remove(resource_id)
+                server["reservations"].pop(resource_id, None)
+                server["last_activity"] = self.clock()
+                
+                resource_key = "rooms" if server_type == "jitsi" else "streams"
+                if not server[resource_key] and server["status"] == "active":
+                    self.idle_servers[server_type][server_id] = server["last_activity"]
+                
+                # Update load percentage
+                self.server_loads[server_id] = max(0, server["current_load"] / server["capacity"])
+                index.update(server)
         
-        allocation = self.room_allocations[resource_id]
-        server_id = allocation["server_id"]
-        server_type = allocation["server_type"]
+        logger.info(f"Deallocated server {server_id} for resource {resource_id}")
+        return True
+    
+    def _resource_lock(self, resource_id: str) -> threading.Lock:
+        """Get the lock guarding a room's or stream's allocation record."""
+        return self.resource_locks[hash(resource_id) % len(self.resource_locks)]
+    
+    def _add_load(self, server_type: str, server: Dict[str, Any], resource_id: str, load: int):
+        """
+        Place a room or stream on a server; the pool's lock must be held.
         
-        # Find server
-        server = None
-        if server_type == "jitsi":
-            for s in self.jitsi_servers:
-                if s["id"] == server_id:
-                    server = s
-                    break
-        elif server_type == "media":
-            for s in self.media_servers:
-                if s["id"] == server_id:
-                    server = s
-                    break
+        Args:
+            server_type (str): "jitsi" or "media".
+            server (Dict[str, Any]): Server information.
+            resource_id (str): ID of the room or stream.
+            load (int): Load the room or stream adds.
+        """
+        now = self.clock()
+        server["current_load"] += load
+        server["rooms" if server_type == "jitsi" else "streams"].append(resource_id)
+        server["last_activity"] = now
+        self.idle_servers[server_type].pop(server["id"], None)
+        if server["measured_at"] is not None:
+            # Counted on top of measurements until the participants show up in them
+            server["reservations"][resource_id] = (now, load)
+        self.server_loads[server["id"]] = server["current_load"] / server["capacity"]
+        (self.jitsi_index if server_type == "jitsi" else self.media_index).update(server)
+    
+    def set_server_status(self, server_type: str, server_id: str, status: str) -> bool:
+        """
+        Change a server's status, keeping placement and idle tracking in step.
         
+        Only active servers take allocations; inactive servers are dropped
+        from placement, and other statuses (such as provisioning or
+        draining) keep the server indexed until it becomes active again.
+        
+        Args:
+            server_type (str): "jitsi" or "media".
+            server_id (str): ID of the server.
+            status (str): New status.
+            
+        Returns:
+            bool: True if the server exists, False otherwise.
+        """
+        server = self.servers_by_id.get((server_type, server_id))
         if not server:
             logger.warning(f"Server not found: {server_id}")
-            del self.room_allocations[resource_id]
             return False
         
-        # Update server load
-        if server_type == "jitsi":
-            server["current_load"] -= allocation.get("expected_participants", 0)
-            if resource_id in server["rooms"]:
-                server["rooms"].remove(resource_id)
-        elif server_type == "media":
-            server["current_load"] -= 1  # Remove the stream itself
-            if resource_id in server["streams"]:
-                server["streams"].remove(resource_id)
+        with self.pool_locks[server_type]:
+            if server["status"] == "active":
+                self.active_counts[server_type] -= 1
+            if status == "active":
+                self.active_counts[server_type] += 1
+            server["status"] = status
+            
+            index = self.jitsi_index if server_type == "jitsi" else self.media_index
+            idle = self.idle_servers[server_type]
+            resource_key = "rooms" if server_type == "jitsi" else "streams"
+            if status == "inactive":
+                index.remove(server_id)
+            else:
+                index.add(server)
+            
+            if status == "active" and not server[resource_key]:
+                if server_id not in idle:
+                    idle[server_id] = server["last_activity"] = self.clock()
+            else:
+                idle.pop(server_id, None)
         
-        # Update load percentage
-        self.server_loads[server_id] = max(0, server["current_load"] / server["capacity"])
+        return True
+    
+    def ingest_telemetry(self, server_type: str, server_id: str, metrics: Dict[str, float],
+                         now: Optional[float] = None) -> bool:
+        """
+        Correct a server's load from a telemetry report.
         
-        # Remove allocation
-        del self.room_allocations[resource_id]
+        The measured load is the larger of the reported participants (or
+        streams), CPU relative to the CPU limit and bitrate relative to the
+        server's max_bitrate, each scaled to the server's capacity. Rooms and
+        streams allocated within the reservation grace period before the
+        report are added on top, since their participants may not have
+        joined yet. Allocation then works from the measured headroom.
         
-        logger.info(f"Deallocated server {server_id} for resource {resource_id}")
+        Args:
+            server_type (str): "jitsi" or "media".
+            server_id (str): ID of the reporting server.
+            metrics (Dict[str, float]): Reported participants, streams, bitrate and cpu.
+            now (float, optional): Time the report was received.
+            
+        Returns:
+            bool: True if the server is known, False otherwise.
+        """
+        if now is None:
+            now = self.clock()
+        
+        server = self.servers_by_id.get((server_type, server_id))
+        if not server:
+            logger.debug(f"Telemetry from unknown {server_type} server: {server_id}")
+            return False
+        
+        with self.pool_locks[server_type]:
+            self.telemetry.record(server_type, server_id, metrics, now)
+            
+            loads = []
+            if LOAD_METRICS[server_type] in metrics:
+                loads.append(metrics[LOAD_METRICS[server_type]])
+            if "cpu" in metrics and self.cpu_limit:
+                loads.append(metrics["cpu"] / self.cpu_limit * server["capacity"])
+            if "bitrate" in metrics and server["max_bitrate"]:
+                loads.append(metrics["bitrate"] / server["max_bitrate"] * server["capacity"])
+            if not loads:
+                return True
+            
+            # Reservations are in allocation order; drop those the measurement should include
+            reservations = server["reservations"]
+            cutoff = now - self.reservation_grace
+            while reservations:
+                resource_id = next(iter(reservations))
+                if reservations[resource_id][0] > cutoff:
+                    break
+                del reservations[resource_id]
+            
+            server["measured_load"] = max(loads)
+            server["measured_at"] = now
+            server["current_load"] = server["measured_load"] + sum(load for _, load in reservations.values())
+            self.server_loads[server_id] = server["current_load"] / server["capacity"]
+            (self.jitsi_index if server_type == "jitsi" else self.media_index).update(server)
         return True
     
+    def get_server_telemetry(self, server_type: str, server_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a server's latest telemetry.
+        
+        Args:
+            server_type (str): "jitsi" or "media".
+            server_id (str): ID of the server.
+            
+        Returns:
+            Optional[Dict[str, Any]]: Latest metrics, receive time and series of
+            the load metric, or None if the server has not reported.
+        """
+        latest = self.telemetry.latest(server_type, server_id)
+        if latest is None:
+            return None
+        
+        server = self.servers_by_id.get((server_type, server_id))
+        return {
+            "latest": latest,
+            "measured_load": server["measured_load"] if server else None,
+            "history": self.telemetry.series(server_type, server_id, LOAD_METRICS[server_type])
+        }
+    
     def start_monitoring(self) -> bool:
         """
         Start monitoring server loads.
@@ -315,51 +532,96 @@ class ScalingManager:
         logger.info("Stopped server load monitoring")
         return True
     
+    def shutdown(self):
+        """Stop monitoring and telemetry ingestion."""
+        if self.is_monitoring:
+            self.stop_monitoring()
+        if self.telemetry_listener:
+            self.telemetry_listener.stop()
+    
     def _monitor_loop(self):
         """Monitor server loads and scale as needed."""
         while self.is_monitoring:
-            try:
-                # Check Jitsi server loads
-                for server in self.jitsi_servers:
-                    if server["status"] == "active":
-                        # Update load percentage
-                        load_percentage = server["current_load"] / server["capacity"]
-                        self.server_loads[server["id"]] = load_percentage
-                        
-                        # Check if server is overloaded
-                        if load_percentage > 0.9:  # 90% capacity
-                            logger.warning(f"Jitsi server {server['id']} is overloaded: {load_percentage:.2%}")
-                            
-                            if self.auto_scaling:
-                                # Provision a new server
-                                logger.info("Auto-scaling: Provisioning new Jitsi server")
-                                self._provision_jitsi_server()
-                
-                # Check media server loads
-                for server in self.media_servers:
-                    if server["status"] == "active":
-                        # Update load percentage
-                        load_percentage = server["current_load"] / server["capacity"]
-                        self.server_loads[server["id"]] = load_percentage
-                        
-                        # Check if server is overloaded
-                        if load_percentage > 0.9:  # 90% capacity
-                            logger.warning(f"Media server {server['id']} is overloaded: {load_percentage:.2%}")
-                            
-                            if self.auto_scaling:
-                                # Provision a new server
-                                logger.info("Auto-scaling: Provisioning new media server")
-                                self._provision_media_server()
-                
-                # Clean up unused servers
-                self._clean_up_servers()
-                
-            except Exception as e:
-                logger.error(f"Error in monitoring loop: {str(e)}")
+            self._monitor_tick()
             
             # Sleep until next interval
             time.sleep(self.monitor_interval_seconds)
     
+    def _monitor_tick(self):
+        """Update loads, apply scaling decisions and clean up idle servers once."""
+        try:
+            now = self.clock()
+            self._scale_pool("jitsi", self.jitsi_servers, self.jitsi_index,
+                             self.max_participants_per_server, self._provision_jitsi_server, now)
+            self._scale_pool("media", self.media_servers, self.media_index,
+                             100, self._provision_media_server, now)
+            
+            # Clean up unused servers
+            self._clean_up_servers()
+            
+        except Exception as e:
+            logger.error(f"Error in monitoring loop: {str(e)}")
+    
+    def _scale_pool(self, pool: str, servers: List[Dict[str, Any]], index, default_capacity: int,
+                    provision: Callable[[], Optional[Dict[str, Any]]], now: float) -> int:
+        """
+        Update a pool's loads and apply the scaling controller's decision.
+        
+        Args:
+            pool (str): Pool name, "jitsi" or "media".
+            servers (List[Dict[str, Any]]): Servers in the pool.
+            index: Placement policy of the pool.
+            default_capacity (int): Server capacity to assume when no server is active.
+            provision (Callable): Provisions one server.
+            now (float): Current time in seconds.
+            
+        Returns:
+            int: Servers added (positive) or deactivated (negative).
+        """
+        label = "Jitsi" if pool == "jitsi" else "Media"
+        overloaded = []
+        demand = 0
+        with self.pool_locks[pool]:
+            active = [server for server in servers if server["status"] == "active"]
+            for server in active:
+                # Update load percentage
+                load_percentage = server["current_load"] / server["capacity"]
+                self.server_loads[server["id"]] = load_percentage
+                demand += server["current_load"]
+                
+                if load_percentage > 0.9:  # 90% capacity
+                    overloaded.append((server["id"], load_percentage))
+        
+        for server_id, load_percentage in overloaded:
+            logger.warning(f"{label} server {server_id} is overloaded: {load_percentage:.2%}")
+        
+        # Servers still booting count towards the pool so a slow boot is not provisioned again
+        with self.pool_locks[pool]:
+            fleet = active + [server for server in servers if server["status"] == "provisioning"]
+        capacity = sum(server["capacity"] for server in fleet) / len(fleet) if fleet else default_capacity
+        delta = self.scaling_controller.decide(pool, demand, capacity, len(fleet), now)
+        
+        if delta > 0 and self.auto_scaling:
+            logger.info(f"Auto-scaling: Provisioning {delta} new {label} server(s), "
+                        f"forecast load {self.scaling_controller.get_forecast(pool):.0f}")
+            added = 0
+            for _ in range(delta):
+                if not provision():
+                    break
+                added += 1
+            return added
+        
+        if delta < 0 and self.auto_scaling:
+            # Only servers without rooms or streams can be released, longest idle first
+            with self.pool_locks[pool]:
+                idle = list(itertools.islice(self.idle_servers[pool], -delta))
+            for server_id in idle:
+                logger.info(f"Auto-scaling: Deactivating idle {label} server: {server_id}")
+                self.set_server_status(pool, server_id, "inactive")
+            return -len(idle)
+        
+        return 0
+    
     def _provision_jitsi_server(self) -> Optional[Dict[str, Any]]:
         """
         Provision a new Jitsi server.
@@ -385,33 +647,24 @@ class ScalingManager:
         return None
     
     def _clean_up_servers(self):
-        """Clean up unused servers."""
-        # Check for idle Jitsi servers
-        for server in self.jitsi_servers:
-            if server["status"] == "active" and not server["rooms"]:
-                # Server has no rooms
-                idle_time = time.time() - max([
-                    allocation["allocated_at"] 
-                    for resource_id, allocation in self.room_allocations.items()
-                    if allocation["server_id"] == server["id"] and allocation["server_type"] == "jitsi"
-                ] or [server["added_at"]])
-                
-                # If server has been idle for over an hour and we have more than one server
-                if idle_time > 3600 and len([s for s in self.jitsi_servers if s["status"] == "active"]) > 1:
-                    logger.info(f"Deactivating idle Jitsi server: {server['id']}")
-                    server["status"] = "inactive"
-        
-        # Check for idle media servers
-        for server in self.media_servers:
-            if server["status"] == "active" and not server["streams"]:
-                # Server has no streams
-                idle_time = time.time() - max([
-                    allocation["allocated_at"] 
-                    for resource_id, allocation in self.room_allocations.items()
-                    if allocation["server_id"] == server["id"] and allocation["server_type"] == "media"
-                ] or [server["added_at"]])
-                
-                # If server has been idle for over an hour and we have more than one server
-                if idle_time > 3600 and len([s for s in self.media_servers if s["status"] == "active"]) > 1:
-                    logger.info(f"Deactivating idle media server: {server['id']}")
-                    server["status"] = "inactive"
\ No newline at end of file
+        """
+        Clean up unused servers.
+        
+        Servers without rooms or streams are kept in the order they became
+        idle, so only those past the idle timeout are visited.
+        """
+        cutoff = self.clock() - self.idle_timeout_seconds
+        
+        for server_type, label in (("jitsi", "Jitsi"), ("media", "media")):
+            idle = self.idle_servers[server_type]
+            
+            with self.pool_locks[server_type]:
+                # Keep at least one active server per pool
+                while idle and self.active_counts[server_type] > 1:
+                    server_id, idle_since = next(iter(idle.items()))
+                    if idle_since > cutoff:
+                        break
+                    
+                    logger.info(f"Deactivating idle {label} server: {server_id}")
+                    if not self.set_server_status(server_type, server_id, "inactive"):
+                        del idle[server_id]
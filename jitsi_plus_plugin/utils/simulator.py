@@ -0,0 +1,281 @@
+"""
+Discrete-event simulation of a server fleet driven by ScalingManager.
+"""
+
+import csv
+import heapq
+import itertools
+import math
+import random
+import time
+from array import array
+from typing import Dict, Any, Iterable, Iterator, Optional, Tuple
+
+from .scaling import ScalingManager
+
+# (start, duration, size, pool): size is participants for "jitsi" rooms and ignored for "media" streams
+Arrival = Tuple[float, float, int, str]
+
+
+class VirtualClock:
+    """Clock advanced by the simulator instead of by wall time."""
+
+    def __init__(self, start: float = 0.0):
+        self.now = start
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def synthetic_trace(hours: float, peak_rate: float, media_share: float = 0.05,
+                    seed: int = 1) -> Iterator[Arrival]:
+    """
+    Generate arrivals with a daily cycle, in time order.
+
+    Args:
+        hours (float): Length of the trace.
+        peak_rate (float): Arrivals per second at the daily peak.
+        media_share (float): Fraction of arrivals that are media streams.
+        seed (int): Random seed.
+
+    Yields:
+        Arrival: (start, duration, size, pool) tuples.
+    """
+    rng = random.Random(seed)
+    now = 0.0
+    end = hours * 3600
+    floor = peak_rate * 0.1
+    while True:
+        # Thinning: draw at the peak rate and keep arrivals in proportion to the current rate
+        now += rng.expovariate(peak_rate)
+        if now >= end:
+            return
+        rate = peak_rate * max(0.1, math.sin(math.pi * ((now / 3600) % 24 - 6) / 12))
+        if rng.random() * peak_rate > max(rate, floor):
+            continue
+        if rng.random() < media_share:
+            yield (now, rng.lognormvariate(math.log(3600), 0.5), 1, "media")
+        else:
+            yield (now, rng.lognormvariate(math.log(40 * 60), 0.6), min(300, int(rng.paretovariate(1.6) * 3)), "jitsi")
+
+
+def load_trace(path: str) -> Iterator[Arrival]:
+    """
+    Read arrivals from a CSV file with start, duration, size and pool columns.
+
+    Rows must be sorted by start; pool defaults to "jitsi".
+
+    Args:
+        path (str): Path to the CSV file.
+
+    Yields:
+        Arrival: (start, duration, size, pool) tuples.
+    """
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            yield (float(row["start"]), float(row["duration"]), int(row.get("size") or 1), row.get("pool") or "jitsi")
+
+
+class FleetSimulator:
+    """
+    Replays arrivals through a ScalingManager on a virtual clock.
+
+    Rooms and streams are allocated with allocate_jitsi_server and
+    allocate_media_server, released with deallocate_server when their
+    duration ends, and the monitor tick (scaling decisions and idle
+    cleanup) runs every monitor interval of virtual time. Provisioned
+    servers become usable after the boot delay; an arrival that triggers
+    provisioning does not wait for the boot and counts as rejected.
+    Events are processed in time order from a heap, with the trace read
+    lazily, so memory is bounded by the number of live rooms.
+    """
+
+    def __init__(self, config: Dict[str, Any] = None, jitsi_servers: int = 10, media_servers: int = 2,
+                 jitsi_capacity: int = 500, media_capacity: int = 100, boot_delay: float = 0,
+                 max_servers: Optional[int] = None):
+        """
+        Initialize the simulator.
+
+        Args:
+            config (Dict[str, Any], optional): ScalingManager configuration.
+            jitsi_servers (int): Jitsi servers at the start.
+            media_servers (int): Media servers at the start.
+            jitsi_capacity (int): Participants per Jitsi server.
+            media_capacity (int): Streams per media server.
+            boot_delay (float): Seconds before a provisioned server takes allocations.
+            max_servers (int, optional): Fleet limit per pool; provisioning fails beyond it.
+        """
+        self.clock = VirtualClock()
+        config = dict(config or {})
+        config.setdefault("max_participants_per_server", jitsi_capacity)
+        self.manager = ScalingManager(config, clock=self.clock)
+        self.manager._provision_jitsi_server = lambda: self._provision("jitsi")
+        self.manager._provision_media_server = lambda: self._provision("media")
+
+        self.capacity = {"jitsi": jitsi_capacity, "media": media_capacity}
+        self.boot_delay = boot_delay
+        self.max_servers = max_servers
+        self.provisioned = {"jitsi": 0, "media": 0}
+        # Servers being paid for (active or booting) per pool, kept current between ticks
+        self.billed = {"jitsi": 0, "media": 0}
+
+        self._events = []
+        self._counter = itertools.count()
+
+        for i in range(jitsi_servers):
+            self.manager.add_jitsi_server({"id": f"jitsi-{i}", "capacity": jitsi_capacity})
+        for i in range(media_servers):
+            self.manager.add_media_server({"id": f"media-{i}", "capacity": media_capacity})
+
+    def _provision(self, pool: str) -> Optional[Dict[str, Any]]:
+        """Add a server to a pool, booting for the boot delay."""
+        servers = self.manager.jitsi_servers if pool == "jitsi" else self.manager.media_servers
+        if self.max_servers is not None and self._count(servers)[0] >= self.max_servers:
+            return None
+
+        self.provisioned[pool] += 1
+        self.billed[pool] += 1
+        server_config = {"id": f"{pool}-sim-{self.provisioned[pool]}", "capacity": self.capacity[pool]}
+        if pool == "jitsi":
+            server = self.manager.add_jitsi_server(server_config)
+        else:
+            server = self.manager.add_media_server(server_config)
+
+        if self.boot_delay:
+            self.manager.set_server_status(pool, server["id"], "provisioning")
+            self._schedule(self.clock.now + self.boot_delay, "boot", (pool, server))
+        return server
+
+    def _schedule(self, at: float, kind: str, payload: Any = None):
+        heapq.heappush(self._events, (at, next(self._counter), kind, payload))
+
+    @staticmethod
+    def _count(servers) -> Tuple[int, float, float]:
+        """Count servers that are not inactive and sum the load and capacity of active ones."""
+        count, load, capacity = 0, 0.0, 0.0
+        for server in servers:
+            if server["status"] != "inactive":
+                count += 1
+                if server["status"] == "active":
+                    load += server["current_load"]
+                    capacity += server["capacity"]
+        return count, load, capacity
+
+    def run(self, trace: Iterable[Arrival]) -> Dict[str, Any]:
+        """
+        Replay a trace until every room and stream has ended.
+
+        Args:
+            trace (Iterable[Arrival]): Arrivals in time order.
+
+        Returns:
+            Dict[str, Any]: Cost in server-hours, rejected allocations, peak
+            servers and utilization per pool, decision latency percentiles
+            and simulation throughput.
+        """
+        manager = self.manager
+        clock = self.clock
+        events = self._events
+        arrivals = iter(trace)
+        next_arrival = next(arrivals, None)
+        interval = manager.monitor_interval_seconds
+
+        allocate = {"jitsi": manager.allocate_jitsi_server, "media": manager.allocate_media_server}
+        allocation_latency = array("d")
+        tick_latency = array("d")
+        allocations = {"jitsi": 0, "media": 0}
+        rejected = {"jitsi": 0, "media": 0}
+        peak_servers = {"jitsi": 0, "media": 0}
+        peak_utilization = {"jitsi": 0.0, "media": 0.0}
+        billed = self.billed
+        billed["jitsi"] = self._count(manager.jitsi_servers)[0]
+        billed["media"] = self._count(manager.media_servers)[0]
+        server_seconds = 0.0
+        live = 0
+        processed = 0
+        room_ids = itertools.count()
+        last = clock.now
+
+        if next_arrival is not None:
+            clock.now = last = next_arrival[0]
+        self._schedule(clock.now + interval, "tick")
+        started_at = time.perf_counter()
+
+        while next_arrival is not None or live:
+            # Departures and ticks at the same instant run before arrivals and free capacity first
+            if next_arrival is not None and (not events or next_arrival[0] < events[0][0]):
+                at, kind, payload = next_arrival[0], "arrival", next_arrival
+                next_arrival = next(arrivals, None)
+            else:
+                at, _, kind, payload = heapq.heappop(events)
+
+            server_seconds += (billed["jitsi"] + billed["media"]) * (at - last)
+            clock.now = last = at
+            processed += 1
+
+            if kind == "arrival":
+                _, duration, size, pool = payload
+                room_id = f"room-{next(room_ids)}"
+                decided_at = time.perf_counter()
+                if pool == "jitsi":
+                    server = allocate[pool](room_id, size)
+                else:
+                    server = allocate[pool](room_id)
+                allocation_latency.append(time.perf_counter() - decided_at)
+
+                allocations[pool] += 1
+                if server is None:
+                    rejected[pool] += 1
+                else:
+                    live += 1
+                    self._schedule(at + duration, "departure", room_id)
+
+            elif kind == "departure":
+                manager.deallocate_server(payload)
+                live -= 1
+
+            elif kind == "boot":
+                pool, server = payload
+                if server["status"] == "provisioning":
+                    manager.set_server_status(pool, server["id"], "active")
+
+            elif kind == "tick":
+                decided_at = time.perf_counter()
+                manager._monitor_tick()
+                tick_latency.append(time.perf_counter() - decided_at)
+
+                for pool, servers in (("jitsi", manager.jitsi_servers), ("media", manager.media_servers)):
+                    count, load, capacity = self._count(servers)
+                    billed[pool] = count
+                    peak_servers[pool] = max(peak_servers[pool], count)
+                    if capacity:
+                        peak_utilization[pool] = max(peak_utilization[pool], load / capacity)
+                self._schedule(at + interval, "tick")
+
+        elapsed = time.perf_counter() - started_at
+
+        return {
+            "simulated_seconds": last,
+            "events": processed,
+            "wall_seconds": elapsed,
+            "events_per_minute": processed / elapsed * 60 if elapsed else 0.0,
+            "server_hours": server_seconds / 3600,
+            "allocations": allocations,
+            "rejected": rejected,
+            "peak_servers": peak_servers,
+            "peak_utilization": peak_utilization,
+            "allocation_latency_us": self._percentiles(allocation_latency),
+            "tick_latency_us": self._percentiles(tick_latency)
+        }
+
+    @staticmethod
+    def _percentiles(samples: array) -> Dict[str, float]:
+        """Median, 99th percentile and maximum of latency samples in microseconds."""
+        if not samples:
+            return {"p50": 0.0, "p99": 0.0, "max": 0.0}
+        ordered = sorted(samples)
+        return {
+            "p50": ordered[len(ordered) // 2] * 1e6,
+            "p99": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1e6,
+            "max": ordered[-1] * 1e6
+        }
@@ -0,0 +1,156 @@
+"""
+Concurrent startup of plugin components with per-component timeouts.
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+class StartupOrchestrator:
+    """
+    Starts components concurrently and tracks their readiness.
+
+    Each component's start function runs on its own daemon thread, so a slow
+    backend neither delays the others nor blocks the caller past its timeout.
+    A component that times out keeps starting in the background and is
+    reported ready once its start function returns True.
+    """
+
+    def __init__(self, config: Dict[str, Any] = None):
+        """
+        Initialize the startup orchestrator.
+
+        Args:
+            config (Dict[str, Any], optional): Startup configuration.
+        """
+        self.config = config or {}
+        self.default_timeout = self.config.get("timeout", 10)
+        self.component_timeouts = self.config.get("component_timeouts", {})
+
+        self.components = {}
+        self.started_at = None
+        self._lock = threading.Lock()
+
+    def add_component(self, name: str, start: Callable[[], bool], timeout: Optional[float] = None):
+        """
+        Register a component.
+
+        Args:
+            name (str): Component name.
+            start (Callable[[], bool]): Function that starts the component and
+                returns True when it is ready.
+            timeout (float, optional): Seconds to wait for readiness.
+        """
+        if timeout is None:
+            timeout = self.component_timeouts.get(name, self.default_timeout)
+
+        self.components[name] = {
+            "start": start,
+            "timeout": timeout,
+            "state": "pending",
+            "elapsed": None,
+            "error": None,
+            "done": threading.Event()
+        }
+
+    def start(self):
+        """Start all registered components without waiting for them."""
+        self.started_at = time.monotonic()
+
+        for name, component in self.components.items():
+            thread = threading.Thread(
+                target=self._start_component,
+                args=(name, component),
+                name=f"startup-{name}"
+            )
+            thread.daemon = True
+            thread.start()
+
+    def wait(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Wait for every component to finish or reach its timeout.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Readiness of each component.
+        """
+        for name, component in self.components.items():
+            remaining = self.started_at + component["timeout"] - time.monotonic()
+            if not component["done"].wait(max(remaining, 0)):
+                with self._lock:
+                    if component["state"] == "pending":
+                        component["state"] = "timeout"
+                logger.warning(f"Component {name} not ready after {component['timeout']}s")
+
+        return self.get_status()
+
+    def run(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Start all components and wait for them.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Readiness of each component.
+        """
+        self.start()
+        return self.wait()
+
+    def get_status(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the readiness of each component.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: State, readiness, startup time and error
+            for each component.
+        """
+        with self._lock:
+            return {
+                name: {
+                    "state": component["state"],
+                    "ready": component["state"] == "ready",
+                    "elapsed": component["elapsed"],
+                    "error": component["error"]
+                }
+                for name, component in self.components.items()
+            }
+
+    def is_ready(self, name: Optional[str] = None) -> bool:
+        """
+        Check whether a component, or every component, is ready.
+
+        Args:
+            name (str, optional): Component name; all components if omitted.
+
+        Returns:
+            bool: True if ready, False otherwise.
+        """
+        with self._lock:
+            if name is not None:
+                component = self.components.get(name)
+                return component is not None and component["state"] == "ready"
+            return all(component["state"] == "ready" for component in self.components.values())
+
+    def _start_component(self, name: str, component: Dict[str, Any]):
+        """
+        Run a component's start function and record the outcome.
+
+        Args:
+            name (str): Component name.
+            component (Dict[str, Any]): Component record.
+        """
+        error = None
+        try:
+            ready = bool(component["start"]())
+        except Exception as e:
+            logger.error(f"Error starting {name}: {str(e)}")
+            ready = False
+            error = str(e)
+
+        with self._lock:
+            component["state"] = "ready" if ready else "failed"
+            component["elapsed"] = time.monotonic() - self.started_at
+            component["error"] = error
+        component["done"].set()
+
+        logger.info(f"Component {name} {component['state']} after {component['elapsed']:.2f}s")
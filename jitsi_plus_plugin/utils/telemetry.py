@@ -0,0 +1,301 @@
+"""
+Load telemetry pushed by Jitsi bridges and media servers.
+
+Servers send UDP datagrams of newline-separated reports, one per server:
+
+    <server type> <server ID> <metric>=<value> ...
+
+for example "jitsi jvb-1 participants=412 bitrate=183000000 cpu=0.64". The
+type is "jitsi" or "media"; Jitsi servers report participants and media
+servers report streams, and both may report bitrate (bits/s) and cpu
+(0-1). A datagram is small enough to send every few seconds from a
+bridge's stats hook without a client library.
+"""
+
+import logging
+import socket
+import threading
+import time
+from typing import Dict, Any, List, Optional, Callable, Tuple
+
+from .autoscaler import RingBuffer
+
+logger = logging.getLogger(__name__)
+
+SERVER_TYPES = ("jitsi", "media")
+
+# Metric that counts each server type's load in the same unit as its capacity
+LOAD_METRICS = {"jitsi": "participants", "media": "streams"}
+
+METRICS = ("participants", "streams", "bitrate", "cpu")
+
+Report = Tuple[str, str, Dict[str, float]]
+
+
+def parse_report(line: str) -> Report:
+    """
+    Parse one telemetry report.
+
+    Unknown metrics are ignored so that servers can send more than is used.
+
+    Args:
+        line (str): Report line.
+
+    Returns:
+        Report: Server type, server ID and metrics.
+
+    Raises:
+        ValueError: If the line is malformed or has an unknown server type.
+    """
+    fields = line.split()
+    if len(fields) < 3:
+        raise ValueError(f"Telemetry report needs a type, an ID and metrics: {line!r}")
+
+    server_type, server_id = fields[0], fields[1]
+    if server_type not in SERVER_TYPES:
+        raise ValueError(f"Unknown server type in telemetry report: {server_type}")
+
+    metrics = {}
+    for field in fields[2:]:
+        name, separator, value = field.partition("=")
+        if not separator:
+            raise ValueError(f"Malformed telemetry metric: {field!r}")
+        if name in METRICS:
+            metrics[name] = float(value)
+
+    return server_type, server_id, metrics
+
+
+def parse_datagram(data: bytes) -> List[Report]:
+    """
+    Parse the reports in a datagram, skipping malformed lines.
+
+    Args:
+        data (bytes): Datagram payload.
+
+    Returns:
+        List[Report]: Parsed reports.
+    """
+    reports = []
+    for line in data.decode("utf-8", "replace").splitlines():
+        if not line.strip():
+            continue
+        try:
+            reports.append(parse_report(line))
+        except ValueError as e:
+            logger.debug(f"Dropping telemetry report: {str(e)}")
+    return reports
+
+
+class TelemetryStore:
+    """
+    Recent telemetry samples per server, kept in fixed-size ring buffers.
+    """
+
+    def __init__(self, history_size: int = 120):
+        """
+        Initialize the store.
+
+        Args:
+            history_size (int): Samples kept per server and metric.
+        """
+        self.history_size = history_size
+        # (server type, server ID) -> {"time": RingBuffer, metric: RingBuffer}
+        self._series = {}
+        self._latest = {}
+        self._received = {}
+
+    def __len__(self) -> int:
+        return len(self._series)
+
+    def record(self, server_type: str, server_id: str, metrics: Dict[str, float], now: float):
+        """
+        Add a sample.
+
+        Metrics missing from a report repeat their previous value so that the
+        series of a server stay aligned.
+
+        Args:
+            server_type (str): Server type.
+            server_id (str): Server ID.
+            metrics (Dict[str, float]): Reported metrics.
+            now (float): Time the sample was received.
+        """
+        key = (server_type, server_id)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = {"time": RingBuffer(self.history_size)}
+            self._latest[key] = {}
+
+        latest = self._latest[key]
+        latest.update(metrics)
+
+        times = series["time"]
+        for name, value in latest.items():
+            buffer = series.get(name)
+            if buffer is None:
+                buffer = series[name] = RingBuffer(self.history_size)
+                # Backfill a metric first seen now so it lines up with the timestamps
+                for _ in range(len(times)):
+                    buffer.append(value)
+            buffer.append(value)
+        times.append(now)
+        self._received[key] = now
+
+    def latest(self, server_type: str, server_id: str) -> Optional[Dict[str, float]]:
+        """
+        Get a server's most recent metrics.
+
+        Args:
+            server_type (str): Server type.
+            server_id (str): Server ID.
+
+        Returns:
+            Optional[Dict[str, float]]: Metrics and the time they were received, or None.
+        """
+        key = (server_type, server_id)
+        if key not in self._latest:
+            return None
+        return dict(self._latest[key], time=self._received[key])
+
+    def series(self, server_type: str, server_id: str, metric: str) -> List[Tuple[float, float]]:
+        """
+        Get a server's samples of one metric.
+
+        Args:
+            server_type (str): Server type.
+            server_id (str): Server ID.
+            metric (str): Metric name.
+
+        Returns:
+            List[Tuple[float, float]]: (time, value) pairs, oldest first.
+        """
+        series = self._series.get((server_type, server_id))
+        if not series or metric not in series:
+            return []
+        return list(zip(series["time"].values(), series[metric].values()))
+
+    def remove(self, server_type: str, server_id: str):
+        """
+        Forget a server's samples.
+
+        Args:
+            server_type (str): Server type.
+            server_id (str): Server ID.
+        """
+        self._series.pop((server_type, server_id), None)
+        self._latest.pop((server_type, server_id), None)
+        self._received.pop((server_type, server_id), None)
+
+
+class TelemetryListener:
+    """
+    Receives telemetry datagrams on a UDP socket in a background thread.
+    """
+
+    def __init__(self, config: Dict[str, Any] = None, on_report: Optional[Callable[..., Any]] = None,
+                 clock: Optional[Callable[[], float]] = None):
+        """
+        Initialize the listener.
+
+        Args:
+            config (Dict[str, Any], optional): Telemetry configuration with host and port.
+            on_report (Callable, optional): Called with the server type, server
+                ID, metrics and receive time of each report.
+            clock (Callable[[], float], optional): Source of receive times; defaults to time.time.
+        """
+        self.config = config or {}
+        self.clock = clock or time.time
+        self.host = self.config.get("host", "0.0.0.0")
+        self.port = self.config.get("port", 8125)
+        self.on_report = on_report
+
+        self.sock = None
+        self.thread = None
+        self._stop_event = threading.Event()
+
+    @property
+    def is_running(self) -> bool:
+        """Whether the receive thread is running."""
+        return self.thread is not None and self.thread.is_alive()
+
+    @property
+    def address(self) -> Optional[Tuple[str, int]]:
+        """Bound address of the socket, or None if not started."""
+        return self.sock.getsockname() if self.sock else None
+
+    def handle_datagram(self, data: bytes, now: Optional[float] = None) -> int:
+        """
+        Dispatch the reports in a datagram.
+
+        Args:
+            data (bytes): Datagram payload.
+            now (float, optional): Receive time.
+
+        Returns:
+            int: Number of reports dispatched.
+        """
+        if now is None:
+            now = self.clock()
+
+        reports = parse_datagram(data)
+        if self.on_report:
+            for server_type, server_id, metrics in reports:
+                try:
+                    self.on_report(server_type, server_id, metrics, now)
+                except Exception as e:
+                    logger.error(f"Error applying telemetry from {server_type} server {server_id}: {str(e)}")
+        return len(reports)
+
+    def start(self) -> bool:
+        """
+        Bind the socket and start receiving.
+
+        Returns:
+            bool: True if started, False if already running or the socket could not be bound.
+        """
+        if self.is_running:
+            return False
+
+        try:
+            self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self.sock.bind((self.host, self.port))
+            # Wake up periodically to notice stop()
+            self.sock.settimeout(0.5)
+        except OSError as e:
+            logger.error(f"Error binding telemetry socket on {self.host}:{self.port}: {str(e)}")
+            if self.sock:
+                self.sock.close()
+                self.sock = None
+            return False
+
+        self._stop_event.clear()
+        self.thread = threading.Thread(target=self._receive_loop)
+        self.thread.daemon = True
+        self.thread.start()
+
+        logger.info(f"Listening for telemetry on {self.host}:{self.address[1]}")
+        return True
+
+    def stop(self):
+        """Stop receiving and close the socket."""
+        self._stop_event.set()
+        if self.thread:
+            self.thread.join(timeout=5)
+            self.thread = None
+        if self.sock:
+            self.sock.close()
+            self.sock = None
+
+    def _receive_loop(self):
+        """Receive datagrams until stopped."""
+        while not self._stop_event.is_set():
+            try:
+                data, _ = self.sock.recvfrom(65535)
+            except socket.timeout:
+                continue
+            except OSError as e:
+                if not self._stop_event.is_set():
+                    logger.error(f"Error receiving telemetry: {str(e)}")
+                break
+            self.handle_datagram(data)
@@ -0,0 +1,329 @@
+"""
+Viewer tracking from heartbeat pings at broadcast scale.
+"""
+
+import hashlib
+import logging
+import math
+import threading
+import time
+from typing import Dict, Any, Optional, Callable
+
+logger = logging.getLogger(__name__)
+
+# 2^14 registers give a standard error of about 0.8% in 16 KiB per sketch
+DEFAULT_PRECISION = 14
+
+
+def hash_viewer(viewer_id: str) -> int:
+    """
+    Hash a viewer ID to 64 bits.
+
+    Python's own hash is salted per process and too narrow for HyperLogLog,
+    so a short BLAKE2b digest is used instead.
+
+    Args:
+        viewer_id (str): Viewer ID.
+
+    Returns:
+        int: Unsigned 64-bit hash.
+    """
+    return int.from_bytes(hashlib.blake2b(viewer_id.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class HyperLogLog:
+    """
+    HyperLogLog cardinality sketch over 64-bit hashes.
+
+    Memory is fixed at 2^precision bytes however many items are added, and
+    sketches of the same precision can be merged.
+    """
+
+    def __init__(self, precision: int = DEFAULT_PRECISION):
+        """
+        Initialize the sketch.
+
+        Args:
+            precision (int): Number of index bits, between 4 and 18.
+
+        Raises:
+            ValueError: If the precision is out of range.
+        """
+        if not 4 <= precision <= 18:
+            raise ValueError(f"HyperLogLog precision must be between 4 and 18, got {precision}")
+
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+        self._rank_bits = 64 - precision
+        self._rank_mask = (1 << self._rank_bits) - 1
+
+    def add_hash(self, value: int):
+        """
+        Add an item by its 64-bit hash.
+
+        Args:
+            value (int): Unsigned 64-bit hash of the item.
+        """
+        index = value >> self._rank_bits
+        rank = self._rank_bits - (value & self._rank_mask).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def add(self, item: str):
+        """
+        Add an item.
+
+        Args:
+            item (str): Item to count.
+        """
+        self.add_hash(hash_viewer(item))
+
+    def merge(self, other: "HyperLogLog"):
+        """
+        Merge another sketch into this one.
+
+        Args:
+            other (HyperLogLog): Sketch with the same precision.
+
+        Raises:
+            ValueError: If the precisions differ.
+        """
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog sketches with different precisions")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def count(self) -> int:
+        """
+        Estimate the number of distinct items added.
+
+        Returns:
+            int: Estimated cardinality.
+        """
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / math.fsum(2.0 ** -register for register in self.registers)
+
+        # Linear counting is more accurate while many registers are empty
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+
+        return int(round(estimate))
+
+
+class _Shard:
+    """Viewers whose IDs hash to one shard, guarded by the shard's lock."""
+
+    __slots__ = ("lock", "viewers", "sketches")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # broadcast ID -> {viewer ID: last heartbeat}, kept in heartbeat order
+        self.viewers = {}
+        self.sketches = {}
+
+
+class ViewerTracker:
+    """
+    Counts concurrent and unique viewers from heartbeat pings.
+
+    Viewers are spread over independently locked shards by a hash of their
+    ID, so concurrent heartbeats rarely contend. A heartbeat only moves the
+    viewer to the end of its shard's insertion-ordered dict, which keeps each
+    dict sorted by last heartbeat; expiry then pops stale viewers from the
+    front. Unique viewers are estimated with one HyperLogLog sketch per shard
+    and broadcast, merged when counts are computed.
+
+    Counts are computed on a periodic tick rather than per heartbeat and
+    handed to the on_tick callback.
+    """
+
+    def __init__(self, config: Dict[str, Any] = None,
+                 on_tick: Optional[Callable[[Dict[str, Dict[str, int]]], None]] = None):
+        """
+        Initialize the viewer tracker.
+
+        Args:
+            config (Dict[str, Any], optional): Viewer tracking configuration.
+            on_tick (Callable, optional): Called with the counts computed by each tick.
+        """
+        self.config = config or {}
+        self.window = self.config.get("window", 30)
+        self.tick_interval = self.config.get("tick_interval", 5)
+        self.precision = self.config.get("hll_precision", DEFAULT_PRECISION)
+        self.shards = [_Shard() for _ in range(self.config.get("shards", 16))]
+        self.on_tick = on_tick
+
+        # Results of the last tick
+        self.counts = {}
+
+        self.tick_thread = None
+        self._stop_event = threading.Event()
+
+    @property
+    def is_running(self) -> bool:
+        """Whether the tick thread is running."""
+        return self.tick_thread is not None and self.tick_thread.is_alive()
+
+    def heartbeat(self, broadcast_id: str, viewer_id: str, now: Optional[float] = None) -> bool:
+        """
+        Record a heartbeat from a viewer.
+
+        Args:
+            broadcast_id (str): ID of the broadcast being watched.
+            viewer_id (str): ID of the viewer, stable across heartbeats.
+            now (float, optional): Monotonic time of the heartbeat.
+
+        Returns:
+            bool: True if the viewer was not already being counted.
+        """
+        if now is None:
+            now = time.monotonic()
+
+        value = hash_viewer(viewer_id)
+        shard = self.shards[value % len(self.shards)]
+
+        with shard.lock:
+            viewers = shard.viewers.get(broadcast_id)
+            if viewers is None:
+                viewers = shard.viewers[broadcast_id] = {}
+
+            # Re-inserting moves the viewer to the end, keeping heartbeat order
+            is_new = viewers.pop(viewer_id, None) is None
+            viewers[viewer_id] = now
+
+            if is_new:
+                sketch = shard.sketches.get(broadcast_id)
+                if sketch is None:
+                    sketch = shard.sketches[broadcast_id] = HyperLogLog(self.precision)
+                sketch.add_hash(value)
+
+        return is_new
+
+    def leave(self, broadcast_id: str, viewer_id: str) -> bool:
+        """
+        Stop counting a viewer before its heartbeats expire.
+
+        Args:
+            broadcast_id (str): ID of the broadcast.
+            viewer_id (str): ID of the viewer.
+
+        Returns:
+            bool: True if the viewer was being counted, False otherwise.
+        """
+        shard = self.shards[hash_viewer(viewer_id) % len(self.shards)]
+        with shard.lock:
+            viewers = shard.viewers.get(broadcast_id)
+            return viewers is not None and viewers.pop(viewer_id, None) is not None
+
+    def tick(self, now: Optional[float] = None) -> Dict[str, Dict[str, int]]:
+        """
+        Expire stale viewers and compute counts for every broadcast.
+
+        Args:
+            now (float, optional): Monotonic time of the tick.
+
+        Returns:
+            Dict[str, Dict[str, int]]: Concurrent and unique viewers by broadcast ID.
+        """
+        if now is None:
+            now = time.monotonic()
+        cutoff = now - self.window
+
+        concurrent = {}
+        sketches = {}
+        for shard in self.shards:
+            with shard.lock:
+                for broadcast_id, viewers in shard.viewers.items():
+                    expired = []
+                    for viewer_id, last_seen in viewers.items():
+                        if last_seen >= cutoff:
+                            break
+                        expired.append(viewer_id)
+                    for viewer_id in expired:
+                        del viewers[viewer_id]
+
+                    concurrent[broadcast_id] = concurrent.get(broadcast_id, 0) + len(viewers)
+
+                for broadcast_id, sketch in shard.sketches.items():
+                    sketches.setdefault(broadcast_id, []).append(bytes(sketch.registers))
+
+        # Merge outside the shard locks so heartbeats are not held up
+        counts = {}
+        for broadcast_id, registers in sketches.items():
+            merged = HyperLogLog(self.precision)
+            merged.registers = bytearray(registers[0])
+            for other in registers[1:]:
+                merged.registers = bytearray(map(max, merged.registers, other))
+            counts[broadcast_id] = {
+                "concurrent": concurrent.get(broadcast_id, 0),
+                "unique": merged.count()
+            }
+
+        self.counts = counts
+
+        if self.on_tick:
+            try:
+                self.on_tick(counts)
+            except Exception as e:
+                logger.error(f"Error applying viewer counts: {str(e)}")
+
+        return counts
+
+    def get_counts(self, broadcast_id: str) -> Optional[Dict[str, int]]:
+        """
+        Get a broadcast's counts as of the last tick.
+
+        Args:
+            broadcast_id (str): ID of the broadcast.
+
+        Returns:
+            Optional[Dict[str, int]]: Concurrent and unique viewers or None if not tracked.
+        """
+        return self.counts.get(broadcast_id)
+
+    def remove_broadcast(self, broadcast_id: str):
+        """
+        Forget all viewers of a broadcast.
+
+        Args:
+            broadcast_id (str): ID of the broadcast.
+        """
+        for shard in self.shards:
+            with shard.lock:
+                shard.viewers.pop(broadcast_id, None)
+                shard.sketches.pop(broadcast_id, None)
+        self.counts.pop(broadcast_id, None)
+
+    def start(self) -> bool:
+        """
+        Start the periodic tick.
+
+        Returns:
+            bool: True if started, False if already running.
+        """
+        if self.is_running:
+            return False
+
+        self._stop_event.clear()
+        self.tick_thread = threading.Thread(target=self._tick_loop)
+        self.tick_thread.daemon = True
+        self.tick_thread.start()
+
+        logger.info("Started viewer tracking")
+        return True
+
+    def stop(self):
+        """Stop the periodic tick."""
+        self._stop_event.set()
+        if self.tick_thread:
+            self.tick_thread.join(timeout=5)
+            self.tick_thread = None
+
+    def _tick_loop(self):
+        """Tick until stopped."""
+        while not self._stop_event.wait(self.tick_interval):
+            try:
+                self.tick()
+            except Exception as e:
+                logger.error(f"Error in viewer tracking tick: {str(e)}")
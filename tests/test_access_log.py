@@ -0,0 +1,144 @@
+# tests/test_access_log.py
+import pytest
+import os
+from unittest.mock import patch
+
+from jitsi_plus_plugin.core import access_log
+from jitsi_plus_plugin.core.access_log import AccessLogAnalytics, parse_log_time
+from jitsi_plus_plugin.core.media_server import MediaServer
+
+def log_line(client, second, path, size, status=200, agent="Player/1.0"):
+    """Format a combined log line at 10:00 UTC plus the given seconds."""
+    minute, second = divmod(second, 60)
+    return (
+        f'{client} - - [19/Oct/2026:10:{minute:02d}:{second:02d} +0000] "GET {path} HTTP/1.1" '
+        f'{status} {size} "-" "{agent}"\n'
+    ).encode()
+
+BASE = parse_log_time(b"19/Oct/2026:10:00:00 +0000")
+
+SAMPLE = b"".join([
+    log_line("10.0.0.1", 5, "/hls/1700-live_720p/3.ts", 1000),
+    log_line("10.0.0.2", 10, "/hls/1700-live_480p/3.ts", 500),
+    log_line("10.0.0.1", 20, "/hls/1700-live_720p.m3u8", 100),
+    log_line("10.0.0.1", 70, "/hls/1700-live_720p/4.ts", 1000),
+    log_line("10.0.0.3", 75, "/llhls/1700-live/part_000001.ts", 200),
+    log_line("10.0.0.4", 80, "/hls/1700-live-5.ts", 0, status=404),
+    log_line("10.0.0.5", 90, "/hls/vod/vod-1/00001.ts", 4000),
+    log_line("10.0.0.5", 95, "/vod/vod-1.mp4?start=10", 6000),
+    log_line("10.0.0.6", 95, "/thumbnails/x.jpg", 50),
+    b"not a log line\n",
+])
+
+def test_parse_log_time():
+    """Test timestamps with positive and negative offsets."""
+    assert parse_log_time(b"19/Oct/2026:12:00:00 +0200") == BASE
+    assert parse_log_time(b"19/Oct/2026:05:30:00 -0430") == BASE
+    with pytest.raises(ValueError):
+        parse_log_time(b"19/Foo/2026:05:30:00 -0430")
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_aggregation(use_numpy):
+    """Test per-stream and per-VOD buckets with and without NumPy."""
+    if use_numpy and access_log.np is None:
+        pytest.skip("NumPy is not installed")
+
+    with patch.object(access_log, "np", access_log.np if use_numpy else None):
+        analytics = AccessLogAnalytics({"bucket_seconds": 60})
+        assert analytics.ingest_bytes(SAMPLE) == 7
+
+        stream = analytics.query("stream", "1700-live")
+        vod = analytics.query("vod", "vod-1")
+
+    assert stream["start"] == BASE
+    assert stream["bytes"] == [1600, 1200]
+    assert stream["requests"] == [3, 2]
+    assert stream["bandwidth_bps"] == [1600 * 8 / 60, 1200 * 8 / 60]
+    assert stream["viewers"] == [2, 2]
+    assert stream["peak_viewers"] == 2
+    assert stream["renditions"] == {"720p": 2100 / 2800, "480p": 500 / 2800, "source": 200 / 2800}
+
+    assert vod["bytes"] == [10000]
+    assert vod["viewers"] == [1]
+    assert analytics.query("vod", "missing") is None
+
+def test_query_range():
+    """Test limiting a query to a time range."""
+    analytics = AccessLogAnalytics({"bucket_seconds": 60})
+    analytics.ingest_bytes(SAMPLE)
+
+    result = analytics.query("stream", "1700-live", start=BASE + 60, end=BASE + 120)
+    assert result["start"] == BASE + 60
+    assert result["bytes"] == [1200]
+    assert analytics.query("stream", "1700-live", start=BASE + 600)["bytes"] == []
+
+def test_rendition_mix_in_range():
+    """Test that the rendition mix only covers the queried range."""
+    analytics = AccessLogAnalytics({"bucket_seconds": 60})
+    analytics.ingest_bytes(SAMPLE)
+
+    result = analytics.query("stream", "1700-live", start=BASE + 60, end=BASE + 120)
+    assert result["renditions"] == {"720p": 1000 / 1200, "source": 200 / 1200}
+
+def test_buckets_merged_across_logs(tmp_path):
+    """Test that a bucket stays open until every followed log has moved past it."""
+    first, second = tmp_path / "edge-1.log", tmp_path / "edge-2.log"
+    first.write_bytes(b"".join([
+        log_line("10.0.0.1", 5, "/hls/live/1.ts", 100),
+        log_line("10.0.0.2", 10, "/hls/live/1.ts", 100),
+        log_line("10.0.0.1", 130, "/hls/live/3.ts", 100),
+    ]))
+    second.write_bytes(b"".join([
+        log_line("10.0.0.3", 20, "/hls/live/1.ts", 100),
+        log_line("10.0.0.1", 25, "/hls/live/1.ts", 100),
+    ]))
+
+    analytics = AccessLogAnalytics({"bucket_seconds": 60})
+    analytics.follow(str(first))
+    analytics.follow(str(second))
+    analytics.ingest_file(str(first))
+    assert analytics.series[("stream", "live")].open_clients
+
+    analytics.ingest_file(str(second))
+    assert analytics.query("stream", "live")["viewers"] == [3, 0, 1]
+
+    # Once both logs have moved on, the bucket is closed with the merged count
+    offset = second.stat().st_size
+    with open(second, "ab") as f:
+        f.write(log_line("10.0.0.3", 135, "/hls/live/3.ts", 100))
+    analytics.ingest_file(str(second), offset)
+    series = analytics.series[("stream", "live")]
+    assert sorted(series.open_clients) == [BASE // 60 + 2]
+    assert analytics.query("stream", "live")["viewers"] == [3, 0, 2]
+
+def test_file_batches_and_tail(tmp_path):
+    """Test batched mmap reads, partial lines, appends and rotation."""
+    path = tmp_path / "access.log"
+    path.write_bytes(SAMPLE + b'10.0.0.9 - - [19/Oct')
+
+    # Batches smaller than a line still end on line boundaries
+    analytics = AccessLogAnalytics({"batch_bytes": 64})
+    analytics.follow(str(path))
+    analytics.poll()
+    assert analytics.lines_parsed == 7
+    assert analytics.positions[str(path)][0] == len(SAMPLE)
+
+    with open(path, "ab") as f:
+        f.write(b':2026:10:01:40 +0000] "GET /hls/vod/vod-1/00002.ts HTTP/1.1" 200 1000 "-" "P"\n')
+    analytics.poll()
+    assert analytics.query("vod", "vod-1")["bytes"] == [11000]
+
+    # Rotation: a new file starts from the beginning
+    os.rename(path, tmp_path / "access.log.1")
+    path.write_bytes(log_line("10.0.0.9", 100, "/hls/vod/vod-1/00003.ts", 1000))
+    analytics.poll()
+    assert analytics.query("vod", "vod-1")["bytes"] == [12000]
+
+def test_media_server_queries(tmp_path):
+    """Test the analytics queries through the media server."""
+    server = MediaServer({"recording_directory": str(tmp_path)})
+    server.analytics.ingest_bytes(SAMPLE)
+
+    assert server.get_stream_analytics("1700-live")["total_bytes"] == 2800
+    assert server.get_vod_analytics("vod-1", end=BASE + 60)["bytes"] == []
+    assert server.get_vod_analytics("vod-1")["total_requests"] == 2
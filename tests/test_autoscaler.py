@@ -0,0 +1,118 @@
+# tests/test_autoscaler.py
+import pytest
+from unittest.mock import Mock
+
+from jitsi_plus_plugin.utils.autoscaler import HoltWintersForecaster, RingBuffer, ScalingController, backtest
+from jitsi_plus_plugin.utils.scaling import ScalingManager
+
+def test_ring_buffer():
+    """Test that the oldest samples are overwritten in order."""
+    buffer = RingBuffer(3)
+    for value in range(5):
+        buffer.append(value)
+
+    assert len(buffer) == 3
+    assert buffer.values() == [2.0, 3.0, 4.0]
+    assert buffer.latest(2) == [3.0, 4.0]
+
+def test_forecasts():
+    """Test trend and seasonal forecasts."""
+    holt = HoltWintersForecaster(alpha=0.8, beta=0.5)
+    for value in range(0, 100, 10):
+        holt.update(value)
+    assert holt.forecast(5) == pytest.approx(140, abs=5)
+
+    seasonal = HoltWintersForecaster(alpha=0.3, beta=0.0, gamma=0.5, season_length=4)
+    for _ in range(30):
+        for value in [10, 50, 10, 10]:
+            seasonal.update(value)
+    assert seasonal.forecast(2) > seasonal.forecast(1) + 25
+
+@pytest.fixture
+def controller():
+    return ScalingController({
+        "tick_seconds": 30, "lead_time": 0, "scale_up_cooldown": 120,
+        "scale_down_cooldown": 300, "scale_down_window": 60, "max_step_up": 3, "max_step_down": 1
+    })
+
+def test_step_limit_and_cooldown(controller):
+    """Test that a spike adds a bounded number of servers per cooldown."""
+    assert controller.decide("jitsi", 2000, 100, 2, now=0) == 3
+    assert controller.decide("jitsi", 2000, 100, 5, now=30) == 0
+    assert controller.decide("jitsi", 2000, 100, 5, now=120) == 3
+
+def test_hysteresis(controller):
+    """Test that utilization between the watermarks causes no change."""
+    assert controller.decide("jitsi", 600, 100, 10, now=0) == 0
+    assert controller.decide("jitsi", 450, 100, 10, now=30) == 0
+
+    # Low load scales down one server at a time, after the cooldown
+    assert controller.decide("jitsi", 100, 100, 10, now=600) == -1
+    assert controller.decide("jitsi", 100, 100, 9, now=630) == 0
+    assert controller.decide("jitsi", 100, 100, 9, now=900) == -1
+
+def test_provisions_ahead_of_ramp():
+    """Test that a rising trend provisions before utilization crosses the watermark."""
+    controller = ScalingController({"tick_seconds": 60, "lead_time": 600, "beta": 0.5})
+    decisions = [controller.decide("jitsi", load, 100, 10, now=i * 60) for i, load in enumerate(range(100, 700, 50))]
+
+    first = next(i for i, delta in enumerate(decisions) if delta > 0)
+    assert (100 + 50 * first) / 1000 < 0.8
+
+def test_backtest_predictive_beats_reactive():
+    """Test that forecasting reduces overload on a ramp with slow provisioning."""
+    demand = [100] * 20 + [100 + 40 * i for i in range(40)] + [1700] * 20
+    reactive = backtest({"tick_seconds": 60, "forecast_enabled": False, "scale_up_cooldown": 0,
+                         "max_step_up": 100}, demand, 100, initial_servers=2, provision_delay=300)
+    predictive = backtest({"tick_seconds": 60, "lead_time": 600}, demand, 100,
+                          initial_servers=2, provision_delay=300)
+
+    assert predictive["unserved_load_seconds"] < reactive["unserved_load_seconds"]
+    assert predictive["scale_ups"] > 0
+    assert len(predictive["servers"]) == len(demand)
+
+def test_monitor_provisions_once_per_pool():
+    """Test that overloaded servers no longer each trigger a provision."""
+    manager = ScalingManager({"auto_scaling": False, "controller": {"max_step_up": 2}})
+    manager.auto_scaling = True
+    for i in range(5):
+        manager.add_jitsi_server({"id": f"jvb-{i}", "capacity": 100})
+        manager.jitsi_servers[i]["current_load"] = 95
+    manager._provision_jitsi_server = Mock(return_value={"id": "new"})
+
+    assert manager._scale_pool("jitsi", manager.jitsi_servers, manager.jitsi_index, 100,
+                               manager._provision_jitsi_server, now=0) == 2
+    assert manager._scale_pool("jitsi", manager.jitsi_servers, manager.jitsi_index, 100,
+                               manager._provision_jitsi_server, now=30) == 0
+    assert manager._provision_jitsi_server.call_count == 2
+
+def test_monitor_counts_booting_servers():
+    """Test that servers still being provisioned are not provisioned again on the next tick."""
+    manager = ScalingManager({"auto_scaling": True, "controller": {"max_step_up": 1, "scale_up_cooldown": 0}})
+    for i in range(2):
+        manager.add_jitsi_server({"id": f"jvb-{i}", "capacity": 100})
+        manager.jitsi_servers[i]["current_load"] = 95
+
+    def provision():
+        server = manager.add_jitsi_server({"id": f"new-{len(manager.jitsi_servers)}", "capacity": 100})
+        manager.set_server_status("jitsi", server["id"], "provisioning")
+        return server
+
+    manager._provision_jitsi_server = Mock(side_effect=provision)
+    for now in range(0, 300, 30):
+        manager._scale_pool("jitsi", manager.jitsi_servers, manager.jitsi_index, 100,
+                            manager._provision_jitsi_server, now=now)
+
+    # 190 participants need three servers at the target utilization
+    assert manager._provision_jitsi_server.call_count == 1
+
+def test_monitor_releases_idle_servers():
+    """Test that scale-down only deactivates servers without rooms."""
+    manager = ScalingManager({"auto_scaling": True, "controller": {"scale_down_cooldown": 0}})
+    for i in range(4):
+        manager.add_jitsi_server({"id": f"jvb-{i}", "capacity": 100})
+    manager.allocate_jitsi_server("room-1", 10)
+
+    assert manager._scale_pool("jitsi", manager.jitsi_servers, manager.jitsi_index, 100,
+                               manager._provision_jitsi_server, now=0) == -1
+    assert [server["status"] for server in manager.jitsi_servers] == ["active", "inactive", "active", "active"]
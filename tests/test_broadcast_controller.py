@@ -75,6 +75,9 @@ def mock_media_server():
             "status": "ready"
         }
     ]
+    # Mock stream -> VOD lookups
+    mock.get_vod_for_stream.return_value = mock.list_vod_entries.return_value[0]
+    mock.get_vods_for_streams.return_value = {"stream-123": mock.list_vod_entries.return_value[0]}
     
     return mock
 
@@ -402,8 +405,9 @@ def test_get_recording_url(broadcast_controller, mock_media_server):
         # Get recording URL
         recording_url = broadcast_controller.get_recording_url(broadcast_info["id"])
         
-        # Check that list_vod_entries was called
-        mock_media_server.list_vod_entries.assert_called_once()
+        # Check that the VOD was looked up by stream key, without a full scan
+        mock_media_server.get_vod_for_stream.assert_called_once_with("stream-123")
+        mock_media_server.list_vod_entries.assert_not_called()
         
         # Check result
         assert recording_url == "https://test.media.server/vod/vod-stream-123.mp4"
@@ -421,4 +425,98 @@ def test_get_recording_url_none(broadcast_controller, mock_media_server):
         recording_url = broadcast_controller.get_recording_url(broadcast_info["id"])
         
         # Check result
-        assert recording_url is None
\ No newline at end of file
+        assert recording_url is None
+
+def test_get_recording_urls(broadcast_controller, mock_media_server):
+    """Test resolving recording URLs for several broadcasts at once."""
+    ended = broadcast_controller.create_broadcast("Ended Broadcast", {"recording": True})
+    broadcast_controller.start_broadcast(ended["id"])
+    broadcast_controller.stop_broadcast(ended["id"])
+    
+    live = broadcast_controller.create_broadcast("Live Broadcast", {"recording": True})
+    broadcast_controller.start_broadcast(live["id"])
+    
+    recording_urls = broadcast_controller.get_recording_urls([ended["id"], live["id"], "unknown"])
+    
+    assert recording_urls == {
+        ended["id"]: "https://test.media.server/vod/vod-stream-123.mp4",
+        live["id"]: None,
+        "unknown": None
+    }
+    mock_media_server.get_vods_for_streams.assert_called_once_with(["stream-123"])
+
+def test_create_clip(broadcast_controller, mock_media_server):
+    """Test cutting a highlight from a live broadcast."""
+    mock_media_server.create_clip.return_value = {"id": "vod-clip-1"}
+    
+    broadcast_info = broadcast_controller.create_broadcast("Test Broadcast", {"recording": True})
+    broadcast_controller.start_broadcast(broadcast_info["id"])
+    
+    clip_info = broadcast_controller.create_clip(broadcast_info["id"], 10.0, 40.0)
+    
+    assert clip_info == {"id": "vod-clip-1"}
+    mock_media_server.create_clip.assert_called_once_with(
+        "stream-123", 10.0, 40.0, "Test Broadcast highlight"
+    )
+    
+    unrecorded = broadcast_controller.create_broadcast("Unrecorded")
+    assert broadcast_controller.create_clip(unrecorded["id"], 0.0, 5.0) is None
+    assert broadcast_controller.create_clip("unknown", 0.0, 5.0) is None
+
+def test_restream_targets(broadcast_controller, mock_media_server):
+    """Test adding, listing and removing simulcast destinations."""
+    mock_media_server.add_restream_target.return_value = {"id": "target-1"}
+    mock_media_server.get_restream_targets.return_value = [{"id": "target-1", "status": "active"}]
+    mock_media_server.remove_restream_target.return_value = True
+    
+    broadcast_info = broadcast_controller.create_broadcast("Test Broadcast")
+    
+    target_info = broadcast_controller.add_restream_target(broadcast_info["id"], "rtmp://example.com/live/key")
+    assert target_info == {"id": "target-1"}
+    mock_media_server.add_restream_target.assert_called_once_with("stream-123", "rtmp://example.com/live/key", None)
+    
+    assert broadcast_controller.get_restream_stats(broadcast_info["id"])[0]["status"] == "active"
+    assert broadcast_controller.remove_restream_target(broadcast_info["id"], "target-1") is True
+    mock_media_server.remove_restream_target.assert_called_once_with("stream-123", "target-1")
+    
+    mock_media_server.add_restream_target.side_effect = ValueError("Unsupported restream URL")
+    assert broadcast_controller.add_restream_target(broadcast_info["id"], "http://example.com") is None
+    assert broadcast_controller.add_restream_target("unknown", "rtmp://example.com/live") is None
+    assert broadcast_controller.get_restream_stats("unknown") is None
+
+def test_viewer_heartbeats(broadcast_controller):
+    """Test that heartbeats feed the viewer counts on the tracker's tick."""
+    broadcast_info = broadcast_controller.create_broadcast("Test Broadcast")
+    broadcast_id = broadcast_info["id"]
+    
+    for viewer in ["v1", "v2", "v3"]:
+        assert broadcast_controller.record_viewer_heartbeat(broadcast_id, viewer) is True
+    assert broadcast_controller.record_viewer_heartbeat("missing", "v1") is False
+    
+    # Counts only change on a tick
+    assert broadcast_info["viewers"] == 0
+    broadcast_controller.viewer_tracker.tick()
+    assert broadcast_info["viewers"] == 3
+    assert broadcast_info["unique_viewers"] == 3
+    
+    assert broadcast_controller.record_viewer_leave(broadcast_id, "v1") is True
+    broadcast_controller.viewer_tracker.tick()
+    assert broadcast_info["viewers"] == 2
+    assert broadcast_info["unique_viewers"] == 3
+    assert broadcast_info["peak_viewers"] == 3
+    
+    # Stopping keeps the final counts and drops the tracked viewers
+    broadcast_controller.start_broadcast(broadcast_id)
+    broadcast_controller.stop_broadcast(broadcast_id)
+    broadcast_controller.shutdown()
+    assert broadcast_info["viewers"] == 2
+    assert broadcast_controller.viewer_tracker.get_counts(broadcast_id) is None
+
+def test_get_broadcast_analytics(broadcast_controller, mock_media_server):
+    """Test that analytics are looked up by the broadcast's stream key."""
+    broadcast_info = broadcast_controller.create_broadcast("Test Broadcast")
+    mock_media_server.get_stream_analytics.return_value = {"total_bytes": 100}
+    
+    assert broadcast_controller.get_broadcast_analytics(broadcast_info["id"], start=10) == {"total_bytes": 100}
+    mock_media_server.get_stream_analytics.assert_called_once_with("stream-123", 10, None)
+    assert broadcast_controller.get_broadcast_analytics("missing") is None
@@ -0,0 +1,181 @@
+# tests/test_clips.py
+import pytest
+import os
+import threading
+from unittest.mock import Mock, patch
+
+from jitsi_plus_plugin.core.keyframes import KeyframeIndex
+from jitsi_plus_plugin.core.media_server import MediaServer
+
+@pytest.fixture
+def media_server(tmp_path):
+    """Create a MediaServer recording into a temporary directory."""
+    server = MediaServer({"recording_directory": str(tmp_path)})
+    yield server
+    if server.clip_executor:
+        server.clip_executor.shutdown(wait=True)
+
+def fake_ffmpeg(commands):
+    """Record FFmpeg commands (and concat lists) and write their output file."""
+    def run(cmd, **kwargs):
+        if "-f" in cmd and cmd[cmd.index("-f") + 1] == "concat":
+            with open(cmd[cmd.index("-i") + 1]) as f:
+                commands.append((cmd, f.read()))
+        else:
+            commands.append((cmd, None))
+        with open(cmd[-1], "wb") as f:
+            f.write(b"clip")
+        return Mock(returncode=0, stderr="")
+    return run
+
+def wait_for_clip(server, clip):
+    """Wait for a clip job to finish."""
+    job = server.clip_jobs.get(clip["id"])
+    if job:
+        job.result(timeout=5)
+
+def test_clip_finished_file(media_server, tmp_path):
+    """Test stream-copying a range of a finished recording from its keyframe index."""
+    video = tmp_path / "stream-1.mp4"
+    video.write_bytes(b"video")
+    KeyframeIndex([0.0, 2.0, 4.0, 6.0, 8.0], [0] * 5).save(KeyframeIndex.index_path(str(video)))
+    media_server.vod_entries["vod-stream-1"] = {
+        "id": "vod-stream-1", "source_stream": "stream-1", "file_path": str(video), "status": "ready"
+    }
+
+    commands = []
+    with patch('subprocess.run', side_effect=fake_ffmpeg(commands)), \
+         patch.object(media_server, '_process_vod_file') as mock_process:
+        clip = media_server.create_clip("vod-stream-1", 3.0, 7.0, name="Highlight")
+        wait_for_clip(media_server, clip)
+
+    cmd = commands[0][0]
+    assert cmd[cmd.index("-ss") + 1] == "2.0"
+    assert cmd[cmd.index("-t") + 1] == "5.0"
+    assert cmd[cmd.index("-c") + 1] == "copy"
+    assert clip["name"] == "Highlight"
+    assert clip["source_stream"] == "stream-1"
+    assert media_server.vod_entries[clip["id"]]["clip_start"] == 2.0
+    assert os.path.exists(clip["file_path"])
+    mock_process.assert_called_once_with(clip["id"], clip["file_path"])
+    assert media_server.clip_jobs == {}
+
+def test_clip_live_recording(media_server, tmp_path):
+    """Test clipping from the segments of a stream that is still recording."""
+    segment_directory = tmp_path / "stream-1_segments"
+    segment_directory.mkdir()
+    (segment_directory / "segments.csv").write_text(
+        "000000.ts,0.000000,2.000000\n000001.ts,2.000000,4.000000\n"
+        "000002.ts,4.000000,6.000000\n000003.ts,6.000000,8.000000\n"
+    )
+    media_server.active_streams["stream-1"] = {
+        "name": "Live", "recording_path": str(tmp_path / "stream-1.mp4"),
+        "segment_directory": str(segment_directory)
+    }
+    media_server.recording_processes["stream-1"] = Mock()
+
+    commands = []
+    with patch('subprocess.run', side_effect=fake_ffmpeg(commands)), \
+         patch.object(media_server, '_process_vod_file'):
+        clip = media_server.create_clip("stream-1", 3.0, 5.5)
+        wait_for_clip(media_server, clip)
+
+    cmd, concat = commands[0]
+    assert "000001.ts" in concat and "000002.ts" in concat
+    assert "000000.ts" not in concat and "000003.ts" not in concat
+    assert cmd[cmd.index("-t") + 1] == "3.5"
+    assert media_server.vod_entries[clip["id"]]["clip_start"] == 2.0
+
+    # Segments stay while recording and go once the recording stops
+    assert segment_directory.exists()
+    del media_server.recording_processes["stream-1"]
+    media_server._release_segments("stream-1")
+    assert not segment_directory.exists()
+
+def test_live_clip_escapes_segment_paths(media_server, tmp_path):
+    """Test that quotes in segment paths are escaped in the concat list."""
+    segment_directory = tmp_path / "it's_segments"
+    segment_directory.mkdir()
+    (segment_directory / "segments.csv").write_text("000000.ts,0.000000,2.000000\n")
+    media_server.active_streams["stream-1"] = {"segment_directory": str(segment_directory)}
+    media_server.recording_processes["stream-1"] = Mock()
+
+    commands = []
+    with patch('subprocess.run', side_effect=fake_ffmpeg(commands)), \
+         patch.object(media_server, '_process_vod_file'):
+        clip = media_server.create_clip("stream-1", 0.0, 2.0)
+        wait_for_clip(media_server, clip)
+
+    escaped = str(segment_directory / "000000.ts").replace("'", "'\\''")
+    assert f"file '{escaped}'" in commands[0][1]
+    assert media_server.segment_users == {}
+
+def test_segments_kept_for_running_clip(media_server, tmp_path):
+    """Test that stopping a recording does not delete segments a clip is reading."""
+    segment_directory = tmp_path / "stream-1_segments"
+    segment_directory.mkdir()
+    media_server.active_streams["stream-1"] = {"segment_directory": str(segment_directory)}
+    media_server.segment_users["stream-1"] = 1
+
+    media_server._release_segments("stream-1")
+    assert segment_directory.exists()
+
+    media_server._release_segments("stream-1", from_clip=True)
+    assert not segment_directory.exists()
+
+def test_clip_errors(media_server, tmp_path):
+    """Test invalid ranges, unknown sources and a full queue."""
+    with pytest.raises(ValueError):
+        media_server.create_clip("vod-missing", 5.0, 2.0)
+    with pytest.raises(ValueError):
+        media_server.create_clip("vod-missing", 0.0, 2.0)
+
+    video = tmp_path / "video.mp4"
+    video.write_bytes(b"video")
+    media_server.vod_entries["vod-1"] = {"id": "vod-1", "file_path": str(video)}
+    media_server.clip_queue_size = 0
+    assert media_server.create_clip("vod-1", 0.0, 2.0) is None
+
+def test_concurrent_clips_respect_queue_bound(media_server, tmp_path):
+    """Test that concurrent requests never queue more clips than the bound."""
+    video = tmp_path / "video.mp4"
+    video.write_bytes(b"video")
+    media_server.vod_entries["vod-1"] = {"id": "vod-1", "file_path": str(video)}
+    media_server.clip_queue_size = 3
+    release = threading.Event()
+    start = threading.Barrier(8)
+    results = []
+
+    def cut(*args):
+        release.wait(5)
+        return 0.0
+
+    def request():
+        start.wait()
+        results.append(media_server.create_clip("vod-1", 0.0, 2.0))
+
+    with patch.object(media_server, '_cut_file_clip', side_effect=cut), \
+         patch.object(media_server, '_process_vod_file'):
+        threads = [threading.Thread(target=request) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        queued = len(media_server.clip_jobs)
+        release.set()
+        media_server.clip_executor.shutdown(wait=True)
+
+    assert queued == 3
+    assert sum(1 for clip in results if clip) == 3
+
+def test_failed_clip_marks_error(media_server, tmp_path):
+    """Test that a failed cut leaves the clip entry in the error state."""
+    video = tmp_path / "video.mp4"
+    video.write_bytes(b"video")
+    media_server.vod_entries["vod-1"] = {"id": "vod-1", "file_path": str(video)}
+
+    with patch('subprocess.run', return_value=Mock(returncode=1, stdout="", stderr="boom")):
+        clip = media_server.create_clip("vod-1", 0.0, 2.0)
+        wait_for_clip(media_server, clip)
+
+    assert media_server.vod_entries[clip["id"]]["status"] == "error"
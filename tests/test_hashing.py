@@ -0,0 +1,178 @@
+# tests/test_hashing.py
+import pytest
+import sqlite3
+from unittest.mock import Mock, patch
+
+from jitsi_plus_plugin.core.media_server import MediaServer
+from jitsi_plus_plugin.core.vod_catalog import VodCatalog
+from jitsi_plus_plugin.utils.hashing import ContentHasher, hash_file
+
+@pytest.fixture
+def media_server(tmp_path):
+    """Create a MediaServer with a catalog in a temporary directory."""
+    server = MediaServer({
+        "recording_directory": str(tmp_path),
+        "catalog_path": str(tmp_path / "catalog.db"),
+        "vod_hls_enabled": False
+    })
+    yield server
+    server.catalog.close()
+
+def test_hash_file_modes(tmp_path):
+    """Test that buffered and mapped reads give the same hash across chunk sizes."""
+    path = tmp_path / "video.mp4"
+    path.write_bytes(bytes(range(256)) * 1000)
+
+    buffered = hash_file(str(path), chunk_size=4096)
+    assert buffered.startswith("blake2b:")
+    assert hash_file(str(path), chunk_size=1000, use_mmap=True) == buffered
+    assert hash_file(str(path), use_mmap=True) == buffered
+
+    empty = tmp_path / "empty.mp4"
+    empty.write_bytes(b"")
+    assert hash_file(str(empty), use_mmap=True) == hash_file(str(empty))
+    assert hash_file(str(empty)) != buffered
+
+def test_hasher_skips_unchanged_files(tmp_path):
+    """Test that an unchanged file is only read once."""
+    path = tmp_path / "video.mp4"
+    path.write_bytes(b"video")
+    hasher = ContentHasher()
+
+    first = hasher.hash(str(path))
+    assert hasher.hash(str(path)) == first
+    assert hasher.files_hashed == 1
+    assert hasher.cache_hits == 1
+
+    path.write_bytes(b"other video")
+    assert hasher.hash(str(path)) != first
+    assert hasher.files_hashed == 2
+
+def ingest(server, name, path, source_stream=None):
+    """Create a VOD entry and process it on the calling thread with FFmpeg mocked."""
+    with patch('threading.Thread'):
+        vod_info = server.create_vod_entry(name, str(path), source_stream)
+    with patch('subprocess.run', return_value=Mock(returncode=0, stdout="10.0", stderr="")):
+        server._process_vod_file(vod_info["id"], str(path))
+    return vod_info
+
+def test_duplicate_ingest_links_file(media_server, tmp_path):
+    """Test that ingesting the same content twice shares the first file."""
+    first_path = tmp_path / "first.mp4"
+    second_path = tmp_path / "second.mp4"
+    other_path = tmp_path / "other.mp4"
+    first_path.write_bytes(b"\0" * 300)
+    second_path.write_bytes(b"\0" * 300)
+    other_path.write_bytes(b"\1" * 100)
+
+    with patch.object(media_server.content_hasher, 'hash', wraps=media_server.content_hasher.hash) as mock_hash, \
+         patch('threading.Thread'):
+        pending = media_server.create_vod_entry("first", str(first_path))
+    assert pending["status"] == "processing"
+    mock_hash.assert_not_called()
+
+    first = ingest(media_server, "first", first_path)
+    duplicate = ingest(media_server, "second", second_path, source_stream="stream-2")
+    other = ingest(media_server, "other", other_path)
+
+    assert duplicate["id"] != first["id"]
+    assert duplicate["duplicate_of"] == first["id"]
+    assert "duplicate_of" not in other
+    assert second_path.samefile(first_path)
+    assert not other_path.samefile(first_path)
+    assert media_server.catalog.get(duplicate["id"])["content_hash"] == first["content_hash"]
+    assert media_server.get_vod_for_stream("stream-2")["id"] == duplicate["id"]
+
+    stats = media_server.get_dedup_stats()
+    assert stats["ingests"] == 3
+    assert stats["duplicates"] == 1
+    assert stats["unique"] == 2
+    assert stats["bytes_stored"] == 400
+    assert stats["ratio"] == 700 / 400
+
+def test_duplicate_reuses_derived_assets(tmp_path):
+    """Test that a duplicate ingest takes its thumbnail, trickplay and segments from the first entry."""
+    server = MediaServer({"recording_directory": str(tmp_path)})
+    first_path = tmp_path / "first.mp4"
+    second_path = tmp_path / "second.mp4"
+    first_path.write_bytes(b"video")
+    second_path.write_bytes(b"video")
+
+    def fake_run(cmd, **kwargs):
+        if "-segment_list" in cmd:
+            with open(cmd[cmd.index("-segment_list") + 1], "w") as f:
+                f.write("00000.ts,0.000000,6.000000\n00001.ts,6.000000,10.000000\n")
+            for name in ("00000.ts", "00001.ts"):
+                (tmp_path / "hls" / "vod" / vod_info["id"] / name).write_bytes(b"ts")
+        return Mock(returncode=0, stdout="10.0", stderr="")
+
+    with patch('threading.Thread'):
+        vod_info = server.create_vod_entry("first", str(first_path))
+    with patch('subprocess.run', side_effect=fake_run):
+        server._process_vod_file(vod_info["id"], str(first_path))
+    first = vod_info
+
+    with patch('threading.Thread'):
+        duplicate = server.create_vod_entry("second", str(second_path))
+    with patch('subprocess.run') as mock_run:
+        server._process_vod_file(duplicate["id"], str(second_path))
+    mock_run.assert_not_called()
+
+    assert duplicate["status"] == "ready"
+    assert first["trickplay"] and first["hls_segments"]
+    for key in ("duration", "thumbnail_url", "trickplay", "hls_segments"):
+        assert duplicate[key] == first[key]
+    # Segment URLs are per entry, so the duplicate gets its own links to the segments
+    first_segment = tmp_path / "hls" / "vod" / first["id"] / "00000.ts"
+    assert (tmp_path / "hls" / "vod" / duplicate["id"] / "00000.ts").samefile(first_segment)
+
+def test_duplicate_found_in_catalog(media_server, tmp_path):
+    """Test that duplicates are found after a restart through the catalog."""
+    path = tmp_path / "video.mp4"
+    copy = tmp_path / "copy.mp4"
+    path.write_bytes(b"video")
+    copy.write_bytes(b"video")
+    first = ingest(media_server, "first", path)
+
+    restarted = MediaServer({
+        "recording_directory": str(tmp_path),
+        "catalog_path": str(tmp_path / "catalog.db"),
+        "vod_hls_enabled": False
+    })
+    try:
+        assert ingest(restarted, "again", copy)["duplicate_of"] == first["id"]
+    finally:
+        restarted.catalog.close()
+
+def test_deleted_or_failed_entry_not_reused(media_server, tmp_path):
+    """Test that deleted and failed entries are ingested again."""
+    path = tmp_path / "video.mp4"
+    path.write_bytes(b"video")
+
+    first = ingest(media_server, "first", path)
+    media_server.vod_entries[first["id"]]["status"] = "error"
+    second = ingest(media_server, "second", path)
+    assert "duplicate_of" not in second
+
+    media_server.delete_vod_entry(second["id"])
+    assert second["content_hash"] not in media_server.content_index
+
+def test_catalog_migrates_content_hash(tmp_path):
+    """Test that a catalog created before content hashes gains the column."""
+    path = str(tmp_path / "catalog.db")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE vod_entries (id TEXT PRIMARY KEY, name TEXT, source_stream TEXT, "
+        "status TEXT, created_at REAL NOT NULL DEFAULT 0, data TEXT NOT NULL)"
+    )
+    conn.commit()
+    conn.close()
+
+    catalog = VodCatalog(path)
+    try:
+        catalog.put({"id": "vod-1", "name": "a", "created_at": 2, "content_hash": "blake2b:ab"})
+        catalog.put({"id": "vod-0", "name": "b", "created_at": 1, "content_hash": "blake2b:ab"})
+        assert catalog.find_by_content_hash("blake2b:ab")["id"] == "vod-0"
+        assert catalog.find_by_content_hash("blake2b:cd") is None
+    finally:
+        catalog.close()
@@ -0,0 +1,129 @@
+# tests/test_http_client.py
+import pytest
+import asyncio
+import requests
+from unittest.mock import patch
+
+from jitsi_plus_plugin.utils.http_client import (
+    HttpClient, CircuitBreaker, CircuitOpenError, acquire_http_client, release_http_client
+)
+from jitsi_plus_plugin.core.media_server import MediaServer
+from jitsi_plus_plugin.core.jitsi_connector import JitsiConnector
+
+@pytest.fixture
+def client():
+    """Create an HttpClient with a low failure threshold."""
+    client = HttpClient({"failure_threshold": 2, "reset_timeout": 30, "health_cache_ttl": 10})
+    yield client
+    client.close()
+
+def test_session_is_pooled(client):
+    """Test that all requests share one keep-alive session with per-host limits."""
+    session = client.session
+    assert client.session is session
+
+    adapter = session.get_adapter("https://media.example.com")
+    assert adapter._pool_maxsize == client.max_connections_per_host
+    assert adapter._pool_block is True
+
+def test_circuit_opens_and_recovers(client, requests_mock):
+    """Test failing fast after repeated failures and recovering after the timeout."""
+    requests_mock.get("https://media.example.com/api/status", status_code=503)
+
+    for _ in range(2):
+        assert client.get("https://media.example.com/api/status").status_code == 503
+    assert client.get_breaker("https://media.example.com").state == "open"
+
+    with pytest.raises(CircuitOpenError):
+        client.get("https://media.example.com/api/status")
+    assert requests_mock.call_count == 2
+
+    # Other hosts are unaffected
+    requests_mock.get("https://meet.jit.si/http-pre-bind", status_code=200)
+    assert client.get("https://meet.jit.si/http-pre-bind").status_code == 200
+
+    # After the reset timeout a trial request closes the circuit again
+    requests_mock.get("https://media.example.com/api/status", status_code=200)
+    with patch("jitsi_plus_plugin.utils.http_client.time.monotonic", return_value=1e12):
+        assert client.get("https://media.example.com/api/status").status_code == 200
+    assert client.get_breaker("https://media.example.com").state == "closed"
+
+def test_connection_errors_count_as_failures():
+    """Test that connection errors trip the breaker and a failed trial re-opens it."""
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    assert breaker.allow_request() is True
+    assert breaker.state == "half_open"
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+def test_request_exception_propagates(client, requests_mock):
+    """Test that transport errors are re-raised and recorded."""
+    requests_mock.get("https://media.example.com/api/status", exc=requests.ConnectionError)
+
+    with pytest.raises(requests.ConnectionError):
+        client.get("https://media.example.com/api/status")
+    assert client.get_breaker("https://media.example.com").failures == 1
+
+def test_health_check_is_cached(client, requests_mock):
+    """Test that health results are reused within the TTL."""
+    requests_mock.get("https://media.example.com/api/status", status_code=200)
+
+    assert client.check_health("https://media.example.com/api/status") is True
+    assert client.check_health("https://media.example.com/api/status") is True
+    assert requests_mock.call_count == 1
+
+    assert client.check_health("https://media.example.com/api/status", ttl=0) is True
+    assert requests_mock.call_count == 2
+
+def test_async_requests(client, requests_mock):
+    """Test concurrent async requests through the shared pool."""
+    requests_mock.get("https://media.example.com/api/status", status_code=200)
+
+    async def run():
+        responses = await asyncio.gather(
+            *(client.aget("https://media.example.com/api/status") for _ in range(5))
+        )
+        healthy = await client.acheck_health("https://media.example.com/api/status")
+        return responses, healthy
+
+    responses, healthy = asyncio.run(run())
+    assert [r.status_code for r in responses] == [200] * 5
+    assert healthy is True
+
+def test_components_use_client(client, requests_mock):
+    """Test that the media server and Jitsi connector go through the client."""
+    requests_mock.get("https://media.example.com/api/status", status_code=200)
+    requests_mock.get("https://meet.jit.si/http-pre-bind", status_code=200)
+
+    media_server = MediaServer({"recording_directory": "/tmp/recordings"}, http_client=client)
+    jitsi = JitsiConnector({}, http_client=client)
+
+    with patch("os.makedirs"):
+        assert media_server.initialize() is True
+    assert jitsi.initialize() is True
+    assert media_server.is_healthy() is True
+    assert jitsi.is_healthy() is True
+
+def test_shared_client_reference_counted():
+    """Test that the shared client is closed only when its last owner releases it."""
+    first = acquire_http_client({"timeout": 3})
+    second = acquire_http_client({"timeout": 3})
+    assert first is second
+    assert first.timeout == 3
+
+    with patch.object(first, "close") as mock_close:
+        release_http_client(first)
+        mock_close.assert_not_called()
+        release_http_client(second)
+        mock_close.assert_called_once()
+
+    # The next owner gets a new client with its own configuration
+    third = acquire_http_client({"timeout": 7})
+    try:
+        assert third is not first
+        assert third.timeout == 7
+    finally:
+        release_http_client(third)
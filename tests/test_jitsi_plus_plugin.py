@@ -1,5 +1,8 @@
 # tests/test_jitsi_plus_plugin.py
 import pytest
+import os
+import subprocess
+import sys
 from unittest.mock import Mock, patch
 
 from jitsi_plus_plugin import JitsiPlusPlugin
@@ -98,4 +101,40 @@ def test_plugin_with_config():
         # Check that the configuration was passed to the components
         mock_jitsi_cls.assert_called_once_with(config.get("jitsi", {}))
         mock_media_cls.assert_called_once_with(config.get("media_server", {}))
-        mock_signaling_cls.assert_called_once_with(config.get("signaling", {}))
\ No newline at end of file
+        mock_signaling_cls.assert_called_once_with(config.get("signaling", {}))
+
+def test_initialize_reports_component_readiness(plugin, mock_media_server):
+    """Test that a failing backend is reported without blocking the others."""
+    mock_media_server.initialize.return_value = False
+    
+    result = plugin.initialize()
+    
+    assert result["components"]["jitsi"]["ready"] is True
+    assert result["components"]["signaling"]["ready"] is True
+    assert result["components"]["media_server"]["state"] == "failed"
+    assert plugin.get_readiness() == result["components"]
+
+def test_controllers_created_on_first_access(plugin):
+    """Test that feature controllers are built lazily and reused."""
+    assert plugin._controllers == {}
+    
+    vod = plugin.vod
+    
+    assert plugin.vod is vod
+    assert list(plugin._controllers) == ["vod"]
+
+def test_package_import_is_lazy():
+    """Test that importing the CLI does not import heavy dependencies."""
+    code = (
+        "import sys, jitsi_plus_plugin.cli; "
+        "print(','.join(m for m in ('requests', 'websockets', 'asyncio', "
+        "'jitsi_plus_plugin.core.media_server') if m in sys.modules))"
+    )
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run([sys.executable, "-c", code], cwd=root,
+                            capture_output=True, text=True, check=True)
+    
+    assert result.stdout.strip() == ""
+    
+    import jitsi_plus_plugin
+    assert jitsi_plus_plugin.VideoOnDemand.__name__ == "VideoOnDemand"
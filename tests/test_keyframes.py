@@ -0,0 +1,144 @@
+# tests/test_keyframes.py
+import pytest
+import os
+import threading
+from unittest.mock import Mock, patch
+
+from jitsi_plus_plugin.core.keyframes import KeyframeIndex
+from jitsi_plus_plugin.core.media_server import MediaServer
+from jitsi_plus_plugin.core.transcoder import ChunkedTranscoder
+
+FFPROBE_OUTPUT = "0.000000,48,K__\n0.033333,1200,___\n2.000000,90210,K__\nN/A,100000,K__\n4.000000,N/A,K_\n"
+
+def test_probe_parses_keyframes():
+    """Test building an index from ffprobe packet output."""
+    mock_result = Mock(stdout=FFPROBE_OUTPUT, returncode=0)
+
+    with patch('subprocess.run', return_value=mock_result) as mock_run:
+        index = KeyframeIndex.probe("/tmp/input.mp4")
+
+    assert index.to_list() == [0.0, 2.0, 4.0]
+    assert list(index.positions) == [48, 90210, -1]
+    assert "packet=pts_time,pos,flags" in mock_run.call_args[0][0]
+
+def test_save_load_round_trip(tmp_path):
+    """Test the compact on-disk format."""
+    index = KeyframeIndex([float(t) for t in range(0, 3600, 2)], range(0, 1800 * 1000, 1000))
+    path = str(tmp_path / "video.kfi")
+
+    index.save(path)
+    loaded = KeyframeIndex.load(path)
+
+    assert os.path.getsize(path) == 8 + 1800 * 16
+    assert loaded.to_list() == index.to_list()
+    assert list(loaded.positions) == list(index.positions)
+
+    with open(path, "r+b") as f:
+        f.truncate(100)
+    with pytest.raises(ValueError):
+        KeyframeIndex.load(path)
+
+def test_lookups():
+    """Test keyframe lookups around a timestamp."""
+    index = KeyframeIndex([0.0, 2.0, 4.0], [0, 500, -1])
+
+    assert index.floor(3.0) == 2.0
+    assert index.floor(2.0) == 2.0
+    assert index.floor(-1.0) is None
+    assert index.ceil(3.0) == 4.0
+    assert index.ceil(5.0) is None
+    assert index.position(2.5) == 500
+    assert index.position(4.5) is None
+
+def test_load_for_ignores_stale_index(tmp_path):
+    """Test that an index older than its media file is not used."""
+    video = tmp_path / "video.mp4"
+    video.write_bytes(b"video")
+    KeyframeIndex([0.0, 2.0], [0, 10]).save(KeyframeIndex.index_path(str(video)))
+
+    assert KeyframeIndex.load_for(str(video)).to_list() == [0.0, 2.0]
+
+    os.utime(video, (os.path.getmtime(video) + 10,) * 2)
+    assert KeyframeIndex.load_for(str(video)) is None
+
+def test_transcoder_uses_saved_index(tmp_path):
+    """Test that the transcoder reads the saved index instead of probing."""
+    video = tmp_path / "video.mp4"
+    video.write_bytes(b"video")
+    KeyframeIndex([0.0, 2.0, 4.0], [0, 10, 20]).save(KeyframeIndex.index_path(str(video)))
+    transcoder = ChunkedTranscoder({"work_directory": str(tmp_path)})
+
+    with patch('subprocess.run') as mock_run:
+        assert transcoder.probe_keyframes(str(video)) == [0.0, 2.0, 4.0]
+    mock_run.assert_not_called()
+
+def test_stop_recording_finalizes_file(tmp_path):
+    """Test the faststart remux and keyframe index after a recording stops."""
+    server = MediaServer({"recording_directory": str(tmp_path)})
+    recording = tmp_path / "stream-1.mp4"
+    recording.write_bytes(b"moov-at-end")
+    server.active_streams["stream-1"] = {"name": "Test Stream", "recording_path": str(recording)}
+    server.recording_processes["stream-1"] = Mock()
+
+    def fake_run(cmd, **kwargs):
+        if cmd[0] == "ffmpeg":
+            with open(cmd[-1], "wb") as f:
+                f.write(b"moov-at-start")
+            return Mock(returncode=0, stderr="")
+        return Mock(returncode=0, stdout=FFPROBE_OUTPUT, stderr="")
+
+    callback = Mock()
+    server.on_recording_completed = callback
+    with patch('subprocess.run', side_effect=fake_run) as mock_run:
+        server._stop_recording("stream-1")
+        server.finalize_jobs["stream-1"].result()
+
+    remux_cmd = mock_run.call_args_list[0][0][0]
+    assert remux_cmd[remux_cmd.index("-c") + 1] == "copy"
+    assert "+faststart" in remux_cmd
+    assert recording.read_bytes() == b"moov-at-start"
+    assert not (tmp_path / "stream-1.faststart.mp4").exists()
+
+    index = KeyframeIndex.load(str(tmp_path / "stream-1.kfi"))
+    assert index.to_list() == [0.0, 2.0, 4.0]
+    callback.assert_called_once()
+    assert callback.call_args[0][0]["keyframe_count"] == 3
+
+def test_stop_stream_finalizes_in_background(tmp_path):
+    """Test that stopping a stream does not wait for finalization."""
+    server = MediaServer({"recording_directory": str(tmp_path)})
+    recording = tmp_path / "stream-1.mp4"
+    recording.write_bytes(b"moov-at-end")
+    server.active_streams["stream-1"] = {"name": "Test Stream", "recording_path": str(recording),
+                                         "status": "active"}
+    server.recording_processes["stream-1"] = Mock()
+    release = threading.Event()
+
+    def fake_run(cmd, **kwargs):
+        release.wait(5)
+        return Mock(returncode=1, stdout="10.0", stderr="")
+
+    with patch('subprocess.run', side_effect=fake_run):
+        assert server.stop_stream("stream-1") is True
+        vod_info = server.get_vod_for_stream("stream-1")
+        assert vod_info["status"] == "processing"
+
+        release.set()
+        # Waits for finalization and the processing it hands over to
+        server.shutdown()
+
+    assert vod_info["status"] == "ready"
+    assert vod_info["duration"] == 10.0
+    assert server.finalize_jobs == {}
+    assert server.recording_jobs == {}
+
+def test_failed_remux_keeps_original(tmp_path):
+    """Test that a failed remux leaves the recording untouched."""
+    server = MediaServer({"recording_directory": str(tmp_path)})
+    recording = tmp_path / "stream-1.mp4"
+    recording.write_bytes(b"original")
+
+    with patch('subprocess.run', return_value=Mock(returncode=1, stderr="error")):
+        assert server._remux_faststart(str(recording)) is False
+
+    assert recording.read_bytes() == b"original"
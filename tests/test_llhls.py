@@ -0,0 +1,250 @@
+# tests/test_llhls.py
+import pytest
+import http.client
+import os
+import shutil
+import threading
+import time
+from unittest.mock import Mock, patch
+
+from jitsi_plus_plugin.core.llhls import LowLatencyHlsPackager, starts_with_keyframe
+from jitsi_plus_plugin.core.media_server import MediaServer
+from jitsi_plus_plugin.core.vod_origin import VodOriginServer
+
+@pytest.fixture
+def packager(tmp_path):
+    """Create a packager with 1 s segments of four 0.25 s parts."""
+    return LowLatencyHlsPackager("stream-1", str(tmp_path / "stream-1_ll"), {
+        "part_duration": 0.25,
+        "segment_duration": 1,
+        "playlist_segments": 2
+    })
+
+def write_part(packager, number, data=b"ts"):
+    """Write a part file and publish it."""
+    os.makedirs(packager.output_directory, exist_ok=True)
+    name = f"part_{number:06d}.ts"
+    with open(os.path.join(packager.output_directory, name), "wb") as f:
+        f.write(data)
+    packager.add_part(name, 0.25)
+
+def test_parts_group_into_segments(packager):
+    """Test segment closing, concatenation and the playlist tags."""
+    for number in range(6):
+        write_part(packager, number, bytes([number]))
+
+    assert packager.next_sequence == 1
+    with open(f"{packager.output_directory}/seg_000000.ts", "rb") as f:
+        assert f.read() == bytes([0, 1, 2, 3])
+
+    lines = packager.playlist().splitlines()
+    assert "#EXT-X-VERSION:9" in lines
+    assert "#EXT-X-TARGETDURATION:1" in lines
+    assert "#EXT-X-SERVER-CONTROL:CAN-BLOCK-RELOAD=YES,PART-HOLD-BACK=0.750" in lines
+    assert "#EXT-X-PART-INF:PART-TARGET=0.250" in lines
+    assert "#EXT-X-MEDIA-SEQUENCE:0" in lines
+    assert '#EXT-X-PART:DURATION=0.250,URI="stream-1/part_000000.ts",INDEPENDENT=YES' in lines
+    assert '#EXT-X-PART:DURATION=0.250,URI="stream-1/part_000001.ts"' in lines
+    assert lines[lines.index("stream-1/seg_000000.ts") - 1] == "#EXTINF:1.000,"
+    assert '#EXT-X-PART:DURATION=0.250,URI="stream-1/part_000005.ts"' in lines
+    assert lines[-1] == '#EXT-X-PRELOAD-HINT:TYPE=PART,URI="stream-1/part_000006.ts"'
+
+    packager.end()
+    lines = packager.playlist().splitlines()
+    assert lines[-1] == "#EXT-X-ENDLIST"
+    assert not any(line.startswith("#EXT-X-PART:") for line in lines)
+    assert "stream-1/seg_000001.ts" in lines
+
+def test_old_segments_deleted(packager):
+    """Test the sliding window on disk and in the playlist."""
+    for number in range(20):
+        write_part(packager, number)
+
+    assert [segment["sequence"] for segment in packager.segments] == [1, 2, 3, 4]
+    assert not os.path.exists(f"{packager.output_directory}/seg_000000.ts")
+    assert not os.path.exists(f"{packager.output_directory}/part_000000.ts")
+    assert "#EXT-X-MEDIA-SEQUENCE:3" in packager.playlist()
+
+def test_has_part(packager):
+    """Test which blocking requests can be answered."""
+    for number in range(5):
+        write_part(packager, number)
+
+    assert packager.has_part(0) is True
+    assert packager.has_part(1) is False
+    assert packager.has_part(1, 0) is True
+    assert packager.has_part(1, 1) is False
+    assert packager.is_preload_hint("part_000005.ts") is True
+
+def ts_packet(pid, payload, unit_start=True, random_access=False):
+    """Build a 188-byte MPEG-TS packet, with an adaptation field carrying the random access flag."""
+    header = bytes([0x47, (0x40 if unit_start else 0) | (pid >> 8), pid & 0xff])
+    if random_access:
+        header += bytes([0x30, 1, 0x40])
+    else:
+        header += bytes([0x10])
+    return (header + payload).ljust(188, b"\xff")
+
+def ts_part(keyframe, stream_type=0x1b):
+    """Build a part with a PAT, a PMT for one stream on PID 0x100 and its first PES packet."""
+    pat = bytes([0, 0x00, 0xb0, 13, 0, 1, 0xc1, 0, 0, 0, 1, 0xf0, 0x00, 0, 0, 0, 0])
+    pmt = bytes([0, 0x02, 0xb0, 18, 0, 1, 0xc1, 0, 0, 0xe1, 0x00, 0xf0, 0x00,
+                 stream_type, 0xe1, 0x00, 0xf0, 0x00, 0, 0, 0, 0])
+    pes = bytes([0, 0, 1, 0xe0])
+    return ts_packet(0, pat) + ts_packet(0x1000, pmt) + ts_packet(0x100, pes, random_access=keyframe)
+
+def test_starts_with_keyframe(tmp_path):
+    """Test reading the random access flag of a part's first video frame."""
+    for name, data, expected in [
+        ("key.ts", ts_part(True), True),
+        ("delta.ts", ts_part(False), False),
+        ("audio.ts", ts_part(False, stream_type=0x0f), True),
+        ("garbage.ts", b"ts", None)
+    ]:
+        (tmp_path / name).write_bytes(data)
+        assert starts_with_keyframe(str(tmp_path / name)) is expected
+    assert starts_with_keyframe(str(tmp_path / "missing.ts")) is None
+
+def test_segments_start_on_keyframes(packager):
+    """Test that segments close before keyframe parts and only those are independent."""
+    os.makedirs(packager.output_directory)
+    keyframes = [True, False, False, False, False, False, True, False, True]
+    for number, keyframe in enumerate(keyframes):
+        with open(os.path.join(packager.output_directory, f"part_{number:06d}.ts"), "wb") as f:
+            f.write(bytes([number]))
+        packager.add_part(f"part_{number:06d}.ts", 0.25, keyframe)
+
+    # The 1 s segment runs on to the next keyframe part
+    assert [len(segment["parts"]) for segment in packager.segments] == [6]
+    assert [part["uri"] for part in packager.current_parts] == ["part_000006.ts", "part_000007.ts",
+                                                                 "part_000008.ts"]
+    lines = packager.playlist().splitlines()
+    assert '#EXT-X-PART:DURATION=0.250,URI="stream-1/part_000006.ts",INDEPENDENT=YES' in lines
+    assert '#EXT-X-PART:DURATION=0.250,URI="stream-1/part_000007.ts"' in lines
+    assert '#EXT-X-PART:DURATION=0.250,URI="stream-1/part_000008.ts",INDEPENDENT=YES' in lines
+
+    # Without keyframes a segment is closed at the maximum duration
+    for number in range(9, 21):
+        with open(os.path.join(packager.output_directory, f"part_{number:06d}.ts"), "wb") as f:
+            f.write(bytes([number]))
+        packager.add_part(f"part_{number:06d}.ts", 0.25, False)
+    assert len(packager.segments[-1]["parts"]) == 12
+
+def test_segment_written_outside_playlist_lock(packager):
+    """Test that playlist reads are not blocked while a segment file is written."""
+    copy = shutil.copyfileobj
+    locked = []
+
+    def checked_copy(source, destination):
+        available = packager._lock.acquire(blocking=False)
+        if available:
+            packager._lock.release()
+        locked.append(not available)
+        copy(source, destination)
+
+    with patch('shutil.copyfileobj', side_effect=checked_copy):
+        for number in range(4):
+            write_part(packager, number)
+
+    assert packager.next_sequence == 1
+    assert locked and not any(locked)
+
+def test_tail_reads_complete_lines(packager):
+    """Test that a partly written part list line is left for the next read."""
+    os.makedirs(packager.output_directory)
+    with open(f"{packager.output_directory}/parts.csv", "w") as f:
+        f.write("part_000000.ts,0.000000,0.250000\npart_000001.ts,0.2500")
+
+    packager._read_part_list()
+    assert [part["uri"] for part in packager.current_parts] == ["part_000000.ts"]
+
+    with open(f"{packager.output_directory}/parts.csv", "a") as f:
+        f.write("00,0.500000\n")
+    packager._read_part_list()
+    assert [part["duration"] for part in packager.current_parts] == [0.25, 0.25]
+
+@pytest.fixture
+def origin(tmp_path, packager):
+    """Serve a packager through the origin."""
+    media_server = MediaServer({"recording_directory": str(tmp_path)})
+    media_server.llhls_packagers["stream-1"] = packager
+    origin = VodOriginServer(media_server, {"host": "127.0.0.1", "port": 0})
+    assert origin.start() is True
+    yield origin
+    origin.stop()
+
+def request(origin, path):
+    """Send a GET request and return the response, its body and the time taken."""
+    started = time.time()
+    conn = http.client.HTTPConnection("127.0.0.1", origin.port, timeout=5)
+    conn.request("GET", path)
+    response = conn.getresponse()
+    return response, response.read(), time.time() - started
+
+def publish_later(packager, numbers, delay=0.2):
+    """Publish parts from another thread after a delay."""
+    def run():
+        time.sleep(delay)
+        for number in numbers:
+            write_part(packager, number)
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+def test_blocking_playlist_reload(origin, packager):
+    """Test that a blocking reload is held until the requested part exists."""
+    write_part(packager, 0)
+    thread = publish_later(packager, [1, 2])
+
+    response, body, elapsed = request(origin, "/llhls/stream-1.m3u8?_HLS_msn=0&_HLS_part=2")
+    thread.join()
+
+    assert response.status == 200
+    assert response.getheader("Content-Type") == "application/vnd.apple.mpegurl"
+    assert b'URI="stream-1/part_000002.ts"' in body
+    assert elapsed >= 0.15
+
+def test_blocking_reload_limits(origin, packager):
+    """Test requests far beyond the live edge and requests that time out."""
+    response, _, _ = request(origin, "/llhls/stream-1.m3u8?_HLS_msn=5")
+    assert response.status == 400
+
+    packager.segment_duration = 0.1
+    response, _, _ = request(origin, "/llhls/stream-1.m3u8?_HLS_msn=1")
+    assert response.status == 503
+
+    response, _, _ = request(origin, "/llhls/missing.m3u8")
+    assert response.status == 404
+
+def test_preload_hint_part_is_held(origin, packager):
+    """Test that requesting the hinted part waits for it to be written."""
+    write_part(packager, 0)
+    thread = publish_later(packager, [1])
+
+    response, body, elapsed = request(origin, "/llhls/stream-1/part_000001.ts")
+    thread.join()
+
+    assert response.status == 200
+    assert body == b"ts"
+    assert elapsed >= 0.15
+
+def test_stream_lifecycle(tmp_path):
+    """Test that live streams are packaged while active when LL-HLS is enabled."""
+    server = MediaServer({"recording_directory": str(tmp_path), "llhls": {"enabled": True}})
+    stream_info = server.create_stream("Live", "live")
+
+    assert stream_info["llhls_url"] == f"https://media.example.com/llhls/{stream_info['key']}.m3u8"
+
+    with patch('subprocess.Popen', return_value=Mock()) as mock_popen:
+        server.start_stream(stream_info["key"])
+
+        cmd = mock_popen.call_args[0][0]
+        assert cmd[cmd.index("-c") + 1] == "copy"
+        assert "-break_non_keyframes" in cmd
+        packager = server.get_llhls_packager(stream_info["key"])
+        assert packager.segment_duration == 4
+
+        server.stop_stream(stream_info["key"])
+
+    assert server.get_llhls_packager(stream_info["key"]) is None
+    assert packager.ended is True
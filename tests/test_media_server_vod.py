@@ -95,8 +95,8 @@ def test_process_vod_file(media_server):
         # Call the method directly
         media_server._process_vod_file(vod_id, file_path)
         
-        # Check FFprobe call to get duration
-        assert mock_run.call_count == 2
+        # Check FFprobe call to get duration; thumbnail, trickplay and HLS segments follow
+        assert mock_run.call_count == 4
         ffprobe_args = mock_run.call_args_list[0][0][0]
         assert ffprobe_args[0] == "ffprobe"
         assert file_path in ffprobe_args
@@ -112,6 +112,46 @@ def test_process_vod_file(media_server):
         assert media_server.vod_entries[vod_id]["status"] == "ready"
         assert "thumbnail_url" in media_server.vod_entries[vod_id]
 
+def test_process_vod_file_trickplay(media_server, tmp_path):
+    """Test generating trickplay sprites and the WebVTT index."""
+    vod_id = "vod-test"
+    file_path = str(tmp_path / "test_video.mp4")
+    media_server.trickplay_interval = 10
+    media_server.trickplay_columns = 2
+    media_server.trickplay_rows = 2
+    
+    media_server.vod_entries[vod_id] = {
+        "id": vod_id,
+        "name": "Test VOD",
+        "file_path": file_path,
+        "url": f"https://media.example.com/vod/{vod_id}.mp4",
+        "status": "processing"
+    }
+    
+    # 45s of video -> 5 thumbnails -> 2 sprite sheets of 2x2 tiles
+    mock_result = Mock(returncode=0, stdout="45.0\n")
+    
+    with patch('subprocess.run', return_value=mock_result) as mock_run:
+        media_server._process_vod_file(vod_id, file_path)
+    
+    # Sprites come from a single FFmpeg pass
+    sprite_args = mock_run.call_args_list[2][0][0]
+    assert sprite_args[0] == "ffmpeg"
+    assert "fps=1/10" in sprite_args[sprite_args.index("-vf") + 1]
+    assert "tile=2x2" in sprite_args[sprite_args.index("-vf") + 1]
+    
+    trickplay = media_server.get_vod_info(vod_id)["trickplay"]
+    assert trickplay["count"] == 5
+    assert len(trickplay["sprite_urls"]) == 2
+    assert trickplay["vtt_url"] == f"https://media.example.com/thumbnails/{vod_id}_trickplay.vtt"
+    
+    vtt = (tmp_path / f"{vod_id}_trickplay.vtt").read_text()
+    assert vtt.startswith("WEBVTT")
+    assert "00:00:00.000 --> 00:00:10.000" in vtt
+    assert f"{vod_id}_sprite_001.jpg#xywh=160,90,160,90" in vtt
+    assert "00:00:40.000 --> 00:00:45.000" in vtt
+    assert f"{vod_id}_sprite_002.jpg#xywh=0,0,160,90" in vtt
+
 def test_process_vod_file_error(media_server):
     """Test processing a VOD file with an error."""
     vod_id = "vod-test"
@@ -363,4 +403,30 @@ def test_shutdown(media_server):
         mock_stop_stream.assert_has_calls([
             call(stream_key1),
             call(stream_key2)
-        ], any_order=True)
\ No newline at end of file
+        ], any_order=True)
+
+def test_stream_vod_index(media_server, tmp_path):
+    """Test that stream key lookups follow VOD creation and deletion."""
+    recording_path = tmp_path / "stream.mp4"
+    recording_path.write_bytes(b"video")
+    
+    media_server.recording_enabled = False
+    stream_info = media_server.create_stream("Test Stream", "record")
+    stream_info["recording_path"] = str(recording_path)
+    media_server.start_stream(stream_info["key"])
+    media_server.stop_stream(stream_info["key"])
+    
+    vod_info = media_server.get_vod_for_stream(stream_info["key"])
+    assert vod_info["id"] == f"vod-{stream_info['key']}"
+    assert media_server.get_vod_for_stream("unknown-stream") is None
+    
+    with patch('threading.Thread'):
+        manual = media_server.create_vod_entry("Manual", str(recording_path), source_stream="other-stream")
+    
+    found = media_server.get_vods_for_streams([stream_info["key"], "other-stream", "unknown-stream"])
+    assert set(found) == {stream_info["key"], "other-stream"}
+    assert found["other-stream"] is manual
+    
+    media_server.delete_vod_entry(vod_info["id"])
+    assert media_server.get_vod_for_stream(stream_info["key"]) is None
+    assert stream_info["key"] not in media_server.stream_vod_index
@@ -0,0 +1,118 @@
+# tests/test_placement.py
+import pytest
+import random
+
+from jitsi_plus_plugin.utils.placement import (
+    BestFitIndex, FirstFitIndex, PlacementPolicy, PowerOfTwoChoicesIndex, ServerLoadIndex,
+    create_placement_policy
+)
+from jitsi_plus_plugin.utils.scaling import ScalingManager
+
+def make_servers(policy, loads, capacity=100):
+    """Index servers with the given loads."""
+    servers = []
+    for i, load in enumerate(loads):
+        server = {"id": f"s{i}", "current_load": load, "capacity": capacity, "status": "active"}
+        policy.add(server)
+        servers.append(server)
+    return servers
+
+def test_least_loaded():
+    """Test the least loaded server with room across mixed capacities and a saturated pool."""
+    policy = ServerLoadIndex()
+    servers = make_servers(policy, [40, 20, 30])
+    small = {"id": "small", "current_load": 5, "capacity": 10, "status": "active"}
+    policy.add(small)
+
+    assert policy.select(10)["id"] == "s1"
+    # The least loaded server is too small for the demand
+    assert policy.select(5)["id"] == "small"
+    assert policy.select(6)["id"] == "s1"
+
+    for server in servers:
+        server["current_load"] = 100
+        policy.update(server)
+    assert policy.select(6) is None
+    assert policy.select(5)["id"] == "small"
+
+    small["status"] = "inactive"
+    assert policy.select(1) is None
+
+def test_best_fit():
+    """Test that the tightest fit is chosen and updates reorder servers."""
+    policy = BestFitIndex()
+    servers = make_servers(policy, [10, 80, 95, 50])
+
+    assert policy.select(10)["id"] == "s1"
+    assert policy.select(5)["id"] == "s2"
+    assert policy.select(95) is None
+
+    servers[3]["current_load"] = 85
+    policy.update(servers[3])
+    assert policy.select(10)["id"] == "s3"
+
+    policy.remove("s3")
+    assert policy.select(10)["id"] == "s1"
+
+def test_first_fit():
+    """Test the first server with room, growth past the initial slots and deactivation."""
+    policy = FirstFitIndex()
+    servers = make_servers(policy, [95] * 20 + [0, 0])
+
+    assert policy.select(5)["id"] == "s0"
+    assert policy.select(10)["id"] == "s20"
+
+    servers[20]["status"] = "inactive"
+    assert policy.select(10)["id"] == "s21"
+
+    policy.remove("s21")
+    assert policy.select(10) is None
+
+def test_power_of_two_choices():
+    """Test that the less loaded sample wins and full pools fall back to a scan."""
+    policy = PowerOfTwoChoicesIndex(rng=random.Random(1))
+    make_servers(policy, [100, 100, 100, 40])
+    assert policy.select(10)["id"] == "s3"
+
+    policy.remove("s3")
+    assert policy.select(10) is None
+    assert len(policy) == 3
+
+def test_create_policy():
+    """Test creating policies by name."""
+    assert isinstance(create_placement_policy("least_loaded"), ServerLoadIndex)
+    assert isinstance(create_placement_policy("power_of_two"), PowerOfTwoChoicesIndex)
+    with pytest.raises(ValueError):
+        create_placement_policy("worst_fit")
+
+def test_policies_implement_the_interface():
+    """Test that a policy missing part of the interface cannot be created."""
+    class Incomplete(PlacementPolicy):
+        def add(self, server):
+            super().add(server)
+
+        def update(self, server):
+            pass
+
+        def remove(self, server_id):
+            super().remove(server_id)
+
+    with pytest.raises(TypeError):
+        PlacementPolicy()
+    with pytest.raises(TypeError):
+        Incomplete()
+
+@pytest.mark.parametrize("placement", ["first_fit", "best_fit"])
+def test_batch_packs_decreasing(placement):
+    """Test that batch allocation places the largest rooms first."""
+    manager = ScalingManager({"auto_scaling": False, "placement": {"jitsi": placement}})
+    for i in range(3):
+        manager.add_jitsi_server({"id": f"jvb-{i}", "capacity": 100})
+
+    # In arrival order, first-fit needs all three servers for these rooms
+    allocations = manager.allocate_jitsi_servers({"a": 30, "b": 60, "c": 40, "d": 70})
+
+    assert {room: server["id"] for room, server in allocations.items()} == {
+        "d": "jvb-0", "b": "jvb-1", "c": "jvb-1", "a": "jvb-0"
+    }
+    assert manager.jitsi_servers[2]["current_load"] == 0
@@ -0,0 +1,196 @@
+# tests/test_restream.py
+import pytest
+import io
+import threading
+from unittest.mock import Mock, patch
+
+from jitsi_plus_plugin.core.media_server import MediaServer
+
+def fake_process(*args, **kwargs):
+    """Create a running FFmpeg process with empty output."""
+    process = Mock()
+    process.stdout = io.StringIO("")
+    process.stderr = io.StringIO("")
+    process.poll.return_value = None
+    return process
+
+@pytest.fixture
+def media_server(tmp_path):
+    """Create a MediaServer with a live stream that is not recorded."""
+    server = MediaServer({"recording_directory": str(tmp_path), "restream": {"retry_interval": 0}})
+    stream_info = server.create_stream("Live", "live")
+    server.start_stream(stream_info["key"])
+    yield server
+    server.restream.shutdown()
+
+@pytest.fixture
+def stream_key(media_server):
+    return next(iter(media_server.active_streams))
+
+def start_targets(media_server, stream_key, urls):
+    """Add targets and restart the stream's restreaming so that they share one process."""
+    targets = [media_server.add_restream_target(stream_key, url) for url in urls]
+    media_server.restream.stop(stream_key)
+    media_server.restream.start(stream_key)
+    return targets
+
+def test_one_tee_process_per_stream(media_server, stream_key):
+    """Test that targets share one tee process and that live changes leave the others running."""
+    with patch('subprocess.Popen', side_effect=fake_process) as mock_popen:
+        first, second = start_targets(media_server, stream_key, [
+            "rtmp://a.example.com/live/key1",
+            "srt://b.example.com:9000?streamid=x|y"
+        ])
+
+        cmd = mock_popen.call_args[0][0]
+        assert cmd[cmd.index("-i") + 1] == media_server.active_streams[stream_key]["rtmp_url"]
+        assert cmd[cmd.index("-c") + 1] == "copy"
+        assert cmd[-3:] == [
+            "-f", "tee",
+            "[f=flv:onfail=ignore]rtmp://a.example.com/live/key1|"
+            "[f=mpegts:onfail=ignore]srt://b.example.com:9000?streamid=x\\|y"
+        ]
+        shared = media_server.restream.processes[stream_key][0]["process"]
+
+        # Added while live: a process of its own
+        third = media_server.add_restream_target(stream_key, "rtmps://c.example.com/app/key")
+        assert len(media_server.restream.processes[stream_key]) == 2
+        assert media_server.remove_restream_target(stream_key, third["id"]) is True
+        shared.terminate.assert_not_called()
+
+        # Removing a shared target moves the other to a new process
+        assert media_server.remove_restream_target(stream_key, first["id"]) is True
+        shared.terminate.assert_called_once()
+        assert [state["slaves"] for state in media_server.restream.processes[stream_key]] == [[second["id"]]]
+        assert mock_popen.call_count == 5
+
+def test_invalid_targets(media_server, stream_key):
+    """Test unsupported URLs, unknown streams and the target limit."""
+    with pytest.raises(ValueError):
+        media_server.add_restream_target(stream_key, "http://example.com/live")
+    with pytest.raises(ValueError):
+        media_server.add_restream_target("missing", "rtmp://example.com/live")
+
+    media_server.restream.max_targets = 1
+    with patch('subprocess.Popen', side_effect=fake_process):
+        media_server.add_restream_target(stream_key, "rtmp://a.example.com/live")
+        with pytest.raises(ValueError):
+            media_server.add_restream_target(stream_key, "rtmp://b.example.com/live")
+
+    assert media_server.remove_restream_target(stream_key, "target-missing") is False
+
+def test_per_target_stats(media_server, stream_key):
+    """Test bitrate and frame counts of running and failed targets."""
+    with patch('subprocess.Popen', side_effect=fake_process):
+        start_targets(media_server, stream_key, ["rtmp://a.example.com/live", "rtmp://b.example.com/live"])
+
+    restream = media_server.restream
+    restream.retry_interval = 3600
+    state = restream.processes[stream_key][0]
+    state["process"].stdout = io.StringIO("frame=100\ndrop_frames=0\nbitrate=2400.0kbits/s\nprogress=continue\n")
+    restream._read_progress(stream_key, state)
+    state["process"].stderr = io.StringIO(
+        "[tee @ 0x1] Slave muxer #1 failed: Broken pipe, continuing with 1/2 slaves.\n"
+    )
+    restream._read_errors(stream_key, state)
+    state["process"].stdout = io.StringIO("frame=250\ndrop_frames=2\nbitrate=2500.0kbits/s\nprogress=continue\n")
+    restream._read_progress(stream_key, state)
+
+    restream.check_health()
+    healthy, failed = media_server.get_restream_targets(stream_key)
+
+    # The tee process keeps writing to the healthy target
+    state["process"].terminate.assert_not_called()
+    assert healthy["status"] == "active"
+    assert healthy["bitrate_kbps"] == 2500.0
+    assert healthy["frames_sent"] == 250
+    assert healthy["dropped_frames"] == 2
+
+    assert failed["status"] == "failed"
+    assert failed["error"] == "Broken pipe"
+    assert failed["bitrate_kbps"] == 0.0
+    assert failed["frames_sent"] == 100
+
+def test_failed_target_retried_with_backoff(media_server, stream_key):
+    """Test that a failed target is retried alone, with exponentially growing delays."""
+    restream = media_server.restream
+    restream.retry_interval = 10
+    restream.max_retry_interval = 25
+    now = [1000.0]
+
+    with patch('subprocess.Popen', side_effect=fake_process) as mock_popen, \
+         patch('time.time', side_effect=lambda: now[0]):
+        healthy, target = start_targets(media_server, stream_key, [
+            "rtmp://a.example.com/live", "rtmp://b.example.com/live"
+        ])
+        shared = restream.processes[stream_key][0]
+        shared["process"].stderr = io.StringIO("Slave muxer #1 failed: Connection refused, continuing with 1/2 slaves.\n")
+        restream._read_errors(stream_key, shared)
+
+        delays = []
+        for attempt in range(4):
+            if attempt:
+                # The retry process holds only the failing target
+                retry = restream.processes[stream_key][1]
+                assert retry["slaves"] == [target["id"]]
+                retry["process"].poll.return_value = 1
+            assert restream.check_health()[stream_key] == {healthy["id"]: "active", target["id"]: "failed"}
+            retry_at = restream.targets[stream_key][target["id"]]["retry_at"]
+            delays.append(retry_at - now[0])
+
+            now[0] = retry_at - 1
+            restream.check_health()
+            assert len(restream.processes[stream_key]) == 1
+
+            now[0] = retry_at
+            assert restream.check_health()[stream_key][target["id"]] == "active"
+
+        assert delays == [10, 20, 25, 25]
+        # The shared process plus four retries; the healthy output never restarted
+        assert mock_popen.call_count == 7
+        shared["process"].terminate.assert_not_called()
+
+        # Staying up resets the backoff
+        now[0] += 10
+        restream.check_health()
+        assert restream.targets[stream_key][target["id"]]["consecutive_failures"] == 0
+
+    assert media_server.get_restream_targets(stream_key)[1]["failures"] == 4
+
+def test_process_stopped_outside_lock(media_server, stream_key):
+    """Test that waiting for FFmpeg to exit does not block other callers."""
+    with patch('subprocess.Popen', side_effect=fake_process):
+        target = media_server.add_restream_target(stream_key, "rtmp://a.example.com/live")
+    restream = media_server.restream
+    process = restream.processes[stream_key][0]["process"]
+
+    acquired = []
+
+    def take_lock():
+        if restream._lock.acquire(timeout=1):
+            acquired.append(True)
+            restream._lock.release()
+
+    def wait(timeout=None):
+        # Another thread can take the lock while this one waits
+        thread = threading.Thread(target=take_lock)
+        thread.start()
+        thread.join()
+
+    process.wait.side_effect = wait
+    assert media_server.remove_restream_target(stream_key, target["id"]) is True
+    process.wait.assert_called_once()
+    assert acquired == [True]
+
+def test_follows_stream_lifecycle(media_server, stream_key):
+    """Test that restreaming stops and starts with the stream and keeps its targets."""
+    with patch('subprocess.Popen', side_effect=fake_process) as mock_popen:
+        media_server.add_restream_target(stream_key, "rtmp://a.example.com/live")
+
+        media_server.stop_stream(stream_key)
+        assert stream_key not in media_server.restream.processes
+        assert media_server.get_restream_targets(stream_key)[0]["status"] == "pending"
+
+        media_server.start_stream(stream_key)
+        assert stream_key in media_server.restream.processes
+        assert mock_popen.call_count == 2
@@ -0,0 +1,185 @@
+# tests/test_scaling.py
+import pytest
+
+from jitsi_plus_plugin.utils.placement import ServerLoadIndex
+from jitsi_plus_plugin.utils.scaling import ScalingManager
+
+@pytest.fixture
+def manager():
+    """Create a scaling manager without auto-scaling or monitoring."""
+    manager = ScalingManager({"auto_scaling": False})
+    for i in range(3):
+        manager.add_jitsi_server({"id": f"jvb-{i}", "capacity": 100})
+    return manager
+
+def test_allocates_least_loaded(manager):
+    """Test that allocation spreads rooms by load, ties going to the first server."""
+    servers = [manager.allocate_jitsi_server(f"room-{i}", 10)["id"] for i in range(4)]
+    assert servers == ["jvb-0", "jvb-1", "jvb-2", "jvb-0"]
+
+    assert manager.deallocate_server("room-1") is True
+    assert manager.allocate_jitsi_server("room-4", 10)["id"] == "jvb-1"
+    assert manager.server_loads["jvb-0"] == 0.2
+
+def test_capacity_and_status(manager):
+    """Test servers without room for the demand and inactive servers."""
+    small = manager.add_jitsi_server({"id": "jvb-small", "capacity": 5})
+    assert manager.allocate_jitsi_server("room-0", 10)["id"] == "jvb-0"
+
+    # The empty small server is skipped for large rooms but kept for small ones
+    assert manager.allocate_jitsi_server("room-1", 10)["id"] == "jvb-1"
+    assert manager.allocate_jitsi_server("room-2", 10)["id"] == "jvb-2"
+    assert manager.allocate_jitsi_server("room-3", 5)["id"] == "jvb-small"
+
+    manager.jitsi_servers[0]["status"] = "inactive"
+    manager.jitsi_index.remove("jvb-0")
+    assert manager.allocate_jitsi_server("room-4", 10)["id"] == "jvb-1"
+    assert manager.allocate_jitsi_server("room-5", 100) is None
+    assert small["current_load"] == 5
+
+def test_media_allocation():
+    """Test media server allocation and release by stream."""
+    manager = ScalingManager({"auto_scaling": False})
+    manager.add_media_server({"id": "media-a", "capacity": 1})
+    manager.add_media_server({"id": "media-b", "capacity": 1})
+
+    assert manager.allocate_media_server("stream-1")["id"] == "media-a"
+    assert manager.allocate_media_server("stream-2")["id"] == "media-b"
+    assert manager.allocate_media_server("stream-3") is None
+
+    manager.deallocate_server("stream-1")
+    assert manager.allocate_media_server("stream-3")["id"] == "media-a"
+
+def test_index_stays_compact():
+    """Test that outdated heap entries do not accumulate."""
+    index = ServerLoadIndex()
+    servers = [{"id": f"s{i}", "current_load": 0, "capacity": 10 ** 9, "status": "active"} for i in range(10)]
+    for server in servers:
+        index.add(server)
+
+    for i in range(10000):
+        server = index.select(1)
+        server["current_load"] += 1
+        index.update(server)
+
+    assert sum(len(heap) for heap in index._heaps.values()) <= 2 * len(servers) + 64
+    assert {server["current_load"] for server in servers} == {1000}
+
+def test_idle_cleanup_by_last_activity():
+    """Test that servers are deactivated an idle timeout after their last room ends."""
+    now = [0.0]
+    manager = ScalingManager({"auto_scaling": False, "idle_timeout_seconds": 3600}, clock=lambda: now[0])
+    for i in range(3):
+        manager.add_jitsi_server({"id": f"jvb-{i}", "capacity": 100})
+
+    now[0] = 3000
+    manager.allocate_jitsi_server("room-0", 10)
+    now[0] = 3500
+    manager.deallocate_server("room-0")
+    assert list(manager.idle_servers["jitsi"]) == ["jvb-1", "jvb-2", "jvb-0"]
+
+    now[0] = 4000
+    manager._clean_up_servers()
+    assert [server["status"] for server in manager.jitsi_servers] == ["active", "inactive", "inactive"]
+    assert manager.active_counts["jitsi"] == 1
+
+    # The last active server is kept however long it idles
+    now[0] = 100000
+    manager._clean_up_servers()
+    assert manager.jitsi_servers[0]["status"] == "active"
+    assert manager.allocate_jitsi_server("room-1", 10)["id"] == "jvb-0"
+
+def test_idle_cleanup_ignores_allocations():
+    """Test that cleanup does not scan live allocations."""
+    now = [0.0]
+    manager = ScalingManager({"auto_scaling": False}, clock=lambda: now[0])
+    manager.add_jitsi_server({"id": "busy", "capacity": 10 ** 6})
+    for i in range(5000):
+        manager.allocate_jitsi_server(f"room-{i}", 1)
+    for i in range(10):
+        manager.add_jitsi_server({"id": f"idle-{i}", "capacity": 1})
+
+    class NoIteration(dict):
+        def items(self):
+            raise AssertionError("room allocations scanned")
+
+    manager.room_allocations = NoIteration(manager.room_allocations)
+    now[0] = 7200
+    manager._clean_up_servers()
+    assert manager.active_counts["jitsi"] == 1
+    assert manager.servers_by_id[("jitsi", "busy")]["status"] == "active"
+
+def test_set_server_status(manager):
+    """Test that status changes keep placement and idle tracking in step."""
+    manager.allocate_jitsi_server("room-0", 10)
+    assert manager.set_server_status("jitsi", "jvb-1", "draining")
+    assert manager.allocate_jitsi_server("room-1", 10)["id"] == "jvb-2"
+    assert manager.active_counts["jitsi"] == 2
+    assert "jvb-1" not in manager.idle_servers["jitsi"]
+
+    assert manager.set_server_status("jitsi", "jvb-1", "active")
+    assert manager.allocate_jitsi_server("room-2", 10)["id"] == "jvb-1"
+    assert manager.active_counts["jitsi"] == 3
+    assert not manager.set_server_status("jitsi", "missing", "active")
+
+def test_concurrent_allocation():
+    """Test that load accounting stays exact with many threads allocating and releasing."""
+    import random
+    import sys
+    import threading
+
+    manager = ScalingManager({"auto_scaling": False, "lock_stripes": 8})
+    for i in range(8):
+        manager.add_jitsi_server({"id": f"jvb-{i}", "capacity": 100})
+    manager.add_media_server({"id": "media-0", "capacity": 10 ** 6})
+
+    def worker(n):
+        rng = random.Random(n)
+        live = []
+        for i in range(1000):
+            room_id = f"room-{n}-{i}"
+            if rng.random() < 0.2:
+                manager.allocate_media_server(room_id)
+                live.append(room_id)
+            elif manager.allocate_jitsi_server(room_id, rng.randint(1, 10)):
+                live.append(room_id)
+            if live and rng.random() < 0.5:
+                manager.deallocate_server(live.pop(rng.randrange(len(live))))
+
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+
+    for server in manager.jitsi_servers:
+        assert server["current_load"] <= server["capacity"]
+        assert server["current_load"] == sum(
+            manager.room_allocations[room_id]["expected_participants"] for room_id in server["rooms"]
+        )
+    placed = [room_id for server in manager.jitsi_servers for room_id in server["rooms"]]
+    placed += manager.media_servers[0]["streams"]
+    assert sorted(placed) == sorted(manager.room_allocations)
+    assert manager.media_servers[0]["current_load"] == len(manager.media_servers[0]["streams"])
+
+def test_no_load_on_booting_server():
+    """Test that a server provisioned on demand takes no room until it is active."""
+    manager = ScalingManager({"auto_scaling": True})
+
+    def provision():
+        server = manager.add_jitsi_server({"id": "jvb-new", "capacity": 100})
+        manager.set_server_status("jitsi", server["id"], "provisioning")
+        return server
+
+    manager._provision_jitsi_server = provision
+    assert manager.allocate_jitsi_server("room-1", 10) is None
+    assert manager.servers_by_id[("jitsi", "jvb-new")]["current_load"] == 0
+    assert "room-1" not in manager.room_allocations
+
+    manager.set_server_status("jitsi", "jvb-new", "active")
+    assert manager.allocate_jitsi_server("room-1", 10)["id"] == "jvb-new"
@@ -0,0 +1,57 @@
+# tests/test_simulator.py
+import pytest
+
+from jitsi_plus_plugin.utils.simulator import FleetSimulator, VirtualClock, load_trace, synthetic_trace
+
+def test_virtual_clock_drives_manager():
+    """Test that the manager reads time from the virtual clock."""
+    sim = FleetSimulator(jitsi_servers=1, media_servers=0)
+    sim.clock.now = 1234.0
+    sim.manager.allocate_jitsi_server("room", 5)
+
+    assert sim.manager.room_allocations["room"]["allocated_at"] == 1234.0
+    assert isinstance(sim.clock, VirtualClock)
+
+def test_rejections_without_scaling():
+    """Test that arrivals beyond a fixed fleet are rejected and counted."""
+    sim = FleetSimulator({"auto_scaling": False}, jitsi_servers=1, media_servers=1, jitsi_capacity=10)
+    trace = [(0, 100, 6, "jitsi"), (1, 100, 6, "jitsi"), (2, 50, 1, "media"), (200, 10, 6, "jitsi")]
+    result = sim.run(trace)
+
+    assert result["allocations"] == {"jitsi": 3, "media": 1}
+    assert result["rejected"] == {"jitsi": 1, "media": 0}
+    assert not sim.manager.room_allocations
+
+def test_cost_and_provisioning():
+    """Test that server-hours follow the fleet and provisioned servers boot."""
+    sim = FleetSimulator({"auto_scaling": True, "monitor_interval_seconds": 60},
+                         jitsi_servers=1, media_servers=1, jitsi_capacity=10, boot_delay=30, max_servers=2)
+    trace = [(0, 3600, 10, "jitsi"), (10, 3600, 10, "jitsi"), (50, 3600, 10, "jitsi")]
+    result = sim.run(trace)
+
+    # The second room provisions a server but cannot wait for it to boot; the third lands on it
+    assert result["rejected"]["jitsi"] == 1
+    assert sim.provisioned["jitsi"] == 1
+    assert result["peak_servers"]["jitsi"] == 2
+    assert result["peak_utilization"]["jitsi"] == pytest.approx(1.0)
+    # Two Jitsi servers and the media server for an hour
+    assert result["server_hours"] == pytest.approx(3.0, rel=0.05)
+    assert result["allocation_latency_us"]["max"] >= result["allocation_latency_us"]["p50"] > 0
+
+def test_deterministic():
+    """Test that the same trace gives the same decisions."""
+    results = [
+        FleetSimulator({"auto_scaling": True}, jitsi_servers=2).run(synthetic_trace(2, 0.5, seed=7))
+        for _ in range(2)
+    ]
+    for key in ("events", "simulated_seconds", "server_hours", "allocations", "rejected",
+                "peak_servers", "peak_utilization"):
+        assert results[0][key] == results[1][key]
+    assert results[0]["allocations"]["jitsi"] > 100
+
+def test_load_trace(tmp_path):
+    """Test reading a CSV trace."""
+    path = tmp_path / "trace.csv"
+    path.write_text("start,duration,size,pool\n0,60,4,jitsi\n5,30,,media\n")
+
+    assert list(load_trace(str(path))) == [(0.0, 60.0, 4, "jitsi"), (5.0, 30.0, 1, "media")]
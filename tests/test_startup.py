@@ -0,0 +1,62 @@
+# tests/test_startup.py
+import pytest
+import socket
+import threading
+import time
+
+from jitsi_plus_plugin.utils.startup import StartupOrchestrator
+from jitsi_plus_plugin.core.signaling import SignalingServer
+
+def test_components_start_concurrently():
+    """Test that slow components do not delay each other."""
+    orchestrator = StartupOrchestrator()
+    for name in ["a", "b", "c"]:
+        orchestrator.add_component(name, lambda: time.sleep(0.2) or True)
+
+    start = time.monotonic()
+    status = orchestrator.run()
+    elapsed = time.monotonic() - start
+
+    assert elapsed < 0.5
+    assert orchestrator.is_ready() is True
+    assert all(component["ready"] for component in status.values())
+
+def test_component_timeout_and_late_readiness():
+    """Test that a timed-out component is reported ready once it finishes."""
+    release = threading.Event()
+    orchestrator = StartupOrchestrator({"component_timeouts": {"slow": 0.1}})
+    orchestrator.add_component("fast", lambda: True)
+    orchestrator.add_component("slow", release.wait)
+
+    status = orchestrator.run()
+    assert status["fast"]["state"] == "ready"
+    assert status["slow"]["state"] == "timeout"
+    assert orchestrator.is_ready() is False
+
+    release.set()
+    orchestrator.components["slow"]["done"].wait(1)
+    assert orchestrator.is_ready("slow") is True
+
+def test_component_failure():
+    """Test that failing and raising components are reported as failed."""
+    def broken():
+        raise RuntimeError("boom")
+
+    orchestrator = StartupOrchestrator()
+    orchestrator.add_component("down", lambda: False)
+    orchestrator.add_component("broken", broken)
+
+    status = orchestrator.run()
+
+    assert status["down"]["state"] == "failed"
+    assert status["broken"]["state"] == "failed"
+    assert status["broken"]["error"] == "boom"
+
+def test_signaling_ready_on_ephemeral_port():
+    """Test that the signaling server reports when it accepts connections."""
+    server = SignalingServer({"host": "127.0.0.1", "port": 0})
+    server.start()
+
+    assert server.wait_until_ready(5) is True
+    assert server.port != 0
+    socket.create_connection(("127.0.0.1", server.port), timeout=1).close()
@@ -0,0 +1,311 @@
+# tests/test_storage.py
+import pytest
+import os
+import threading
+import time
+from unittest.mock import patch
+
+from jitsi_plus_plugin.core.media_server import MediaServer
+from jitsi_plus_plugin.core.vod_catalog import VodCatalog
+from jitsi_plus_plugin.features.vod import VideoOnDemand
+
+def make_server(tmp_path, **storage_config):
+    """Create a MediaServer with a storage quota and no free-space floor."""
+    storage_config.setdefault("min_free_bytes", 0)
+    storage_config.setdefault("recording_reserve_bytes", 0)
+    return MediaServer({
+        "recording_directory": str(tmp_path / "recordings"),
+        "storage": storage_config
+    })
+
+def add_vod(server, vod_id, size, created_at):
+    """Create a VOD entry backed by a video file and a thumbnail."""
+    directory = server.recording_directory
+    os.makedirs(directory, exist_ok=True)
+    video = os.path.join(directory, f"{vod_id}.mp4")
+    with open(video, "wb") as f:
+        f.write(b"\0" * size)
+    with open(os.path.join(directory, f"{vod_id}_thumbnail.jpg"), "wb") as f:
+        f.write(b"\0" * 10)
+
+    server.vod_entries[vod_id] = {
+        "id": vod_id,
+        "name": vod_id,
+        "created_at": created_at,
+        "file_path": video,
+        "status": "ready"
+    }
+    server._save_vod_entry(vod_id)
+    return video
+
+def test_scan_is_incremental(tmp_path):
+    """Test that rescans only pick up changed files."""
+    server = make_server(tmp_path)
+    add_vod(server, "vod-a", 100, 1)
+    add_vod(server, "vod-b", 200, 2)
+
+    first = server.storage.scan()
+    assert first["bytes"] == 320
+    assert server.storage.vod_files["vod-a"] == {
+        os.path.join(server.recording_directory, "vod-a.mp4"),
+        os.path.join(server.recording_directory, "vod-a_thumbnail.jpg")
+    }
+
+    assert server.storage.scan()["changed"] == 0
+
+    os.remove(os.path.join(server.recording_directory, "vod-b_thumbnail.jpg"))
+    with open(os.path.join(server.recording_directory, "live.mp4"), "wb") as f:
+        f.write(b"\0" * 50)
+
+    second = server.storage.scan()
+    assert second["changed"] == 2
+    assert second["bytes"] == 360
+
+def test_hard_links_counted_once(tmp_path):
+    """Test that deduplicated files linked under several paths are counted once."""
+    server = make_server(tmp_path)
+    first = add_vod(server, "vod-a", 100, 1)
+    second = add_vod(server, "vod-b", 100, 2)
+    assert server.storage.scan()["bytes"] == 220
+
+    server._link_file(first, second)
+    server._save_vod_entry("vod-b")
+    assert server.storage.total_bytes == 120
+    assert server.storage.scan()["bytes"] == 120
+
+    # The data is only freed with its last link
+    server.storage.evict("vod-a")
+    assert server.storage.total_bytes == 110
+    server.storage.evict("vod-b")
+    assert server.storage.total_bytes == 0
+
+@pytest.mark.parametrize("policy,expected", [
+    ("age", ["vod-a", "vod-b", "vod-c"]),
+    ("lru", ["vod-b", "vod-c", "vod-a"]),
+    ("lfu", ["vod-c", "vod-b", "vod-a"]),
+])
+def test_eviction_order(tmp_path, policy, expected):
+    """Test the candidate order for each eviction policy."""
+    server = make_server(tmp_path, policy=policy)
+    for index, vod_id in enumerate(["vod-a", "vod-b", "vod-c"]):
+        add_vod(server, vod_id, 100, index)
+
+    server.storage.access = {"vod-a": [30, 5], "vod-b": [10, 2], "vod-c": [20, 1]}
+    assert server.storage.eviction_candidates() == expected
+
+@pytest.mark.parametrize("policy,expected", [
+    ("age", ["vod-a", "vod-b", "vod-c"]),
+    ("lru", ["vod-b", "vod-c", "vod-a"]),
+    ("lfu", ["vod-c", "vod-b", "vod-a"]),
+])
+def test_catalog_eviction_order(tmp_path, policy, expected):
+    """Test that the catalog ranks candidates without loading entries into memory."""
+    server = make_server(tmp_path, policy=policy)
+    server.catalog = VodCatalog(str(tmp_path / "catalog.db"))
+    try:
+        for index, vod_id in enumerate(["vod-a", "vod-b", "vod-c"]):
+            add_vod(server, vod_id, 100, index)
+        # Not under the recording directory, so never a candidate
+        server.catalog.put({"id": "vod-external", "created_at": -1, "file_path": "/elsewhere/vod.mp4"})
+        server.vod_entries.clear()
+
+        with patch('time.time', return_value=10):
+            for _ in range(2):
+                server.storage.record_access("vod-b")
+        with patch('time.time', return_value=20):
+            server.storage.record_access("vod-c")
+        with patch('time.time', return_value=30):
+            for _ in range(5):
+                server.storage.record_access("vod-a")
+
+        with patch.object(server.catalog, 'get') as mock_get:
+            assert server.storage.eviction_candidates() == expected
+            # The limit counts the external VOD, which ranks first
+            assert server.storage.eviction_candidates(limit=3) == expected[:2]
+        mock_get.assert_not_called()
+        assert server.vod_entries == {}
+
+        # Access statistics survive updates to the entry
+        server.catalog.put(server.catalog.get("vod-a"))
+        assert server.storage.eviction_candidates() == expected
+    finally:
+        server.catalog.close()
+
+def test_catalog_quota_evicts_in_batches(tmp_path):
+    """Test enforcing the quota from catalog-ranked batches past VODs that cannot be evicted."""
+    server = make_server(tmp_path, max_bytes=1000, policy="age",
+                         high_watermark=0.9, low_watermark=0.5)
+    server.catalog = VodCatalog(str(tmp_path / "catalog.db"))
+    try:
+        server.catalog.put_many(
+            {"id": f"vod-external-{index}", "created_at": -1, "file_path": f"/elsewhere/{index}.mp4"}
+            for index in range(3)
+        )
+        for index in range(4):
+            add_vod(server, f"vod-{index}", 240, index)
+        server.storage.scan()
+
+        with patch('jitsi_plus_plugin.core.storage.EVICTION_BATCH_SIZE', 2):
+            assert server.storage.enforce() == ["vod-0", "vod-1"]
+        assert server.storage.total_bytes == 500
+        assert server.catalog.get("vod-0") is None
+        assert server.catalog.get("vod-external-0") is not None
+    finally:
+        server.catalog.close()
+
+def test_quota_evicts_to_low_watermark(tmp_path):
+    """Test that exceeding the quota deletes the oldest VODs and their files."""
+    server = make_server(tmp_path, max_bytes=1000, policy="age",
+                         high_watermark=0.9, low_watermark=0.5)
+    for index in range(4):
+        add_vod(server, f"vod-{index}", 240, index)
+    server.storage.scan()
+
+    evicted = server.storage.enforce()
+
+    assert evicted == ["vod-0", "vod-1"]
+    assert server.storage.total_bytes == 500
+    assert "vod-0" not in server.vod_entries
+    assert not os.path.exists(os.path.join(server.recording_directory, "vod-0.mp4"))
+    assert not os.path.exists(os.path.join(server.recording_directory, "vod-0_thumbnail.jpg"))
+    assert server.storage.get_usage()["evicted"] == 2
+
+def test_eviction_removes_segments_and_manifests(tmp_path):
+    """Test that evicting a VOD removes its HLS segments and drops the playlist manifests that use it."""
+    server = make_server(tmp_path, max_bytes=1000, policy="age", high_watermark=0.9, low_watermark=0.5)
+    vod = VideoOnDemand(server)
+    for index in range(2):
+        add_vod(server, f"vod-{index}", 400, index)
+        server.vod_entries[f"vod-{index}"]["hls_segments"] = [[0.0, 4.0]]
+    segment_directory = os.path.join(server.hls_directory, "vod", "vod-0")
+    os.makedirs(segment_directory)
+    with open(os.path.join(segment_directory, "00000.ts"), "wb") as f:
+        f.write(b"\0" * 200)
+
+    playlist = vod.create_playlist("Show", ["vod-0", "vod-1"])
+    assert "vod-0" in vod.get_playlist_manifest(playlist["id"])
+    server.storage.scan()
+    assert os.path.join(segment_directory, "00000.ts") in server.storage.vod_files["vod-0"]
+
+    assert server.storage.enforce() == ["vod-0"]
+
+    assert not os.path.exists(segment_directory)
+    assert server.storage.total_bytes == 410
+    assert playlist["id"] not in vod.manifest_cache
+    assert "vod-0" not in vod.get_playlist_manifest(playlist["id"])
+
+def test_cold_storage_moves_video(tmp_path):
+    """Test that eviction moves videos to the cold directory and keeps the VOD."""
+    cold = tmp_path / "cold"
+    server = make_server(tmp_path, max_bytes=1000, policy="age", low_watermark=0.5,
+                         cold_directory=str(cold))
+    for index in range(3):
+        add_vod(server, f"vod-{index}", 400, index)
+    server.storage.scan()
+
+    assert server.storage.enforce() == ["vod-0", "vod-1"]
+
+    moved = server.vod_entries["vod-0"]
+    assert moved["storage_tier"] == "cold"
+    assert moved["file_path"] == str(cold / "vod-0.mp4")
+    assert os.path.exists(moved["file_path"])
+    assert server.storage.total_bytes == 430
+    assert "vod-0" not in server.storage.eviction_candidates()
+
+def test_refuse_recording_when_full(tmp_path):
+    """Test that recordings are refused instead of filling the disk."""
+    server = make_server(tmp_path, max_bytes=1000, recording_reserve_bytes=600)
+    stream_info = server.create_stream("Test Stream", "record")
+
+    with patch.object(server, "_start_recording") as mock_start_recording:
+        assert server.start_stream(stream_info["key"]) is True
+        mock_start_recording.assert_called_once()
+
+    # A second recording would need another reservation on top of the first
+    server.recording_processes[stream_info["key"]] = object()
+    other = server.create_stream("Other Stream", "record")
+    assert server.start_stream(other["key"]) is False
+    assert server.active_streams[other["key"]]["status"] != "active"
+
+def test_refuse_recording_low_disk(tmp_path):
+    """Test the free disk space floor."""
+    server = make_server(tmp_path, min_free_bytes=10 ** 18)
+
+    assert server.storage.can_record() is False
+
+def test_delete_clears_index(tmp_path):
+    """Test that deleting a VOD clears its index and access statistics."""
+    server = make_server(tmp_path)
+    add_vod(server, "vod-a", 100, 1)
+    server.storage.scan()
+    server.storage.record_access("vod-a")
+    server.storage.record_access("vod-a")
+    assert server.storage.access["vod-a"][1] == 2
+
+    server.delete_vod_entry("vod-a", delete_file=True)
+
+    assert "vod-a" not in server.storage.vod_files
+    assert "vod-a" not in server.storage.access
+    assert server.storage.total_bytes == 10
+
+def test_start_indexes_in_background(tmp_path):
+    """Test that starting does not wait for the directory scan."""
+    server = make_server(tmp_path)
+    add_vod(server, "vod-a", 100, 1)
+    release = threading.Event()
+    scan = server.storage.scan
+
+    def slow_scan():
+        release.wait(5)
+        return scan()
+
+    with patch.object(server.storage, 'scan', side_effect=slow_scan):
+        try:
+            assert server.storage.start() is True
+            assert not server.storage.indexed.is_set()
+            release.set()
+            assert server.storage.indexed.wait(5)
+        finally:
+            server.storage.stop()
+
+    assert server.storage.total_bytes == 110
+
+def test_orphaned_files_evicted(tmp_path):
+    """Test that files left without VOD entries after a restart are evicted, oldest first."""
+    server = make_server(tmp_path, max_bytes=1000, recording_reserve_bytes=300)
+    directory = tmp_path / "recordings"
+    directory.mkdir()
+    files = {"old.mp4": 800, "vod-gone_thumbnail.jpg": 100, "fresh.mp4": 50, "notes.txt": 20}
+    for name, size in files.items():
+        (directory / name).write_bytes(b"\0" * size)
+    for name, mtime in (("old.mp4", 1000), ("vod-gone_thumbnail.jpg", 2000), ("notes.txt", 1000)):
+        os.utime(directory / name, (mtime, mtime))
+
+    server.storage.scan()
+    server.storage._track_known_vods()
+    assert server.storage.file_owners[str(directory / "vod-gone_thumbnail.jpg")] is None
+
+    # Refusing a recording only wakes the monitor to make room
+    assert server.storage.can_record() is False
+    assert server.storage._wake_event.is_set()
+    assert (directory / "old.mp4").exists()
+
+    server.storage.start()
+    try:
+        deadline = time.time() + 5
+        while not server.storage.can_record() and time.time() < deadline:
+            time.sleep(0.01)
+    finally:
+        server.storage.stop()
+
+    assert server.storage.can_record() is True
+    assert not (directory / "old.mp4").exists()
+    # Under the low watermark after one file; fresh files and other files are never orphans
+    assert (directory / "vod-gone_thumbnail.jpg").exists()
+    assert (directory / "fresh.mp4").exists()
+    assert server.storage.get_usage()["orphans_removed"] == 1
+
+def test_invalid_policy(tmp_path):
+    """Test that an unknown policy is rejected."""
+    with pytest.raises(ValueError):
+        make_server(tmp_path, policy="random")
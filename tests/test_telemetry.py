@@ -0,0 +1,98 @@
+# tests/test_telemetry.py
+import socket
+import time
+
+import pytest
+
+from jitsi_plus_plugin.utils.scaling import ScalingManager
+from jitsi_plus_plugin.utils.telemetry import TelemetryListener, TelemetryStore, parse_datagram, parse_report
+
+def test_parse_report():
+    """Test parsing reports and rejecting malformed ones."""
+    assert parse_report("jitsi jvb-1 participants=412 cpu=0.64 dominant=7") == (
+        "jitsi", "jvb-1", {"participants": 412.0, "cpu": 0.64}
+    )
+    with pytest.raises(ValueError):
+        parse_report("jitsi jvb-1")
+    with pytest.raises(ValueError):
+        parse_report("sfu jvb-1 participants=1")
+
+    reports = parse_datagram(b"media m1 streams=3\ngarbage\n\njitsi j1 participants=nan-ish\njitsi j2 cpu=0.5\n")
+    assert [report[1] for report in reports] == ["m1", "j2"]
+
+def test_store_series():
+    """Test that series stay aligned when metrics come and go."""
+    store = TelemetryStore(history_size=3)
+    store.record("jitsi", "j1", {"participants": 10}, now=1)
+    store.record("jitsi", "j1", {"participants": 20, "cpu": 0.5}, now=2)
+    store.record("jitsi", "j1", {"cpu": 0.6}, now=3)
+    store.record("jitsi", "j1", {"participants": 40}, now=4)
+
+    assert store.series("jitsi", "j1", "participants") == [(2.0, 20.0), (3.0, 20.0), (4.0, 40.0)]
+    assert store.series("jitsi", "j1", "cpu") == [(2.0, 0.5), (3.0, 0.6), (4.0, 0.6)]
+    assert store.latest("jitsi", "j1") == {"participants": 40, "cpu": 0.6, "time": 4}
+
+    store.remove("jitsi", "j1")
+    assert store.latest("jitsi", "j1") is None
+
+@pytest.fixture
+def manager():
+    manager = ScalingManager({"auto_scaling": False, "telemetry": {"reservation_grace": 60, "cpu_limit": 0.8}})
+    manager.add_jitsi_server({"id": "j1", "capacity": 100})
+    manager.add_jitsi_server({"id": "j2", "capacity": 100, "max_bitrate": 1000})
+    return manager
+
+def test_measured_load_corrects_estimates(manager):
+    """Test that reports replace expected participants and steer allocation."""
+    manager.allocate_jitsi_server("big", 50)
+    assert manager.servers_by_id[("jitsi", "j1")]["current_load"] == 50
+
+    # The room turned out small, while j2 is busy with traffic outside our allocations
+    assert manager.ingest_telemetry("jitsi", "j1", {"participants": 5}, now=1000)
+    assert manager.ingest_telemetry("jitsi", "j2", {"participants": 10, "bitrate": 600}, now=1000)
+    assert manager.server_loads["j1"] == pytest.approx(0.05)
+    assert manager.servers_by_id[("jitsi", "j2")]["current_load"] == pytest.approx(60)
+
+    assert manager.allocate_jitsi_server("next", 30)["id"] == "j1"
+
+    # CPU limits headroom even when participant counts look low
+    manager.ingest_telemetry("jitsi", "j1", {"participants": 5, "cpu": 0.78}, now=1001)
+    assert manager.servers_by_id[("jitsi", "j1")]["current_load"] == pytest.approx(97.5 + 30)
+    assert manager.allocate_jitsi_server("after", 30)["id"] == "j2"
+
+    assert not manager.ingest_telemetry("jitsi", "unknown", {"participants": 1})
+    assert manager.get_server_telemetry("jitsi", "j1")["history"] == [(1000.0, 5.0), (1001.0, 5.0)]
+
+def test_reservations_expire(manager):
+    """Test that recent allocations count until reports should include them."""
+    manager.ingest_telemetry("jitsi", "j1", {"participants": 0}, now=0)
+    manager.clock = lambda: 10
+    manager.allocate_jitsi_server("room", 40)
+
+    manager.ingest_telemetry("jitsi", "j1", {"participants": 2}, now=30)
+    assert manager.servers_by_id[("jitsi", "j1")]["current_load"] == 42
+
+    manager.ingest_telemetry("jitsi", "j1", {"participants": 35}, now=80)
+    assert manager.servers_by_id[("jitsi", "j1")]["current_load"] == 35
+
+    manager.deallocate_server("room")
+    assert manager.servers_by_id[("jitsi", "j1")]["current_load"] == 0
+
+def test_listener_receives_datagrams():
+    """Test receiving reports over UDP."""
+    received = []
+    listener = TelemetryListener({"host": "127.0.0.1", "port": 0},
+                                 lambda *report: received.append(report), clock=lambda: 5.0)
+    assert listener.start()
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.sendto(b"jitsi j1 participants=7\nmedia m1 streams=2", listener.address)
+
+        deadline = time.time() + 5
+        while len(received) < 2 and time.time() < deadline:
+            time.sleep(0.01)
+    finally:
+        listener.stop()
+
+    assert received == [("jitsi", "j1", {"participants": 7.0}, 5.0), ("media", "m1", {"streams": 2.0}, 5.0)]
+    assert not listener.is_running
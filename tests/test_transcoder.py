@@ -0,0 +1,156 @@
+# tests/test_transcoder.py
+import pytest
+import os
+from unittest.mock import Mock, patch
+
+from jitsi_plus_plugin.core.transcoder import ChunkedTranscoder
+
+@pytest.fixture
+def transcoder(tmp_path):
+    """Create a ChunkedTranscoder with a temporary work directory."""
+    return ChunkedTranscoder({
+        "workers": 4,
+        "min_chunk_duration": 10,
+        "work_directory": str(tmp_path)
+    })
+
+def test_probe_keyframes(transcoder):
+    """Test parsing keyframe timestamps from ffprobe packet output."""
+    mock_result = Mock(returncode=0, stderr="")
+    mock_result.stdout = "0.000000,48,K__\n0.033333,1200,___\n2.000000,90210,K__\nN/A,100000,K__\n4.000000,N/A,K_\n"
+
+    with patch('subprocess.run', return_value=mock_result) as mock_run:
+        keyframes = transcoder.probe_keyframes("/tmp/input.mp4")
+
+    assert keyframes == [0.0, 2.0, 4.0]
+    assert "packet=pts_time,pos,flags" in mock_run.call_args[0][0]
+
+def test_probe_duration_failures(transcoder):
+    """Test that a failed probe or a missing duration raises a descriptive error."""
+    with patch('subprocess.run', return_value=Mock(returncode=0, stdout="12.5\n", stderr="")):
+        assert transcoder.probe_duration("/tmp/input.mp4") == 12.5
+
+    with patch('subprocess.run', return_value=Mock(returncode=1, stdout="", stderr="/tmp/input.mp4: No such file")):
+        with pytest.raises(RuntimeError, match="No such file"):
+            transcoder.probe_duration("/tmp/input.mp4")
+
+    with patch('subprocess.run', return_value=Mock(returncode=0, stdout="N/A\n", stderr="")):
+        with pytest.raises(RuntimeError, match="No duration"):
+            transcoder.probe_duration("/tmp/input.mp4")
+
+def test_plan_chunks_snaps_to_keyframes(transcoder):
+    """Test that chunk boundaries only fall on keyframes."""
+    keyframes = [float(t) for t in range(0, 400, 2)]
+
+    chunks = transcoder.plan_chunks(keyframes, 400.0, workers=4)
+
+    # 4 workers x 2 chunks per worker -> 50s target chunks
+    assert len(chunks) == 8
+    assert chunks[0][0] == 0.0
+    assert chunks[-1][1] == 400.0
+    for start, end in chunks:
+        assert start in keyframes or start == 0.0
+        assert end > start
+    for (_, end), (start, _) in zip(chunks, chunks[1:]):
+        assert end == start
+
+def test_plan_chunks_respects_min_duration(transcoder):
+    """Test that short inputs are not split into tiny chunks."""
+    keyframes = [float(t) for t in range(0, 14, 1)]
+
+    chunks = transcoder.plan_chunks(keyframes, 14.0, workers=16)
+
+    assert len(chunks) == 1
+    assert chunks[0] == (0.0, 14.0)
+
+def test_transcode_file_not_found(transcoder):
+    """Test transcoding a file that doesn't exist."""
+    with pytest.raises(FileNotFoundError):
+        transcoder.transcode("/tmp/nonexistent_input.mp4", "/tmp/output.mp4")
+
+def test_transcode_runs_chunks_and_concat(transcoder, tmp_path):
+    """Test the split, parallel encode and concat pipeline."""
+    input_path = tmp_path / "input.mp4"
+    input_path.write_bytes(b"video")
+    output_path = str(tmp_path / "output.mp4")
+    commands = []
+
+    def fake_run(cmd, **kwargs):
+        commands.append(cmd)
+        result = Mock(returncode=0, stderr=b"")
+        if "format=duration" in cmd:
+            result.stdout = "120.0\n"
+        elif "packet=pts_time,pos,flags" in cmd:
+            result.stdout = "".join(f"{t}.0,{t * 1000},K__\n" for t in range(0, 120, 5))
+        elif "stream=index" in cmd:
+            result.stdout = "1\n"
+        elif "segment" in cmd:
+            # Simulate the segment muxer writing three chunks
+            for index in range(3):
+                open(cmd[-1] % index, "wb").close()
+        return result
+
+    with patch('subprocess.run', side_effect=fake_run):
+        result = transcoder.transcode(str(input_path), output_path, workers=3)
+
+    assert result["chunks"] == 3
+    assert result["workers"] == 3
+    assert result["output_path"] == output_path
+
+    split_cmd = next(cmd for cmd in commands if "segment" in cmd)
+    assert split_cmd[split_cmd.index("-c") + 1] == "copy"
+    assert "-segment_times" in split_cmd
+
+    chunk_cmds = [cmd for cmd in commands if "-an" in cmd]
+    assert len(chunk_cmds) == 3
+    assert all("-threads" in cmd for cmd in chunk_cmds)
+
+    concat_cmd = commands[-1]
+    assert "concat" in concat_cmd
+    assert concat_cmd[concat_cmd.index("-c") + 1] == "copy"
+    assert concat_cmd[-1] == output_path
+
+    # Work directory is cleaned up
+    assert [name for name in os.listdir(tmp_path) if name.startswith("transcode-")] == []
+
+def test_transcode_ffmpeg_failure(transcoder, tmp_path):
+    """Test that an FFmpeg failure is surfaced as an error."""
+    input_path = tmp_path / "input.mp4"
+    input_path.write_bytes(b"video")
+
+    def fake_run(cmd, **kwargs):
+        if "format=duration" in cmd:
+            return Mock(returncode=0, stdout="60.0\n")
+        if "packet=pts_time,pos,flags" in cmd:
+            return Mock(returncode=0, stdout="0.0,0,K__\n")
+        if "stream=index" in cmd:
+            return Mock(returncode=0, stdout="1\n")
+        return Mock(returncode=1, stderr=b"Invalid data found when processing input")
+
+    with patch('subprocess.run', side_effect=fake_run):
+        with pytest.raises(RuntimeError, match="Invalid data"):
+            transcoder.transcode(str(input_path), str(tmp_path / "output.mp4"))
+
+def test_transcode_audio_probes_first(transcoder, tmp_path):
+    """Test that only a missing audio stream skips the audio, and failures raise."""
+    def fake_run(cmd, **kwargs):
+        if "stream=index" in cmd:
+            return Mock(returncode=0, stdout="", stderr="")
+        return Mock(returncode=1, stderr=b"Invalid data found when processing input")
+
+    with patch('subprocess.run', side_effect=fake_run) as mock_run:
+        assert transcoder._transcode_audio("/tmp/input.mp4", str(tmp_path / "audio.mka"), []) is False
+    assert mock_run.call_count == 1
+
+    def failing_run(cmd, **kwargs):
+        if "stream=index" in cmd:
+            return Mock(returncode=0, stdout="1\n", stderr="")
+        return Mock(returncode=1, stderr=b"Unknown encoder")
+
+    with patch('subprocess.run', side_effect=failing_run):
+        with pytest.raises(RuntimeError, match="Unknown encoder"):
+            transcoder._transcode_audio("/tmp/input.mp4", str(tmp_path / "audio.mka"), [])
+
+    with patch('subprocess.run', return_value=Mock(returncode=1, stdout="", stderr="No such file")):
+        with pytest.raises(RuntimeError, match="No such file"):
+            transcoder.has_audio("/tmp/input.mp4")
@@ -0,0 +1,89 @@
+# tests/test_viewers.py
+import pytest
+import threading
+from unittest.mock import Mock
+
+from jitsi_plus_plugin.utils.viewers import HyperLogLog, ViewerTracker
+
+@pytest.fixture
+def tracker():
+    """Create a tracker with a 30 s window."""
+    return ViewerTracker({"window": 30, "shards": 8})
+
+def test_hyperloglog_estimate():
+    """Test estimates at small and large cardinalities, and merging."""
+    small = HyperLogLog()
+    for i in range(100):
+        small.add(f"viewer-{i}")
+        small.add(f"viewer-{i}")
+    assert small.count() == 100
+
+    large = HyperLogLog()
+    other = HyperLogLog()
+    for i in range(50000):
+        large.add(f"viewer-{i}")
+        other.add(f"viewer-{i + 25000}")
+    assert abs(large.count() - 50000) / 50000 < 0.03
+
+    large.merge(other)
+    assert abs(large.count() - 75000) / 75000 < 0.03
+
+    with pytest.raises(ValueError):
+        large.merge(HyperLogLog(10))
+    with pytest.raises(ValueError):
+        HyperLogLog(3)
+
+def test_sliding_window_expiry(tracker):
+    """Test that viewers expire once their heartbeats stop."""
+    assert tracker.heartbeat("b1", "alice", now=0) is True
+    assert tracker.heartbeat("b1", "bob", now=0) is True
+    assert tracker.heartbeat("b1", "alice", now=20) is False
+    tracker.heartbeat("b2", "carol", now=20)
+
+    assert tracker.tick(now=25) == {
+        "b1": {"concurrent": 2, "unique": 2},
+        "b2": {"concurrent": 1, "unique": 1}
+    }
+
+    # Bob's last heartbeat is outside the window; he still counts as unique
+    assert tracker.tick(now=40)["b1"] == {"concurrent": 1, "unique": 2}
+    assert tracker.leave("b1", "alice") is True
+    assert tracker.leave("b1", "alice") is False
+    assert tracker.tick(now=40)["b1"] == {"concurrent": 0, "unique": 2}
+
+    tracker.remove_broadcast("b1")
+    assert tracker.get_counts("b1") is None
+    assert "b1" not in tracker.tick(now=40)
+
+def test_concurrent_heartbeats(tracker):
+    """Test heartbeats from many threads at once."""
+    def ping(offset):
+        for i in range(2000):
+            tracker.heartbeat("b1", f"viewer-{offset + i}", now=0)
+            tracker.heartbeat("b1", f"viewer-{offset + i}", now=1)
+
+    threads = [threading.Thread(target=ping, args=(n * 2000,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    counts = tracker.tick(now=1)["b1"]
+    assert counts["concurrent"] == 16000
+    assert abs(counts["unique"] - 16000) / 16000 < 0.03
+
+def test_tick_callback_and_thread():
+    """Test that the background tick hands counts to the callback."""
+    on_tick = Mock()
+    tracker = ViewerTracker({"tick_interval": 0.01}, on_tick=on_tick)
+    tracker.heartbeat("b1", "alice")
+
+    assert tracker.start() is True
+    assert tracker.start() is False
+    event = threading.Event()
+    on_tick.side_effect = lambda counts: event.set()
+    assert event.wait(2)
+    tracker.stop()
+
+    assert tracker.is_running is False
+    on_tick.assert_called_with({"b1": {"concurrent": 1, "unique": 1}})
@@ -0,0 +1,168 @@
+# tests/test_vod_catalog.py
+import pytest
+from unittest.mock import patch
+
+from jitsi_plus_plugin.core.vod_catalog import VodCatalog
+from jitsi_plus_plugin.core.media_server import MediaServer
+
+def make_entry(index, **overrides):
+    """Create a VOD entry with a predictable creation time."""
+    entry = {
+        "id": f"vod-{index:04d}",
+        "name": f"VOD {index}",
+        "source_stream": f"stream-{index % 3}",
+        "created_at": 1000.0 + index,
+        "file_path": f"/tmp/recordings/{index}.mp4",
+        "status": "ready" if index % 2 == 0 else "processing"
+    }
+    entry.update(overrides)
+    return entry
+
+@pytest.fixture
+def catalog(tmp_path):
+    """Create a VodCatalog in a temporary directory."""
+    catalog = VodCatalog(str(tmp_path / "catalog.db"))
+    yield catalog
+    catalog.close()
+
+def test_wal_mode(catalog):
+    """Test that the catalog runs in WAL mode."""
+    assert catalog._conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+def test_put_get_delete(catalog):
+    """Test storing, loading and deleting an entry."""
+    entry = make_entry(1, ad_config={"pre_roll": ["https://example.com/ad.mp4"]})
+    catalog.put(entry)
+
+    assert catalog.get("vod-0001") == entry
+    assert catalog.get("vod-missing") is None
+
+    assert catalog.delete("vod-0001") is True
+    assert catalog.get("vod-0001") is None
+    assert catalog.delete("vod-0001") is False
+
+def test_query_cursor_pagination(catalog):
+    """Test walking the catalog page by page with a cursor."""
+    catalog.put_many(make_entry(i) for i in range(10))
+
+    pages = []
+    cursor = None
+    while True:
+        page = catalog.query(limit=4, cursor=cursor)
+        if not page:
+            break
+        pages.append([entry["id"] for entry in page])
+        cursor = page[-1]["id"]
+
+    assert [len(page) for page in pages] == [4, 4, 2]
+    assert sum(pages, []) == [f"vod-{i:04d}" for i in range(10)]
+
+def test_query_descending(catalog):
+    """Test newest-first pagination."""
+    catalog.put_many(make_entry(i) for i in range(5))
+
+    first = catalog.query(limit=2, descending=True)
+    second = catalog.query(limit=2, cursor=first[-1]["id"], descending=True)
+
+    assert [entry["id"] for entry in first] == ["vod-0004", "vod-0003"]
+    assert [entry["id"] for entry in second] == ["vod-0002", "vod-0001"]
+
+def test_query_filters(catalog):
+    """Test filtering by indexed columns."""
+    catalog.put_many(make_entry(i) for i in range(12))
+
+    ready = catalog.query(status="ready")
+    assert len(ready) == 6
+    assert all(entry["status"] == "ready" for entry in ready)
+
+    from_stream = catalog.query(source_stream="stream-1")
+    assert [entry["id"] for entry in from_stream] == ["vod-0001", "vod-0004", "vod-0007", "vod-0010"]
+
+    in_range = catalog.query(created_after=1003.0, created_before=1006.0)
+    assert [entry["id"] for entry in in_range] == ["vod-0003", "vod-0004", "vod-0005"]
+
+    assert catalog.count(status="processing") == 6
+    assert catalog.query(name="VOD 7")[0]["id"] == "vod-0007"
+
+def test_query_uses_indexes(catalog):
+    """Test that filtered listings are served from an index."""
+    plan = catalog._conn.execute(
+        "EXPLAIN QUERY PLAN SELECT data FROM vod_entries WHERE status = ? "
+        "ORDER BY created_at, id LIMIT 10", ("ready",)
+    ).fetchall()
+    details = " ".join(row[-1] for row in plan)
+
+    assert "idx_vod_status" in details
+    assert "TEMP B-TREE" not in details
+
+def test_get_many(catalog):
+    """Test batched lookups beyond the bound-parameter batch size."""
+    catalog.put_many(make_entry(i) for i in range(1200))
+
+    found = catalog.get_many([f"vod-{i:04d}" for i in range(0, 1200, 2)] + ["vod-missing"])
+
+    assert len(found) == 600
+    assert found["vod-0010"]["name"] == "VOD 10"
+
+def test_media_server_persists_across_restart(tmp_path):
+    """Test that VOD entries survive a media server restart."""
+    config = {
+        "recording_directory": str(tmp_path),
+        "catalog_path": str(tmp_path / "catalog.db")
+    }
+    video = tmp_path / "video.mp4"
+    video.write_bytes(b"video")
+
+    server = MediaServer(config)
+    with patch('threading.Thread'):
+        vod_info = server.create_vod_entry("test_vod", str(video))
+    server.configure_ad_settings(vod_info["id"], {"pre_roll": ["https://example.com/ad.mp4"]})
+    server.shutdown()
+
+    restarted = MediaServer(config)
+    assert restarted.vod_entries == {}
+
+    loaded = restarted.get_vod_info(vod_info["id"])
+    assert loaded["name"] == "test_vod"
+    assert loaded["ad_config"]["pre_roll"] == ["https://example.com/ad.mp4"]
+    assert [entry["id"] for entry in restarted.list_vod_entries(status="processing")] == [vod_info["id"]]
+
+    assert restarted.delete_vod_entry(vod_info["id"]) is True
+    assert restarted.list_vod_entries() == []
+    restarted.shutdown()
+
+def test_media_server_in_memory_pagination():
+    """Test pagination and filters without a catalog."""
+    server = MediaServer({"recording_directory": "/tmp/recordings"})
+    for i in range(6):
+        entry = make_entry(i)
+        server.vod_entries[entry["id"]] = entry
+
+    page = server.list_vod_entries(limit=2, cursor="vod-0001")
+    assert [entry["id"] for entry in page] == ["vod-0002", "vod-0003"]
+
+    ready = server.list_vod_entries(status="ready", descending=True)
+    assert [entry["id"] for entry in ready] == ["vod-0004", "vod-0002", "vod-0000"]
+
+    # An unknown cursor ends the listing, as in the catalog
+    assert server.list_vod_entries(limit=2, cursor="vod-missing") == []
+
+def test_find_by_source_streams(catalog):
+    """Test batched lookups of the newest entry per source stream."""
+    catalog.put_many(make_entry(i) for i in range(9))
+
+    found = catalog.find_by_source_streams(["stream-0", "stream-2", "stream-missing"])
+
+    assert set(found) == {"stream-0", "stream-2"}
+    assert found["stream-0"]["id"] == "vod-0006"
+    assert found["stream-2"]["id"] == "vod-0008"
+
+def test_find_by_source_streams_skips_clips(catalog):
+    """Test that a newer clip of a stream does not replace its recording."""
+    catalog.put(make_entry(0))
+    catalog.put(make_entry(3, clip_of="vod-0000"))
+
+    found = catalog.find_by_source_streams(["stream-0"])
+
+    assert found["stream-0"]["id"] == "vod-0000"
+    assert catalog.query(limit=2, cursor="vod-missing") == []
@@ -0,0 +1,214 @@
+# tests/test_vod_origin.py
+import pytest
+import http.client
+import os
+
+from jitsi_plus_plugin.core.media_server import MediaServer
+from jitsi_plus_plugin.core.vod_origin import VodOriginServer, FileHandleCache, parse_range
+
+@pytest.fixture
+def media_server(tmp_path):
+    """Create a MediaServer with a VOD entry backed by a real file."""
+    server = MediaServer({"recording_directory": str(tmp_path)})
+    video = tmp_path / "video.mp4"
+    video.write_bytes(bytes(range(256)) * 40)  # 10240 bytes
+    server.vod_entries["vod-test"] = {
+        "id": "vod-test",
+        "name": "Test VOD",
+        "file_path": str(video),
+        "status": "ready"
+    }
+    (tmp_path / "vod-test_thumbnail.jpg").write_bytes(b"jpeg")
+    (tmp_path / "hls").mkdir()
+    (tmp_path / "hls" / "stream.m3u8").write_text("#EXTM3U\n")
+    return server
+
+@pytest.fixture
+def origin(media_server):
+    """Start an origin server on an ephemeral port."""
+    origin = VodOriginServer(media_server, {"host": "127.0.0.1", "port": 0, "fd_cache_size": 2})
+    assert origin.start() is True
+    yield origin
+    origin.stop()
+
+def request(origin, path, headers=None, method="GET", conn=None):
+    """Send a request and return the response and its body."""
+    conn = conn or http.client.HTTPConnection("127.0.0.1", origin.port, timeout=5)
+    conn.request(method, path, headers=headers or {})
+    response = conn.getresponse()
+    return response, response.read()
+
+def test_parse_range():
+    """Test parsing single byte ranges."""
+    assert parse_range("bytes=0-99", 1000) == (0, 99)
+    assert parse_range("bytes=900-", 1000) == (900, 999)
+    assert parse_range("bytes=-100", 1000) == (900, 999)
+    assert parse_range("bytes=500-5000", 1000) == (500, 999)
+    assert parse_range("bytes=1000-", 1000) is None
+    with pytest.raises(ValueError):
+        parse_range("bytes=0-1,5-10", 1000)
+
+def test_full_get(origin, media_server):
+    """Test serving a whole VOD file."""
+    response, body = request(origin, "/vod/vod-test.mp4")
+
+    assert response.status == 200
+    assert response.getheader("Content-Type") == "video/mp4"
+    assert response.getheader("Accept-Ranges") == "bytes"
+    assert body == open(media_server.vod_entries["vod-test"]["file_path"], "rb").read()
+
+def test_range_requests(origin):
+    """Test partial content responses."""
+    response, body = request(origin, "/vod/vod-test.mp4", {"Range": "bytes=256-511"})
+    assert response.status == 206
+    assert response.getheader("Content-Range") == "bytes 256-511/10240"
+    assert body == bytes(range(256))
+
+    response, body = request(origin, "/vod/vod-test.mp4", {"Range": "bytes=-10"})
+    assert response.status == 206
+    assert body == bytes(range(246, 256))
+
+    response, body = request(origin, "/vod/vod-test.mp4", {"Range": "bytes=20000-"})
+    assert response.status == 416
+    assert response.getheader("Content-Range") == "bytes */10240"
+
+def test_etag_not_modified(origin):
+    """Test conditional requests with If-None-Match."""
+    response, _ = request(origin, "/vod/vod-test.mp4", method="HEAD")
+    etag = response.getheader("ETag")
+    assert etag
+
+    response, body = request(origin, "/vod/vod-test.mp4", {"If-None-Match": etag})
+    assert response.status == 304
+    assert body == b""
+
+    # A stale If-Range falls back to the full file
+    response, body = request(origin, "/vod/vod-test.mp4", {"Range": "bytes=0-9", "If-Range": '"stale"'})
+    assert response.status == 200
+    assert len(body) == 10240
+
+def test_thumbnails_hls_and_not_found(origin):
+    """Test the thumbnail and HLS routes and unknown paths."""
+    response, body = request(origin, "/thumbnails/vod-test_thumbnail.jpg")
+    assert response.status == 200
+    assert body == b"jpeg"
+
+    response, body = request(origin, "/hls/stream.m3u8")
+    assert response.status == 200
+    assert response.getheader("Content-Type") == "application/vnd.apple.mpegurl"
+    assert response.getheader("Cache-Control") == "no-cache"
+
+    for path in ["/vod/missing.mp4", "/thumbnails/../video.mp4", "/hls/../../etc/passwd", "/other"]:
+        response, _ = request(origin, path)
+        assert response.status == 404
+
+    response, _ = request(origin, "/vod/vod-test.mp4", method="POST")
+    assert response.status == 405
+
+def test_thumbnails_only_serve_derived_files(origin, tmp_path):
+    """Test that the thumbnail route does not expose other files in the recording directory."""
+    (tmp_path / "vod-test_sprite_001.jpg").write_bytes(b"sprite")
+    (tmp_path / "vod-test_trickplay.vtt").write_text("WEBVTT\n")
+    (tmp_path / "vod_catalog.db").write_bytes(b"sqlite")
+    (tmp_path / "video.kfi").write_bytes(b"index")
+    (tmp_path / "other_thumbnail.jpg").write_bytes(b"jpeg")
+    (tmp_path / "live_segments").mkdir()
+    (tmp_path / "live_segments" / "seg_00001.ts").write_bytes(b"ts")
+
+    for path in ["/thumbnails/vod-test_sprite_001.jpg", "/thumbnails/vod-test_trickplay.vtt"]:
+        response, _ = request(origin, path)
+        assert response.status == 200
+
+    for path in ["/thumbnails/video.mp4", "/thumbnails/vod_catalog.db", "/thumbnails/video.kfi",
+                 "/thumbnails/other_thumbnail.jpg", "/thumbnails/live_segments/seg_00001.ts",
+                 "/thumbnails/vod-test_thumbnail.jpg/../video.mp4"]:
+        response, _ = request(origin, path)
+        assert response.status == 404, path
+
+def test_http10_closes_by_default(origin):
+    """Test that HTTP/1.0 requests are not kept alive unless asked."""
+    import socket
+
+    for headers, expected in [(b"", b"Connection: close"), (b"Connection: keep-alive\r\n", b"Connection: keep-alive")]:
+        with socket.create_connection(("127.0.0.1", origin.port), timeout=5) as sock:
+            sock.sendall(b"HEAD /vod/vod-test.mp4 HTTP/1.0\r\n" + headers + b"\r\n")
+            response = sock.recv(4096)
+        assert response.startswith(b"HTTP/1.1 200")
+        assert expected in response
+
+def test_keep_alive_reuses_fd_cache(origin):
+    """Test several requests on one connection sharing a cached file handle."""
+    conn = http.client.HTTPConnection("127.0.0.1", origin.port, timeout=5)
+    for offset in range(0, 4096, 1024):
+        response, body = request(origin, "/vod/vod-test.mp4",
+                                 {"Range": f"bytes={offset}-{offset + 1023}"}, conn=conn)
+        assert response.status == 206
+        assert len(body) == 1024
+    conn.close()
+
+    assert origin.file_cache.misses == 1
+    assert origin.file_cache.hits == 3
+
+def test_file_handle_cache_eviction(tmp_path):
+    """Test LRU eviction and deferred close of in-use handles."""
+    cache = FileHandleCache(max_size=1)
+    paths = []
+    for name in ["a", "b"]:
+        path = tmp_path / name
+        path.write_bytes(name.encode())
+        paths.append(str(path))
+
+    first = cache.acquire(paths[0], os.stat(paths[0]))
+    second = cache.acquire(paths[1], os.stat(paths[1]))
+
+    # The first file is evicted but still in use, so it stays open
+    assert list(cache.entries) == [paths[1]]
+    assert not first.closed
+
+    cache.release(paths[0], first)
+    assert first.closed
+
+    cache.release(paths[1], second)
+    cache.close()
+    assert second.closed
+
+def test_media_server_start_origin(media_server):
+    """Test starting and stopping the origin through the media server."""
+    assert media_server.start_origin("127.0.0.1", 0) is True
+
+    response, _ = request(media_server.origin, "/vod/vod-test.mp4", method="HEAD")
+    assert response.status == 200
+
+    media_server.shutdown()
+    assert media_server.origin.is_running is False
+
+def test_playlist_manifest_route(origin, media_server):
+    """Test serving generated playlist manifests."""
+    media_server.playlist_manifest_provider = lambda playlist_id: "#EXTM3U\n" if playlist_id == "show" else None
+
+    response, body = request(origin, "/playlists/show.m3u8")
+    assert response.status == 200
+    assert response.getheader("Content-Type") == "application/vnd.apple.mpegurl"
+    assert response.getheader("Cache-Control") == "no-cache"
+    assert body == b"#EXTM3U\n"
+
+    response, _ = request(origin, "/playlists/show.m3u8", {"If-None-Match": response.getheader("ETag")})
+    assert response.status == 304
+
+    response, _ = request(origin, "/playlists/other.m3u8")
+    assert response.status == 404
+
+def test_hls_directory_follows_media_server(tmp_path):
+    """Test that segments are served from the media server's HLS directory by default."""
+    hls_directory = tmp_path / "segments"
+    (hls_directory / "vod" / "vod-test").mkdir(parents=True)
+    (hls_directory / "vod" / "vod-test" / "00000.ts").write_bytes(b"ts")
+    server = MediaServer({"recording_directory": str(tmp_path / "recordings"), "hls_directory": str(hls_directory)})
+    origin = VodOriginServer(server, {"host": "127.0.0.1", "port": 0})
+    assert origin.start() is True
+    try:
+        response, body = request(origin, "/hls/vod/vod-test/00000.ts")
+        assert response.status == 200
+        assert body == b"ts"
+    finally:
+        origin.stop()
@@ -0,0 +1,282 @@
+# tests/test_vod_playlists.py
+import pytest
+from unittest.mock import Mock, patch
+
+from jitsi_plus_plugin.core.media_server import MediaServer
+from jitsi_plus_plugin.features.vod import VideoOnDemand
+
+@pytest.fixture
+def media_server(tmp_path):
+    """Create a MediaServer with two processed VOD entries and three ads."""
+    server = MediaServer({"recording_directory": str(tmp_path), "hls_segment_duration": 4})
+    for vod_id, segments in (("vod-a", [[0.0, 4.0], [4.0, 8.0]]), ("vod-b", [[0.0, 4.0], [4.0, 6.0]]),
+                             ("ad-pre", [[0.0, 5.0]]), ("ad-mid", [[0.0, 4.0], [4.0, 15.0]]),
+                             ("ad-post", [[0.0, 10.0]])):
+        server.vod_entries[vod_id] = {
+            "id": vod_id,
+            "name": vod_id,
+            "file_path": str(tmp_path / f"{vod_id}.mp4"),
+            "url": f"https://media.example.com/vod/{vod_id}.mp4",
+            "duration": segments[-1][1],
+            "hls_segments": segments,
+            "status": "ready"
+        }
+    return server
+
+@pytest.fixture
+def vod(media_server):
+    """Create a VOD controller."""
+    return VideoOnDemand(media_server)
+
+def segment_urls(manifest):
+    """Get the segment URLs of a manifest."""
+    return [line for line in manifest.splitlines() if line and not line.startswith("#")]
+
+def test_manifest_with_ad_breaks(vod):
+    """Test stitching pre-, mid- and post-rolls between discontinuities."""
+    playlist = vod.create_playlist("Show", ["vod-a", "vod-b"])
+    vod.configure_playlist_ad_settings(playlist["id"], {
+        "pre_roll": ["ad-pre", "https://ads.example.com/raw.mp4"],
+        "mid_roll": [{"time": 8, "vod_id": "ad-mid"}],
+        "post_roll": [{"vod_id": "ad-post"}]
+    })
+
+    manifest = vod.get_playlist_manifest(playlist["id"])
+    lines = manifest.splitlines()
+
+    assert lines[0] == "#EXTM3U"
+    assert "#EXT-X-TARGETDURATION:11" in lines
+    assert lines[-1] == "#EXT-X-ENDLIST"
+    # Ads play from their own segments; bare URLs are not stitched in
+    assert segment_urls(manifest) == [
+        "https://media.example.com/hls/vod/ad-pre/00000.ts",
+        "https://media.example.com/hls/vod/vod-a/00000.ts",
+        "https://media.example.com/hls/vod/vod-a/00001.ts",
+        "https://media.example.com/hls/vod/ad-mid/00000.ts",
+        "https://media.example.com/hls/vod/ad-mid/00001.ts",
+        "https://media.example.com/hls/vod/vod-b/00000.ts",
+        "https://media.example.com/hls/vod/vod-b/00001.ts",
+        "https://media.example.com/hls/vod/ad-post/00000.ts",
+    ]
+    # pre|a, a|mid, mid|b, b|post
+    assert lines.count("#EXT-X-DISCONTINUITY") == 4
+    assert lines[lines.index("https://media.example.com/hls/vod/ad-mid/00001.ts") - 1] == "#EXTINF:11.000,"
+
+def test_discontinuity_between_vods(vod):
+    """Test that consecutive VODs are separated by a discontinuity."""
+    playlist = vod.create_playlist("Show", ["vod-a", "vod-b"])
+
+    lines = vod.get_playlist_manifest(playlist["id"]).splitlines()
+
+    assert lines.count("#EXT-X-DISCONTINUITY") == 1
+    assert lines.index("#EXT-X-DISCONTINUITY") == lines.index("https://media.example.com/hls/vod/vod-b/00000.ts") - 2
+
+def test_segment_vod(media_server, tmp_path):
+    """Test that VODs are cut with stream copy and keep the muxer's actual cut points."""
+    commands = []
+
+    def fake_ffmpeg(cmd, **kwargs):
+        commands.append(cmd)
+        with open(cmd[cmd.index("-segment_list") + 1], "w") as f:
+            f.write("00000.ts,0.000000,5.005000\n00001.ts,5.005000,7.500000\n")
+        return Mock(returncode=0, stderr="")
+
+    with patch('subprocess.run', side_effect=fake_ffmpeg):
+        segments = media_server._segment_vod("vod-a", str(tmp_path / "vod-a.mp4"))
+
+    assert segments == [[0.0, 5.005], [5.005, 7.5]]
+    assert commands[0][commands[0].index("-c") + 1] == "copy"
+    assert commands[0][-1] == str(tmp_path / "hls" / "vod" / "vod-a" / "%05d.ts")
+
+    # Segments are served from the HLS directory and removed with the entry
+    assert (tmp_path / "hls" / "vod" / "vod-a").is_dir()
+    media_server.delete_vod_entry("vod-a")
+    assert not (tmp_path / "hls" / "vod" / "vod-a").exists()
+
+    with patch('subprocess.run', return_value=Mock(returncode=1, stderr="boom")):
+        assert media_server._segment_vod("vod-b", str(tmp_path / "vod-b.mp4")) is None
+    assert not (tmp_path / "hls" / "vod" / "vod-b").exists()
+
+def test_manifest_cache_invalidation(vod):
+    """Test that manifests are cached until the playlist changes."""
+    playlist = vod.create_playlist("Show", ["vod-a"])
+    first = vod.get_playlist_manifest(playlist["id"])
+
+    with patch.object(vod, '_build_playlist_manifest') as mock_build:
+        assert vod.get_playlist_manifest(playlist["id"]) is first
+        # Changes that leave the playlist as it was keep the cache
+        vod.add_to_playlist(playlist["id"], "vod-a")
+        vod.remove_from_playlist(playlist["id"], "vod-b")
+        vod.get_playlist_manifest(playlist["id"])
+        mock_build.assert_not_called()
+
+    vod.add_to_playlist(playlist["id"], "vod-b")
+    assert "vod-b" in vod.get_playlist_manifest(playlist["id"])
+
+    vod.configure_playlist_ad_settings(playlist["id"], {"pre_roll": ["ad-pre"]})
+    assert "ad-pre" in vod.get_playlist_manifest(playlist["id"])
+
+    vod.remove_from_playlist(playlist["id"], "vod-b")
+    assert "vod-b" not in vod.get_playlist_manifest(playlist["id"])
+
+    vod.delete_playlist(playlist["id"])
+    assert vod.get_playlist_manifest(playlist["id"]) is None
+
+def test_processing_vod_not_cached(vod, media_server):
+    """Test that a manifest missing a processing VOD is rebuilt once it is ready."""
+    segments = media_server.vod_entries["vod-b"].pop("hls_segments")
+    media_server.vod_entries["vod-b"]["status"] = "processing"
+    playlist = vod.create_playlist("Show", ["vod-a", "vod-b"])
+
+    assert "vod-b" not in vod.get_playlist_manifest(playlist["id"])
+    assert playlist["id"] not in vod.manifest_cache
+
+    media_server.vod_entries["vod-b"].update(hls_segments=segments, status="ready")
+    assert "vod-b" in vod.get_playlist_manifest(playlist["id"])
+    assert playlist["id"] in vod.manifest_cache
+
+def test_vod_changes_invalidate_manifests(vod, media_server):
+    """Test that reprocessing or deleting a VOD, or one of its ads, drops the manifests that use it."""
+    playlist = vod.create_playlist("Show", ["vod-a"])
+    other = vod.create_playlist("Other", ["vod-b"])
+    vod.configure_playlist_ad_settings(playlist["id"], {"post_roll": ["ad-post"]})
+    vod.get_playlist_manifest(playlist["id"])
+    vod.get_playlist_manifest(other["id"])
+
+    media_server.vod_entries["vod-a"]["hls_segments"] = [[0.0, 8.0]]
+    media_server._save_vod_entry("vod-a")
+    assert playlist["id"] not in vod.manifest_cache
+    assert other["id"] in vod.manifest_cache
+    assert "#EXTINF:8.000," in vod.get_playlist_manifest(playlist["id"])
+
+    # Deletions made directly on the media server, as storage eviction does
+    media_server.delete_vod_entry("ad-post")
+    assert "ad-post" not in vod.get_playlist_manifest(playlist["id"])
+
+def test_dropped_manifests_leave_no_index_entries(vod, media_server):
+    """Test that deleting playlists and VODs prunes the manifest cache and its reverse index."""
+    playlist = vod.create_playlist("Show", ["vod-a", "vod-b"])
+    other = vod.create_playlist("Other", ["vod-b"])
+    vod.get_playlist_manifest(playlist["id"])
+    vod.get_playlist_manifest(other["id"])
+    assert vod.manifest_dependents == {"vod-a": {playlist["id"]}, "vod-b": {playlist["id"], other["id"]}}
+
+    vod.delete_playlist(playlist["id"])
+    assert vod.manifest_dependents == {"vod-b": {other["id"]}}
+
+    media_server.delete_vod_entry("vod-b")
+    assert vod.manifest_cache == {}
+    assert vod.manifest_dependents == {}
+    assert vod.manifest_vods == {}
+
+def test_manifest_built_during_change_not_cached(vod, media_server):
+    """Test that a manifest built while one of its VODs changes is not cached."""
+    playlist = vod.create_playlist("Show", ["vod-a"])
+    build = vod._build_playlist_manifest
+
+    def build_during_change(playlist_info):
+        result = build(playlist_info)
+        media_server._save_vod_entry("vod-a")
+        return result
+
+    with patch.object(vod, '_build_playlist_manifest', side_effect=build_during_change):
+        vod.get_playlist_manifest(playlist["id"])
+
+    assert playlist["id"] not in vod.manifest_cache
+
+def test_player_config_has_hls_url(vod):
+    """Test that playlist player configs point at the stitched manifest."""
+    playlist = vod.create_playlist("Show", ["vod-a"])
+
+    config = vod.create_player_config(playlist_id=playlist["id"])
+
+    assert config["hls_url"] == f"https://media.example.com/playlists/{playlist['id']}.m3u8"
+
+    # Without VOD segments there is nothing for the manifest to point at
+    vod.media_server.vod_hls_enabled = False
+    assert "hls_url" not in vod.create_player_config(playlist_id=playlist["id"])
+
+def test_playlist_stores_references(vod, media_server):
+    """Test that playlists hold VOD IDs and show the current entries."""
+    playlist = vod.create_playlist("Show", ["vod-a", "vod-missing", "vod-a"])
+
+    assert vod.vod_playlists[playlist["id"]]["vod_ids"] == ["vod-a"]
+    assert "vod_entries" not in vod.vod_playlists[playlist["id"]]
+
+    media_server.vod_entries["vod-a"]["status"] = "reprocessed"
+    assert vod.get_playlist_info(playlist["id"])["vod_entries"][0]["status"] == "reprocessed"
+
+    assert vod.add_to_playlist(playlist["id"], "vod-missing") is False
+    assert vod.add_to_playlist(playlist["id"], "vod-b") is True
+    media_server.delete_vod_entry("vod-b")
+    assert [entry["id"] for entry in vod.get_playlist_info(playlist["id"])["vod_entries"]] == ["vod-a"]
+
+def test_move_and_reorder(vod, media_server):
+    """Test moving single entries and replacing the whole order."""
+    for index in range(5):
+        media_server.vod_entries[f"vod-{index}"] = {"id": f"vod-{index}", "url": "", "duration": 4.0}
+    playlist = vod.create_playlist("Show", [f"vod-{index}" for index in range(5)])
+    playlist_id = playlist["id"]
+    vod.get_playlist_manifest(playlist_id)
+
+    assert vod.move_in_playlist(playlist_id, "vod-4", 0) is True
+    assert vod.move_in_playlist(playlist_id, "vod-0", -1) is True
+    assert vod.vod_playlists[playlist_id]["vod_ids"] == ["vod-4", "vod-1", "vod-2", "vod-3", "vod-0"]
+    assert playlist_id not in vod.manifest_cache
+    assert vod.move_in_playlist(playlist_id, "vod-a", 0) is False
+
+    assert vod.reorder_playlist(playlist_id, ["vod-0", "vod-1", "vod-2", "vod-3"]) is False
+    assert vod.reorder_playlist(playlist_id, ["vod-0", "vod-1", "vod-2", "vod-3", "vod-3"]) is False
+    assert vod.reorder_playlist(playlist_id, ["vod-3", "vod-2", "vod-1", "vod-0", "vod-4"]) is True
+    assert [entry["id"] for entry in vod.get_playlist_info(playlist_id)["vod_entries"]] == \
+        ["vod-3", "vod-2", "vod-1", "vod-0", "vod-4"]
+
+def test_entries_resolved_from_catalog_in_one_batch(tmp_path):
+    """Test that entries not in memory are loaded with a single catalog lookup."""
+    server = MediaServer({"recording_directory": str(tmp_path), "catalog_path": str(tmp_path / "catalog.db")})
+    try:
+        server.catalog.put_many([{"id": f"vod-{index}", "name": str(index)} for index in range(3)])
+        vod = VideoOnDemand(server)
+        playlist = vod.create_playlist("Show", ["vod-0", "vod-1", "vod-2"])
+        server.vod_entries.clear()
+
+        with patch.object(server.catalog, 'get_many', wraps=server.catalog.get_many) as mock_get_many, \
+             patch.object(server.catalog, 'get') as mock_get:
+            playlist_info = vod.get_playlist_info(playlist["id"])
+
+        assert [entry["id"] for entry in playlist_info["vod_entries"]] == ["vod-0", "vod-1", "vod-2"]
+        mock_get_many.assert_called_once()
+        mock_get.assert_not_called()
+    finally:
+        server.catalog.close()
+
+def test_stopped_stream_recording_in_playlist(tmp_path):
+    """Test that a stopped stream's recording is segmented and can be played in a playlist."""
+    server = MediaServer({"recording_directory": str(tmp_path), "server_url": "https://media.example.com"})
+    recording = tmp_path / "stream-1.mp4"
+    recording.write_bytes(b"recording")
+    server.active_streams["stream-1"] = {"name": "Test Stream", "recording_path": str(recording),
+                                         "status": "active"}
+    server.recording_processes["stream-1"] = Mock()
+
+    def fake_run(cmd, **kwargs):
+        if "-segment_list" in cmd:
+            with open(cmd[cmd.index("-segment_list") + 1], "w") as f:
+                f.write("00000.ts,0.000000,6.000000\n00001.ts,6.000000,10.000000\n")
+        return Mock(returncode=0, stdout="10.0", stderr="")
+
+    with patch('subprocess.run', side_effect=fake_run):
+        assert server.stop_stream("stream-1") is True
+        server.shutdown()
+
+    vod_info = server.get_vod_for_stream("stream-1")
+    assert vod_info["status"] == "ready"
+    assert vod_info["hls_segments"] == [[0.0, 6.0], [6.0, 10.0]]
+    assert vod_info["trickplay"] is not None
+
+    vod = VideoOnDemand(server)
+    playlist = vod.create_playlist("Show", [vod_info["id"]])
+    assert segment_urls(vod.get_playlist_manifest(playlist["id"])) == [
+        "https://media.example.com/hls/vod/vod-stream-1/00000.ts",
+        "https://media.example.com/hls/vod/vod-stream-1/00001.ts",
+    ]